@@ -1,62 +1,69 @@
 # PLANEJAMENTO_DE_OBRA.py (Versão Final Consolidada e Revisada)
+"""Interface Streamlit do Gestor de Obras. Toda a lógica de dados e cálculos fica no pacote gestor_obras."""
 import streamlit as st
 import json
 import os
-from datetime import datetime, date, timedelta
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import functools
+import threading
+import time
 import uuid
-import io
-import zipfile
-import re
-
-# --- CONFIGURAÇÃO DA PÁGINA ---
-st.set_page_config(
-    page_title="Gestor de Obras Pro+",
-    page_icon="🏗️",
-    layout="wide",
-    initial_sidebar_state="expanded"
+from datetime import datetime, date, timedelta
+from gestor_obras.constants import (
+    API_PORT, CONFIG_FILE, DEFAULT_WEEKMASK, DUE_CATEGORY_ORDER, DUE_SOON_LABEL,
+    FLOWCHART_COLLAPSE_TASKS, FLOWCHART_LAYOUTS, GANTT_AUTO_ORDER, ORG_COLLAPSE_TEAM_SIZE,
+    PEOPLE_FILE, PROFILE_HISTORY_RERUNS, REPORTS_URL,
+)
+from gestor_obras.instrumentation import (
+    begin_profiled_rerun, end_profiled_rerun, get_metrics, profile_lap, profile_percentiles,
+    profile_span, start_metrics_exporter,
+)
+from gestor_obras.storage import ProgressHistoryStore, create_backup_zip
+from gestor_obras.domain import (
+    SiteCalendar, build_scheduler, build_site_state, compute_data_version, load_site,
+)
+from gestor_obras.analytics import (
+    build_capacity_plan, build_dashboard_cube, capacity_overload_frame, capacity_plan_frame,
+    compute_report_metrics, cube_kpis, cube_mask, filter_report_tasks, filter_tasks_by_window, forecast_completion,
+    planned_progress_curve, prepare_gantt_rows, rollup_forecast, sector_team_matrix,
+    team_workload_matrix,
 )
+from gestor_obras.rendering import (
+    build_gantt_figure, create_printable_diagram_html, generate_flowchart_mermaid_syntax,
+    generate_org_chart_mermaid_syntax, iter_report_html, prune_old_reports_at_startup, write_report_file,
+)
+from gestor_obras.lazy import lazy_import
+from gestor_obras import operations
 
-# --- CAMINHOS E CONSTANTES ---
-TASKS_FILE = "datatasks.json"
-ACTIVITIES_FILE = "data_activities.json"
-CONFIG_FILE = "dataconfig.json"
-PEOPLE_FILE = "data_people.json"
-BACKUP_DIR = "backup_tasks"
-
-# --- CLASSES PARA GERENCIAMENTO DE DADOS ---
-class DataManager:
-    """Classe centralizada para carregar e salvar dados em arquivos JSON."""
-    @staticmethod
-    def load(file_path, default=None):
-        """Carrega dados de um arquivo JSON. Retorna um valor padrão se o arquivo não existir ou estiver corrompido."""
-        default_value = default if default is not None else {}
-        try:
-            if os.path.exists(file_path):
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return default_value
-        return default_value
-
-    @staticmethod
-    def save(file_path, data):
-        """Salva dados em um arquivo JSON."""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-    @staticmethod
-    def backup_tasks():
-        """Cria um backup do arquivo de tarefas com timestamp."""
-        os.makedirs(BACKUP_DIR, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
-        tasks = st.session_state.get('tasks', [])
-        if tasks:
-            backup_file_path = os.path.join(BACKUP_DIR, f"backup_tasks_{timestamp}.json")
-            DataManager.save(backup_file_path, tasks)
-            st.toast("Backup das tarefas criado com sucesso!", icon="💾")
+# Carregados só quando uma tela precisa deles: a tela de login não importa a pilha de análise e gráficos
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+# --- CACHE DOS CÁLCULOS (COM CONTAGEM DE ACERTOS) ---
+_metrics_local = threading.local()
+
+def metered_cache(**cache_kwargs):
+    """Equivale a @st.cache_data(...), contando acertos e faltas do cache nas métricas.
+
+    A função original só roda quando o cache falha; é isso que marca a consulta como "miss".
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _metrics_local.cache_miss = True
+            return func(*args, **kwargs)
+        cached = st.cache_data(**cache_kwargs)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _metrics_local.cache_miss = False
+            result = cached(*args, **kwargs)
+            get_metrics().inc("gestor_obras_cache_requests_total", cache=func.__name__,
+                              result="miss" if _metrics_local.cache_miss else "hit")
+            return result
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
 
 
 # --- FUNÇÃO DE AUTENTICAÇÃO ---
@@ -92,1254 +99,1179 @@ def check_authentication():
 
     return True
 
-
-# --- FUNÇÕES DE GERAÇÃO DE DIAGRAMAS (MERMAID) ---
-
-def generate_org_chart_mermaid_syntax(employees, tasks):
-    """Gera a sintaxe Mermaid para o organograma, enriquecida com dados de performance."""
-    if not employees:
-        return "graph LR\n    A[Nenhum funcionário cadastrado]"
-
-    # Agrupa funcionários e calcula performance por equipe
-    teams = {}
-    for emp in employees:
-        team_name = emp.get('team', 'Sem Equipe')
-        if team_name not in teams:
-            teams[team_name] = {'members': [], 'total_progress': 0, 'task_count': 0, 'overdue_count': 0}
-        teams[team_name]['members'].append(emp)
-
-    today = datetime.now().date()
-    for task in tasks:
-        team_name = task.get('team')
-        if team_name in teams:
-            teams[team_name]['task_count'] += 1
-            teams[team_name]['total_progress'] += task.get('progress', 0)
-            due_date = task.get('due_date')
-            if due_date and datetime.strptime(due_date, "%Y-%m-%d").date() < today and task.get('status') != 'Concluída':
-                teams[team_name]['overdue_count'] += 1
-
-    def safe_id(text, prefix=''):
-        return prefix + re.sub(r'[^a-zA-Z0-9]', '', text)
-
-    mermaid_string = "graph TD\n"
-    mermaid_string += '    ENG_CIVIL["Engenheiro Civil"]\n'
-    mermaid_string += '    ENC_CIVIL["Encarregado Civil"]\n'
-    mermaid_string += '    TEC_SEG["Técnico de Seg. do Trabalho"]\n'
-    mermaid_string += '    ENG_CIVIL --> ENC_CIVIL\n'
-    mermaid_string += '    ENC_CIVIL --> TEC_SEG\n\n'
-    style_definitions = ""
-
-    for team_name, data in teams.items():
-        team_id = safe_id(team_name, 'T')
-        avg_progress = (data['total_progress'] / data['task_count']) if data['task_count'] > 0 else 0
-        
-        # Define a cor da equipe com base na performance
-        color = "#b3b3b3" # Cinza (padrão, sem tarefas)
-        if data['task_count'] > 0:
-            if data['overdue_count'] > 0:
-                color = "#ffcdd2" # Vermelho claro para atraso
-            elif avg_progress > 70:
-                color = "#c8e6c9" # Verde claro
-            elif avg_progress > 30:
-                color = "#fff9c4" # Amarelo claro
-            else:
-                color = "#ffecb3" # Laranja claro
-
-        team_label = f'"{team_name}<br><b>{avg_progress:.1f}% Concluído</b><br><i>{data["task_count"]} tarefas</i>"'
-        mermaid_string += f'    ENC_CIVIL --> {team_id}({team_label})\n'
-        style_definitions += f"    style {team_id} fill:{color},stroke:#333,stroke-width:2px\n"
-
-        for member in data['members']:
-            member_id = safe_id(member['id'], 'P')
-            member_name = member.get('name', 'Sem Nome')
-            member_role = member.get('role', 'Sem Função')
-            mermaid_string += f'    {team_id} --> {member_id}["{member_name}<br><i>({member_role})</i>"]\n'
-    
-    style_definitions += "    style ENG_CIVIL fill:#d1e7dd,stroke:#0f5132,stroke-width:2px\n"
-    style_definitions += "    style ENC_CIVIL fill:#e9ecef,stroke:#343a40,stroke-width:2px\n"
-    style_definitions += "    style TEC_SEG fill:#e9ecef,stroke:#343a40,stroke-width:2px\n"
-    mermaid_string += "\n" + style_definitions
-    return mermaid_string
-
-def generate_flowchart_mermaid_syntax(tasks):
-    """Gera a sintaxe Mermaid para o fluxograma de tarefas, com status e prazos."""
-    if not tasks:
-        return "flowchart TD\n    A[Nenhuma tarefa cadastrada]"
-
-    sorted_tasks = sorted(tasks, key=lambda x: x.get('created_at', ''))
-    mermaid_string = "flowchart TD\n"
-    style_definitions = ""
-    
-    def safe_id(text, prefix=''):
-        return prefix + re.sub(r'[^a-zA-Z0-9]', '', text)
-
-    mermaid_string += '    Start([Início da Obra])\n'
-    style_definitions += "    style Start fill:#d4edda,stroke:#155724,stroke-width:2px\n"
-    
-    last_node_id = "Start"
-    today = datetime.now().date()
-
-    for task in sorted_tasks:
-        task_id = safe_id(task['id'], 'TASK')
-        task_name = task.get('name', 'Tarefa sem nome').replace('"', '')
-        team_name = task.get('team', 'Sem equipe').replace('"', '')
-        status = task.get('status', 'Planejada')
-        progress = task.get('progress', 0)
-        due_date_str = task.get('due_date')
-        
-        # Informações de prazo
-        prazo_info = ""
-        color = "#e9ecef" # Cinza (Planejada)
-        
-        if status == 'Concluída':
-            color = "#c8e6c9" # Verde
-            prazo_info = "Concluída"
-        elif status == 'Em Andamento':
-            color = "#fff9c4" # Amarelo
-            if due_date_str:
-                due_date = datetime.strptime(due_date_str, "%Y-%m-%d").date()
-                if due_date < today:
-                    color = "#ffcdd2" # Vermelho (Atrasada)
-                    prazo_info = f"Atrasada! (Venceu em {due_date.strftime('%d/%m')})"
-                else:
-                    prazo_info = f"Vence em {due_date.strftime('%d/%m')}"
-        
-        task_label = f'"{task_name}<br><b>{progress}%</b> - <i>{team_name}</i><br><small>{prazo_info}</small>"'
-        
-        mermaid_string += f'    {task_id}({task_label})\n'
-        mermaid_string += f"    {last_node_id} --> {task_id}\n"
-        style_definitions += f"    style {task_id} fill:{color},stroke:#333,stroke-width:2px\n"
-        last_node_id = task_id
-
-    mermaid_string += '    End([Conclusão da Obra])\n'
-    style_definitions += "    style End fill:#d4edda,stroke:#155724,stroke-width:2px\n"
-    mermaid_string += f"    {last_node_id} --> End\n"
-    
-    mermaid_string += "\n" + style_definitions
-    return mermaid_string
-
-def create_printable_diagram_html(title, mermaid_syntax, orientation='landscape'):
-    """Cria um arquivo HTML completo com um diagrama Mermaid, otimizado para impressão."""
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="pt-BR">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{title}</title>
-        <script src="https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"></script>
-        <script>
-            mermaid.initialize({{
-                startOnLoad: true,
-                theme: 'default',
-                flowchart: {{ useMaxWidth: false, htmlLabels: true }},
-                graph: {{ useMaxWidth: false, htmlLabels: true }}
-            }});
-        </script>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                justify-content: center;
-                min-height: 100vh;
-                margin: 0;
-            }}
-            h1 {{
-                text-align: center;
-                margin-top: 20px;
-                margin-bottom: 10px;
-            }}
-            .mermaid {{
-                display: block;
-                width: 100%;
-                text-align: center;
-            }}
-            /* Estilos para Impressão */
-            @media print {{
-                @page {{
-                    size: A4 {orientation};
-                    margin: 1cm;
-                }}
-                body {{
-                    -webkit-print-color-adjust: exact;
-                    print-color-adjust: exact;
-                    justify-content: flex-start;
-                }}
-                h1 {{
-                    font-size: 16pt;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <h1>{title}</h1>
-        <div class="mermaid">
-{mermaid_syntax}
-        </div>
-    </body>
-    </html>
-    """
-    return html_content
-
-
-# --- FUNÇÕES DE LÓGICA DE NEGÓCIO E UI ---
-
-def create_backup_zip():
-    """Cria um arquivo ZIP em memória contendo todos os arquivos de dados."""
-    data_files = [TASKS_FILE, ACTIVITIES_FILE, CONFIG_FILE, PEOPLE_FILE]
-    
-    # Garante que todos os dados em memória (session_state) sejam salvos antes do backup
-    if 'tasks' in st.session_state: DataManager.save(TASKS_FILE, st.session_state.tasks)
-    if 'activities' in st.session_state: DataManager.save(ACTIVITIES_FILE, st.session_state.activities)
-    if 'config' in st.session_state: DataManager.save(CONFIG_FILE, st.session_state.config)
-    if 'people' in st.session_state: DataManager.save(PEOPLE_FILE, st.session_state.people)
-
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_f:
-        for file_path in data_files:
-            if os.path.exists(file_path):
-                zip_f.write(file_path, arcname=os.path.basename(file_path))
-    
-    zip_buffer.seek(0)
-    return zip_buffer.getvalue()
-
-def get_due_category(due_date, today=pd.to_datetime(date.today())):
-    """Classifica uma tarefa pendente com base na sua data de vencimento."""
-    if pd.isna(due_date):
-        return "Sem Prazo"
-    delta = (due_date - today).days
-    if delta < 0:
-        return "Atrasada"
-    if delta <= 7:
-        return "Vence em 7 dias"
-    return "Em Dia"
-
-def generate_report_html(filtered_df, personnel_df, project_goals, filters):
-    """Gera um relatório HTML completo e estilizado, com foco em didática e profissionalismo."""
-    
-    # --- Pré-processamento e Cálculos Adicionais ---
-    today = pd.to_datetime(date.today())
-    
-    def calculate_due_days(row):
-        if pd.isna(row['due_date']):
-            return None, 'secondary'
-        if row['status'] == 'Concluída':
-            return None, 'success'
-        
-        delta = (row['due_date'] - today).days
-        if delta < 0:
-            return f"{abs(delta)} dias de atraso", 'danger'
-        elif delta <= 7:
-            return f"Vence em {delta} dias", 'warning'
-        else:
-            return f"Vence em {delta} dias", 'primary'
-
-    filtered_df[['due_days_text', 'due_days_color']] = filtered_df.apply(calculate_due_days, axis=1, result_type='expand')
-
-    # --- Métricas Principais ---
-    total_tasks = len(filtered_df)
-    completed_tasks = len(filtered_df[filtered_df['status'] == 'Concluída'])
-    progress = filtered_df['progress'].mean() if total_tasks > 0 else 0
-    overdue_tasks_df = filtered_df[(filtered_df['due_date'] < today) & (filtered_df['status'] != 'Concluída')]
-    overdue_tasks = len(overdue_tasks_df)
-    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-
-    # Processar as metas para formato de lista HTML
-    goals_html = ""
-    if project_goals and project_goals.strip():
-        goals_list = [goal.strip() for goal in project_goals.strip().split('\n') if goal.strip()]
-        goals_html = '<ul style="margin-top: 10px; padding-left: 20px;">'
-        for goal in goals_list:
-            goals_html += f"<li>{goal}</li>"
-        goals_html += "</ul>"
-    else:
-        goals_html = "<p style='margin-top:10px;'>Nenhuma meta definida.</p>"
-
-
-    # --- Geração de Gráficos (convertidos para HTML) ---
-    # Gráfico de Status (Pizza)
-    status_counts = filtered_df['status'].value_counts().reset_index()
-    status_counts.columns = ['status', 'count']
-    fig_status = px.pie(status_counts, names='status', values='count', hole=.4,
-                        title="Distribuição por Status",
-                        color='status', color_discrete_map={'Concluída':'#28a745', 'Em Andamento':'#ffc107', 'Planejada':'#007bff'})
-    fig_status.update_layout(legend_title_text='Status', margin=dict(t=40, b=20, l=20, r=20), font_family="Arial")
-    status_chart_html = fig_status.to_html(full_html=False, include_plotlyjs='cdn')
-
-    # Gráfico de Prazos (Barras)
-    df_pending = filtered_df[filtered_df['status'] != 'Concluída'].copy()
-    due_chart_html = ""
-    if not df_pending.empty:
-        df_pending['due_category'] = df_pending['due_date'].apply(lambda d: get_due_category(d, today))
-        due_counts = df_pending['due_category'].value_counts().reset_index()
-        due_counts.columns = ['category', 'count']
-        category_order = ["Atrasada", "Vence em 7 dias", "Em Dia", "Sem Prazo"]
-        fig_due = px.bar(due_counts, x='category', y='count', color='category', text_auto=True,
-                         title="Análise de Prazos (Tarefas Pendentes)",
-                         labels={'category': 'Status do Prazo', 'count': 'Nº de Tarefas'},
-                         color_discrete_map={'Atrasada': '#dc3545', 'Vence em 7 dias': '#ffc107', 'Em Dia': '#28a745', 'Sem Prazo': '#6c757d'},
-                         category_orders={"category": category_order})
-        fig_due.update_layout(xaxis_title=None, yaxis_title="Nº de Tarefas", showlegend=False, font_family="Arial")
-        due_chart_html = fig_due.to_html(full_html=False, include_plotlyjs='cdn')
-
-    # Gráfico de Progresso por Setor
-    progress_by_sector = filtered_df.groupby('sector')['progress'].mean().sort_values(ascending=False).reset_index()
-    fig_sector_progress = px.bar(progress_by_sector, x='sector', y='progress', text='progress',
-                                title="Progresso Médio por Setor",
-                                color='progress', color_continuous_scale=px.colors.sequential.Greens)
-    fig_sector_progress.update_traces(texttemplate='%{text:.2s}%', textposition='outside')
-    fig_sector_progress.update_layout(xaxis_title="Setor", yaxis_title="Progresso Médio (%)", coloraxis_showscale=False, font_family="Arial")
-    sector_progress_chart_html = fig_sector_progress.to_html(full_html=False, include_plotlyjs='cdn')
-
-    # Gráfico de Carga de Trabalho por Equipe
-    tasks_by_team_status = filtered_df.groupby(['team', 'status']).size().reset_index(name='count')
-    fig_teams_workload = px.bar(tasks_by_team_status, x='team', y='count', color='status',
-                               title="Carga de Trabalho por Equipe e Status",
-                               labels={'team': 'Equipe', 'count': 'Nº de Tarefas', 'status': 'Status'},
-                               color_discrete_map={'Concluída':'#28a745', 'Em Andamento':'#ffc107', 'Planejada':'#007bff'},
-                               text_auto=True)
-    fig_teams_workload.update_layout(xaxis={'categoryorder':'total descending'}, yaxis_title="Nº de Tarefas", xaxis_title=None, font_family="Arial")
-    teams_workload_chart_html = fig_teams_workload.to_html(full_html=False, include_plotlyjs='cdn')
-
-    # Gráfico de Gantt (Cronograma)
-    gantt_chart_html = "<p>Nenhuma tarefa com datas válidas para gerar o cronograma.</p>"
-    df_gantt = filtered_df[['name', 'created_at', 'due_date', 'team']].copy()
-    df_gantt.rename(columns={'name': 'Task', 'created_at': 'Start', 'due_date': 'Finish', 'team': 'Resource'}, inplace=True)
-    df_gantt.dropna(subset=['Start', 'Finish'], inplace=True)
-    if not df_gantt.empty:
-        num_tasks = len(df_gantt)
-        chart_height = max(400, num_tasks * 35 + 100)
-        
-        unique_teams = df_gantt['Resource'].unique()
-        color_palette = px.colors.qualitative.Plotly 
-        team_color_map = {team: color_palette[i % len(color_palette)] for i, team in enumerate(unique_teams)}
-        
-        fig_gantt = px.timeline(df_gantt, x_start="Start", x_end="Finish", y="Task", color="Resource", title="Cronograma da Obra",
-                                color_discrete_map=team_color_map,
-                                height=chart_height)
-                                
-        fig_gantt.update_yaxes(autorange="reversed", title=None)
-        fig_gantt.update_xaxes(title="Linha do Tempo")
-        
-        # Aumenta a margem esquerda para garantir que nomes longos de tarefas sejam exibidos
-        fig_gantt.update_layout(margin=dict(l=350)) 
-        
-        fig_gantt.add_shape(type='line', x0=datetime.now(), y0=0, x1=datetime.now(), y1=1, yref='paper', line=dict(color='#dc3545', width=2, dash='dash'))
-        fig_gantt.add_annotation(x=datetime.now(), y=1.05, yref='paper', showarrow=False, text="Hoje", font=dict(color="#dc3545"))
-        gantt_chart_html = fig_gantt.to_html(full_html=False, include_plotlyjs='cdn')
-
-
-    # --- Geração de Tabelas (convertidas para HTML) ---
-    df_display = filtered_df[['name', 'team', 'sector', 'status', 'progress', 'due_date', 'due_days_text', 'due_days_color']].copy()
-    df_display.rename(columns={'name': 'Tarefa', 'team': 'Equipe', 'sector': 'Setor', 'status': 'Status', 'progress': 'Progresso', 'due_date': 'Vencimento'}, inplace=True)
-    df_display['Vencimento'] = df_display['Vencimento'].dt.strftime('%d/%m/%Y')
-    
-    status_map = {'Concluída': 'success', 'Em Andamento': 'warning', 'Planejada': 'primary'}
-    tasks_table_html = "<thead><tr><th>Tarefa</th><th>Equipe</th><th>Setor</th><th>Status</th><th>Progresso</th><th>Prazo</th></tr></thead><tbody>"
-    for _, row in df_display.iterrows():
-        tasks_table_html += f"""
-            <tr class="{'table-danger' if row['due_days_color'] == 'danger' else ''}">
-                <td>{row['Tarefa']}</td>
-                <td>{row['Equipe']}</td>
-                <td>{row['Setor']}</td>
-                <td><span class="badge badge-{status_map.get(row['Status'], 'secondary')}">{row['Status']}</span></td>
-                <td>
-                    <div class="progress-bar-container">
-                        <div class="progress-bar" style="width: {row['Progresso']}%; background-color: {'#28a745' if row['Progresso'] == 100 else '#007bff'};">{row['Progresso']}%</div>
-                    </div>
-                </td>
-                <td>
-                    {row['Vencimento']}
-                    <small class="badge-prazo badge-prazo-{row['due_days_color']}">{row['due_days_text'] if row['due_days_text'] else ''}</small>
-                </td>
-            </tr>
-        """
-    tasks_table_html += "</tbody>"
-    tasks_table_html = f'<table class="dataframe">{tasks_table_html}</table>'
-
-    # Tabela de Pessoal
-    total_employees = len(personnel_df)
-    team_summary_html = "<p>Nenhuma equipe para exibir.</p>"
-    personnel_list_html = "<p>Nenhum funcionário para exibir.</p>"
-    if not personnel_df.empty:
-        team_counts = personnel_df['team'].value_counts().reset_index()
-        team_counts.columns = ['Equipe', 'Nº de Colaboradores']
-        team_summary_html = team_counts.to_html(index=False, border=0, classes='dataframe')
-        
-        tasks_by_team = filtered_df.groupby('team')['name'].apply(lambda x: '<br>'.join(x)).reset_index()
-        tasks_by_team.rename(columns={'name': 'Tarefa(s) da Equipe'}, inplace=True)
-
-        enriched_personnel_df = pd.merge(personnel_df, tasks_by_team, on='team', how='left')
-        enriched_personnel_df['Tarefa(s) da Equipe'].fillna('Nenhuma tarefa atribuída à equipe', inplace=True)
-        
-        df_people_display = enriched_personnel_df[['name', 'team', 'role', 'Tarefa(s) da Equipe']].copy().sort_values(by=['team', 'name'])
-        df_people_display.rename(columns={'name': 'Nome', 'team': 'Equipe', 'role': 'Função'}, inplace=True)
-        
-        personnel_list_html = df_people_display.to_html(index=False, border=0, classes='dataframe', escape=False)
-
-
-    # --- Template HTML Completo ---
-    html_template = f"""
-    <!DOCTYPE html>
-    <html lang="pt-br">
-    <head>
-        <meta charset="UTF-8">
-        <title>Relatório de Andamento da Obra</title>
-        <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap" rel="stylesheet">
-        <style>
-            body {{ font-family: 'Roboto', sans-serif; line-height: 1.6; color: #333; background-color: #f4f7f9; margin: 0; padding: 0; }}
-            .container {{ max-width: 1200px; margin: 20px auto; padding: 25px; background-color: #fff; border-radius: 8px; box-shadow: 0 4px 15px rgba(0,0,0,0.08); }}
-            header {{ display: flex; justify-content: space-between; align-items: center; border-bottom: 3px solid #007bff; padding-bottom: 20px; margin-bottom: 25px; }}
-            header h1 {{ margin: 0; color: #004a99; font-size: 2.2em; font-weight: 700;}}
-            .report-info p {{ margin: 2px 0; text-align: right; color: #555; font-size: 0.9em; }}
-            .section {{ margin-bottom: 45px; }}
-            .section h2 {{ font-size: 1.6em; color: #004a99; border-bottom: 1px solid #ddd; padding-bottom: 10px; margin-bottom: 20px; font-weight: 700; }}
-            .metrics-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 20px; }}
-            .metric {{ background-color: #fff; padding: 20px; border-radius: 8px; text-align: center; border: 1px solid #e0e0e0; transition: all 0.3s ease; }}
-            .metric:hover {{ transform: translateY(-5px); box-shadow: 0 8px 20px rgba(0,0,0,0.1); }}
-            .metric .value {{ font-size: 2.8em; font-weight: 700; color: #007bff; }}
-            .metric .value.danger {{ color: #dc3545; }}
-            .metric .label {{ font-size: 1.1em; color: #666; margin-top: 5px; }}
-            .summary-box {{ background-color: #e7f5ff; border-left: 5px solid #007bff; padding: 20px; margin-bottom: 25px; border-radius: 5px; }}
-            .summary-box strong {{ color: #004a99; }}
-            .charts-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); gap: 25px; align-items: start; }}
-            .chart {{ border: 1px solid #ddd; padding: 15px; border-radius: 8px; background: #fff; }}
-            .chart-desc {{ font-size: 0.9em; color: #777; text-align: center; margin-top: 5px; }}
-            .dataframe {{ width: 100%; border-collapse: collapse; }}
-            .dataframe th, .dataframe td {{ padding: 12px 15px; text-align: left; border-bottom: 1px solid #e0e0e0; }}
-            .dataframe th {{ background-color: #f2f7fc; font-weight: bold; color: #004a99; }}
-            .dataframe tbody tr:hover {{ background-color: #f8f9fa; }}
-            .dataframe .table-danger, .dataframe .table-danger:hover {{ background-color: #f8d7da !important; }}
-            .badge {{ display: inline-block; padding: .35em .65em; font-size: 85%; font-weight: 700; line-height: 1; text-align: center; white-space: nowrap; vertical-align: baseline; border-radius: .25rem; color: #fff; }}
-            .badge-primary {{ background-color: #007bff; }}
-            .badge-success {{ background-color: #28a745; }}
-            .badge-warning {{ background-color: #ffc107; color: #212529;}}
-            .badge-danger {{ background-color: #dc3545; }}
-            .badge-secondary {{ background-color: #6c757d; }}
-            .badge-prazo {{ font-size: 0.8em; margin-left: 8px; padding: 0.2em 0.5em; border-radius: 10px; }}
-            .badge-prazo-danger {{ background-color: #dc3545; color: white;}}
-            .badge-prazo-warning {{ background-color: #ffc107; color: #212529;}}
-            .badge-prazo-primary {{ background-color: #e7f5ff; color: #007bff;}}
-            .badge-prazo-success {{ background-color: #d4edda; color: #155724;}}
-            .badge-prazo-secondary {{ background-color: #e9ecef; color: #343a40;}}
-            .progress-bar-container {{ width: 100%; background-color: #e9ecef; border-radius: .25rem; }}
-            .progress-bar {{ height: 20px; line-height: 20px; text-align: center; color: white; font-size: 0.85em; border-radius: .25rem; }}
-            .personnel-list-container {{ max-height: 400px; overflow-y: auto; }}
-            footer {{ text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #eee; font-size: 0.9em; color: #888; }}
-            
-            @media print {{ 
-                body {{ background-color: #fff; }} 
-                .container {{ box-shadow: none; border: none; margin: 0; max-width: 100%; }} 
-                .personnel-list-container {{ 
-                    max-height: none !important; 
-                    overflow-y: visible !important; 
-                }}
-                .no-print {{ display: none; }}
-                body {{
-                    -webkit-print-color-adjust: exact !important;
-                    print-color-adjust: exact !important;
-                }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <header>
-                <h1>Relatório de Andamento da Obra</h1>
-                <div class="report-info">
-                    <p><strong>Data de Emissão:</strong> {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
-                    <p><strong>Filtros Aplicados:</strong></p>
-                    <p>Equipe: {filters['team']} | Setor: {filters['sector']} | Status: {filters['status']}</p>
-                </div>
-            </header>
-
-            <div class="section">
-                <h2>1. Sumário Executivo e Metas</h2>
-                <div class="summary-box"><strong>Metas do Projeto:</strong>
-                {goals_html}
-                </div>
-                <div class="metrics-grid">
-                    <div class="metric"><div class="value">{total_tasks}</div><div class="label">Total de Tarefas</div></div>
-                    <div class="metric"><div class="value">{progress:.1f}%</div><div class="label">Progresso Médio Geral</div></div>
-                    <div class="metric"><div class="value">{completion_rate:.1f}%</div><div class="label">Taxa de Conclusão</div></div>
-                    <div class="metric"><div class="value {'danger' if overdue_tasks > 0 else ''}">{overdue_tasks}</div><div class="label">Tarefas Atrasadas</div></div>
-                </div>
-            </div>
-            
-            <div class="section">
-                <h2>2. Cronograma das Tarefas</h2>
-                <div class="chart">{gantt_chart_html}</div>
-                <p class="chart-desc">O Gráfico de Gantt ilustra a linha do tempo das atividades, permitindo visualizar a duração e a sobreposição das tarefas.</p>
-            </div>
-
-            <div class="section">
-                <h2>3. Análise de Desempenho</h2>
-                <div class="charts-grid">
-                    <div class="chart">
-                        {status_chart_html}
-                        <p class="chart-desc">Este gráfico mostra a proporção de tarefas concluídas, em andamento e planejadas.</p>
-                    </div>
-                    <div class="chart">
-                        {due_chart_html if due_chart_html else "<p>Nenhuma tarefa pendente para análise de prazo.</p>"}
-                        <p class="chart-desc">Análise focada nas tarefas pendentes, classificando-as por urgência de prazo.</p>
-                    </div>
-                    <div class="chart">
-                        {sector_progress_chart_html}
-                        <p class="chart-desc">Média de progresso das tarefas agrupadas por cada setor da obra.</p>
-                    </div>
-                    <div class="chart">
-                        {teams_workload_chart_html}
-                        <p class="chart-desc">Distribuição do número de tarefas por status para cada equipe.</p>
-                    </div>
-                </div>
-            </div>
-
-            <div class="section">
-                <h2>4. Detalhamento das Atividades</h2>
-                <p>A tabela a seguir lista todas as atividades consideradas neste relatório, com detalhes sobre status, progresso e prazos.</p>
-                {tasks_table_html}
-            </div>
-
-            <div class="section">
-                <h2>5. Gestão de Pessoal</h2>
-                <div class="charts-grid">
-                     <div class="chart">
-                        <h3 style="text-align: center; margin-top: 5px;">Colaboradores por Equipe</h3>
-                        {team_summary_html}
-                    </div>
-                    <div class="metric" style="display: flex; flex-direction: column; justify-content: center; align-items: center; height: 100%;">
-                        <div class="value">{total_employees}</div>
-                        <div class="label">Total de Colaboradores</div>
-                    </div>
-                </div>
-                <br>
-                <h3>Lista Geral de Funcionários Por Atividade</h3>
-                <div class="personnel-list-container">
-                    {personnel_list_html}
-                </div>
-            </div>
-            
-            <footer>
-                <p>Relatório gerado pelo sistema Gestor de Obras Pro+ | © {datetime.now().year}</p>
-                <p>Desenvolvido por Francelino neto santos.</p>
-            </footer>
-        </div>
-    </body>
-    </html>
-    """
-    return html_template
-
-def get_task_status(task):
-    """Retorna o status de uma tarefa com base no seu progresso."""
-    progress = task.get('progress', 0)
-    if progress == 100:
-        return 'Concluída'
-    elif progress > 0:
-        return 'Em Andamento'
-    else:
-        return 'Planejada'
+# --- CÁLCULOS EM CACHE (DIAGRAMAS E DASHBOARD) ---
+@metered_cache(show_spinner=False, max_entries=16)
+def cached_org_chart(data_version, people_version, collapse, today_iso, _employees, _tasks, _calendar):
+    """Organograma recalculado só quando tarefas, pessoas, o modo ou o dia mudam."""
+    return generate_org_chart_mermaid_syntax(_employees, _tasks, collapse, _calendar)
+
+@metered_cache(show_spinner=False, max_entries=16)
+def cached_flowchart(data_version, calendar_key, layout, sector_order, today_iso, _tasks, _scheduler):
+    """Fluxograma recalculado só quando tarefas, calendário, layout, frentes ou o dia mudam."""
+    calendar = SiteCalendar.from_config({'calendar': json.loads(calendar_key)})
+    return generate_flowchart_mermaid_syntax(_tasks, _scheduler, layout, list(sector_order), calendar)
+
+@metered_cache(show_spinner=False, max_entries=8)
+def cached_forecast(data_version, calendar_key, today_iso, _tasks_df):
+    """Previsão por tarefa, equipe e setor, recalculada só quando os dados, o calendário ou o dia mudam."""
+    calendar = SiteCalendar.from_config({'calendar': json.loads(calendar_key)})
+    task_forecast = forecast_completion(_tasks_df, calendar, date.fromisoformat(today_iso))
+    return task_forecast, rollup_forecast(task_forecast, 'team'), rollup_forecast(task_forecast, 'sector')
+
+@metered_cache(show_spinner=False, max_entries=8)
+def cached_sector_team_matrix(data_version, calendar_key, today_iso, _tasks_df):
+    calendar = SiteCalendar.from_config({'calendar': json.loads(calendar_key)})
+    return sector_team_matrix(_tasks_df, date.fromisoformat(today_iso), calendar)
+
+@metered_cache(show_spinner=False, max_entries=8)
+def cached_team_workload(data_version, calendar_key, start_iso, end_iso, _tasks_df):
+    calendar = SiteCalendar.from_config({'calendar': json.loads(calendar_key)})
+    return team_workload_matrix(_tasks_df, start_iso, end_iso, calendar)
+
+@metered_cache(show_spinner=False, max_entries=8)
+def cached_dashboard_cube(data_version, calendar_key, today_iso, _tasks_df, _wbs):
+    calendar = SiteCalendar.from_config({'calendar': json.loads(calendar_key)})
+    return build_dashboard_cube(_tasks_df, _wbs, calendar, date.fromisoformat(today_iso))
+
+# --- ESTADO DA SESSÃO ---
 
 def add_activity(icon_type, title, desc):
     """Adiciona uma nova atividade ao log."""
-    activity_map = {"new": "➕", "update": "🔄", "delete": "🗑️", "user": "👤", "config": "⚙️", "complete": "✅"}
-    icon = activity_map.get(icon_type, "ℹ️")
-    new_activity = {
-        "type": icon, "title": title, "desc": desc, "time": datetime.now().strftime("%d/%m %H:%M")
-    }
-    st.session_state.activities.insert(0, new_activity)
-    DataManager.save(ACTIVITIES_FILE, st.session_state.activities)
+    operations.add_activity(st.session_state, icon_type, title, desc)
+
+def refresh_tasks_df():
+    """Reconstrói o DataFrame de tarefas e a versão dos dados após qualquer alteração nas tarefas."""
+    operations.refresh_tasks_df(st.session_state)
+
+def calendar_cache_key():
+    return json.dumps(st.session_state.config.get('calendar', {}), sort_keys=True)
 
 def save_tasks_state():
-    """Salva o estado das tarefas e cria um backup."""
-    DataManager.save(TASKS_FILE, st.session_state.tasks)
-    DataManager.backup_tasks()
+    """Salva o estado das tarefas, atualiza o DataFrame de análise e cria um backup."""
+    if operations.save_tasks(st.session_state):
+        st.toast("Backup das tarefas criado com sucesso!", icon="💾")
+
+def save_site_file(file_path):
+    """Grava os funcionários ou a configuração da sessão sem apagar o que outras sessões gravaram."""
+    operations.save_site_file(st.session_state, file_path)
+
+def save_calendar_config(calendar_config):
+    """Salva a configuração do calendário e recalcula o que depende dos dias úteis."""
+    st.session_state.config["calendar"] = calendar_config
+    save_site_file(CONFIG_FILE)
+    st.session_state.calendar = SiteCalendar.from_config(st.session_state.config)
+    st.session_state.scheduler = build_scheduler(st.session_state.tasks, st.session_state.calendar)
+    rebuild_wbs()
+    save_tasks_state()
+
+def rebuild_wbs():
+    """Remonta a EAP inteira — usado quando a estrutura muda (inclusão, exclusão, troca de pai ou de calendário)."""
+    operations.rebuild_wbs(st.session_state)
 
 def initialize_state():
-    """Carrega todos os dados para o estado da sessão na inicialização."""
+    """Carrega todos os dados para o estado da sessão na inicialização.
+
+    Sessões de visualização não guardam cópia própria: a cada execução recebem referências ao
+    instantâneo imutável do processo (operations.get_read_snapshot), sempre com a última gravação.
+    """
+    if st.session_state.get('user_role') != 'admin':
+        snapshot = operations.get_read_snapshot()
+        for key in operations.SNAPSHOT_KEYS:
+            st.session_state[key] = snapshot[key]
+        return
     if 'initialized' not in st.session_state:
-        st.session_state.config = DataManager.load(CONFIG_FILE, {"sectors": [], "teams": [], "project_goals": ""})
-        st.session_state.people = DataManager.load(PEOPLE_FILE, {"employees": []})
-        tasks_data = DataManager.load(TASKS_FILE, [])
-        st.session_state.activities = DataManager.load(ACTIVITIES_FILE, [])
-
-        for team in st.session_state.config.get("teams", []):
-            team['name'] = team['name'].strip()
-        for sector in st.session_state.config.get("sectors", []):
-            sector['name'] = sector['name'].strip()
-
-        for task in tasks_data:
-            if 'id' not in task:
-                task['id'] = str(uuid.uuid4())
-            task['status'] = get_task_status(task)
-        
-        df_tasks = pd.DataFrame(tasks_data)
-        if not df_tasks.empty:
-            df_tasks['created_at'] = pd.to_datetime(df_tasks['created_at'], errors='coerce')
-            df_tasks['due_date'] = pd.to_datetime(df_tasks['due_date'], errors='coerce')
-        
-        st.session_state.tasks_df = df_tasks
-        st.session_state.tasks = tasks_data
+        site = load_site(track_versions=True)
+        saved_progress = {task['id']: task.get('progress', 0) for task in site['tasks']}
+        # Na primeira execução, o progresso atual de cada tarefa vira o ponto de partida do histórico
+        history = ProgressHistoryStore()
+        if history.is_empty() and saved_progress:
+            history.record_many(saved_progress)
+        build_site_state(site)
+        # Tarefas-resumo cujo progresso consolidado pela EAP difere do gravado entram no histórico
+        rolled = {task['id']: task['progress'] for task in site['tasks'] if task.get('progress', 0) != saved_progress[task['id']]}
+        if rolled:
+            history.record_many(rolled)
+        site.update(data_version=compute_data_version(site['tasks']), conflicts=[])
+        for key, value in site.items():
+            st.session_state[key] = value
         st.session_state.initialized = True
-
-
-# --- INICIALIZAÇÃO DA APLICAÇÃO ---
-if not check_authentication():
-    st.stop()
-
-initialize_state()
-is_admin = st.session_state.get('user_role') == 'admin'
-
-
-# =================================================================================
-# --- SIDEBAR (BARRA LATERAL) ---
-# =================================================================================
-with st.sidebar:
-    st.title("🏗️ Gestor de Obras Pro+")
-    if is_admin:
-        st.success("Modo de Edição (Admin)")
     else:
-        st.warning("Modo de Visualização")
+        # O que outras sessões e outros processos gravaram desde a última execução
+        operations.sync_site_state(st.session_state)
+    # Status e progresso consolidado acertados na carga vão numa gravação própria, antes de qualquer edição
+    operations.save_rollup(st.session_state)
+
+CONFLICT_LABELS = {'tasks': "Tarefa", 'people': "Funcionário", 'config': "Configuração da obra"}
+
+def render_conflicts():
+    """Alterações desta sessão que colidiram com as de outra: o usuário escolhe qual versão fica."""
+    for conflict in list(st.session_state.conflicts):
+        mine, theirs = conflict['mine'], conflict['theirs']
+        name = (mine or theirs or {}).get('name', '') if conflict['collection'] != 'config' else ''
+        key = f"{conflict['collection']}_{conflict['id']}"
+        with st.container(border=True):
+            st.warning(f"**{CONFLICT_LABELS[conflict['collection']]} {name}**: outra sessão alterou este registro enquanto "
+                       "você editava. A versão gravada foi mantida; escolha qual versão deve ficar.", icon="⚠️")
+            if mine is None or theirs is None:
+                st.caption("Sua versão: excluída." if mine is None else "Versão gravada: excluída pela outra sessão.")
+            else:
+                fields = [field for field in dict.fromkeys([*theirs, *mine]) if mine.get(field) != theirs.get(field)]
+                st.dataframe(pd.DataFrame({"Campo": fields,
+                                           "Sua versão": [json.dumps(mine.get(f), ensure_ascii=False) for f in fields],
+                                           "Versão gravada": [json.dumps(theirs.get(f), ensure_ascii=False) for f in fields]}),
+                             use_container_width=True, hide_index=True)
+            col1, col2 = st.columns(2)
+            if col1.button("Manter a versão gravada", key=f"conflict_keep_{key}", use_container_width=True):
+                operations.resolve_conflict(st.session_state, conflict, keep_mine=False)
+                st.rerun()
+            if col2.button("Gravar a minha versão", key=f"conflict_mine_{key}", use_container_width=True, type="primary"):
+                operations.resolve_conflict(st.session_state, conflict, keep_mine=True)
+                add_activity("update", "Conflito Resolvido", f"A versão desta sessão de '{name or 'configuração'}' foi gravada.")
+                st.rerun()
 
-    st.divider()
 
-    with st.expander("🎯 Metas da Obra", expanded=True):
+# --- INICIALIZAÇÃO DA APLICAÇÃO ---
+def main():
+    """Ponto de entrada do script: monta a interface e registra a duração da execução nas métricas."""
+    st.set_page_config(
+        page_title="Gestor de Obras Pro+",
+        page_icon="🏗️",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    start_metrics_exporter()
+    prune_old_reports_at_startup()
+    if API_PORT:
+        from gestor_obras.api import start_api_server  # O servidor HTTP só é carregado com a API ligada
+        start_api_server(access_key=st.secrets.get("ACCESS_KEY"))
+    metrics = get_metrics()
+    metrics.touch_session(st.session_state.setdefault('metrics_session_id', str(uuid.uuid4())))
+    started = time.perf_counter()
+    try:
+        render_app()
+    finally:  # st.rerun()/st.stop() interrompem o script com exceções; a execução conta mesmo assim
+        metrics.observe("gestor_obras_rerun_duration_seconds", time.perf_counter() - started)
+
+
+def render_app():
+    """Monta a interface. Fica numa função para que o módulo possa ser importado (benchmarks, scripts) sem abrir a UI."""
+    begin_profiled_rerun(st.session_state.get('profiling_enabled', False) and st.session_state.get('user_role') == 'admin')
+    if not check_authentication():
+        st.stop()
+
+    with profile_span("Inicialização dos dados"):
+        initialize_state()
+    is_admin = st.session_state.get('user_role') == 'admin'
+
+
+    # =================================================================================
+    # --- SIDEBAR (BARRA LATERAL) ---
+    # =================================================================================
+    with st.sidebar, profile_span("Barra lateral"):
+        st.title("🏗️ Gestor de Obras Pro+")
         if is_admin:
-            goals = st.text_area(
-                "Descreva as metas principais do projeto:",
-                value=st.session_state.config.get("project_goals", ""),
-                height=150,
-                key="project_goals_text",
-                help="Defina os objetivos gerais que guiarão todas as atividades da obra."
-            )
-            if st.button("Salvar Metas", use_container_width=True):
-                st.session_state.config["project_goals"] = goals
-                DataManager.save(CONFIG_FILE, st.session_state.config)
-                add_activity("config", "Metas Atualizadas", "As metas gerais da obra foram definidas/atualizadas.")
-                st.toast("Metas salvas com sucesso!")
-                st.rerun()
+            st.success("Modo de Edição (Admin)")
         else:
-            goals = st.session_state.config.get("project_goals", "Nenhuma meta definida.")
-            st.markdown(goals if goals else "Nenhuma meta definida.")
+            st.warning("Modo de Visualização")
 
-    st.header("Feed de Atividades")
-    for activity in st.session_state.activities[:5]:
-        st.info(f"**{activity['type']} {activity['title']}**\n\n_{activity['desc']}_\n\n`{activity['time']}`")
-    st.divider()
-
-    if is_admin:
-        with st.expander("⚙️ Backup e Manutenção", expanded=False):
-            st.info("Faça o download de todos os dados da aplicação em um único arquivo .zip.")
-            
-            zip_bytes = create_backup_zip()
-            
-            st.download_button(
-                label="📥 Baixar Backup Completo",
-                data=zip_bytes,
-                file_name=f"backup_gestor_obras_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
-                mime="application/zip",
-                use_container_width=True
-            )
-
-    with st.expander("👥 Equipes e Funcionários", expanded=False):
-        employees = st.session_state.people.get('employees', [])
-        if not employees:
-            st.warning("Nenhum funcionário cadastrado.")
-        else:
-            team_names = [t['name'] for t in st.session_state.config.get("teams", [])]
-            selected_team = st.selectbox("Filtrar por Equipe", ["Todas"] + team_names, key="sb_team_filter")
-
-            df_emp = pd.DataFrame(employees)
-            if selected_team != "Todas":
-                df_emp = df_emp[df_emp['team'] == selected_team]
-
-            st.dataframe(df_emp, use_container_width=True, hide_index=True)
-
-
-# =================================================================================
-# --- PÁGINA PRINCIPAL ---
-# =================================================================================
-st.header("Painel de Acompanhamento de Obra")
-tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-    "📊 Dashboard",
-    "📋 Gestão de Tarefas",
-    "👷 Gestão de Pessoal",
-    "⚙️ Gestão de Configurações",
-    "📈 Relatórios Detalhados",
-    "🏗️ Análise Estrutural"
-])
-
-# =================================================================================
-# --- ABA 1: DASHBOARD ---
-# =================================================================================
-with tab1:
-    st.subheader("Visão Geral do Projeto")
-    if st.session_state.tasks_df.empty:
-        st.warning("Nenhuma tarefa cadastrada. Adicione tarefas para visualizar os relatórios.")
-    else:
-        df_tasks = st.session_state.tasks_df
-        
-        total_tasks = len(df_tasks)
-        completed_tasks = len(df_tasks[df_tasks['status'] == 'Concluída'])
-        pending_tasks = total_tasks - completed_tasks
-        overall_progress = df_tasks['progress'].mean() if not df_tasks.empty else 0
-
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Progresso Geral", f"{overall_progress:.1f}%", help="Média de progresso de todas as tarefas.")
-        col2.metric("Total de Tarefas", total_tasks)
-        col3.metric("Tarefas Concluídas", completed_tasks)
-        col4.metric("Tarefas Pendentes", pending_tasks)
         st.divider()
 
-        st.subheader("Indicadores de Desempenho")
-        col_chart1, col_chart2 = st.columns(2)
-
-        with col_chart1:
-            st.markdown("##### **Status das Tarefas**", help="Distribuição percentual das tarefas por status.")
-            status_counts = df_tasks['status'].value_counts().reset_index()
-            status_counts.columns = ['status', 'count']
-            fig_status = px.pie(status_counts, names='status', values='count', hole=.4,
-                                title="Distribuição por Status",
-                                color='status', color_discrete_map={'Concluída':'#2ca02c', 'Em Andamento':'#ff7f0e', 'Planejada':'#1f77b4'})
-            fig_status.update_traces(textinfo='percent+value', textfont_size=14, pull=[0.05, 0, 0])
-            fig_status.update_layout(legend_title_text='Status', margin=dict(t=40, b=20, l=20, r=20))
-            st.plotly_chart(fig_status, use_container_width=True)
-
-        with col_chart2:
-            st.markdown("##### **Progresso por Setor**", help="Média de conclusão das tarefas em cada setor da obra.")
-            progress_by_sector = df_tasks.groupby('sector')['progress'].mean().sort_values(ascending=False).reset_index()
-            fig_sector = px.bar(progress_by_sector, x='sector', y='progress', text='progress',
-                                title="Progresso Médio por Setor",
-                                color='progress', color_continuous_scale=px.colors.sequential.Greens)
-            fig_sector.update_traces(texttemplate='%{text:.2s}%', textposition='outside')
-            fig_sector.update_layout(xaxis_title="Setor", yaxis_title="Progresso Médio (%)", coloraxis_showscale=False)
-            st.plotly_chart(fig_sector, use_container_width=True)
-
-        col_chart3, col_chart4 = st.columns(2)
-        with col_chart3:
-            st.markdown("##### **Carga de Trabalho por Equipe**", help="Número de tarefas (concluídas, em andamento, planejadas) por equipe.")
-            tasks_by_team_status = df_tasks.groupby(['team', 'status']).size().reset_index(name='count')
-            fig_teams = px.bar(tasks_by_team_status, x='team', y='count', color='status',
-                               title="Tarefas por Equipe e Status",
-                               labels={'team': 'Equipe', 'count': 'Nº de Tarefas', 'status': 'Status'},
-                               color_discrete_map={'Concluída':'#2ca02c', 'Em Andamento':'#ff7f0e', 'Planejada':'#1f77b4'},
-                               text_auto=True)
-            fig_teams.update_layout(xaxis={'categoryorder':'total descending'}, yaxis_title="Nº de Tarefas", xaxis_title=None)
-            st.plotly_chart(fig_teams, use_container_width=True)
-
-        with col_chart4:
-            st.markdown("##### **Situação dos Prazos**", help="Classificação de tarefas pendentes por prazo de vencimento.")
-            today = pd.to_datetime(date.today())
-            df_tasks_pending = df_tasks[df_tasks['status'] != 'Concluída'].copy()
-
-            if not df_tasks_pending.empty:
-                df_tasks_pending['due_category'] = df_tasks_pending['due_date'].apply(get_due_category)
-                due_counts = df_tasks_pending['due_category'].value_counts().reset_index()
-                due_counts.columns = ['category', 'count']
-
-                category_order = ["Atrasada", "Vence em 7 dias", "Em Dia", "Sem Prazo"]
-                fig_due_date = px.bar(due_counts, x='category', y='count', color='category', text_auto=True,
-                                      title="Análise de Prazos das Tarefas Pendentes",
-                                      labels={'category': 'Status do Prazo', 'count': 'Nº de Tarefas'},
-                                      color_discrete_map={'Atrasada': '#d62728', 'Vence em 7 dias': '#ff7f0e', 'Em Dia': '#2ca02c', 'Sem Prazo': '#7f7f7f'},
-                                      category_orders={"category": category_order})
-                fig_due_date.update_layout(xaxis_title=None, yaxis_title="Nº de Tarefas", showlegend=False)
-                st.plotly_chart(fig_due_date, use_container_width=True)
+        with st.expander("🎯 Metas da Obra", expanded=True):
+            if is_admin:
+                goals = st.text_area(
+                    "Descreva as metas principais do projeto:",
+                    value=st.session_state.config.get("project_goals", ""),
+                    height=150,
+                    key="project_goals_text",
+                    help="Defina os objetivos gerais que guiarão todas as atividades da obra."
+                )
+                if st.button("Salvar Metas", use_container_width=True):
+                    st.session_state.config["project_goals"] = goals
+                    save_site_file(CONFIG_FILE)
+                    add_activity("config", "Metas Atualizadas", "As metas gerais da obra foram definidas/atualizadas.")
+                    st.toast("Metas salvas com sucesso!")
+                    st.rerun()
             else:
-                st.info("Nenhuma tarefa pendente.")
+                goals = st.session_state.config.get("project_goals", "Nenhuma meta definida.")
+                st.markdown(goals if goals else "Nenhuma meta definida.")
 
+        st.header("Feed de Atividades")
+        for activity in st.session_state.activities[:5]:
+            st.info(f"**{activity['type']} {activity['title']}**\n\n_{activity['desc']}_\n\n`{activity['time']}`")
         st.divider()
-        st.subheader("Cronograma da Obra (Gráfico de Gantt)")
-        if df_tasks.empty:
-            st.info("Nenhuma tarefa para exibir no cronograma.")
-        else:
-            df_gantt = df_tasks[['name', 'created_at', 'due_date', 'team']].copy()
-            df_gantt.rename(columns={'name': 'Task', 'created_at': 'Start', 'due_date': 'Finish', 'team': 'Resource'}, inplace=True)
-            df_gantt.dropna(subset=['Start', 'Finish'], inplace=True)
-
-            if not df_gantt.empty:
-                fig_gantt = px.timeline(df_gantt, x_start="Start", x_end="Finish", y="Task", color="Resource",
-                                        title="Linha do Tempo das Tarefas por Equipe")
-                fig_gantt.update_yaxes(autorange="reversed", title=None)
-                fig_gantt.update_xaxes(title="Linha do Tempo")
-                
-                # Aumenta a margem esquerda para garantir que nomes longos de tarefas sejam exibidos
-                fig_gantt.update_layout(margin=dict(l=350))
-
-                fig_gantt.add_shape(type='line',
-                                  x0=datetime.now(), y0=0,
-                                  x1=datetime.now(), y1=1,
-                                  yref='paper',
-                                  line=dict(color='red', width=2, dash='dash'))
-                fig_gantt.add_annotation(x=datetime.now(), y=1.05, yref='paper',
-                                       showarrow=False, text="Hoje",
-                                       font=dict(color="red"))
-                st.plotly_chart(fig_gantt, use_container_width=True)
-            else:
-                st.warning("Nenhuma tarefa com datas válidas para gerar o cronograma.")
 
-# --- ABA 2: GESTÃO DE TAREFAS ---
-with tab2:
-    with st.expander("Adicionar Nova Tarefa", expanded=True):
-        with st.form("task_form", clear_on_submit=True):
-            task_name = st.text_input("Nome da Tarefa", placeholder="Ex: Instalação Elétrica do Bloco A", disabled=not is_admin)
+        if is_admin:
+            with st.expander("⚙️ Backup e Manutenção", expanded=False):
+                st.info("Faça o download de todos os dados da aplicação em um único arquivo .zip.")
+
+                with profile_span("Backup (.zip)"):
+                    # Os arquivos já estão em dia: toda alteração da sessão é gravada na hora
+                    zip_bytes = create_backup_zip()
+
+                st.download_button(
+                    label="📥 Baixar Backup Completo",
+                    data=zip_bytes,
+                    file_name=f"backup_gestor_obras_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime="application/zip",
+                    use_container_width=True
+                )
 
-            col1, col2 = st.columns(2)
-            available_teams = [t['name'] for t in st.session_state.config.get("teams", [])]
-            task_team = col1.selectbox("Equipe Responsável", available_teams, index=None, placeholder="Selecione a equipe", disabled=not is_admin)
-            available_sectors = [s['name'] for s in st.session_state.config.get("sectors", [])]
-            task_sector = col2.selectbox("Setor da Obra", available_sectors, index=None, placeholder="Selecione o setor", disabled=not is_admin)
-
-            col3, col4 = st.columns(2)
-            task_created_at = col3.date_input("Data de Início", date.today(), disabled=not is_admin)
-            task_due_date = col4.date_input("Data de Vencimento", date.today() + timedelta(days=7), disabled=not is_admin)
-
-            if st.form_submit_button("➕ Adicionar Tarefa", use_container_width=True, disabled=not is_admin):
-                if all([task_name, task_team, task_sector]):
-                    if task_created_at > task_due_date:
-                        st.error("A data de início não pode ser posterior à data de vencimento.")
-                    else:
-                        new_task = {
-                            "id": str(uuid.uuid4()), "name": task_name, "team": task_team, "sector": task_sector,
-                            "progress": 0, "created_at": task_created_at.strftime("%Y-%m-%d"),
-                            "due_date": task_due_date.strftime("%Y-%m-%d"), "status": "Planejada"
-                        }
-                        st.session_state.tasks.append(new_task)
-                        save_tasks_state()
-                        add_activity("new", "Nova Tarefa Criada", f"'{task_name}' atribuída à {task_team}.")
-                        st.success(f"Tarefa '{task_name}' adicionada!")
-                        st.rerun()
-                else:
-                    st.error("Todos os campos são obrigatórios.")
-
-    st.divider()
-    st.subheader("Lista de Tarefas")
-
-    col_filter1, col_filter2, col_filter3 = st.columns(3)
-    filter_team = col_filter1.multiselect("Filtrar por Equipe", available_teams, placeholder="Todas as equipes")
-    filter_sector = col_filter2.multiselect("Filtrar por Setor", available_sectors, placeholder="Todos os setores")
-    filter_status = col_filter3.multiselect("Filtrar por Status", ["Planejada", "Em Andamento", "Concluída"], placeholder="Todos os status")
-
-    search_query = st.text_input("🔍 Buscar tarefa por nome", placeholder="Digite o nome da tarefa...")
-
-    filtered_tasks = st.session_state.tasks
-    if filter_team:
-        filtered_tasks = [t for t in filtered_tasks if t.get('team') in filter_team]
-    if filter_sector:
-        filtered_tasks = [t for t in filtered_tasks if t.get('sector') in filter_sector]
-    if filter_status:
-        filtered_tasks = [t for t in filtered_tasks if t.get('status') in filter_status]
-    if search_query:
-        filtered_tasks = [t for t in filtered_tasks if search_query.lower() in t.get('name', '').lower()]
-
-    if not filtered_tasks:
-        st.info("Nenhuma tarefa encontrada com os filtros atuais.")
-    else:
-        for index, task in enumerate(filtered_tasks):
-            with st.expander(f"**{task.get('name', 'Tarefa sem nome')}** | `{task.get('team', 'Sem equipe')}` | `{task.get('sector', 'Sem setor')}`", expanded=False):
-                original_task = task.copy()
-
-                team_name = task.get("team", "")
-                employees = st.session_state.people.get("employees", [])
-                team_members = [e for e in employees if e.get("team") == team_name]
-
-                if team_members:
-                    st.markdown("##### 👥 Colaboradores da Equipe")
-                    df_team = pd.DataFrame(team_members)[["name", "role"]]
-                    st.dataframe(df_team, use_container_width=True, hide_index=True, key=f"df_team_{task['id']}")
+        with st.expander("👥 Equipes e Funcionários", expanded=False):
+            employees = st.session_state.people.get('employees', [])
+            if not employees:
+                st.warning("Nenhum funcionário cadastrado.")
+            else:
+                team_names = [t['name'] for t in st.session_state.config.get("teams", [])]
+                selected_team = st.selectbox("Filtrar por Equipe", ["Todas"] + team_names, key="sb_team_filter")
+
+                df_emp = pd.DataFrame(employees)
+                if selected_team != "Todas":
+                    df_emp = df_emp[df_emp['team'] == selected_team]
+
+                st.dataframe(df_emp, use_container_width=True, hide_index=True)
+
+
+    # =================================================================================
+    # --- PÁGINA PRINCIPAL ---
+    # =================================================================================
+    st.header("Painel de Acompanhamento de Obra")
+    if is_admin and st.session_state.get('conflicts'):
+        render_conflicts()
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+        "📊 Dashboard",
+        "📋 Gestão de Tarefas",
+        "👷 Gestão de Pessoal",
+        "⚙️ Gestão de Configurações",
+        "📈 Relatórios Detalhados",
+        "🏗️ Análise Estrutural",
+        "🗓️ Planejamento de Equipes"
+    ])
+
+    # =================================================================================
+    # --- ABA 1: DASHBOARD ---
+    # =================================================================================
+    with tab1, profile_span("Aba: Dashboard"):
+        st.subheader("Visão Geral do Projeto")
+        if st.session_state.tasks_df.empty:
+            st.warning("Nenhuma tarefa cadastrada. Adicione tarefas para visualizar os relatórios.")
+        else:
+            df_tasks = st.session_state.tasks_df
+            cube = cached_dashboard_cube(st.session_state.data_version, calendar_cache_key(), date.today().isoformat(),
+                                         df_tasks, st.session_state.wbs)
+
+            # Filtros cruzados: cliques nas barras de setor/equipe e a janela de datas filtram os demais gráficos
+            selected_sectors = [point['x'] for point in st.session_state.get('dash_sector_chart', {}).get('selection', {}).get('points', [])]
+            selected_teams = [point['x'] for point in st.session_state.get('dash_team_chart', {}).get('selection', {}).get('points', [])]
+            col_filter_window, col_filter_clear = st.columns([3, 1])
+            dated_weeks = cube.dropna(subset=['start_week', 'end_week'])
+            dash_window = None
+            if not dated_weeks.empty:
+                window_default = (pd.Timestamp(dated_weeks['start_week'].min()).date(), pd.Timestamp(dated_weeks['end_week'].max()).date() + timedelta(days=6))
+                dash_window = col_filter_window.date_input("Período em Análise", value=window_default, format="DD/MM/YYYY", key="dash_window",
+                                                           help="Considera as tarefas ativas no período (por semana). Clique nas barras de setor ou equipe para filtrar os demais gráficos.")
+                dash_window = dash_window if len(dash_window) == 2 and tuple(dash_window) != window_default else None
+
+            def clear_dashboard_filters():
+                for key in ('dash_sector_chart', 'dash_team_chart', 'dash_window'):
+                    st.session_state.pop(key, None)
+
+            col_filter_clear.button("Limpar Filtros", on_click=clear_dashboard_filters, use_container_width=True,
+                                    disabled=not (selected_sectors or selected_teams or dash_window))
+            active_filters = [f"Setores: {', '.join(selected_sectors)}" if selected_sectors else "",
+                              f"Equipes: {', '.join(selected_teams)}" if selected_teams else "",
+                              f"Período: {dash_window[0]:%d/%m/%Y} a {dash_window[1]:%d/%m/%Y}" if dash_window else ""]
+            if any(active_filters):
+                st.caption("Filtros ativos — " + " | ".join(f for f in active_filters if f))
+
+            cube_all = cube[cube_mask(cube, selected_sectors, selected_teams, dash_window)]
+            cube_for_sectors = cube[cube_mask(cube, None, selected_teams, dash_window)]
+            cube_for_teams = cube[cube_mask(cube, selected_sectors, None, dash_window)]
+
+            kpis = cube_kpis(cube_all)
+
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Progresso Geral", f"{kpis['progress']:.1f}%",
+                        help="Média ponderada pela duração em dias úteis (ou pelo peso informado), consolidada pela EAP.")
+            col2.metric("Total de Tarefas", kpis['total_tasks'])
+            col3.metric("Tarefas Concluídas", kpis['completed_tasks'])
+            col4.metric("Tarefas Pendentes", kpis['pending_tasks'])
+            st.divider()
+
+            st.subheader("Indicadores de Desempenho")
+            col_chart1, col_chart2 = st.columns(2)
+
+            with col_chart1:
+                st.markdown("##### **Status das Tarefas**", help="Distribuição percentual das tarefas por status.")
+                status_counts = cube_all.groupby('status')['count'].sum().sort_values(ascending=False).reset_index()
+                fig_status = px.pie(status_counts, names='status', values='count', hole=.4,
+                                    title="Distribuição por Status",
+                                    color='status', color_discrete_map={'Concluída':'#2ca02c', 'Em Andamento':'#ff7f0e', 'Planejada':'#1f77b4'})
+                fig_status.update_traces(textinfo='percent+value', textfont_size=14, pull=[0.05, 0, 0])
+                fig_status.update_layout(legend_title_text='Status', margin=dict(t=40, b=20, l=20, r=20))
+                st.plotly_chart(fig_status, use_container_width=True)
+
+            with col_chart2:
+                st.markdown("##### **Progresso por Setor**", help="Média de conclusão das tarefas em cada setor da obra. Clique em uma barra para filtrar o dashboard.")
+                sector_sums = cube_for_sectors.groupby('sector')[['progress_sum', 'count']].sum()
+                progress_by_sector = (sector_sums['progress_sum'] / sector_sums['count']).rename('progress').sort_values(ascending=False).reset_index()
+                fig_sector = px.bar(progress_by_sector, x='sector', y='progress', text='progress',
+                                    title="Progresso Médio por Setor",
+                                    color='progress', color_continuous_scale=px.colors.sequential.Greens)
+                fig_sector.update_traces(texttemplate='%{text:.2s}%', textposition='outside')
+                fig_sector.update_layout(xaxis_title="Setor", yaxis_title="Progresso Médio (%)", coloraxis_showscale=False, clickmode='event+select')
+                st.plotly_chart(fig_sector, use_container_width=True, on_select="rerun", selection_mode="points", key="dash_sector_chart")
+
+            col_chart3, col_chart4 = st.columns(2)
+            with col_chart3:
+                st.markdown("##### **Carga de Trabalho por Equipe**", help="Número de tarefas (concluídas, em andamento, planejadas) por equipe. Clique em uma barra para filtrar o dashboard.")
+                tasks_by_team_status = cube_for_teams.groupby(['team', 'status'])['count'].sum().reset_index()
+                fig_teams = px.bar(tasks_by_team_status, x='team', y='count', color='status',
+                                   title="Tarefas por Equipe e Status",
+                                   labels={'team': 'Equipe', 'count': 'Nº de Tarefas', 'status': 'Status'},
+                                   color_discrete_map={'Concluída':'#2ca02c', 'Em Andamento':'#ff7f0e', 'Planejada':'#1f77b4'},
+                                   text_auto=True)
+                fig_teams.update_layout(xaxis={'categoryorder':'total descending'}, yaxis_title="Nº de Tarefas", xaxis_title=None, clickmode='event+select')
+                st.plotly_chart(fig_teams, use_container_width=True, on_select="rerun", selection_mode="points", key="dash_team_chart")
+
+            with col_chart4:
+                st.markdown("##### **Situação dos Prazos**", help="Classificação de tarefas pendentes por prazo de vencimento.")
+                cube_pending = cube_all[cube_all['status'] != 'Concluída']
+
+                if not cube_pending.empty:
+                    due_counts = cube_pending.groupby('due_category')['count'].sum().reset_index()
+                    due_counts.columns = ['category', 'count']
+
+                    category_order = DUE_CATEGORY_ORDER
+                    fig_due_date = px.bar(due_counts, x='category', y='count', color='category', text_auto=True,
+                                          title="Análise de Prazos das Tarefas Pendentes",
+                                          labels={'category': 'Status do Prazo', 'count': 'Nº de Tarefas'},
+                                          color_discrete_map={'Atrasada': '#d62728', DUE_SOON_LABEL: '#ff7f0e', 'Em Dia': '#2ca02c', 'Sem Prazo': '#7f7f7f'},
+                                          category_orders={"category": category_order})
+                    fig_due_date.update_layout(xaxis_title=None, yaxis_title="Nº de Tarefas", showlegend=False)
+                    st.plotly_chart(fig_due_date, use_container_width=True)
                 else:
-                    st.info("Nenhum colaborador cadastrado nesta equipe.")
-
-                col1, col2, col3 = st.columns(3)
-
-                new_name = col1.text_input("Nome", value=task.get('name', ''), key=f"name_{task['id']}", disabled=not is_admin)
-
-                team_name = task.get('team')
-                current_team_index = available_teams.index(team_name) if team_name in available_teams else None
-                new_team = col2.selectbox("Equipe", available_teams, index=current_team_index, key=f"team_{task['id']}", disabled=not is_admin)
+                    st.info("Nenhuma tarefa pendente.")
+            profile_lap("Indicadores e filtros cruzados")
 
-                sector_name = task.get('sector')
-                current_sector_index = available_sectors.index(sector_name) if sector_name in available_sectors else None
-                new_sector = col3.selectbox("Setor", available_sectors, index=current_sector_index, key=f"sector_{task['id']}", disabled=not is_admin)
-
-                col_date1, col_date2 = st.columns(2)
-                start_date_val = datetime.strptime(task.get('created_at', str(date.today())), "%Y-%m-%d").date()
-                new_start_date = col_date1.date_input("Início", value=start_date_val, key=f"start_date_{task['id']}", disabled=not is_admin)
-
-                due_date_val = datetime.strptime(task.get('due_date', str(date.today())), "%Y-%m-%d").date()
-                new_due_date = col_date2.date_input("Vencimento", value=due_date_val, key=f"due_date_{task['id']}", disabled=not is_admin)
-
-                new_progress = st.slider("Progresso (%)", 0, 100, task.get('progress', 0), key=f"progress_{task['id']}", disabled=not is_admin)
+            st.divider()
+            st.subheader("Cronograma da Obra (Gráfico de Gantt)")
+            df_dated = df_tasks.dropna(subset=['created_at', 'due_date'])
+            if df_dated.empty:
+                st.warning("Nenhuma tarefa com datas válidas para gerar o cronograma.")
+            else:
+                col_gantt1, col_gantt2, col_gantt3 = st.columns(3)
+                gantt_level = col_gantt1.selectbox("Nível de Detalhe", ["Automático"] + GANTT_AUTO_ORDER, key="gantt_level",
+                                                   help="No modo automático, o cronograma é agregado por setor/equipe quando há tarefas demais para exibir individualmente.")
+                gantt_sectors = sorted(df_dated['sector'].dropna().unique().tolist())
+                gantt_drill = col_gantt2.selectbox("Detalhar Setor", ["Todos"] + gantt_sectors, key="gantt_drill_sector")
+                gantt_window = col_gantt3.date_input("Janela de Datas", value=(df_dated['created_at'].min().date(), df_dated['due_date'].max().date()),
+                                                     format="DD/MM/YYYY", key="gantt_window")
+
+                df_gantt = df_dated if gantt_drill == "Todos" else df_dated[df_dated['sector'] == gantt_drill]
+                if len(gantt_window) == 2:
+                    df_gantt = filter_tasks_by_window(df_gantt, gantt_window[0], gantt_window[1], st.session_state.interval_index)
+
+                gantt_rows, used_level, total_rows = prepare_gantt_rows(df_gantt, gantt_level)
+                if gantt_rows.empty:
+                    st.info("Nenhuma tarefa no intervalo selecionado.")
+                else:
+                    critical_ids = st.session_state.scheduler.critical_ids() if used_level == "Tarefa" else None
+                    fig_gantt = build_gantt_figure(gantt_rows, "Linha do Tempo das Tarefas por Equipe", used_level, highlight_ids=critical_ids)
+                    if gantt_window and len(gantt_window) == 2:
+                        fig_gantt.update_xaxes(range=[pd.Timestamp(gantt_window[0]), pd.Timestamp(gantt_window[1]) + pd.Timedelta(days=1)])
+                    st.plotly_chart(fig_gantt, use_container_width=True)
+                    st.caption(f"Nível de detalhe: **{used_level}** | Exibindo {len(gantt_rows)} de {total_rows} linhas.")
+            profile_lap("Gantt")
+
+            st.divider()
+            st.subheader("Matriz Setor × Equipe")
+            matrix = cached_sector_team_matrix(st.session_state.data_version, calendar_cache_key(), date.today().isoformat(), df_tasks)
+            matrix_options = {"Quantidade de Tarefas": ('count', 'Blues', "%{z}"), "Progresso Médio (%)": ('avg_progress', 'Greens', "%{z:.0f}%"),
+                              "Tarefas Atrasadas": ('overdue', 'Reds', "%{z}")}
+            matrix_metric = st.radio("Indicador", list(matrix_options), horizontal=True, key="matrix_metric")
+            matrix_key, matrix_scale, matrix_text = matrix_options[matrix_metric]
+            fig_matrix = go.Figure(go.Heatmap(z=matrix[matrix_key], x=matrix['teams'], y=matrix['sectors'], colorscale=matrix_scale,
+                                              texttemplate=matrix_text, hoverongaps=False,
+                                              hovertemplate="Setor: %{y}<br>Equipe: %{x}<br>" + matrix_metric + ": %{z}<extra></extra>"))
+            fig_matrix.update_layout(xaxis_title="Equipe", yaxis_title="Setor", height=max(300, 40 * len(matrix['sectors']) + 120),
+                                     margin=dict(t=20, b=20))
+            st.plotly_chart(fig_matrix, use_container_width=True)
+
+            st.markdown("##### **Carga de Trabalho por Equipe**", help="Quantidade de tarefas ativas de cada equipe em cada dia útil.")
+            df_window = df_tasks.dropna(subset=['created_at', 'due_date'])
+            if not df_window.empty:
+                workload_default = (df_window['created_at'].min().date(), df_window['due_date'].max().date())
+                workload_window = st.date_input("Período", value=workload_default, format="DD/MM/YYYY", key="workload_window")
+                if len(workload_window) == 2:
+                    workload = cached_team_workload(st.session_state.data_version, calendar_cache_key(),
+                                                    workload_window[0].isoformat(), workload_window[1].isoformat(), df_tasks)
+                    fig_workload = go.Figure(go.Heatmap(z=workload['active'], x=workload['days'], y=workload['teams'], colorscale='YlOrRd',
+                                                        hovertemplate="%{y}<br>%{x|%d/%m/%Y}: %{z} tarefa(s) ativa(s)<extra></extra>"))
+                    fig_workload.update_layout(xaxis_title=None, yaxis_title="Equipe", height=max(250, 30 * len(workload['teams']) + 120),
+                                               margin=dict(t=20, b=20))
+                    st.plotly_chart(fig_workload, use_container_width=True)
+            profile_lap("Matriz setor × equipe e carga")
+
+            st.divider()
+            st.subheader("Previsão de Conclusão")
+            task_forecast, team_forecast, sector_forecast = cached_forecast(
+                st.session_state.data_version, calendar_cache_key(), date.today().isoformat(), df_tasks)
+            will_slip = task_forecast[task_forecast['forecast_status'] == "Vai Atrasar"]
+            col_fc1, col_fc2, col_fc3 = st.columns(3)
+            forecast_end = task_forecast['forecast_date'].max()
+            col_fc1.metric("Término Previsto (ritmo atual)", pd.Timestamp(forecast_end).strftime('%d/%m/%Y') if pd.notna(forecast_end) else "—")
+            col_fc2.metric("Tarefas que Vão Atrasar", len(will_slip), help="Ainda no prazo, mas o ritmo atual leva o término para depois do vencimento.")
+            col_fc3.metric("Tarefas Já Atrasadas", int((task_forecast['forecast_status'] == "Atrasada").sum()))
+
+            forecast_columns = {'tasks': 'Tarefas', 'progress': 'Progresso Médio (%)', 'due_date': 'Último Vencimento',
+                                'forecast_date': 'Término Previsto', 'will_slip': 'Vão Atrasar', 'at_risk': 'Em Risco',
+                                'max_slip_days': 'Maior Atraso Previsto (dias úteis)'}
+            col_fc_team, col_fc_sector = st.columns(2)
+            col_fc_team.markdown("###### Por Equipe")
+            col_fc_team.dataframe(team_forecast.rename(columns={'team': 'Equipe', **forecast_columns}), use_container_width=True, hide_index=True)
+            col_fc_sector.markdown("###### Por Setor")
+            col_fc_sector.dataframe(sector_forecast.rename(columns={'sector': 'Setor', **forecast_columns}), use_container_width=True, hide_index=True)
+            if not will_slip.empty:
+                st.warning(f"{len(will_slip)} tarefa(s) ainda no prazo devem atrasar no ritmo atual:")
+                st.dataframe(will_slip[['name', 'team', 'sector', 'progress', 'due_date', 'forecast_date', 'slip_days']].rename(columns={
+                    'name': 'Tarefa', 'team': 'Equipe', 'sector': 'Setor', 'progress': 'Progresso (%)', 'due_date': 'Vencimento',
+                    'forecast_date': 'Término Previsto', 'slip_days': 'Atraso Previsto (dias úteis)'}), use_container_width=True, hide_index=True)
+            profile_lap("Previsão de conclusão")
+
+            st.divider()
+            st.subheader("Curva S — Planejado x Realizado")
+            df_dated = df_tasks.dropna(subset=['created_at', 'due_date'])
+            if df_dated.empty:
+                st.info("Nenhuma tarefa com datas válidas para montar a curva S.")
+            else:
+                curve_default = (df_dated['created_at'].min().date(), max(df_dated['due_date'].max().date(), date.today()))
+                curve_window = st.date_input("Período da Curva S", value=curve_default, format="DD/MM/YYYY", key="s_curve_window",
+                                             help="O realizado vem do histórico de progresso salvo a cada atualização de tarefa.")
+                if len(curve_window) == 2:
+                    planned_curve = planned_progress_curve(df_tasks, curve_window[0], curve_window[1], calendar=st.session_state.calendar)
+                    fig_curve = go.Figure()
+                    fig_curve.add_trace(go.Scatter(x=planned_curve.index, y=planned_curve.values, mode='lines', name='Planejado',
+                                                   line=dict(color='#1f77b4', dash='dash')))
+                    actual_end = min(curve_window[1], date.today())
+                    if actual_end >= curve_window[0]:
+                        actual_curve = ProgressHistoryStore().progress_curve(df_tasks['id'].tolist(), curve_window[0], actual_end)
+                        fig_curve.add_trace(go.Scatter(x=actual_curve.index, y=actual_curve.values, mode='lines', name='Realizado',
+                                                       line=dict(color='#2ca02c', width=3)))
+                    fig_curve.update_layout(yaxis_title="Progresso Acumulado (%)", xaxis_title=None, yaxis_range=[0, 105],
+                                            legend=dict(orientation='h', y=1.1))
+                    st.plotly_chart(fig_curve, use_container_width=True)
+            profile_lap("Curva S")
+
+    # --- ABA 2: GESTÃO DE TAREFAS ---
+    with tab2, profile_span("Aba: Gestão de Tarefas"):
+        with st.expander("Adicionar Nova Tarefa", expanded=True):
+            with st.form("task_form", clear_on_submit=True):
+                task_name = st.text_input("Nome da Tarefa", placeholder="Ex: Instalação Elétrica do Bloco A", disabled=not is_admin)
+
+                col1, col2 = st.columns(2)
+                available_teams = [t['name'] for t in st.session_state.config.get("teams", [])]
+                task_team = col1.selectbox("Equipe Responsável", available_teams, index=None, placeholder="Selecione a equipe", disabled=not is_admin)
+                available_sectors = [s['name'] for s in st.session_state.config.get("sectors", [])]
+                task_sector = col2.selectbox("Setor da Obra", available_sectors, index=None, placeholder="Selecione o setor", disabled=not is_admin)
+
+                col3, col4 = st.columns(2)
+                task_created_at = col3.date_input("Data de Início", date.today(), disabled=not is_admin)
+                task_due_date = col4.date_input("Data de Vencimento", date.today() + timedelta(days=7), disabled=not is_admin)
+
+                task_crew_size = st.number_input("Colaboradores Necessários", min_value=0, value=0, step=1, disabled=not is_admin,
+                                                 help="Quantas pessoas da equipe a tarefa ocupa por dia. Use 0 para a equipe inteira.")
+
+                task_names_by_id = {t['id']: t.get('name', 'Tarefa sem nome') for t in st.session_state.tasks}
+                col5, col6 = st.columns(2)
+                task_parent = col5.selectbox("Tarefa Pai (EAP)", list(task_names_by_id), index=None, format_func=task_names_by_id.get,
+                                             placeholder="Nenhuma (tarefa de primeiro nível)", disabled=not is_admin,
+                                             help="Agrupa esta tarefa como subtarefa de outra na estrutura analítica do projeto.")
+                task_weight = col6.number_input("Peso", min_value=0.0, value=0.0, step=1.0, disabled=not is_admin,
+                                                help="Peso no progresso geral. Use 0 para ponderar pela duração em dias úteis.")
+                task_predecessors = st.multiselect("Tarefas Predecessoras", list(task_names_by_id), format_func=task_names_by_id.get,
+                                                   placeholder="Nenhuma (pode iniciar de forma independente)", disabled=not is_admin,
+                                                   help="Tarefas que precisam terminar antes desta começar.")
+
+                if st.form_submit_button("➕ Adicionar Tarefa", use_container_width=True, disabled=not is_admin):
+                    if all([task_name, task_team, task_sector]):
+                        if task_created_at > task_due_date:
+                            st.error("A data de início não pode ser posterior à data de vencimento.")
+                        else:
+                            new_task = {
+                                "id": str(uuid.uuid4()), "name": task_name, "team": task_team, "sector": task_sector,
+                                "progress": 0, "created_at": task_created_at.strftime("%Y-%m-%d"),
+                                "due_date": task_due_date.strftime("%Y-%m-%d"), "status": "Planejada",
+                                "predecessors": task_predecessors, "crew_size": int(task_crew_size),
+                                "parent_id": task_parent, "weight": float(task_weight)
+                            }
+                            st.session_state.tasks.append(new_task)
+                            st.session_state.scheduler = build_scheduler(st.session_state.tasks, st.session_state.calendar)
+                            st.session_state.interval_index.upsert(new_task)
+                            rebuild_wbs()
+                            save_tasks_state()
+                            add_activity("new", "Nova Tarefa Criada", f"'{task_name}' atribuída à {task_team}.")
+                            st.success(f"Tarefa '{task_name}' adicionada!")
+                            st.rerun()
+                    else:
+                        st.error("Todos os campos são obrigatórios.")
+        profile_lap("Formulário de nova tarefa")
 
-                if st.button("💾 Salvar", key=f"save_{task['id']}", use_container_width=True, disabled=not is_admin):
-                    if new_start_date > new_due_date:
-                        st.error("A data de início não pode ser posterior à data de vencimento.", icon="🚨")
+        st.divider()
+        st.subheader("Lista de Tarefas")
+
+        col_filter1, col_filter2, col_filter3 = st.columns(3)
+        filter_team = col_filter1.multiselect("Filtrar por Equipe", available_teams, placeholder="Todas as equipes")
+        filter_sector = col_filter2.multiselect("Filtrar por Setor", available_sectors, placeholder="Todos os setores")
+        filter_status = col_filter3.multiselect("Filtrar por Status", ["Planejada", "Em Andamento", "Concluída"], placeholder="Todos os status")
+
+        search_query = st.text_input("🔍 Buscar tarefa por nome", placeholder="Digite o nome da tarefa...")
+
+        filtered_tasks = st.session_state.tasks
+        if filter_team:
+            filtered_tasks = [t for t in filtered_tasks if t.get('team') in filter_team]
+        if filter_sector:
+            filtered_tasks = [t for t in filtered_tasks if t.get('sector') in filter_sector]
+        if filter_status:
+            filtered_tasks = [t for t in filtered_tasks if t.get('status') in filter_status]
+        if search_query:
+            filtered_tasks = [t for t in filtered_tasks if search_query.lower() in t.get('name', '').lower()]
+
+        if not filtered_tasks:
+            st.info("Nenhuma tarefa encontrada com os filtros atuais.")
+        else:
+            for index, task in enumerate(filtered_tasks):
+                with st.expander(f"**{task.get('name', 'Tarefa sem nome')}** | `{task.get('team', 'Sem equipe')}` | `{task.get('sector', 'Sem setor')}`", expanded=False):
+                    team_name = task.get("team", "")
+                    employees = st.session_state.people.get("employees", [])
+                    team_members = [e for e in employees if e.get("team") == team_name]
+
+                    if team_members:
+                        st.markdown("##### 👥 Colaboradores da Equipe")
+                        df_team = pd.DataFrame(team_members)[["name", "role"]]
+                        st.dataframe(df_team, use_container_width=True, hide_index=True, key=f"df_team_{task['id']}")
                     else:
-                        task_index = next((i for i, t in enumerate(st.session_state.tasks) if t['id'] == task['id']), None)
-                        if task_index is not None:
-                            st.session_state.tasks[task_index].update({
+                        st.info("Nenhum colaborador cadastrado nesta equipe.")
+
+                    col1, col2, col3 = st.columns(3)
+
+                    new_name = col1.text_input("Nome", value=task.get('name', ''), key=f"name_{task['id']}", disabled=not is_admin)
+
+                    team_name = task.get('team')
+                    current_team_index = available_teams.index(team_name) if team_name in available_teams else None
+                    new_team = col2.selectbox("Equipe", available_teams, index=current_team_index, key=f"team_{task['id']}", disabled=not is_admin)
+
+                    sector_name = task.get('sector')
+                    current_sector_index = available_sectors.index(sector_name) if sector_name in available_sectors else None
+                    new_sector = col3.selectbox("Setor", available_sectors, index=current_sector_index, key=f"sector_{task['id']}", disabled=not is_admin)
+
+                    col_date1, col_date2 = st.columns(2)
+                    start_date_val = datetime.strptime(task.get('created_at', str(date.today())), "%Y-%m-%d").date()
+                    new_start_date = col_date1.date_input("Início", value=start_date_val, key=f"start_date_{task['id']}", disabled=not is_admin)
+
+                    due_date_val = datetime.strptime(task.get('due_date', str(date.today())), "%Y-%m-%d").date()
+                    new_due_date = col_date2.date_input("Vencimento", value=due_date_val, key=f"due_date_{task['id']}", disabled=not is_admin)
+
+                    other_tasks = {t['id']: t.get('name', 'Tarefa sem nome') for t in st.session_state.tasks if t['id'] != task['id']}
+                    new_predecessors = st.multiselect("Tarefas Predecessoras", list(other_tasks), format_func=other_tasks.get,
+                                                      default=[p for p in task.get('predecessors', []) if p in other_tasks],
+                                                      key=f"predecessors_{task['id']}", disabled=not is_admin,
+                                                      help="Tarefas que precisam terminar antes desta começar.")
+
+                    new_crew_size = st.number_input("Colaboradores Necessários", min_value=0, value=int(task.get('crew_size', 0) or 0), step=1,
+                                                    key=f"crew_size_{task['id']}", disabled=not is_admin,
+                                                    help="Quantas pessoas da equipe a tarefa ocupa por dia. Use 0 para a equipe inteira.")
+
+                    wbs = st.session_state.wbs
+                    parent_options = {t['id']: t.get('name', 'Tarefa sem nome') for t in st.session_state.tasks
+                                      if t['id'] != task['id'] and t['id'] not in wbs.descendants(task['id'])}
+                    col_wbs1, col_wbs2 = st.columns(2)
+                    current_parent = task.get('parent_id')
+                    new_parent = col_wbs1.selectbox("Tarefa Pai (EAP)", list(parent_options), format_func=parent_options.get,
+                                                    index=list(parent_options).index(current_parent) if current_parent in parent_options else None,
+                                                    placeholder="Nenhuma (tarefa de primeiro nível)", key=f"parent_{task['id']}", disabled=not is_admin)
+                    new_weight = col_wbs2.number_input("Peso", min_value=0.0, value=float(task.get('weight') or 0), step=1.0,
+                                                       key=f"weight_{task['id']}", disabled=not is_admin,
+                                                       help="Peso no progresso geral. Use 0 para ponderar pela duração em dias úteis.")
+
+                    is_summary_task = wbs.is_summary(task['id'])
+                    new_progress = st.slider("Progresso (%)", 0, 100, task.get('progress', 0), key=f"progress_{task['id']}", disabled=not is_admin or is_summary_task,
+                                             help="Tarefa-resumo: o progresso é consolidado a partir das subtarefas." if is_summary_task else None)
+
+                    if st.button("💾 Salvar", key=f"save_{task['id']}", use_container_width=True, disabled=not is_admin):
+                        try:
+                            _, backup_path = operations.update_task(st.session_state, task['id'], {
                                 'name': new_name, 'team': new_team, 'sector': new_sector,
                                 'created_at': new_start_date.strftime("%Y-%m-%d"),
                                 'due_date': new_due_date.strftime("%Y-%m-%d"), 'progress': new_progress,
-                                'status': get_task_status({'progress': new_progress})
+                                'predecessors': new_predecessors, 'crew_size': int(new_crew_size),
+                                'parent_id': new_parent, 'weight': float(new_weight)
                             })
-                            save_tasks_state()
-                            add_activity("update", "Tarefa Atualizada", f"A tarefa '{original_task.get('name', '')}' foi atualizada.")
+                        except operations.ConflictError:
+                            st.rerun()  # O aviso de conflito aparece no topo da página
+                        except ValueError as error:
+                            st.error(str(error), icon="🚨")
+                        else:
+                            if backup_path:
+                                st.toast("Backup das tarefas criado com sucesso!", icon="💾")
                             st.success(f"Tarefa '{new_name}' atualizada!")
                             st.rerun()
 
-                if st.button("🗑️ Excluir", key=f"delete_{task['id']}", use_container_width=True, disabled=not is_admin):
-                    st.session_state.confirm_delete = task['id']
-                    st.rerun()
+                    if st.button("🗑️ Excluir", key=f"delete_{task['id']}", use_container_width=True, disabled=not is_admin):
+                        st.session_state.confirm_delete = task['id']
+                        st.rerun()
 
-                if st.session_state.get('confirm_delete') == task['id']:
-                    st.warning(f"**Tem certeza que deseja excluir a tarefa '{task.get('name', '')}'?**")
-                    c1, c2 = st.columns(2)
-                    if c1.button("Sim, excluir", key=f"confirm_del_{task['id']}", use_container_width=True):
-                        task_index = next((i for i, t in enumerate(st.session_state.tasks) if t['id'] == task['id']), None)
-                        if task_index is not None:
-                            deleted_task_name = st.session_state.tasks.pop(task_index).get('name', 'Sem nome')
-                            save_tasks_state()
-                            add_activity("delete", "Tarefa Excluída", f"A tarefa '{deleted_task_name}' foi removida.")
-                            st.warning(f"Tarefa '{deleted_task_name}' excluída.")
+                    if st.session_state.get('confirm_delete') == task['id']:
+                        st.warning(f"**Tem certeza que deseja excluir a tarefa '{task.get('name', '')}'?**")
+                        c1, c2 = st.columns(2)
+                        if c1.button("Sim, excluir", key=f"confirm_del_{task['id']}", use_container_width=True):
+                            task_index = next((i for i, t in enumerate(st.session_state.tasks) if t['id'] == task['id']), None)
+                            if task_index is not None:
+                                deleted_task = st.session_state.tasks.pop(task_index)
+                                deleted_task_name = deleted_task.get('name', 'Sem nome')
+                                for other in st.session_state.tasks:
+                                    if deleted_task['id'] in other.get('predecessors', []):
+                                        other['predecessors'] = [p for p in other['predecessors'] if p != deleted_task['id']]
+                                    if other.get('parent_id') == deleted_task['id']:
+                                        other['parent_id'] = deleted_task.get('parent_id')
+                                st.session_state.scheduler = build_scheduler(st.session_state.tasks, st.session_state.calendar)
+                                st.session_state.interval_index.remove(deleted_task['id'])
+                                rebuild_wbs()
+                                save_tasks_state()
+                                add_activity("delete", "Tarefa Excluída", f"A tarefa '{deleted_task_name}' foi removida.")
+                                st.warning(f"Tarefa '{deleted_task_name}' excluída.")
+                                del st.session_state['confirm_delete']
+                                st.rerun()
+                        if c2.button("Cancelar", key=f"cancel_del_{task['id']}", use_container_width=True):
                             del st.session_state['confirm_delete']
                             st.rerun()
-                    if c2.button("Cancelar", key=f"cancel_del_{task['id']}", use_container_width=True):
-                        del st.session_state['confirm_delete']
-                        st.rerun()
-
-# --- ABA 3: GESTÃO DE PESSOAL ---
-with tab3:
-    with st.expander("Cadastrar Novo Funcionário", expanded=True):
-        with st.form("people_form", clear_on_submit=True):
-            emp_name = st.text_input("Nome do Funcionário", disabled=not is_admin)
-
-            available_teams_personnel = [t['name'] for t in st.session_state.config.get("teams", [])]
-            emp_team = st.selectbox("Equipe", available_teams_personnel, index=None, placeholder="Selecione uma equipe", disabled=not is_admin)
-            emp_role = st.text_input("Função/Cargo", disabled=not is_admin)
-
-            if st.form_submit_button("➕ Adicionar Funcionário", use_container_width=True, disabled=not is_admin):
-                if all([emp_name, emp_role, emp_team]):
-                    employees = st.session_state.people.get('employees', [])
-                    normalized_new_name = emp_name.strip().lower()
-                    
-                    existing_names = [e['name'].strip().lower() for e in employees]
-
-                    if normalized_new_name in existing_names:
-                        st.error(f"O funcionário '{emp_name.strip()}' já está cadastrado no sistema.")
-                    else:
-                        new_employee = {"id": str(uuid.uuid4()), "name": emp_name.strip(), "team": emp_team, "role": emp_role}
-                        st.session_state.people.setdefault('employees', []).append(new_employee)
-                        DataManager.save(PEOPLE_FILE, st.session_state.people)
-                        add_activity("user", "Novo Colaborador", f"{emp_name.strip()} adicionado à equipe {emp_team}.")
-                        st.success(f"Funcionário {emp_name.strip()} cadastrado!")
-                        st.rerun()
-                else:
-                    st.error("Todos os campos são obrigatórios.")
+        profile_lap("Lista de tarefas")
 
-    st.divider()
-    st.subheader("Funcionários Cadastrados")
-    employees = st.session_state.people.get('employees', [])
-    if not employees:
-        st.info("Nenhum funcionário cadastrado.")
-    else:
-        df_people = pd.DataFrame(employees)
+    # --- ABA 3: GESTÃO DE PESSOAL ---
+    with tab3, profile_span("Aba: Gestão de Pessoal"):
+        with st.expander("Cadastrar Novo Funcionário", expanded=True):
+            with st.form("people_form", clear_on_submit=True):
+                emp_name = st.text_input("Nome do Funcionário", disabled=not is_admin)
 
-        dataframe_args = {
-            "use_container_width": True,
-            "hide_index": True,
-            "key": "employee_selector"
-        }
+                available_teams_personnel = [t['name'] for t in st.session_state.config.get("teams", [])]
+                emp_team = st.selectbox("Equipe", available_teams_personnel, index=None, placeholder="Selecione uma equipe", disabled=not is_admin)
+                emp_role = st.text_input("Função/Cargo", disabled=not is_admin)
 
-        if is_admin:
-            dataframe_args["on_select"] = "rerun"
-            dataframe_args["selection_mode"] = "single-row"
+                if st.form_submit_button("➕ Adicionar Funcionário", use_container_width=True, disabled=not is_admin):
+                    if all([emp_name, emp_role, emp_team]):
+                        employees = st.session_state.people.get('employees', [])
+                        normalized_new_name = emp_name.strip().lower()
 
-        st.dataframe(df_people, **dataframe_args)
+                        existing_names = [e['name'].strip().lower() for e in employees]
 
-        if is_admin:
-            selection = st.session_state.get("employee_selector", {}).get("selection", {})
-            if selection and selection.get("rows"):
-                selected_index = selection["rows"][0]
-                if selected_index < len(employees):
-                    employee = employees[selected_index]
-
-                    st.markdown("#### Editar/Excluir Funcionário Selecionado")
-                    with st.form(key=f"edit_employee_{employee.get('id', selected_index)}"):
-                        edited_name = st.text_input("Nome", value=employee['name'])
-
-                        all_teams_edit = [t['name'] for t in st.session_state.config.get("teams", [])]
-                        current_team_index = all_teams_edit.index(employee['team']) if employee['team'] in all_teams_edit else 0
-                        edited_team = st.selectbox("Equipe", options=all_teams_edit, index=current_team_index)
-
-                        edited_role = st.text_input("Cargo", value=employee['role'])
-
-                        col_btn1, col_btn2 = st.columns(2)
-                        if col_btn1.form_submit_button("💾 Salvar Alterações", use_container_width=True):
-                            employees[selected_index] = {'id': employee.get('id'), 'name': edited_name, 'team': edited_team, 'role': edited_role}
-                            DataManager.save(PEOPLE_FILE, st.session_state.people)
-                            add_activity("update", "Dados Atualizados", f"Os dados de '{edited_name}' foram atualizados.")
-                            st.success(f"Dados de '{edited_name}' atualizados!")
-                            st.rerun()
-
-                        if col_btn2.form_submit_button("🗑️ Excluir Funcionário", type="primary", use_container_width=True):
-                            deleted_employee = employees.pop(selected_index)
-                            DataManager.save(PEOPLE_FILE, st.session_state.people)
-                            add_activity("delete", "Funcionário Removido", f"O funcionário '{deleted_employee['name']}' foi removido.")
-                            st.warning(f"Funcionário '{deleted_employee['name']}' removido.")
+                        if normalized_new_name in existing_names:
+                            st.error(f"O funcionário '{emp_name.strip()}' já está cadastrado no sistema.")
+                        else:
+                            new_employee = {"id": str(uuid.uuid4()), "name": emp_name.strip(), "team": emp_team, "role": emp_role}
+                            st.session_state.people.setdefault('employees', []).append(new_employee)
+                            save_site_file(PEOPLE_FILE)
+                            add_activity("user", "Novo Colaborador", f"{emp_name.strip()} adicionado à equipe {emp_team}.")
+                            st.success(f"Funcionário {emp_name.strip()} cadastrado!")
                             st.rerun()
+                    else:
+                        st.error("Todos os campos são obrigatórios.")
 
-# --- ABA 4: GESTÃO DE CONFIGURAÇÕES ---
-with tab4:
-    st.subheader("Gerenciar Setores e Equipes")
-    if not is_admin:
-        st.warning("Apenas administradores podem gerenciar setores e equipes.", icon="🔒")
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.markdown("#### Setores da Obra")
-        with st.form("form_add_sector", clear_on_submit=True):
-            new_sector_name = st.text_input("Nome do Novo Setor", disabled=not is_admin).strip()
-            if st.form_submit_button("➕ Adicionar Setor", disabled=not is_admin):
-                if new_sector_name and not any(s['name'].lower() == new_sector_name.lower() for s in st.session_state.config["sectors"]):
-                    st.session_state.config["sectors"].append({"name": new_sector_name, "desc": ""})
-                    DataManager.save(CONFIG_FILE, st.session_state.config)
-                    add_activity("config", "Setor Adicionado", f"O setor '{new_sector_name}' foi criado.")
-                    st.rerun()
-                elif not new_sector_name:
-                    st.error("O nome do setor não pode ser vazio.")
-                else:
-                    st.error("Este setor já existe.")
-
-        for i, sector in enumerate(st.session_state.config["sectors"]):
-            is_in_use = any(task.get('sector') == sector['name'] for task in st.session_state.tasks)
-            with st.expander(f"{sector['name']} ({'Em uso' if is_in_use else 'Não utilizado'})"):
-                with st.form(key=f"edit_sector_{i}"):
-                    old_name = sector['name']
-                    new_name = st.text_input("Nome do Setor", value=old_name, disabled=not is_admin).strip()
-
-                    col_btn1, col_btn2 = st.columns([3, 1])
-                    if col_btn1.form_submit_button("💾 Salvar", disabled=not is_admin):
-                        if new_name and not any(s['name'].lower() == new_name.lower() for s in st.session_state.config["sectors"] if s['name'] != old_name):
-                            st.session_state.config["sectors"][i]['name'] = new_name
-                            DataManager.save(CONFIG_FILE, st.session_state.config)
-                            # Atualiza em cascata as tarefas
-                            for task in st.session_state.tasks:
-                                if task.get('sector') == old_name:
-                                    task['sector'] = new_name
-                            save_tasks_state()
-                            
-                            df_tasks = pd.DataFrame(st.session_state.tasks)
-                            if not df_tasks.empty:
-                                df_tasks['created_at'] = pd.to_datetime(df_tasks['created_at'], errors='coerce')
-                                df_tasks['due_date'] = pd.to_datetime(df_tasks['due_date'], errors='coerce')
-                            st.session_state.tasks_df = df_tasks
-
-                            add_activity("update", "Setor Atualizado", f"Setor '{old_name}' atualizado para '{new_name}'.")
+        st.divider()
+        st.subheader("Funcionários Cadastrados")
+        employees = st.session_state.people.get('employees', [])
+        if not employees:
+            st.info("Nenhum funcionário cadastrado.")
+        else:
+            df_people = pd.DataFrame(employees)
+
+            dataframe_args = {
+                "use_container_width": True,
+                "hide_index": True,
+                "key": "employee_selector"
+            }
+
+            if is_admin:
+                dataframe_args["on_select"] = "rerun"
+                dataframe_args["selection_mode"] = "single-row"
+
+            st.dataframe(df_people, **dataframe_args)
+
+            if is_admin:
+                selection = st.session_state.get("employee_selector", {}).get("selection", {})
+                if selection and selection.get("rows"):
+                    selected_index = selection["rows"][0]
+                    if selected_index < len(employees):
+                        employee = employees[selected_index]
+
+                        st.markdown("#### Editar/Excluir Funcionário Selecionado")
+                        with st.form(key=f"edit_employee_{employee.get('id', selected_index)}"):
+                            edited_name = st.text_input("Nome", value=employee['name'])
+
+                            all_teams_edit = [t['name'] for t in st.session_state.config.get("teams", [])]
+                            current_team_index = all_teams_edit.index(employee['team']) if employee['team'] in all_teams_edit else 0
+                            edited_team = st.selectbox("Equipe", options=all_teams_edit, index=current_team_index)
+
+                            edited_role = st.text_input("Cargo", value=employee['role'])
+
+                            col_btn1, col_btn2 = st.columns(2)
+                            if col_btn1.form_submit_button("💾 Salvar Alterações", use_container_width=True):
+                                employees[selected_index] = {'id': employee.get('id'), 'name': edited_name, 'team': edited_team, 'role': edited_role}
+                                save_site_file(PEOPLE_FILE)
+                                add_activity("update", "Dados Atualizados", f"Os dados de '{edited_name}' foram atualizados.")
+                                st.success(f"Dados de '{edited_name}' atualizados!")
+                                st.rerun()
+
+                            if col_btn2.form_submit_button("🗑️ Excluir Funcionário", type="primary", use_container_width=True):
+                                deleted_employee = employees.pop(selected_index)
+                                save_site_file(PEOPLE_FILE)
+                                add_activity("delete", "Funcionário Removido", f"O funcionário '{deleted_employee['name']}' foi removido.")
+                                st.warning(f"Funcionário '{deleted_employee['name']}' removido.")
+                                st.rerun()
+
+    # --- ABA 4: GESTÃO DE CONFIGURAÇÕES ---
+    with tab4, profile_span("Aba: Configurações"):
+        st.subheader("Gerenciar Setores e Equipes")
+        if not is_admin:
+            st.warning("Apenas administradores podem gerenciar setores e equipes.", icon="🔒")
+
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("#### Setores da Obra")
+            with st.form("form_add_sector", clear_on_submit=True):
+                new_sector_name = st.text_input("Nome do Novo Setor", disabled=not is_admin).strip()
+                if st.form_submit_button("➕ Adicionar Setor", disabled=not is_admin):
+                    if new_sector_name and not any(s['name'].lower() == new_sector_name.lower() for s in st.session_state.config["sectors"]):
+                        st.session_state.config["sectors"].append({"name": new_sector_name, "desc": ""})
+                        save_site_file(CONFIG_FILE)
+                        add_activity("config", "Setor Adicionado", f"O setor '{new_sector_name}' foi criado.")
+                        st.rerun()
+                    elif not new_sector_name:
+                        st.error("O nome do setor não pode ser vazio.")
+                    else:
+                        st.error("Este setor já existe.")
+
+            for i, sector in enumerate(st.session_state.config["sectors"]):
+                is_in_use = any(task.get('sector') == sector['name'] for task in st.session_state.tasks)
+                with st.expander(f"{sector['name']} ({'Em uso' if is_in_use else 'Não utilizado'})"):
+                    with st.form(key=f"edit_sector_{i}"):
+                        old_name = sector['name']
+                        new_name = st.text_input("Nome do Setor", value=old_name, disabled=not is_admin).strip()
+
+                        col_btn1, col_btn2 = st.columns([3, 1])
+                        if col_btn1.form_submit_button("💾 Salvar", disabled=not is_admin):
+                            if new_name and not any(s['name'].lower() == new_name.lower() for s in st.session_state.config["sectors"] if s['name'] != old_name):
+                                st.session_state.config["sectors"][i]['name'] = new_name
+                                save_site_file(CONFIG_FILE)
+                                # Atualiza em cascata as tarefas
+                                for task in st.session_state.tasks:
+                                    if task.get('sector') == old_name:
+                                        task['sector'] = new_name
+                                save_tasks_state()
+
+                                add_activity("update", "Setor Atualizado", f"Setor '{old_name}' atualizado para '{new_name}'.")
+                                st.rerun()
+                            else:
+                                st.error("Nome inválido ou já existente.")
+
+                        if col_btn2.form_submit_button("❌", disabled=not is_admin or is_in_use, help="Excluir setor (só se não estiver em uso)"):
+                            deleted_sector_name = st.session_state.config["sectors"].pop(i)['name']
+                            save_site_file(CONFIG_FILE)
+                            add_activity("delete", "Setor Removido", f"O setor '{deleted_sector_name}' foi removido.")
                             st.rerun()
-                        else:
-                            st.error("Nome inválido ou já existente.")
 
-                    if col_btn2.form_submit_button("❌", disabled=not is_admin or is_in_use, help="Excluir setor (só se não estiver em uso)"):
-                        deleted_sector_name = st.session_state.config["sectors"].pop(i)['name']
-                        DataManager.save(CONFIG_FILE, st.session_state.config)
-                        add_activity("delete", "Setor Removido", f"O setor '{deleted_sector_name}' foi removido.")
+        with col2:
+            st.markdown("#### Equipes de Trabalho")
+            with st.form("form_add_team", clear_on_submit=True):
+                new_team_name = st.text_input("Nome da Nova Equipe", disabled=not is_admin).strip()
+                if st.form_submit_button("➕ Adicionar Equipe", disabled=not is_admin):
+                    if new_team_name and not any(t['name'].lower() == new_team_name.lower() for t in st.session_state.config["teams"]):
+                        st.session_state.config["teams"].append({"name": new_team_name})
+                        save_site_file(CONFIG_FILE)
+                        add_activity("config", "Equipe Adicionada", f"A equipe '{new_team_name}' foi criada.")
                         st.rerun()
+                    elif not new_team_name:
+                        st.error("O nome da equipe não pode ser vazio.")
+                    else:
+                        st.error("Esta equipe já existe.")
+
+            for i, team in enumerate(st.session_state.config["teams"]):
+                is_in_use = any(task.get('team') == team['name'] for task in st.session_state.tasks) or \
+                            any(emp.get('team') == team['name'] for emp in st.session_state.people.get('employees', []))
+
+                with st.expander(f"{team['name']} ({'Em uso' if is_in_use else 'Não utilizada'})"):
+                    with st.form(key=f"edit_team_{i}"):
+                        old_name = team['name']
+                        new_name = st.text_input("Nome da Equipe", value=old_name, disabled=not is_admin).strip()
+
+                        col_btn1, col_btn2 = st.columns([3, 1])
+                        if col_btn1.form_submit_button("💾 Salvar", disabled=not is_admin):
+                            if new_name and not any(t['name'].lower() == new_name.lower() for t in st.session_state.config["teams"] if t['name'] != old_name):
+                                st.session_state.config["teams"][i]['name'] = new_name
+                                save_site_file(CONFIG_FILE)
+                                # Atualiza em cascata
+                                for task in st.session_state.tasks:
+                                    if task.get('team') == old_name:
+                                        task['team'] = new_name
+                                save_tasks_state()
+                                for emp in st.session_state.people.get('employees', []):
+                                    if emp.get('team') == old_name:
+                                        emp['team'] = new_name
+                                save_site_file(PEOPLE_FILE)
+
+                                add_activity("update", "Equipe Atualizada", f"Equipe '{old_name}' atualizada para '{new_name}'.")
+                                st.rerun()
+                            else:
+                                st.error("Nome inválido ou já existente.")
+
+                        if col_btn2.form_submit_button("❌", disabled=not is_admin or is_in_use, help="Excluir equipe (só se não estiver em uso)"):
+                            deleted_team_name = st.session_state.config["teams"].pop(i)['name']
+                            save_site_file(CONFIG_FILE)
+                            add_activity("delete", "Equipe Removida", f"A equipe '{deleted_team_name}' foi removida.")
+                            st.rerun()
 
-    with col2:
-        st.markdown("#### Equipes de Trabalho")
-        with st.form("form_add_team", clear_on_submit=True):
-            new_team_name = st.text_input("Nome da Nova Equipe", disabled=not is_admin).strip()
-            if st.form_submit_button("➕ Adicionar Equipe", disabled=not is_admin):
-                if new_team_name and not any(t['name'].lower() == new_team_name.lower() for t in st.session_state.config["teams"]):
-                    st.session_state.config["teams"].append({"name": new_team_name})
-                    DataManager.save(CONFIG_FILE, st.session_state.config)
-                    add_activity("config", "Equipe Adicionada", f"A equipe '{new_team_name}' foi criada.")
-                    st.rerun()
-                elif not new_team_name:
-                    st.error("O nome da equipe não pode ser vazio.")
+        st.divider()
+        st.markdown("#### Calendário da Obra")
+        st.caption("Define os dias trabalhados. Prazos, caminho crítico e planejamento das equipes são contados em dias úteis.")
+        calendar_config = dict(st.session_state.config.get("calendar", {}))
+        calendar_config.setdefault("weekmask", DEFAULT_WEEKMASK)
+
+        with st.form("form_calendar_weekdays"):
+            weekday_names = ["Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom"]
+            weekday_cols = st.columns(7)
+            worked_days = [weekday_cols[i].checkbox(day, value=calendar_config["weekmask"][i] == "1", disabled=not is_admin, key=f"weekday_{i}")
+                           for i, day in enumerate(weekday_names)]
+            if st.form_submit_button("💾 Salvar Dias Trabalhados", disabled=not is_admin):
+                if not any(worked_days):
+                    st.error("Selecione ao menos um dia de trabalho.")
                 else:
-                    st.error("Esta equipe já existe.")
-
-        for i, team in enumerate(st.session_state.config["teams"]):
-            is_in_use = any(task.get('team') == team['name'] for task in st.session_state.tasks) or \
-                        any(emp.get('team') == team['name'] for emp in st.session_state.people.get('employees', []))
-
-            with st.expander(f"{team['name']} ({'Em uso' if is_in_use else 'Não utilizada'})"):
-                with st.form(key=f"edit_team_{i}"):
-                    old_name = team['name']
-                    new_name = st.text_input("Nome da Equipe", value=old_name, disabled=not is_admin).strip()
-
-                    col_btn1, col_btn2 = st.columns([3, 1])
-                    if col_btn1.form_submit_button("💾 Salvar", disabled=not is_admin):
-                        if new_name and not any(t['name'].lower() == new_name.lower() for t in st.session_state.config["teams"] if t['name'] != old_name):
-                            st.session_state.config["teams"][i]['name'] = new_name
-                            DataManager.save(CONFIG_FILE, st.session_state.config)
-                            # Atualiza em cascata
-                            for task in st.session_state.tasks:
-                                if task.get('team') == old_name:
-                                    task['team'] = new_name
-                            save_tasks_state()
-                            for emp in st.session_state.people.get('employees', []):
-                                if emp.get('team') == old_name:
-                                    emp['team'] = new_name
-                            DataManager.save(PEOPLE_FILE, st.session_state.people)
-
-                            df_tasks = pd.DataFrame(st.session_state.tasks)
-                            if not df_tasks.empty:
-                                df_tasks['created_at'] = pd.to_datetime(df_tasks['created_at'], errors='coerce')
-                                df_tasks['due_date'] = pd.to_datetime(df_tasks['due_date'], errors='coerce')
-                            st.session_state.tasks_df = df_tasks
-
-                            add_activity("update", "Equipe Atualizada", f"Equipe '{old_name}' atualizada para '{new_name}'.")
-                            st.rerun()
+                    calendar_config["weekmask"] = "".join("1" if worked else "0" for worked in worked_days)
+                    save_calendar_config(calendar_config)
+                    add_activity("config", "Calendário Atualizado", "Os dias trabalhados da semana foram alterados.")
+                    st.rerun()
+
+        col_cal1, col_cal2 = st.columns(2)
+        calendar_lists = ((col_cal1, "holidays", "Feriados", "Feriado"),
+                          (col_cal2, "blocked_days", "Dias Bloqueados (chuva, paralisações)", "Chuva"))
+        for column, list_key, list_title, default_desc in calendar_lists:
+            with column:
+                st.markdown(f"##### {list_title}")
+                with st.form(f"form_add_{list_key}", clear_on_submit=True):
+                    new_day = st.date_input("Data", value=date.today(), format="DD/MM/YYYY", disabled=not is_admin)
+                    new_desc = st.text_input("Descrição", value=default_desc, disabled=not is_admin).strip()
+                    if st.form_submit_button("➕ Adicionar", disabled=not is_admin):
+                        entries = list(calendar_config.get(list_key, []))
+                        if any(entry['date'] == new_day.isoformat() for entry in entries):
+                            st.error("Esta data já está cadastrada.")
                         else:
-                            st.error("Nome inválido ou já existente.")
+                            entries.append({"date": new_day.isoformat(), "desc": new_desc})
+                            calendar_config[list_key] = sorted(entries, key=lambda entry: entry['date'])
+                            save_calendar_config(calendar_config)
+                            add_activity("config", "Calendário Atualizado", f"{new_day.strftime('%d/%m/%Y')} ({new_desc}) marcado como dia sem trabalho.")
+                            st.rerun()
 
-                    if col_btn2.form_submit_button("❌", disabled=not is_admin or is_in_use, help="Excluir equipe (só se não estiver em uso)"):
-                        deleted_team_name = st.session_state.config["teams"].pop(i)['name']
-                        DataManager.save(CONFIG_FILE, st.session_state.config)
-                        add_activity("delete", "Equipe Removida", f"A equipe '{deleted_team_name}' foi removida.")
+                for i, entry in enumerate(calendar_config.get(list_key, [])):
+                    col_entry, col_delete = st.columns([4, 1])
+                    col_entry.write(f"{date.fromisoformat(entry['date']).strftime('%d/%m/%Y')} — {entry.get('desc', '')}")
+                    if col_delete.button("❌", key=f"delete_{list_key}_{i}", disabled=not is_admin):
+                        calendar_config[list_key] = [e for j, e in enumerate(calendar_config[list_key]) if j != i]
+                        save_calendar_config(calendar_config)
+                        add_activity("delete", "Calendário Atualizado", f"{date.fromisoformat(entry['date']).strftime('%d/%m/%Y')} voltou a ser dia de trabalho.")
                         st.rerun()
 
-# =================================================================================
-# --- ABA 5: RELATÓRIOS DETALHADOS ---
-# =================================================================================
-with tab5:
-    st.subheader("Gerador de Relatórios para Diretoria")
+    # =================================================================================
+    # --- ABA 5: RELATÓRIOS DETALHADOS ---
+    # =================================================================================
+    with tab5, profile_span("Aba: Relatórios"):
+        st.subheader("Gerador de Relatórios para Diretoria")
 
-    if 'report_html' not in st.session_state:
-        st.session_state.report_html = None
+        if 'report_file' not in st.session_state:
+            st.session_state.report_file = None
 
-    st.markdown("Selecione os filtros desejados para gerar um relatório detalhado e profissional.")
-    if not st.session_state.tasks:
-        st.info("Nenhuma tarefa cadastrada para gerar relatórios.")
-    else:
-        df_tasks = st.session_state.tasks_df
-        with st.container(border=True):
-            st.markdown("#### **1. Definir Parâmetros do Relatório**")
-            col_filter1, col_filter2, col_filter3 = st.columns(3)
-            all_teams = ["Todas"] + sorted(df_tasks['team'].unique().tolist())
-            selected_team = col_filter1.selectbox("Filtrar por Equipe:", all_teams, key="report_team_filter")
-
-            all_sectors = ["Todos"] + sorted(df_tasks['sector'].unique().tolist())
-            selected_sector = col_filter2.selectbox("Filtrar por Setor:", all_sectors, key="report_sector_filter")
-
-            all_statuses = ["Todos"] + sorted(df_tasks['status'].unique().tolist())
-            selected_status = col_filter3.selectbox("Filtrar por Status:", all_statuses, key="report_status_filter")
-
-        if st.button("📄 Gerar Relatório", use_container_width=True, type="primary"):
-            query = []
-            if selected_team != "Todas":
-                query.append(f"team == '{selected_team}'")
-            if selected_sector != "Todos":
-                query.append(f"sector == '{selected_sector}'")
-            if selected_status != "Todos":
-                query.append(f"status == '{selected_status}'")
-            
-            filtered_report_tasks = df_tasks.query(" and ".join(query)) if query else df_tasks.copy()
-
-            if filtered_report_tasks.empty:
-                st.warning("Nenhuma tarefa encontrada com os filtros selecionados.")
-                st.session_state.report_html = None
+        st.markdown("Selecione os filtros desejados para gerar um relatório detalhado e profissional.")
+        if not st.session_state.tasks:
+            st.info("Nenhuma tarefa cadastrada para gerar relatórios.")
+        else:
+            df_tasks = st.session_state.tasks_df
+            with st.container(border=True):
+                st.markdown("#### **1. Definir Parâmetros do Relatório**")
+                col_filter1, col_filter2, col_filter3 = st.columns(3)
+                all_teams = ["Todas"] + sorted(df_tasks['team'].unique().tolist())
+                selected_team = col_filter1.selectbox("Filtrar por Equipe:", all_teams, key="report_team_filter")
+
+                all_sectors = ["Todos"] + sorted(df_tasks['sector'].unique().tolist())
+                selected_sector = col_filter2.selectbox("Filtrar por Setor:", all_sectors, key="report_sector_filter")
+
+                all_statuses = ["Todos"] + sorted(df_tasks['status'].unique().tolist())
+                selected_status = col_filter3.selectbox("Filtrar por Status:", all_statuses, key="report_status_filter")
+
+                col_period1, col_period2 = st.columns([1, 2])
+                filter_by_period = col_period1.checkbox("Filtrar por Período", key="report_period_toggle",
+                                                        help="Inclui apenas as tarefas em execução em algum dia do período.")
+                report_period = col_period2.date_input("Período:", value=(date.today().replace(day=1), date.today()), format="DD/MM/YYYY",
+                                                       key="report_period_filter", disabled=not filter_by_period)
+
+            if st.button("📄 Gerar Relatório", use_container_width=True, type="primary"):
+                period = report_period if filter_by_period and len(report_period) == 2 else None
+                filtered_report_tasks, filters = filter_report_tasks(df_tasks, selected_team, selected_sector, selected_status,
+                                                                     period, st.session_state.interval_index)
+
+                # O relatório anterior desta sessão é descartado antes de gerar um novo
+                previous_report = st.session_state.report_file
+                if previous_report and os.path.exists(previous_report['path']):
+                    os.remove(previous_report['path'])
+                st.session_state.report_file = None
+
+                if filtered_report_tasks.empty:
+                    st.warning("Nenhuma tarefa encontrada com os filtros selecionados.")
+                else:
+                    project_goals = st.session_state.config.get("project_goals", "")
+                    df_people = pd.DataFrame(st.session_state.people.get('employees', []))
+                    report_chunks = iter_report_html(filtered_report_tasks, df_people, project_goals, filters, st.session_state.wbs,
+                                                     st.session_state.calendar, st.session_state.interval_index)
+                    started = time.perf_counter()
+                    with profile_span("Geração do relatório"):
+                        report_path, report_size = write_report_file(report_chunks)
+                    get_metrics().observe("gestor_obras_report_duration_seconds", time.perf_counter() - started)
+                    get_metrics().set("gestor_obras_report_bytes", report_size)
+                    st.session_state.report_file = {
+                        "path": report_path,
+                        "size": report_size,
+                        "filters": filters,
+                        "generated_at": datetime.now().strftime('%d/%m/%Y %H:%M'),
+                        "metrics": compute_report_metrics(filtered_report_tasks, pd.to_datetime(date.today()), st.session_state.wbs,
+                                                          st.session_state.interval_index),
+                    }
+
+        report_file = st.session_state.report_file
+        if report_file and os.path.exists(report_file['path']):
+            st.divider()
+            st.markdown("#### **2. Resumo e Download**")
+
+            # Pré-visualização leve: apenas os indicadores, sem carregar o documento completo no navegador
+            metrics = report_file['metrics']
+            filters = report_file['filters']
+            st.caption(f"Gerado em {report_file['generated_at']} | Equipe: {filters['team']} | Setor: {filters['sector']} | "
+                       f"Status: {filters['status']} | Período: {filters.get('period', 'Todo o projeto')} | Tamanho: {report_file['size'] / 1024:.0f} KB")
+            col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+            col_m1.metric("Total de Tarefas", metrics['total_tasks'])
+            col_m2.metric("Progresso Geral (Ponderado)", f"{metrics['progress']:.1f}%")
+            col_m3.metric("Taxa de Conclusão", f"{metrics['completion_rate']:.1f}%")
+            col_m4.metric("Tarefas Atrasadas", metrics['overdue_tasks'])
+
+            download_name = f"relatorio_obra_{datetime.now().strftime('%Y%m%d')}.html"
+            if st.get_option("server.enableStaticServing"):
+                # O arquivo é servido pelo próprio Streamlit em partes: nem a sessão nem o cache de mídia guardam uma cópia
+                report_url = f"{REPORTS_URL}/{os.path.basename(report_file['path'])}"
+                st.markdown(f'<a href="{report_url}" download="{download_name}">📥 Baixar Relatório em HTML</a>',
+                            unsafe_allow_html=True)
             else:
-                filters = {"team": selected_team, "sector": selected_sector, "status": selected_status}
-                project_goals = st.session_state.config.get("project_goals", "")
-                df_people = pd.DataFrame(st.session_state.people.get('employees', []))
-                st.session_state.report_html = generate_report_html(filtered_report_tasks, df_people, project_goals, filters)
-
-    if st.session_state.report_html:
-        st.divider()
-        st.markdown("#### **2. Pré-visualização e Download**")
-
-        st.download_button(
-            label="📥 Baixar Relatório em HTML",
-            data=st.session_state.report_html,
-            file_name=f"relatorio_obra_{datetime.now().strftime('%Y%m%d')}.html",
-            mime="text/html",
-            use_container_width=True
+                st.caption("Sem server.enableStaticServing, o download passa o relatório inteiro pela memória do servidor.")
+                with open(report_file['path'], 'rb') as report_stream:
+                    st.download_button(
+                        label="📥 Baixar Relatório em HTML",
+                        data=report_stream,
+                        file_name=download_name,
+                        mime="text/html",
+                        use_container_width=True
+                    )
+
+    # =================================================================================
+    # --- ABA 6: ANÁLISE ESTRUTURAL ---
+    # =================================================================================
+    with tab6, profile_span("Aba: Análise Estrutural"):
+        st.subheader("Geração de Diagramas da Obra")
+        st.markdown("Use os botões abaixo para gerar e baixar o Organograma e o Fluxograma da obra em formato HTML, prontos para impressão.")
+
+        orientation = st.radio(
+            "Orientação de Impressão",
+            ["Paisagem", "Retrato"],
+            index=0,
+            horizontal=True,
+            help="Escolha como a página será orientada ao imprimir."
         )
+        st.divider()
 
-        with st.container(height=600, border=True):
-            st.components.v1.html(st.session_state.report_html, height=600, scrolling=True)
-
-# =================================================================================
-# --- ABA 6: ANÁLISE ESTRUTURAL ---
-# =================================================================================
-with tab6:
-    st.subheader("Geração de Diagramas da Obra")
-    st.markdown("Use os botões abaixo para gerar e baixar o Organograma e o Fluxograma da obra em formato HTML, prontos para impressão.")
-    
-    orientation = st.radio(
-        "Orientação de Impressão",
-        ["Paisagem", "Retrato"],
-        index=0,
-        horizontal=True,
-        help="Escolha como a página será orientada ao imprimir."
-    )
-    st.divider()
-
-    col1, col2 = st.columns(2)
+        col1, col2 = st.columns(2)
 
-    with col1:
-        st.markdown("##### Organograma Estrutural")
-        # Botão para gerar o Organograma
-        if st.button("📊 Gerar Organograma", use_container_width=True):
+        with col1:
+            st.markdown("##### Organograma Estrutural")
             employees = st.session_state.people.get('employees', [])
-            tasks = st.session_state.get('tasks', [])
-            if employees:
-                org_chart_syntax = generate_org_chart_mermaid_syntax(employees, tasks)
-                st.session_state.org_chart_html = create_printable_diagram_html(
-                    "Organograma - Estrutura Hierárquica da Obra",
-                    org_chart_syntax,
-                    orientation.lower()
+            largest_team = max((sum(1 for e in employees if e.get('team') == t) for t in {e.get('team') for e in employees}), default=0)
+            collapse_org = st.checkbox("Modo resumido", value=largest_team > ORG_COLLAPSE_TEAM_SIZE, key="collapse_org_chart",
+                                       help=f"Equipes com mais de {ORG_COLLAPSE_TEAM_SIZE} colaboradores aparecem como um único nó, com a contagem por função.")
+            # Botão para gerar o Organograma
+            if st.button("📊 Gerar Organograma", use_container_width=True):
+                tasks = st.session_state.get('tasks', [])
+                if employees:
+                    org_chart_syntax = cached_org_chart(st.session_state.data_version, compute_data_version(employees), collapse_org,
+                                                        date.today().isoformat(), employees, tasks, st.session_state.calendar)
+                    st.session_state.org_chart_html = create_printable_diagram_html(
+                        "Organograma - Estrutura Hierárquica da Obra",
+                        org_chart_syntax,
+                        orientation.lower()
+                    )
+                    st.toast("Organograma gerado com sucesso!")
+                else:
+                    st.warning("Nenhum funcionário cadastrado para gerar o organograma.")
+                    st.session_state.org_chart_html = None
+
+            # Botão de download e pré-visualização para o Organograma
+            if 'org_chart_html' in st.session_state and st.session_state.org_chart_html:
+                st.download_button(
+                    label="📥 Baixar Organograma (.html)",
+                    data=st.session_state.org_chart_html,
+                    file_name="organograma_obra.html",
+                    mime="text/html",
+                    use_container_width=True
                 )
-                st.toast("Organograma gerado com sucesso!")
-            else:
-                st.warning("Nenhum funcionário cadastrado para gerar o organograma.")
-                st.session_state.org_chart_html = None
-
-        # Botão de download e pré-visualização para o Organograma
-        if 'org_chart_html' in st.session_state and st.session_state.org_chart_html:
-            st.download_button(
-                label="📥 Baixar Organograma (.html)",
-                data=st.session_state.org_chart_html,
-                file_name="organograma_obra.html",
-                mime="text/html",
-                use_container_width=True
-            )
-            st.markdown("###### Pré-visualização:")
-            with st.container(height=400, border=True):
-                st.components.v1.html(st.session_state.org_chart_html, height=400, scrolling=True)
-
-    with col2:
-        st.markdown("##### Fluxograma de Atividades")
-        # Botão para gerar o Fluxograma
-        if st.button("🌊 Gerar Fluxograma", use_container_width=True):
-            tasks = st.session_state.get('tasks', [])
-            if tasks:
-                flowchart_syntax = generate_flowchart_mermaid_syntax(tasks)
-                st.session_state.flowchart_html = create_printable_diagram_html(
-                    "Fluxograma - Sequência de Atividades da Obra",
-                    flowchart_syntax,
-                    orientation.lower()
+                st.markdown("###### Pré-visualização:")
+                with st.container(height=400, border=True):
+                    st.components.v1.html(st.session_state.org_chart_html, height=400, scrolling=True)
+
+        with col2:
+            st.markdown("##### Fluxograma de Atividades")
+            flow_layout = st.selectbox("Layout", FLOWCHART_LAYOUTS, index=2 if len(st.session_state.tasks) > FLOWCHART_COLLAPSE_TASKS else 0,
+                                       key="flowchart_layout",
+                                       help="Faixas por Setor: uma faixa por frente, tarefas em ordem de data. Dependências: setas entre predecessoras. "
+                                            "Resumido por Setor: contagens por status em cada setor, para obras grandes.")
+            # Botão para gerar o Fluxograma
+            if st.button("🌊 Gerar Fluxograma", use_container_width=True):
+                tasks = st.session_state.get('tasks', [])
+                if tasks:
+                    sector_order = tuple(sector['name'] for sector in st.session_state.config.get('sectors', []))
+                    flowchart_syntax = cached_flowchart(st.session_state.data_version, calendar_cache_key(), flow_layout, sector_order,
+                                                        date.today().isoformat(), tasks, st.session_state.scheduler)
+                    st.session_state.flowchart_html = create_printable_diagram_html(
+                        "Fluxograma - Sequência de Atividades da Obra",
+                        flowchart_syntax,
+                        orientation.lower()
+                    )
+                    st.toast("Fluxograma gerado com sucesso!")
+                else:
+                    st.warning("Nenhuma tarefa cadastrada para gerar o fluxograma.")
+                    st.session_state.flowchart_html = None
+
+            # Botão de download e pré-visualização para o Fluxograma
+            if 'flowchart_html' in st.session_state and st.session_state.flowchart_html:
+                st.download_button(
+                    label="📥 Baixar Fluxograma (.html)",
+                    data=st.session_state.flowchart_html,
+                    file_name="fluxograma_obra.html",
+                    mime="text/html",
+                    use_container_width=True
                 )
-                st.toast("Fluxograma gerado com sucesso!")
+                st.markdown("###### Pré-visualização:")
+                with st.container(height=400, border=True):
+                    st.components.v1.html(st.session_state.flowchart_html, height=400, scrolling=True)
+
+        st.divider()
+        st.markdown("##### Caminho Crítico e Impacto de Atrasos")
+        tasks = st.session_state.get('tasks', [])
+        if not tasks:
+            st.info("Nenhuma tarefa cadastrada para calcular o caminho crítico.")
+        else:
+            scheduler = st.session_state.scheduler
+            task_names = {t['id']: t.get('name', 'Tarefa sem nome').strip() for t in tasks}
+            df_schedule = pd.DataFrame(scheduler.schedule_rows())
+            df_schedule.insert(0, 'Tarefa', df_schedule['id'].map(task_names))
+            df_schedule = df_schedule.drop(columns='id').rename(columns={
+                'early_start': 'Início + Cedo', 'early_finish': 'Término + Cedo', 'late_start': 'Início + Tarde',
+                'late_finish': 'Término + Tarde', 'float': 'Folga (dias úteis)', 'critical': 'Crítica'})
+            col_cpm1, col_cpm2 = st.columns(2)
+            col_cpm1.metric("Término Previsto da Obra", scheduler.project_end_date().strftime('%d/%m/%Y'))
+            col_cpm2.metric("Tarefas no Caminho Crítico", int(df_schedule['Crítica'].sum()))
+            st.dataframe(df_schedule.sort_values(['Folga (dias úteis)', 'Início + Cedo']), use_container_width=True, hide_index=True)
+
+            col_sim1, col_sim2 = st.columns([3, 1])
+            delayed_task = col_sim1.selectbox("O que atrasa se esta tarefa atrasar?", list(task_names), format_func=task_names.get, key="cpm_delay_task")
+            delay_days = col_sim2.number_input("Dias úteis de atraso", min_value=1, max_value=365, value=5, key="cpm_delay_days")
+            slips, new_end = scheduler.simulate_delay(delayed_task, int(delay_days))
+            impacted = {task_id: days for task_id, days in slips.items() if task_id != delayed_task}
+            if impacted:
+                st.warning(f"{len(impacted)} tarefa(s) seriam empurradas. Novo término da obra: **{new_end.strftime('%d/%m/%Y')}**.")
+                st.dataframe(pd.DataFrame({'Tarefa': [task_names[t] for t in impacted], 'Atraso no Término (dias úteis)': list(impacted.values())}),
+                             use_container_width=True, hide_index=True)
+            else:
+                st.success(f"Nenhuma outra tarefa seria afetada. Término da obra: **{new_end.strftime('%d/%m/%Y')}**.")
+
+    # =================================================================================
+    # --- ABA 7: PLANEJAMENTO DE EQUIPES ---
+    # =================================================================================
+    with tab7, profile_span("Aba: Planejamento de Equipes"):
+        st.subheader("Planejamento Diário/Semanal por Frente de Trabalho")
+        st.markdown("Distribui o efetivo de cada equipe (cadastrado em Gestão de Pessoal) entre as frentes, dia a dia, "
+                    "conforme as janelas das tarefas, e aponta os dias em que a equipe está sobrecarregada.")
+        df_tasks = st.session_state.tasks_df
+        df_dated = df_tasks.dropna(subset=['created_at', 'due_date']) if not df_tasks.empty else df_tasks
+        if df_dated.empty:
+            st.info("Nenhuma tarefa com datas válidas para planejar.")
+        else:
+            col_plan1, col_plan2 = st.columns([2, 1])
+            plan_window = col_plan1.date_input("Período do Planejamento", value=(df_dated['created_at'].min().date(), df_dated['due_date'].max().date()),
+                                               format="DD/MM/YYYY", key="plan_window")
+            plan_view = col_plan2.radio("Visão", ["Diária", "Semanal"], horizontal=True, key="plan_view")
+
+            plan = None
+            if len(plan_window) == 2:
+                plan = build_capacity_plan(df_dated, st.session_state.people.get('employees', []), plan_window[0], plan_window[1],
+                                           st.session_state.calendar, st.session_state.interval_index)
+            if plan is None:
+                st.info("Nenhuma tarefa no período selecionado.")
             else:
-                st.warning("Nenhuma tarefa cadastrada para gerar o fluxograma.")
-                st.session_state.flowchart_html = None
-
-        # Botão de download e pré-visualização para o Fluxograma
-        if 'flowchart_html' in st.session_state and st.session_state.flowchart_html:
-            st.download_button(
-                label="📥 Baixar Fluxograma (.html)",
-                data=st.session_state.flowchart_html,
-                file_name="fluxograma_obra.html",
-                mime="text/html",
-                use_container_width=True
-            )
-            st.markdown("###### Pré-visualização:")
-            with st.container(height=400, border=True):
-                st.components.v1.html(st.session_state.flowchart_html, height=400, scrolling=True)
\ No newline at end of file
+                overloads = capacity_overload_frame(plan)
+                if overloads.empty:
+                    st.success("Nenhuma equipe sobrecarregada no período.")
+                else:
+                    st.error(f"{len(overloads)} período(s) de sobrecarga encontrados: a demanda das frentes supera o efetivo da equipe.")
+                    st.dataframe(overloads, use_container_width=True, hide_index=True)
+
+                df_plan = capacity_plan_frame(plan)
+                plan_sectors = [s['name'] for s in st.session_state.config.get("sectors", []) if s['name'] in set(df_plan['Setor'])]
+                plan_sectors += sorted(set(df_plan['Setor']) - set(plan_sectors))
+                for sector_name in plan_sectors:
+                    df_sector = df_plan[df_plan['Setor'] == sector_name].sort_values('Data', kind='stable')
+                    with st.expander(f"{sector_name} — {df_sector['Equipe'].nunique()} equipe(s)", expanded=False):
+                        if plan_view == "Semanal":
+                            period = df_sector['Data'].dt.to_period('W-SUN').dt.start_time.dt.strftime('Sem. %d/%m')
+                            values, label = 'Alocados', "Homens-dia alocados por semana"
+                        else:
+                            period = df_sector['Data'].dt.strftime('%d/%m')
+                            values, label = 'Alocados', "Colaboradores alocados por dia"
+                        pivot = df_sector.assign(Periodo=period).pivot_table(index='Equipe', columns='Periodo', values=values,
+                                                                             aggfunc='sum', sort=False).fillna(0)
+                        st.caption(label)
+                        st.dataframe(pivot.round(1), use_container_width=True)
+
+    # --- PAINEL DE PERFIL (SOMENTE ADMIN) ---
+    profile = end_profiled_rerun()
+    if is_admin:
+        render_profiling_panel(profile)
+
+
+def render_profiling_panel(profile):
+    """Painel na barra lateral com o tempo de cada trecho da última execução e os percentis das anteriores."""
+    history = st.session_state.setdefault('profile_history', [])
+    if profile:
+        history.append(profile)
+        del history[:-PROFILE_HISTORY_RERUNS]
+
+    with st.sidebar.expander("⏱️ Perfil de Desempenho"):
+        st.toggle("Medir tempos das execuções", key="profiling_enabled",
+                  help="Cronometra barra lateral, abas, seções do dashboard e gravações em disco. Desligado, o custo é praticamente nulo.")
+        if not history:
+            st.caption("Ligue a medição e interaja com o app para coletar tempos.")
+            return
+        last = history[-1]
+        st.markdown(f"**Última execução:** {last['total'] * 1000:.0f} ms")
+        st.dataframe(pd.DataFrame([{'Trecho': "\u2003" * depth + name, 'ms': duration * 1000, '%': 100 * duration / last['total']}
+                                   for depth, name, duration in last['spans']]).round(1),
+                     use_container_width=True, hide_index=True)
+        st.markdown(f"**Percentis das últimas {len(history)} execuções**")
+        st.dataframe(profile_percentiles(history).round(1), use_container_width=True, hide_index=True)
+        if st.button("Limpar histórico", key="clear_profile_history", use_container_width=True):
+            history.clear()
+            st.rerun()
+
+
+if __name__ == "__main__":
+    main()
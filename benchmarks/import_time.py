@@ -0,0 +1,105 @@
+"""Relatório de tempo de importação (python -X importtime) dos pontos de entrada da aplicação.
+
+Cada cenário roda em um processo Python novo, algumas vezes, e o relatório fica com a execução mais
+rápida. O resultado vai para a tela e para benchmarks/import_time.md, que é versionado para que
+mudanças no tempo de abertura apareçam na revisão.
+
+Uso:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeticoes 5 --top 15
+"""
+import argparse
+import os
+import platform
+import subprocess
+import sys
+from datetime import date
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+REPORT_FILE = os.path.join(BENCH_DIR, "import_time.md")
+HEAVY_MODULES = ["numpy", "pandas", "plotly.express"]
+
+# (nome, o que representa, código executado com -X importtime)
+SCENARIOS = [
+    ("streamlit", "Só o framework, referência para os demais", "import streamlit"),
+    ("tela de login", "Streamlit + script da interface: o que roda antes do formulário de acesso aparecer",
+     "import streamlit, PLANEJAMENTO_DE_OBRA"),
+    ("dashboard", "Tela de login + pilha de análise e gráficos, carregada no primeiro acesso ao dashboard",
+     "import streamlit, PLANEJAMENTO_DE_OBRA, numpy, pandas, plotly.express"),
+    ("núcleo (ferramentas)", "Pacote gestor_obras sem Streamlit, como importado por scripts e benchmarks",
+     "import gestor_obras.domain, gestor_obras.analytics, gestor_obras.rendering"),
+]
+
+
+def run_importtime(code):
+    """Executa `code` com -X importtime e devolve [(módulo, próprio_us, acumulado_us, nível)]."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_ROOT,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), level))
+    return rows
+
+
+def summarize(rows, top, startup=frozenset()):
+    """Totais do cenário, sem os módulos que o interpretador importa antes de rodar qualquer código."""
+    rows = [row for row in rows if row[0] not in startup]
+    loaded = {name for name, _, _, _ in rows}
+    first_level = min(level for *_, level in rows)
+    packages = sorted((row for row in rows if row[3] == first_level), key=lambda row: row[2], reverse=True)
+    return {
+        "total_ms": sum(self_us for _, self_us, _, _ in rows) / 1000,
+        "modules": len(rows),
+        "heavy": {module: module in loaded for module in HEAVY_MODULES},
+        "top": [(name, cumulative_us / 1000) for name, _, cumulative_us, _ in packages[:top]],
+    }
+
+
+def build_report(results, repetitions):
+    lines = [
+        "# Tempo de importação",
+        "",
+        f"Gerado por `python benchmarks/import_time.py` em {date.today().isoformat()} "
+        f"(Python {platform.python_version()}, {platform.machine()}, melhor de {repetitions} execuções). "
+        "Os totais não incluem a inicialização do próprio interpretador.",
+        "",
+        "| Cenário | Total (ms) | Módulos | " + " | ".join(HEAVY_MODULES) + " |",
+        "|---|---:|---:|" + "---|" * len(HEAVY_MODULES),
+    ]
+    for name, _, summary in results:
+        marks = " | ".join("carregado" if summary["heavy"][module] else "—" for module in HEAVY_MODULES)
+        lines.append(f"| {name} | {summary['total_ms']:.0f} | {summary['modules']} | {marks} |")
+    for name, description, summary in results:
+        lines += ["", f"## {name}", "", description + ".", "", "| Importação de primeiro nível | Acumulado (ms) |", "|---|---:|"]
+        lines += [f"| {module} | {milliseconds:.1f} |" for module, milliseconds in summary["top"]]
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação dos pontos de entrada da aplicação.")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="Importações de primeiro nível listadas por cenário")
+    parser.add_argument("--nao-salvar", action="store_true", help="Só mostra o relatório, sem regravar import_time.md")
+    args = parser.parse_args()
+
+    startup = frozenset(name for name, *_ in run_importtime("pass"))
+    results = []
+    for name, description, code in SCENARIOS:
+        runs = [summarize(run_importtime(code), args.top, startup) for _ in range(args.repeticoes)]
+        results.append((name, description, min(runs, key=lambda summary: summary["total_ms"])))
+
+    report = build_report(results, args.repeticoes)
+    print(report)
+    if not args.nao_salvar:
+        with open(REPORT_FILE, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(f"Relatório salvo em {REPORT_FILE}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Teste de carga: vários trabalhadores sobre a mesma pasta de dados, em threads ou em processos.
+
+Cada trabalhador abre a obra como uma sessão da interface (load_site_state com versões) e repete,
+até o fim do tempo, páginas pesadas — sincronização com o diário de eventos, cubo e indicadores do
+dashboard, previsão de conclusão e relatório HTML — e, numa fração das vezes, grava um valor único
+no efetivo de uma tarefa (operations.update_task, com o compare-and-swap por registro). A mesma
+carga roda com N threads em um só processo, presas ao GIL, e com N processos, como vários
+trabalhadores do Streamlit.
+
+Ao final de cada rodada o diário é conferido: números de sequência contínuos e sem repetição, o
+arquivo de tarefas igual à reconstrução pelo diário e, para cada alteração aceita, um evento que
+troca exatamente o valor que o trabalhador via pelo valor que ele gravou (nenhuma alteração
+perdida ou aplicada sobre uma versão desatualizada entre processos). Cada trabalhador faz pelo
+menos --escritas-minimas alterações, completadas depois da janela medida se o sorteio não chegou
+a elas; uma rodada sem nenhuma alteração aceita falha, porque a conferência não teria testado nada.
+
+Uso:
+    python benchmarks/load_test.py                                  # escala pequena, 1, 2 e 4 trabalhadores
+    python benchmarks/load_test.py --escala media --trabalhadores 1 2 4 8 --duracao 30
+    python benchmarks/load_test.py --modo processos --escrita 0.2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd  # noqa: E402
+
+from gestor_obras import operations  # noqa: E402
+from gestor_obras.analytics import build_dashboard_cube, cube_kpis, filter_report_tasks, forecast_completion  # noqa: E402
+from gestor_obras.constants import EVENTS_DIR, TASKS_FILE  # noqa: E402
+from gestor_obras.domain import load_site_state  # noqa: E402
+from gestor_obras.rendering import iter_report_html  # noqa: E402
+from gestor_obras.storage import DataManager, EventLog  # noqa: E402
+from synthetic_data import SCALES, generate_site, write_site  # noqa: E402
+
+MODES = {"threads": ThreadPoolExecutor, "processos": ProcessPoolExecutor}
+START_DELAY_S = 3.0  # Tempo para todos os trabalhadores carregarem a obra antes da largada
+
+
+def render_page(state, today):
+    """Uma execução pesada da interface: sincroniza com o diário e monta dashboard, previsão e relatório."""
+    operations.sync_site_state(state)
+    tasks_df = state['tasks_df']
+    cube_kpis(build_dashboard_cube(tasks_df, state['wbs'], state['calendar'], today))
+    forecast_completion(tasks_df, state['calendar'], today)
+    filtered_df, filters = filter_report_tasks(tasks_df, index=state['interval_index'])
+    personnel_df = pd.DataFrame(state['people'].get('employees', []))
+    for _ in iter_report_html(filtered_df, personnel_df, state['config'].get('project_goals', ''), filters, state['wbs'],
+                              state['calendar'], state['interval_index']):
+        pass
+
+
+def run_worker(directory, start_at, duration, write_ratio, seed, min_writes):
+    """Laço de um trabalhador. Retorna as páginas dentro da janela medida e todas as alterações."""
+    if os.getcwd() != directory:
+        os.chdir(directory)  # Processo novo: a aplicação usa caminhos relativos
+    rng = random.Random(seed)
+    state = load_site_state(track_versions=True)
+    leaf_ids = [task['id'] for task in state['tasks'] if not state['wbs'].is_summary(task['id'])]
+    today = date.today()
+    counts = {"pages": 0, "writes": [], "conflicts": 0}
+
+    def write():
+        task_id = rng.choice(leaf_ids)
+        seen = next(t for t in state['tasks'] if t['id'] == task_id).get('crew_size')
+        value = (seed + 1) * 1_000_000 + len(counts["writes"]) + counts["conflicts"]  # Único entre trabalhadores
+        try:
+            operations.update_task(state, task_id, {'crew_size': value})
+        except operations.ConflictError:
+            counts["conflicts"] += 1
+        else:
+            counts["writes"].append((task_id, seen, value))
+
+    time.sleep(max(start_at - time.time(), 0))
+    end_at = start_at + duration
+    while time.time() < end_at:
+        if rng.random() < write_ratio:
+            write()
+        else:
+            render_page(state, today)
+            if time.time() <= end_at:
+                counts["pages"] += 1
+    while len(counts["writes"]) + counts["conflicts"] < min_writes:  # Fora da janela: só para a conferência
+        operations.sync_site_state(state)
+        write()
+    return counts
+
+
+def verify_store(directory, accepted_writes):
+    """Confere o diário e os arquivos depois de uma rodada. Retorna a lista de problemas encontrados."""
+    problems = []
+    log = EventLog(os.path.join(directory, EVENTS_DIR))
+    with open(log.path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    if [entry['seq'] for entry in entries] != list(range(1, len(entries) + 1)):
+        problems.append("números de sequência do diário com falhas ou repetidos")
+    records, _ = log.state_as_of(datetime.now())
+    tasks = {task['id']: task for task in DataManager.load(os.path.join(directory, TASKS_FILE), [])}
+    if records['tasks'] != tasks:
+        problems.append("arquivo de tarefas diferente da reconstrução pelo diário")
+    crew_events = {(entry['id'], entry['changes']['crew_size'][1]): entry['changes']['crew_size'][0] for entry in entries
+                   if entry['op'] == 'update' and 'crew_size' in entry['changes']}
+    lost = sum(1 for task_id, seen, value in accepted_writes
+               if (task_id, value) not in crew_events or crew_events[(task_id, value)] != seen)
+    if lost or len(crew_events) != len(accepted_writes):
+        problems.append(f"{lost} de {len(accepted_writes)} alterações aceitas não aparecem no diário sobre a versão vista")
+    if not accepted_writes:
+        problems.append("nenhuma alteração aceita: a conferência não testou nada")
+    return problems
+
+
+def run_round(template, mode, workers, duration, write_ratio, min_writes):
+    directory = tempfile.mkdtemp(prefix=f"carga_{mode}_{workers}_")
+    shutil.copytree(template, directory, dirs_exist_ok=True)
+    os.chdir(directory)  # As threads dividem o diretório de trabalho do processo
+    start_at = time.time() + START_DELAY_S
+    executor_options = {"mp_context": multiprocessing.get_context("spawn")} if mode == "processos" else {}
+    with MODES[mode](max_workers=workers, **executor_options) as executor:
+        futures = [executor.submit(run_worker, directory, start_at, duration, write_ratio, seed, min_writes)
+                   for seed in range(workers)]
+        results = [future.result() for future in futures]
+    os.chdir(template)
+    totals = {"pages": sum(result["pages"] for result in results), "conflicts": sum(result["conflicts"] for result in results),
+              "writes": [write for result in results for write in result["writes"]]}
+    totals["problems"] = verify_store(directory, totals["writes"])
+    shutil.rmtree(directory, ignore_errors=True)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a vazão com vários trabalhadores (threads ou processos) sobre os mesmos dados.")
+    parser.add_argument("--escala", choices=SCALES, default="pequena")
+    parser.add_argument("--trabalhadores", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modo", choices=[*MODES, "ambos"], default="ambos")
+    parser.add_argument("--duracao", type=float, default=10.0, help="Segundos medidos por rodada")
+    parser.add_argument("--escrita", type=float, default=0.1, help="Fração das operações que alteram uma tarefa")
+    parser.add_argument("--escritas-minimas", type=int, default=5,
+                        help="Alterações por trabalhador garantidas para a conferência, mesmo que o sorteio não chegue a elas")
+    args = parser.parse_args()
+
+    template = tempfile.mkdtemp(prefix=f"carga_obra_{args.escala}_")
+    print(f"Gerando dados sintéticos ({args.escala}) em {template} ...")
+    write_site(template, generate_site(**SCALES[args.escala]))
+    modes = list(MODES) if args.modo == "ambos" else [args.modo]
+    print(f"CPUs: {os.cpu_count()} · {args.duracao:.0f} s por rodada · {args.escrita:.0%} de escritas\n")
+
+    print(f"{'Modo':<11}{'Trab.':>6}{'Páginas/s':>12}{'Escritas':>10}{'Conflitos':>11}{'Aceleração':>12}  Conferência")
+    failed = False
+    for mode in modes:
+        reference = None
+        for workers in args.trabalhadores:
+            totals = run_round(template, mode, workers, args.duracao, args.escrita, args.escritas_minimas)
+            throughput = totals["pages"] / args.duracao
+            reference = reference or throughput
+            failed = failed or bool(totals["problems"])
+            check = "ok" if not totals["problems"] else "; ".join(totals["problems"])
+            print(f"{mode:<11}{workers:>6}{throughput:>12.2f}{len(totals['writes']):>10}{totals['conflicts']:>11}"
+                  f"{throughput / reference if reference else 0:>11.2f}x  {check}")
+    shutil.rmtree(template, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
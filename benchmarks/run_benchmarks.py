@@ -0,0 +1,156 @@
+"""Benchmarks dos caminhos críticos da aplicação sobre dados sintéticos.
+
+As medições chamam diretamente o pacote gestor_obras, sem Streamlit. Cada medição roda N vezes e registra a mediana e o mínimo. Com --salvar-baseline, os números
+viram a referência em benchmarks/baseline.json; nas execuções seguintes, medições mais lentas que
+a referência além da tolerância são apontadas como regressão (código de saída 1).
+
+Uso:
+    python benchmarks/run_benchmarks.py                       # escala pequena, compara com a baseline
+    python benchmarks/run_benchmarks.py --escala media --repeticoes 3
+    python benchmarks/run_benchmarks.py --salvar-baseline      # atualiza a referência da escala
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import pandas as pd  # noqa: E402
+
+from gestor_obras.analytics import (  # noqa: E402
+    build_capacity_plan, build_dashboard_cube, forecast_completion, planned_progress_curve, prepare_gantt_rows,
+    sector_team_matrix, team_workload_matrix,
+)
+from gestor_obras.constants import ACTIVITIES_FILE, TASKS_FILE  # noqa: E402
+from gestor_obras.domain import CriticalPathScheduler, WbsRollup, load_site_state  # noqa: E402
+from gestor_obras.rendering import (  # noqa: E402
+    generate_flowchart_mermaid_syntax, generate_org_chart_mermaid_syntax, iter_report_html,
+)
+from gestor_obras.storage import DataManager, create_backup_zip  # noqa: E402
+from synthetic_data import SCALES, generate_site, write_site  # noqa: E402
+
+state = {}  # Obra carregada, no lugar do st.session_state da interface
+
+
+def load_project():
+    """Carrega a obra como a interface faz ao abrir uma sessão: dados, calendário, DataFrame, índices, CPM e EAP."""
+    state.clear()
+    state.update(load_site_state())
+
+
+def build_benchmarks():
+    """Lista (nome, função) das medições. Cada função roda sobre a obra carregada por load_project()."""
+    calendar = lambda: state['calendar']  # noqa: E731
+    tasks_df = lambda: state['tasks_df']  # noqa: E731
+    employees = lambda: state['people']['employees']  # noqa: E731
+    window = lambda: (tasks_df()['created_at'].min(), tasks_df()['due_date'].max())  # noqa: E731
+
+    def report():
+        filters = {"team": "Todas", "sector": "Todos", "status": "Todos", "period": "Todo o projeto"}
+        chunks = iter_report_html(tasks_df().copy(), pd.DataFrame(employees()), state['config'].get('project_goals', ''), filters, state['wbs'],
+                                  calendar(), state['interval_index'])
+        return sum(len(chunk) for chunk in chunks)  # Consome os pedaços sem juntar o documento
+
+    return [
+        ("DataManager.load (tarefas)", lambda: DataManager.load(TASKS_FILE, [])),
+        ("DataManager.load (atividades)", lambda: DataManager.load(ACTIVITIES_FILE, [])),
+        ("DataManager.save (tarefas)", lambda: DataManager.save(TASKS_FILE, state['tasks'])),
+        ("carga da obra (dados + índices)", load_project),
+        ("dashboard: cubo de filtros", lambda: build_dashboard_cube(tasks_df(), state['wbs'], calendar())),
+        ("dashboard: matriz setor × equipe", lambda: sector_team_matrix(tasks_df(), calendar=calendar())),
+        ("dashboard: carga por equipe", lambda: team_workload_matrix(tasks_df(), *window(), calendar())),
+        ("dashboard: previsão de conclusão", lambda: forecast_completion(tasks_df(), calendar())),
+        ("dashboard: gantt (nível automático)", lambda: prepare_gantt_rows(tasks_df().dropna(subset=['created_at', 'due_date']), "Automático")),
+        ("dashboard: curva S planejada", lambda: planned_progress_curve(tasks_df(), *window(), calendar=calendar())),
+        ("planejamento de equipes", lambda: build_capacity_plan(tasks_df(), employees(), calendar=calendar(), index=state['interval_index'])),
+        ("caminho crítico (completo)", lambda: CriticalPathScheduler(state['tasks'], calendar=calendar())),
+        ("EAP (completa)", lambda: WbsRollup(state['tasks'], calendar())),
+        ("relatório HTML (iter_report_html)", report),
+        ("organograma (mermaid)", lambda: generate_org_chart_mermaid_syntax(employees(), state['tasks'], calendar=calendar())),
+        ("fluxograma (mermaid, dependências)", lambda: generate_flowchart_mermaid_syntax(state['tasks'], state['scheduler'], calendar=calendar())),
+        ("fluxograma (mermaid, faixas)", lambda: generate_flowchart_mermaid_syntax(
+            state['tasks'], state['scheduler'], "Faixas por Setor", [s['name'] for s in state['config']['sectors']], calendar())),
+        ("create_backup_zip", create_backup_zip),
+    ]
+
+
+def measure(function, repetitions):
+    timings = []
+    for _ in range(repetitions):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return {"median_s": statistics.median(timings), "min_s": min(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede os caminhos críticos da aplicação sobre dados sintéticos.")
+    parser.add_argument("--escala", choices=SCALES, default="pequena")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--filtro", help="Roda só as medições cujo nome contém este texto")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Folga sobre a baseline antes de acusar regressão (0.25 = +25%%)")
+    parser.add_argument("--salvar-baseline", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_obra_{args.escala}_")
+    try:
+        print(f"Gerando dados sintéticos ({args.escala}) em {workdir} ...")
+        write_site(workdir, generate_site(**SCALES[args.escala]))
+        os.chdir(workdir)  # A aplicação usa caminhos relativos para os arquivos de dados
+        load_project()
+
+        baselines = {}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE, encoding="utf-8") as f:
+                baselines = json.load(f)
+        baseline = baselines.get(args.escala, {}).get("results", {})
+
+        results, regressions = {}, []
+        print(f"\n{'Medição':<42}{'Mediana':>12}{'Mínimo':>12}{'Baseline':>12}{'Variação':>10}")
+        for name, function in build_benchmarks():
+            if args.filtro and args.filtro.lower() not in name.lower():
+                continue
+            result = measure(function, args.repeticoes)
+            results[name] = result
+            reference = baseline.get(name, {}).get("median_s")
+            change = ""
+            if reference:
+                ratio = result["median_s"] / reference - 1
+                change = f"{ratio:+.0%}"
+                if ratio > args.tolerancia:
+                    regressions.append(name)
+                    change += " ⚠"
+            reference_text = f"{reference * 1000:.1f}ms" if reference else "—"
+            print(f"{name:<42}{result['median_s'] * 1000:>10.1f}ms{result['min_s'] * 1000:>10.1f}ms{reference_text:>12}{change:>10}")
+
+        if args.salvar_baseline:
+            baselines[args.escala] = {
+                "sizes": SCALES[args.escala], "repetitions": args.repeticoes,
+                "environment": {"python": platform.python_version(), "pandas": pd.__version__, "machine": platform.machine()},
+                # Com --filtro só as medições rodadas mudam; sem ele a escala inteira é trocada, para não
+                # sobrarem medições renomeadas ou removidas.
+                "results": {**baseline, **results} if args.filtro else results,
+            }
+            with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+                json.dump(baselines, f, indent=2, ensure_ascii=False)
+            print(f"\nBaseline da escala '{args.escala}' salva em {BASELINE_FILE}.")
+        elif regressions:
+            print(f"\nRegressões acima de {args.tolerancia:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    finally:
+        os.chdir(REPO_ROOT)  # Sai da pasta antes de apagá-la
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
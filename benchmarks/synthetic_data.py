@@ -0,0 +1,137 @@
+"""Gerador determinístico de dados sintéticos de obra (tarefas, pessoas, configuração e atividades).
+
+A mesma semente e a mesma escala produzem sempre os mesmos arquivos, para que as medições dos
+benchmarks sejam comparáveis entre execuções e entre máquinas.
+
+Uso:
+    python benchmarks/synthetic_data.py --escala media --destino /tmp/obra_media
+    python benchmarks/synthetic_data.py --tarefas 2500 --funcionarios 300 --atividades 50000 --destino dados
+"""
+import argparse
+import os
+import random
+import sys
+import uuid
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Escalas pré-definidas: (tarefas, funcionários, atividades)
+SCALES = {
+    "pequena": {"tasks": 100, "employees": 50, "activities": 10_000},
+    "media": {"tasks": 10_000, "employees": 500, "activities": 100_000},
+    "grande": {"tasks": 100_000, "employees": 5_000, "activities": 1_000_000},
+}
+
+PROJECT_START = date(2025, 1, 6)  # Data fixa, para que os arquivos não dependam do dia da geração
+TASKS_PER_SUMMARY = 20  # A cada N tarefas, uma tarefa-resumo agrupa as seguintes na EAP
+ROLES = ["PEDREIRO", "SERVENTE", "CARPINTEIRO", "ARMADOR", "ELETRICISTA", "ENCANADOR",
+         "OPERADOR DE MÁQUINA", "MONTADOR ELETROMECÂNICO", "ENCARREGADO"]
+SERVICES = ["Escavação", "Fundação", "Forma", "Armação", "Concretagem", "Alvenaria", "Reboco",
+            "Instalações Elétricas", "Instalações Hidráulicas", "Drenagem", "Pavimentação", "Pintura"]
+FIRST_NAMES = ["JOSÉ", "MARIA", "JOÃO", "ANA", "CARLOS", "PAULO", "LUCAS", "MARCOS", "PEDRO", "RAFAEL"]
+LAST_NAMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "LIMA", "PEREIRA", "COSTA", "ROCHA", "ALVES"]
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_site(tasks=100, employees=50, activities=10_000, sectors=None, teams=None, seed=42):
+    """Gera os quatro conjuntos de dados da aplicação em memória.
+
+    O número de setores e equipes cresce com a raiz do número de tarefas (limitado), como em obras
+    reais. As tarefas recebem predecessoras só entre tarefas anteriores (o grafo nunca tem ciclo)
+    e parte delas é agrupada sob tarefas-resumo.
+    """
+    rng = random.Random(seed)
+    sectors = sectors or max(3, min(40, int(tasks ** 0.5) // 2))
+    teams = teams or max(4, min(120, int(tasks ** 0.5)))
+
+    config = {
+        "sectors": [{"name": f"Setor {i + 1}", "desc": f"Frente de serviço {i + 1}"} for i in range(sectors)],
+        "teams": [{"name": f"Equipe {i + 1:03d}"} for i in range(teams)],
+        "project_goals": "Concluir a obra dentro do prazo contratual, sem acidentes.",
+    }
+    team_names = [team["name"] for team in config["teams"]]
+    sector_names = [sector["name"] for sector in config["sectors"]]
+
+    people = {"employees": [
+        {"id": _uuid(rng), "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}",
+         "team": team_names[i % teams], "role": rng.choice(ROLES)}
+        for i in range(employees)
+    ]}
+
+    task_list = []
+    project_days = max(60, tasks // 10)
+    summary_id = None
+    for i in range(tasks):
+        start = PROJECT_START + timedelta(days=rng.randint(0, project_days))
+        due = start + timedelta(days=rng.randint(1, 45))
+        progress = rng.choice([0, 0, 0, 10, 25, 50, 75, 90, 100])
+        task = {
+            "id": _uuid(rng),
+            "name": f"{rng.choice(SERVICES)} {i + 1}",
+            "team": rng.choice(team_names),
+            "sector": rng.choice(sector_names),
+            "progress": progress,
+            "created_at": start.isoformat(),
+            "due_date": due.isoformat(),
+            "status": "Concluída" if progress == 100 else "Em Andamento" if progress > 0 else "Planejada",
+            "predecessors": [],
+            "crew_size": rng.choice([0, 2, 3, 4, 6]),
+            "parent_id": None,
+            "weight": 0.0,
+        }
+        if i % TASKS_PER_SUMMARY == 0:
+            summary_id = task["id"]
+        else:
+            task["parent_id"] = summary_id
+            window = task_list[max(0, i - 50):i]
+            task["predecessors"] = [other["id"] for other in rng.sample(window, min(len(window), rng.choice([0, 0, 1, 2])))
+                                    if other["id"] != summary_id]
+        task_list.append(task)
+
+    activity_titles = [("🔄", "Tarefa Atualizada"), ("➕", "Nova Tarefa Criada"), ("✅", "Tarefa Concluída"), ("⚙️", "Configuração Alterada")]
+    activity_list = []
+    for i in range(activities):
+        icon, title = activity_titles[rng.randrange(len(activity_titles))]
+        moment = PROJECT_START + timedelta(minutes=activities - i)
+        activity_list.append({"type": icon, "title": title, "desc": f"A tarefa 'Serviço {rng.randint(1, max(tasks, 1))}' foi atualizada.",
+                              "time": moment.strftime("%d/%m %H:%M")})
+
+    return {"config": config, "people": people, "tasks": task_list, "activities": activity_list}
+
+
+def write_site(directory, site):
+    """Grava os dados nos mesmos arquivos e formato usados pela aplicação."""
+    sys.path.insert(0, REPO_ROOT)
+    from gestor_obras.constants import ACTIVITIES_FILE, CONFIG_FILE, PEOPLE_FILE, TASKS_FILE
+    from gestor_obras.storage import DataManager
+
+    os.makedirs(directory, exist_ok=True)
+    for file_name, key in [(CONFIG_FILE, "config"), (PEOPLE_FILE, "people"),
+                           (TASKS_FILE, "tasks"), (ACTIVITIES_FILE, "activities")]:
+        DataManager.save(os.path.join(directory, file_name), site[key])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos de obra para testes de desempenho.")
+    parser.add_argument("--escala", choices=SCALES, default="pequena")
+    parser.add_argument("--tarefas", type=int, help="Sobrepõe o número de tarefas da escala")
+    parser.add_argument("--funcionarios", type=int, help="Sobrepõe o número de funcionários da escala")
+    parser.add_argument("--atividades", type=int, help="Sobrepõe o número de atividades da escala")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--destino", required=True, help="Pasta onde os arquivos JSON serão gravados")
+    args = parser.parse_args()
+
+    sizes = dict(SCALES[args.escala])
+    sizes.update({key: value for key, value in
+                  {"tasks": args.tarefas, "employees": args.funcionarios, "activities": args.atividades}.items() if value is not None})
+    write_site(args.destino, generate_site(seed=args.semente, **sizes))
+    print(f"Dados gerados em {args.destino}: {sizes['tasks']} tarefas, {sizes['employees']} funcionários, "
+          f"{sizes['activities']} atividades.")
+
+
+if __name__ == "__main__":
+    main()
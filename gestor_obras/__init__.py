@@ -0,0 +1,16 @@
+"""Núcleo do Gestor de Obras, independente do Streamlit.
+
+Módulos:
+    constants        caminhos dos arquivos de dados e parâmetros
+    instrumentation  perfil por execução e métricas no formato do Prometheus
+    storage          arquivos JSON, histórico de progresso e backup
+    domain           calendário, prazos, índice de intervalos, caminho crítico e EAP
+    analytics        agregações do dashboard, capacidade, curvas e previsão
+    rendering        diagramas Mermaid, Gantt e relatório HTML
+    operations       alterações na obra carregada (mesma gravação para a interface e a API)
+    api              API JSON local com ETag e gzip, para os tablets de campo
+    cli              linha de comando (python -m gestor_obras)
+
+A interface (PLANEJAMENTO_DE_OBRA.py) só monta as telas sobre estas funções; scripts,
+benchmarks e outras ferramentas importam diretamente o módulo de que precisam.
+"""
@@ -0,0 +1,5 @@
+"""Permite rodar a linha de comando com `python -m gestor_obras`."""
+import sys
+from .cli import main
+
+sys.exit(main())
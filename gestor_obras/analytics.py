@@ -0,0 +1,395 @@
+"""Análises sobre o DataFrame de tarefas: Gantt agregado, capacidade das equipes, curvas, previsão, matrizes e cubo do dashboard."""
+from datetime import date
+from .constants import GANTT_AUTO_ORDER, GANTT_LEVELS, GANTT_MAX_ROWS
+from .domain import SiteCalendar, categorize_due_dates
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# --- FUNÇÕES DO CRONOGRAMA (GANTT) ---
+
+def filter_tasks_by_window(df_tasks, window_start=None, window_end=None, index=None):
+    """Retorna as tarefas cujo intervalo [início, vencimento] intercepta a janela de datas informada.
+
+    Com um `TaskIntervalIndex`, a janela é resolvida pelo índice e só as tarefas encontradas são selecionadas.
+    """
+    if index is not None and window_start is not None and window_end is not None:
+        found = index.active_on(window_start) if window_start == window_end else index.overlapping(window_start, window_end)
+        return df_tasks[df_tasks['id'].isin(found)]
+    mask = df_tasks['created_at'].notna() & df_tasks['due_date'].notna()
+    if window_start is not None:
+        mask &= df_tasks['due_date'] >= pd.Timestamp(window_start)
+    if window_end is not None:
+        mask &= df_tasks['created_at'] <= pd.Timestamp(window_end)
+    return df_tasks[mask]
+
+def choose_gantt_level(df_tasks, max_rows=GANTT_MAX_ROWS):
+    """Escolhe o nível de detalhe mais fino cujo número de linhas cabe no limite do gráfico."""
+    for level in GANTT_AUTO_ORDER:
+        columns = GANTT_LEVELS[level]
+        num_rows = len(df_tasks) if columns is None else len(df_tasks.drop_duplicates(subset=columns))
+        if num_rows <= max_rows:
+            return level
+    return GANTT_AUTO_ORDER[-1]
+
+def prepare_gantt_rows(df_tasks, level="Automático", max_rows=GANTT_MAX_ROWS):
+    """Agrega as tarefas no nível de detalhe pedido e limita o número de linhas do cronograma.
+
+    Retorna (linhas, nível efetivamente usado, total de linhas antes do corte).
+    """
+    df = df_tasks.dropna(subset=['created_at', 'due_date'])
+    if level not in GANTT_LEVELS:
+        level = choose_gantt_level(df, max_rows)
+
+    columns = GANTT_LEVELS[level]
+    if columns is None:
+        rows = pd.DataFrame({
+            'label': df['name'].str.strip(), 'start': df['created_at'], 'finish': df['due_date'],
+            'progress': df['progress'], 'count': 1, 'color_key': df['team'], 'id': df['id'],
+        })
+    else:
+        rows = df.groupby(columns, sort=False).agg(
+            start=('created_at', 'min'), finish=('due_date', 'max'),
+            progress=('progress', 'mean'), count=('name', 'size'),
+        ).reset_index()
+        rows['label'] = rows[columns].astype(str).agg(' · '.join, axis=1)
+        rows['color_key'] = rows[columns[0]]
+        rows['id'] = rows['label']
+
+    rows = rows.sort_values('start', kind='stable')
+    total_rows = len(rows)
+    return rows.iloc[:max_rows].reset_index(drop=True), level, total_rows
+
+# --- PLANEJAMENTO DE CAPACIDADE DAS EQUIPES ---
+
+def team_headcount(employees):
+    """Conta os colaboradores de cada equipe (capacidade diária em pessoas)."""
+    headcount = {}
+    for emp in employees:
+        team_name = emp.get('team', 'Sem Equipe')
+        headcount[team_name] = headcount.get(team_name, 0) + 1
+    return headcount
+
+def build_capacity_plan(tasks_df, employees, start=None, end=None, calendar=None, index=None):
+    """Distribui a capacidade de cada equipe entre as frentes (setores) dia a dia.
+
+    A demanda de uma tarefa é o seu 'crew_size' (ou a equipe inteira, quando não informado) em
+    cada dia da sua janela [início, vencimento]. Em vez de percorrer dia a dia cada tarefa, cada
+    janela vira dois eventos (+demanda no início, -demanda após o vencimento) numa matriz de
+    diferenças por par equipe×setor; uma soma acumulada ao longo dos dias produz a demanda diária
+    de todos os pares de uma só vez (O(tarefas + pares × dias)). Quando a demanda de uma equipe
+    supera o seu efetivo, a alocação de cada frente é reduzida proporcionalmente e o dia é
+    marcado como sobrecarga. Fins de semana, feriados e dias bloqueados do calendário da obra
+    não recebem alocação. Com um `TaskIntervalIndex`, as tarefas do período saem do índice.
+    """
+    df = tasks_df.dropna(subset=['created_at', 'due_date'])
+    if df.empty:
+        return None
+    start = pd.Timestamp(start) if start is not None else df['created_at'].min()
+    end = pd.Timestamp(end) if end is not None else df['due_date'].max()
+    df = filter_tasks_by_window(df, start, end, index)
+    if df.empty:
+        return None
+
+    days = pd.date_range(start, end, freq='D')
+    num_days = len(days)
+    headcount = team_headcount(employees)
+
+    pair_codes, pairs = pd.MultiIndex.from_arrays([df['team'], df['sector']]).factorize()
+    team_codes, team_names = pd.factorize(pairs.get_level_values(0))
+    capacity = np.array([headcount.get(team_name, 0) for team_name in team_names], dtype=float)
+
+    crew = df['crew_size'].fillna(0).to_numpy(dtype=float) if 'crew_size' in df else np.zeros(len(df))
+    demand = np.where(crew > 0, crew, capacity[team_codes[pair_codes]])
+    first_day = np.clip((df['created_at'] - start).dt.days.to_numpy(), 0, num_days)
+    last_day = np.clip((df['due_date'] - start).dt.days.to_numpy() + 1, 0, num_days)
+
+    diff = np.zeros((len(pairs), num_days + 1))
+    np.add.at(diff, (pair_codes, first_day), demand)
+    np.add.at(diff, (pair_codes, last_day), -demand)
+    workdays = (calendar or SiteCalendar()).is_workday(days.to_numpy(dtype='datetime64[D]'))
+    pair_demand = np.cumsum(diff, axis=1)[:, :num_days] * workdays
+
+    count_diff = np.zeros((len(pairs), num_days + 1), dtype=np.int64)
+    np.add.at(count_diff, (pair_codes, first_day), 1)
+    np.add.at(count_diff, (pair_codes, last_day), -1)
+    pair_tasks = np.cumsum(count_diff, axis=1)[:, :num_days] * workdays
+
+    team_demand = np.zeros((len(team_names), num_days))
+    np.add.at(team_demand, team_codes, pair_demand)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(team_demand > 0, np.minimum(1.0, capacity[:, None] / team_demand), 0.0)
+    allocated = pair_demand * scale[team_codes]
+
+    return {
+        'days': days, 'pairs': pairs, 'team_names': list(team_names), 'team_codes': team_codes,
+        'capacity': capacity, 'pair_demand': pair_demand, 'pair_tasks': pair_tasks,
+        'team_demand': team_demand, 'allocated': allocated,
+        'overload': team_demand > capacity[:, None], 'workdays': workdays,
+    }
+
+def capacity_plan_frame(plan):
+    """Converte o plano em tabela longa (dia, equipe, setor), apenas com os dias em que há trabalho."""
+    pair_index, day_index = np.nonzero(plan['pair_tasks'])
+    team_index = plan['team_codes'][pair_index]
+    return pd.DataFrame({
+        'Data': plan['days'][day_index],
+        'Equipe': plan['pairs'].get_level_values(0)[pair_index],
+        'Setor': plan['pairs'].get_level_values(1)[pair_index],
+        'Tarefas Ativas': plan['pair_tasks'][pair_index, day_index],
+        'Demanda': plan['pair_demand'][pair_index, day_index],
+        'Alocados': plan['allocated'][pair_index, day_index].round(1),
+        'Efetivo da Equipe': plan['capacity'][team_index],
+        'Sobrecarga': plan['overload'][team_index, day_index],
+    })
+
+def capacity_overload_frame(plan):
+    """Lista os períodos contínuos de sobrecarga de cada equipe."""
+    rows = []
+    for team_index, team_name in enumerate(plan['team_names']):
+        overloaded = plan['overload'][team_index].astype(np.int8)
+        edges = np.diff(np.concatenate(([0], overloaded, [0])))
+        for first, last in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1) - 1):
+            rows.append({
+                'Equipe': team_name, 'Início': plan['days'][first].date(), 'Fim': plan['days'][last].date(),
+                'Dias': int(last - first + 1), 'Efetivo': int(plan['capacity'][team_index]),
+                'Demanda Máxima': float(plan['team_demand'][team_index, first:last + 1].max()),
+            })
+    return pd.DataFrame(rows, columns=['Equipe', 'Início', 'Fim', 'Dias', 'Efetivo', 'Demanda Máxima'])
+
+# --- CURVA S PLANEJADA ---
+
+def planned_progress_curve(tasks_df, start, end, weights=None, calendar=None):
+    """Progresso médio (ponderado) planejado, supondo avanço linear em dias úteis entre início e vencimento.
+
+    Cada tarefa é uma rampa; as rampas são somadas com diferenças de segunda ordem (inclinação
+    acumulada duas vezes), em O(tarefas + dias), sem percorrer tarefa por tarefa.
+    """
+    calendar = calendar or SiteCalendar()
+    days_index = pd.date_range(start, end, freq='D')
+    df = tasks_df.dropna(subset=['created_at', 'due_date'])
+    task_weights = np.ones(len(tasks_df)) if weights is None else np.asarray(weights, dtype=float)
+    task_weights = task_weights[tasks_df[['created_at', 'due_date']].notna().all(axis=1).to_numpy()]
+    total_weight = task_weights.sum()
+    if df.empty or len(days_index) == 0 or total_weight == 0:
+        return pd.Series(0.0, index=days_index)
+
+    task_start = calendar.workday_index(df['created_at'])
+    task_length = np.maximum(calendar.workday_index(df['due_date']) - task_start + 1, 1)
+    day_positions = calendar.workday_index(days_index.to_numpy(dtype='datetime64[D]'))
+    # O dia d "vê" a rampa no índice de dias úteis dele (fins de semana repetem o último dia útil)
+    day_positions = day_positions - (~calendar.is_workday(days_index.to_numpy(dtype='datetime64[D]')))
+    origin = min(task_start.min(), day_positions.min())
+    span = int(max((task_start + task_length).max(), day_positions.max()) - origin + 2)
+
+    slope = task_weights * 100.0 / task_length
+    slope_diff = np.zeros(span)
+    np.add.at(slope_diff, task_start - origin, slope)
+    np.add.at(slope_diff, task_start + task_length - origin, -slope)
+    planned_sum = np.cumsum(np.cumsum(slope_diff))
+    return pd.Series(planned_sum[day_positions - origin] / total_weight, index=days_index)
+
+# --- PREVISÃO DE CONCLUSÃO ---
+
+def forecast_completion(tasks_df, calendar=None, today=None):
+    """Projeta a data de término de cada tarefa pelo ritmo observado desde o início.
+
+    Ritmo = progresso / dias úteis decorridos desde 'created_at'; o que falta é projetado a partir
+    de hoje nesse ritmo. Tarefas que já deveriam ter começado e estão em 0% são projetadas como se
+    começassem hoje, com a duração planejada. Tudo é calculado com operações numpy sobre as
+    colunas inteiras, sem laço por tarefa.
+    """
+    calendar = calendar or SiteCalendar()
+    today = np.datetime64(today or date.today(), 'D')
+    start = calendar.to_days(tasks_df['created_at'])
+    due = calendar.to_days(tasks_df['due_date'])
+    progress = tasks_df['progress'].to_numpy(dtype=float)
+    valid = ~(np.isnat(start) | np.isnat(due))
+    done = (progress >= 100) | (tasks_df['status'].to_numpy() == 'Concluída') if 'status' in tasks_df else progress >= 100
+
+    elapsed = np.nan_to_num(calendar.workdays_between(start, today))
+    planned = np.maximum(np.nan_to_num(calendar.workdays_between(start, due)), 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where((elapsed > 0) & (progress > 0), progress / elapsed, 0.0)
+        remaining = np.where(rate > 0, np.ceil((100 - progress) / rate), planned)
+    not_started_yet = valid & (elapsed <= 0) & (progress == 0)
+
+    forecast = np.full(len(tasks_df), np.datetime64('NaT'), dtype='datetime64[D]')
+    projected = valid & ~done & ~not_started_yet
+    forecast[projected] = calendar.add_workdays(today, remaining[projected].astype(np.int64))
+    forecast[not_started_yet] = due[not_started_yet]
+    forecast[valid & done] = due[valid & done]
+
+    overdue = valid & ~done & (due < today)
+    will_slip = valid & ~done & ~overdue & (forecast > due)
+    slip_days = np.where(valid & ~done, np.nan_to_num(calendar.workdays_between(due, forecast)), 0).clip(min=0)
+
+    return pd.DataFrame({
+        'id': tasks_df['id'].to_numpy(), 'name': tasks_df['name'].to_numpy(),
+        'team': tasks_df['team'].to_numpy(), 'sector': tasks_df['sector'].to_numpy(),
+        'progress': progress, 'due_date': due, 'forecast_date': forecast,
+        'rate_per_day': rate.round(2), 'slip_days': slip_days.astype(int),
+        'forecast_status': np.select([~valid, done, overdue, will_slip], ["Sem Prazo", "Concluída", "Atrasada", "Vai Atrasar"], default="No Prazo"),
+    })
+
+def rollup_forecast(task_forecast, group_column):
+    """Consolida a previsão por equipe ou setor: término previsto, tarefas em risco e maior atraso."""
+    at_risk = task_forecast['forecast_status'].isin(["Vai Atrasar", "Atrasada"])
+    grouped = task_forecast.assign(at_risk=at_risk, will_slip=task_forecast['forecast_status'] == "Vai Atrasar").groupby(group_column)
+    rollup = grouped.agg(
+        tasks=('id', 'size'), progress=('progress', 'mean'), due_date=('due_date', 'max'),
+        forecast_date=('forecast_date', 'max'), will_slip=('will_slip', 'sum'), at_risk=('at_risk', 'sum'),
+        max_slip_days=('slip_days', 'max'),
+    ).reset_index()
+    rollup['progress'] = rollup['progress'].round(1)
+    return rollup.sort_values(['at_risk', 'max_slip_days'], ascending=False)
+
+# --- MATRIZ SETOR × EQUIPE E CARGA DE TRABALHO ---
+
+def sector_team_matrix(tasks_df, today=None, calendar=None):
+    """Quantidade, progresso médio e atrasadas de cada par setor×equipe em uma única passada.
+
+    Cada tarefa vira um código de célula (setor × nº de equipes + equipe) e as três métricas saem
+    de `np.bincount` sobre esses códigos, sem um groupby por métrica.
+    """
+    sector_codes, sectors = pd.factorize(tasks_df['sector'].fillna('Sem Setor'), sort=True)
+    team_codes, teams = pd.factorize(tasks_df['team'].fillna('Sem Equipe'), sort=True)
+    cells = len(sectors) * len(teams)
+    cell_codes = sector_codes * len(teams) + team_codes
+    categories, _ = categorize_due_dates(tasks_df['due_date'], tasks_df['status'], calendar=calendar, today=today)
+
+    count = np.bincount(cell_codes, minlength=cells)
+    progress_sum = np.bincount(cell_codes, weights=tasks_df['progress'].to_numpy(dtype=float), minlength=cells)
+    overdue = np.bincount(cell_codes, weights=(categories == "Atrasada"), minlength=cells)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_progress = np.where(count > 0, progress_sum / count, np.nan)
+
+    shape = (len(sectors), len(teams))
+    return {
+        'sectors': list(sectors), 'teams': list(teams), 'count': count.reshape(shape),
+        'avg_progress': avg_progress.reshape(shape), 'overdue': overdue.astype(int).reshape(shape),
+    }
+
+def team_workload_matrix(tasks_df, start, end, calendar=None):
+    """Tarefas ativas de cada equipe em cada dia útil da janela, via matriz de diferenças por equipe."""
+    df = tasks_df.dropna(subset=['created_at', 'due_date'])
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    df = df[(df['due_date'] >= start) & (df['created_at'] <= end)]
+    days = pd.date_range(start, end, freq='D')
+    workdays = (calendar or SiteCalendar()).is_workday(days.to_numpy(dtype='datetime64[D]'))
+    if df.empty:
+        return {'teams': [], 'days': days[workdays], 'active': np.zeros((0, int(workdays.sum())), dtype=np.int64)}
+
+    team_codes, teams = pd.factorize(df['team'].fillna('Sem Equipe'), sort=True)
+    first_day = np.clip((df['created_at'] - start).dt.days.to_numpy(), 0, len(days))
+    last_day = np.clip((df['due_date'] - start).dt.days.to_numpy() + 1, 0, len(days))
+    diff = np.zeros((len(teams), len(days) + 1), dtype=np.int64)
+    np.add.at(diff, (team_codes, first_day), 1)
+    np.add.at(diff, (team_codes, last_day), -1)
+    active = np.cumsum(diff, axis=1)[:, :len(days)]
+    return {'teams': list(teams), 'days': days[workdays], 'active': active[:, workdays]}
+
+# --- CUBO DE AGREGADOS DO DASHBOARD (FILTROS CRUZADOS) ---
+
+CUBE_DIMENSIONS = ['status', 'team', 'sector', 'due_category', 'start_week', 'end_week']
+
+def week_start(dates):
+    """Segunda-feira da semana de cada data (NaT permanece NaT)."""
+    days = SiteCalendar.to_days(dates)
+    return days - ((days.astype('datetime64[D]').view('int64') - 4) % 7).astype('timedelta64[D]')
+
+def build_dashboard_cube(tasks_df, wbs=None, calendar=None, today=None):
+    """Agrega as tarefas em um cubo status × equipe × setor × situação do prazo × semanas de início/fim.
+
+    O dashboard responde a cada clique somando células do cubo, que tem no máximo algumas centenas de
+    linhas, em vez de reagrupar o DataFrame de tarefas inteiro. As semanas de início e de vencimento
+    permitem filtrar por janela de datas com granularidade semanal. As colunas 'share'/'share_progress'
+    carregam a participação de cada tarefa na EAP, para que o progresso ponderado também saia do cubo.
+    """
+    categories, _ = categorize_due_dates(tasks_df['due_date'], tasks_df['status'], calendar=calendar, today=today)
+    progress = tasks_df['progress'].to_numpy(dtype=float)
+    shares = tasks_df['id'].map(wbs.leaf_shares()).fillna(0).to_numpy(dtype=float) if wbs else np.zeros(len(tasks_df))
+    cube = pd.DataFrame({
+        'status': tasks_df['status'].fillna('Planejada').to_numpy(), 'team': tasks_df['team'].fillna('Sem Equipe').to_numpy(),
+        'sector': tasks_df['sector'].fillna('Sem Setor').to_numpy(), 'due_category': categories,
+        'start_week': week_start(tasks_df['created_at']), 'end_week': week_start(tasks_df['due_date']),
+        'count': 1, 'progress_sum': progress, 'share': shares, 'share_progress': shares * progress,
+    })
+    return cube.groupby(CUBE_DIMENSIONS, dropna=False, sort=False, observed=True).sum().reset_index()
+
+def cube_mask(cube, sectors=None, teams=None, window=None):
+    """Seleciona as células do cubo que atendem aos filtros (listas vazias/None não filtram)."""
+    mask = np.ones(len(cube), dtype=bool)
+    if sectors:
+        mask &= cube['sector'].isin(sectors).to_numpy()
+    if teams:
+        mask &= cube['team'].isin(teams).to_numpy()
+    if window:
+        first_week, last_week = week_start([window[0], window[1]])
+        mask &= (cube['end_week'] >= first_week).to_numpy() & (cube['start_week'] <= last_week).to_numpy()
+    return mask
+
+def cube_progress(cube):
+    """Progresso ponderado pela EAP das células informadas (média simples se não houver pesos)."""
+    if cube['share'].sum() > 0:
+        return cube['share_progress'].sum() / cube['share'].sum()
+    return cube['progress_sum'].sum() / cube['count'].sum() if cube['count'].sum() else 0.0
+
+def cube_kpis(cube):
+    """Indicadores do topo do dashboard (progresso geral, total, concluídas e pendentes) das células informadas."""
+    total_tasks = int(cube['count'].sum())
+    completed_tasks = int(cube.loc[cube['status'] == 'Concluída', 'count'].sum())
+    return {
+        "progress": float(cube_progress(cube)) if total_tasks else 0.0,
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "pending_tasks": total_tasks - completed_tasks,
+    }
+
+# --- MÉTRICAS DO RELATÓRIO ---
+
+def filter_report_tasks(df_tasks, team="Todas", sector="Todos", status="Todos", period=None, index=None):
+    """Aplica os filtros do relatório ("Todas"/"Todos" não filtram) e retorna (tarefas filtradas, filtros).
+
+    `period` é um par (início, fim): ficam as tarefas em execução em algum dia do período. O dicionário
+    de filtros é o que o relatório HTML exibe no cabeçalho.
+    """
+    mask = np.ones(len(df_tasks), dtype=bool)
+    for column, value, everything in (('team', team, "Todas"), ('sector', sector, "Todos"), ('status', status, "Todos")):
+        if value != everything:
+            mask &= (df_tasks[column] == value).to_numpy()
+    filtered_df = df_tasks[mask]
+    period_label = "Todo o projeto"
+    if period:
+        filtered_df = filter_tasks_by_window(filtered_df, period[0], period[1], index)
+        period_label = f"{period[0]:%d/%m/%Y} a {period[1]:%d/%m/%Y}"
+    filters = {"team": team, "sector": sector, "status": status, "period": period_label}
+    return filtered_df.copy(), filters
+
+def compute_report_metrics(filtered_df, today, wbs=None, index=None):
+    """Calcula as métricas principais exibidas no relatório e na pré-visualização.
+
+    Com a EAP (`wbs`), o progresso é ponderado pela duração (ou peso) das tarefas; sem ela, é a média simples.
+    Com um `TaskIntervalIndex`, as tarefas vencidas saem do índice (vencimento até ontem).
+    """
+    total_tasks = len(filtered_df)
+    completed_tasks = int((filtered_df['status'] == 'Concluída').sum())
+    if total_tasks == 0:
+        progress = 0
+    else:
+        progress = wbs.weighted_progress(filtered_df) if wbs else filtered_df['progress'].mean()
+    overdue = filtered_df['due_date'] < pd.Timestamp(today)
+    if index is not None and filtered_df['due_date'].notna().any():
+        # O índice só guarda tarefas com início e vencimento; as sem início são conferidas no DataFrame
+        overdue = (filtered_df['id'].isin(index.ending_between(filtered_df['due_date'].min(), pd.Timestamp(today) - pd.Timedelta(days=1)))
+                   | (overdue & filtered_df['created_at'].isna()))
+    overdue_tasks = int((overdue & (filtered_df['status'] != 'Concluída')).sum())
+    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    return {
+        "total_tasks": total_tasks,
+        "completed_tasks": completed_tasks,
+        "progress": progress,
+        "overdue_tasks": overdue_tasks,
+        "completion_rate": completion_rate,
+    }
@@ -0,0 +1,370 @@
+"""API JSON local para os tablets de campo, sobre os mesmos arquivos e o mesmo caminho de gravação da interface.
+
+Rotas:
+    GET   /api/tarefas              tarefas (?equipe= &setor= &status= &inicio=AAAA-MM-DD &fim=AAAA-MM-DD)
+    GET   /api/tarefas/<id>         uma tarefa
+    PATCH /api/tarefas/<id>         altera campos da tarefa (cabeçalho Authorization: Bearer <chave de acesso>)
+    GET   /api/funcionarios         funcionários (?equipe=)
+    GET   /api/atividades           feed de atividades, mais recentes primeiro (?limite=)
+    GET   /api/mudancas?desde=N     eventos de tarefas, funcionários e configuração depois do seq N (?limite=)
+
+Dispositivos que ficam offline sincronizam pelo diário de eventos (storage.EventLog): guardam o
+último seq recebido e, na volta, pedem só o que mudou depois dele — `desde=0` traz tudo. Inclusões
+trazem o registro inteiro; alterações, só os campos alterados ({campo: [antes, depois]}). Um PATCH com
+`?base=N` (o seq da última mudança da tarefa que o dispositivo conhece) é recusado com 409 se a tarefa
+mudou depois disso, em vez de sobrescrever a edição de outra pessoa.
+
+Cada leitura leva um ETag; se o cliente reenviar o mesmo valor em If-None-Match, a resposta é um 304
+sem corpo. Respostas maiores que API_GZIP_MIN_BYTES vão comprimidas quando o cliente aceita gzip.
+As alterações passam por operations.update_task, exatamente como a tela de tarefas: caminho crítico,
+EAP, arquivo JSON, backup, histórico de progresso e feed.
+"""
+import gzip
+import hashlib
+import hmac
+import json
+import sys
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from . import operations
+from .analytics import filter_report_tasks
+from .constants import (
+    ACTIVITIES_FILE, API_CHANGES_LIMIT, API_FEED_LIMIT, API_GZIP_MIN_BYTES, API_HOST, API_MAX_BODY_BYTES, API_PORT, CONFIG_FILE,
+    PEOPLE_FILE, TASKS_FILE,
+)
+from .domain import load_site_state
+from .instrumentation import get_metrics
+from .storage import file_signature, get_event_log
+
+DATA_FILES = (TASKS_FILE, ACTIVITIES_FILE, CONFIG_FILE, PEOPLE_FILE)
+RESPONSE_CACHE_SIZE = 256  # Respostas prontas guardadas por versão dos dados (uma por rota + filtros)
+
+
+class ApiError(Exception):
+    """Erro com status HTTP e mensagem para o cliente."""
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- OBRA CARREGADA PELA API ---
+
+class SiteStore:
+    """Obra carregada pela API, recarregada quando algum arquivo de dados muda no disco.
+
+    A assinatura dos arquivos (inode, mtime, tamanho) é conferida a cada requisição: uma gravação da
+    interface, de outro processo ou a restauração de um backup trocam o arquivo (os.replace) e
+    disparam a recarga. Entre uma mudança e outra, as respostas já montadas são reaproveitadas.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.state = {}
+        self.signature = None
+        self.responses = {}
+
+    @staticmethod
+    def _file_signature():
+        return tuple(file_signature(file_path) for file_path in DATA_FILES)
+
+    def _refresh(self):
+        """Recarrega a obra se algum arquivo mudou. Chamado com o lock adquirido."""
+        signature = self._file_signature()
+        if signature != self.signature:
+            self.state = load_site_state(track_versions=True)
+            self.signature = signature
+            self.responses = {}
+
+    def read(self, key, build):
+        """Resposta pronta de uma leitura: {'body', 'etag', 'gzip'}. `build(state)` só roda quando os dados mudam."""
+        with self.lock:
+            self._refresh()
+            response = self.responses.get(key)
+            if response is None:
+                if len(self.responses) >= RESPONSE_CACHE_SIZE:
+                    self.responses.clear()
+                response = self.responses[key] = json_response(build(self.state))
+            return response
+
+    def write(self, change):
+        """Roda `change(state)` sobre a obra atual; o que ele gravar vira a nova versão servida."""
+        with self.lock:
+            self._refresh()
+            try:
+                return change(self.state)
+            except ApiError:
+                raise  # Recusada na validação, antes de qualquer alteração
+            except Exception:
+                self.signature = None  # Uma falha no meio da gravação força a releitura dos arquivos
+                raise
+            finally:
+                if self.signature is not None:
+                    self.signature = self._file_signature()
+                self.responses = {}
+
+
+def not_modified(if_none_match, etag):
+    """Compara o If-None-Match do cliente com o ETag atual (comparação fraca, aceita lista e '*')."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in candidates or etag.removeprefix('W/') in candidates
+
+def json_response(payload):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    return {'body': body, 'etag': f'W/"{hashlib.sha1(body).hexdigest()[:20]}"', 'gzip': None}
+
+
+# --- LEITURAS ---
+
+def parse_int(params, name, default, minimum):
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(400, f"'{name}' deve ser um número inteiro.") from None
+    if value < minimum:
+        raise ApiError(400, f"'{name}' deve ser maior ou igual a {minimum}.")
+    return value
+
+def parse_date(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"Data inválida em '{name}': use AAAA-MM-DD.") from None
+
+def list_tasks(state, params):
+    team, sector, status = params.get('equipe', "Todas"), params.get('setor', "Todos"), params.get('status', "Todos")
+    start, end = parse_date(params, 'inicio'), parse_date(params, 'fim')
+    if (start is None) != (end is None):
+        raise ApiError(400, "Informe 'inicio' e 'fim' juntos.")
+    period = (start, end) if start else None
+    tasks = state['tasks']
+    if not tasks or (team == "Todas" and sector == "Todos" and status == "Todos" and period is None):
+        return tasks
+    filtered_df, _ = filter_report_tasks(state['tasks_df'], team, sector, status, period, state['interval_index'])
+    selected = set(filtered_df['id'])
+    return [task for task in tasks if task['id'] in selected]
+
+def get_task(state, task_id):
+    task = next((t for t in state['tasks'] if t['id'] == task_id), None)
+    if task is None:
+        raise ApiError(404, "Tarefa não encontrada.")
+    return task
+
+def list_employees(state, params):
+    employees = state['people'].get('employees', [])
+    if 'equipe' in params:
+        employees = [e for e in employees if e.get('team') == params['equipe']]
+    return employees
+
+def list_activities(state, params):
+    return state['activities'][:parse_int(params, 'limite', API_FEED_LIMIT, 1)]
+
+def list_changes(state, params):
+    """Página do diário de eventos. O cliente repete o pedido com desde=`seq` enquanto `more` for verdadeiro."""
+    since = parse_int(params, 'desde', 0, 0)
+    changes, reached, last_seq = get_event_log().changes_since(since, parse_int(params, 'limite', API_CHANGES_LIMIT, 1))
+    return {"seq": reached, "latest": last_seq, "more": reached < last_seq, "changes": changes}
+
+
+# --- ALTERAÇÕES ---
+
+def validate_task_changes(state, task_id, payload):
+    """Confere tipos e referências dos campos enviados e devolve as alterações normalizadas."""
+    if not isinstance(payload, dict) or not payload:
+        raise ApiError(400, "Envie um objeto JSON com os campos a alterar.")
+    unknown = sorted(set(payload) - set(operations.EDITABLE_TASK_FIELDS))
+    if unknown:
+        raise ApiError(400, f"Campos não editáveis: {', '.join(unknown)}.")
+    get_task(state, task_id)
+    task_ids = {t['id'] for t in state['tasks']}
+    config = state['config']
+    changes = {}
+    for field, value in payload.items():
+        if field == 'name':
+            if not isinstance(value, str) or not value.strip():
+                raise ApiError(400, "O nome da tarefa não pode ficar vazio.")
+            value = value.strip()
+        elif field in ('team', 'sector'):
+            options = {item['name'] for item in config.get('teams' if field == 'team' else 'sectors', [])}
+            if value not in options:
+                raise ApiError(400, f"{'Equipe' if field == 'team' else 'Setor'} não cadastrado: {value!r}.")
+        elif field in ('created_at', 'due_date'):
+            try:
+                value = date.fromisoformat(value).isoformat()
+            except (TypeError, ValueError):
+                raise ApiError(400, f"Data inválida em '{field}': use AAAA-MM-DD.") from None
+        elif field in ('progress', 'crew_size'):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0 or (field == 'progress' and value > 100):
+                raise ApiError(400, f"'{field}' deve ser um inteiro {'entre 0 e 100' if field == 'progress' else 'maior ou igual a zero'}.")
+        elif field == 'weight':
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+                raise ApiError(400, "'weight' deve ser um número maior ou igual a zero.")
+            value = float(value)
+        elif field == 'predecessors':
+            if not isinstance(value, list) or any(p not in task_ids or p == task_id for p in value):
+                raise ApiError(400, "'predecessors' deve listar ids de outras tarefas existentes.")
+            value = list(dict.fromkeys(value))
+        elif field == 'parent_id':
+            if value is not None and (value not in task_ids or value == task_id or value in state['wbs'].descendants(task_id)):
+                raise ApiError(400, "'parent_id' deve ser outra tarefa, fora das subtarefas desta.")
+        changes[field] = value
+    return changes
+
+def patch_task(state, task_id, payload, base_seq=None):
+    """Aplica o PATCH. Retorna (tarefa, seq da versão gravada), o seq vindo do save_records desta gravação."""
+    changes = validate_task_changes(state, task_id, payload)
+    if base_seq is not None:
+        current_seq = get_event_log().record_seq('tasks', task_id)
+        if current_seq > base_seq:
+            raise ApiError(409, f"A tarefa foi alterada depois da versão {base_seq} (versão atual: {current_seq}).")
+    try:
+        task, _ = operations.update_task(state, task_id, changes)
+    except operations.ConflictError as error:
+        state['conflicts'] = []  # Quem resolve é o dispositivo, com a versão atual da tarefa
+        raise ApiError(409, str(error)) from None
+    except ValueError as error:
+        raise ApiError(422, str(error)) from None
+    return task, state['versions']['tasks'].get(task_id, 0)
+
+
+# --- SERVIDOR HTTP ---
+
+READ_ROUTES = {
+    ('api', 'tarefas'): ("/api/tarefas", list_tasks),
+    ('api', 'funcionarios'): ("/api/funcionarios", list_employees),
+    ('api', 'atividades'): ("/api/atividades", list_activities),
+    ('api', 'mudancas'): ("/api/mudancas", list_changes),
+}
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "GestorObrasAPI/1.0"
+    protocol_version = "HTTP/1.1"  # Conexões reaproveitadas: menos handshakes numa rede 4G ruim
+
+    def _route(self):
+        url = urlsplit(self.path)
+        parts = tuple(part for part in url.path.split('/') if part)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        return parts, params
+
+    def _send(self, status, response=None, route="-", extra_headers=()):
+        """Envia a resposta (corpo já serializado), com gzip quando compensa e o cliente aceita."""
+        body, encoding = b"", "identity"
+        if response is not None and status != 304:
+            body = response['body']
+            if len(body) >= API_GZIP_MIN_BYTES and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                if response['gzip'] is None:
+                    response['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+                body, encoding = response['gzip'], "gzip"
+        self.send_response(status)
+        if response is not None:
+            self.send_header('ETag', response['etag'])
+            self.send_header('Cache-Control', 'no-cache')  # Sempre revalida, mas com If-None-Match
+            self.send_header('Vary', 'Accept-Encoding')
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            if encoding == "gzip":
+                self.send_header('Content-Encoding', 'gzip')
+        for name, value in extra_headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        metrics = get_metrics()
+        metrics.inc("gestor_obras_api_requests_total", route=route, method=self.command, status=str(status))
+        metrics.inc("gestor_obras_api_response_bytes_total", len(body), encoding=encoding)
+
+    def _send_error(self, error, route="-", extra_headers=()):
+        self._send(error.status, json_response({"erro": str(error)}), route, extra_headers)
+
+    def do_GET(self):
+        parts, params = self._route()
+        store = self.server.store
+        if parts in READ_ROUTES:
+            route, build = READ_ROUTES[parts]
+            key = (parts, tuple(sorted(params.items())))
+            read = lambda: store.read(key, lambda state: build(state, params))  # noqa: E731
+        elif len(parts) == 3 and parts[:2] == ('api', 'tarefas'):
+            route = "/api/tarefas/{id}"
+            read = lambda: store.read(parts, lambda state: get_task(state, parts[2]))  # noqa: E731
+        else:
+            self._send_error(ApiError(404, "Rota não encontrada."))
+            return
+        try:
+            response = read()
+        except ApiError as error:
+            self._send_error(error, route)
+            return
+        if not_modified(self.headers.get('If-None-Match'), response['etag']):
+            self._send(304, response, route)
+        else:
+            self._send(200, response, route)
+
+    def do_PATCH(self):
+        parts, params = self._route()
+        route = "/api/tarefas/{id}"
+        if len(parts) != 3 or parts[:2] != ('api', 'tarefas'):
+            self._send_error(ApiError(404, "Rota não encontrada."))
+            return
+        try:
+            payload = self._read_authorized_json()
+            base_seq = parse_int(params, 'base', 0, 0) if 'base' in params else None
+            task, seq = self.server.store.write(lambda state: patch_task(state, parts[2], payload, base_seq))
+        except ApiError as error:
+            self._send_error(error, route, [('WWW-Authenticate', 'Bearer')] if error.status == 401 else ())
+            return
+        self._send(200, json_response(task), route, [('X-Sequencia', str(seq))])
+
+    def _read_authorized_json(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= API_MAX_BODY_BYTES:
+            self.close_connection = True  # O corpo não lido inutiliza a conexão
+            raise ApiError(413, "Corpo da requisição grande demais.")
+        raw_body = self.rfile.read(length)  # Lido sempre, para a conexão seguir utilizável
+        access_key = self.server.access_key
+        if not access_key:
+            raise ApiError(403, "Alterações pela API desativadas: nenhuma chave de acesso configurada.")
+        scheme, _, token = self.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), access_key.encode()):
+            raise ApiError(401, "Chave de acesso inválida.")
+        try:
+            return json.loads(raw_body or b"null")
+        except ValueError:
+            raise ApiError(400, "JSON inválido.") from None
+
+    def log_message(self, *args):
+        pass  # As requisições já são contadas nas métricas (gestor_obras_api_requests_total)
+
+
+def create_api_server(host=API_HOST, port=API_PORT, access_key=None):
+    """Servidor da API sobre os arquivos da pasta atual. `access_key` libera as alterações (PATCH)."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.store = SiteStore()
+    server.access_key = access_key
+    return server
+
+_api_lock = threading.Lock()
+_api_started = False
+
+def start_api_server(port=API_PORT, host=API_HOST, access_key=None):
+    """Sobe a API, uma vez por processo, numa thread em segundo plano. Retorna o servidor (ou None)."""
+    global _api_started
+    with _api_lock:
+        if _api_started or not port:
+            return None
+        _api_started = True
+    try:
+        server = create_api_server(host, port, access_key)
+    except OSError as error:
+        print(f"API: não foi possível abrir {host}:{port} ({error}).", file=sys.stderr)
+        return None
+    threading.Thread(target=server.serve_forever, name="api-http", daemon=True).start()
+    return server
@@ -0,0 +1,302 @@
+"""Linha de comando do Gestor de Obras: indicadores, relatório, diagramas, backup e API local sem abrir o Streamlit.
+
+Uso:
+    python -m gestor_obras --dados /srv/obra kpis --setor "Bloco A"
+    python -m gestor_obras --dados /srv/obra relatorio --equipe "Elétrica" --saida relatorio.html
+    python -m gestor_obras --dados /srv/obra organograma --saida organograma.html
+    python -m gestor_obras --dados /srv/obra fluxograma --layout "Dependências" --saida fluxograma.mmd
+    python -m gestor_obras --dados /srv/obra backup --saida backup_obra.zip
+    python -m gestor_obras --dados /srv/obra api --host 0.0.0.0 --porta 8600
+    python -m gestor_obras --dados /srv/obra estado --em 2025-03-31 --saida /tmp/obra_em_marco
+    python -m gestor_obras --dados /srv/obra auditoria --tarefa <id da tarefa>
+
+Os comandos de saída só leem os arquivos da obra; cada saída é gravada em um arquivo temporário na
+mesma pasta e renomeada ao final, então várias execuções (agendadas no cron, por exemplo) podem rodar
+em paralelo entre si e com a interface. O comando api serve a API local de gestor_obras.api; estado e
+auditoria consultam o diário de eventos (storage.EventLog).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import date, datetime
+from .analytics import (
+    build_dashboard_cube, cube_kpis, cube_mask, filter_report_tasks, forecast_completion,
+)
+from .constants import API_HOST, API_PORT, FLOWCHART_COLLAPSE_TASKS, FLOWCHART_LAYOUTS, ORG_COLLAPSE_TEAM_SIZE
+from .domain import load_site_state
+from .lazy import lazy_import
+from .rendering import (
+    create_printable_diagram_html, generate_flowchart_mermaid_syntax, generate_org_chart_mermaid_syntax,
+    iter_report_html,
+)
+from .storage import CONFIG_RECORD_ID, TRACKED_FILES, create_backup_zip, get_event_log, records_file_data
+
+pd = lazy_import("pandas")
+
+ORIENTATIONS = {"paisagem": "landscape", "retrato": "portrait"}
+
+state = {}  # Obra carregada, no lugar do st.session_state da interface
+
+
+# --- GRAVAÇÃO DAS SAÍDAS ---
+
+def write_output(path, chunks, binary=False):
+    """Grava os pedaços em `path` de forma atômica (arquivo temporário na mesma pasta + os.replace).
+
+    Retorna o tamanho gravado em bytes.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb' if binary else 'w', **({} if binary else {'encoding': 'utf-8'})) as f:
+            for chunk in chunks:
+                f.write(chunk)
+            size = f.tell()
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return size
+
+
+def describe_output(path, size):
+    print(f"{path} ({size / 1024:.1f} KB)")
+
+
+def iso_date(value):
+    return pd.Timestamp(value).date().isoformat() if pd.notna(value) else None
+
+
+def moment(value):
+    """Data (AAAA-MM-DD, vale o fim do dia) ou data e hora (AAAA-MM-DDTHH:MM) para consultas ao diário."""
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value), datetime.max.time()).replace(microsecond=0)
+    return datetime.fromisoformat(value)
+
+
+# --- COMANDOS ---
+
+def command_kpis(args):
+    """Indicadores do dashboard em JSON: progresso, contagens, prazos, previsão e caminho crítico."""
+    today = args.hoje or date.today()
+    df_tasks = state['tasks_df']
+    window = (args.inicio, args.fim) if args.inicio else None
+    result = {
+        "generated_at": datetime.now().isoformat(timespec='seconds'),
+        "today": today.isoformat(),
+        "filters": {"sectors": args.setor or [], "teams": args.equipe or [],
+                    "period": [args.inicio.isoformat(), args.fim.isoformat()] if window else None},
+    }
+    if df_tasks.empty:
+        result.update(progress=0.0, total_tasks=0, completed_tasks=0, pending_tasks=0, due_categories={},
+                      forecast=None, critical_path=None)
+    else:
+        cube = build_dashboard_cube(df_tasks, state['wbs'], state['calendar'], today)
+        cube = cube[cube_mask(cube, args.setor, args.equipe, window)]
+        due_counts = cube.dropna(subset=['due_category']).groupby('due_category')['count'].sum()
+        result.update(cube_kpis(cube), due_categories={str(k): int(v) for k, v in due_counts.items()})
+        result['progress'] = round(result['progress'], 2)
+
+        # A previsão considera as mesmas equipes e setores; o caminho crítico é sempre o da obra inteira
+        forecast_tasks = df_tasks
+        if args.setor:
+            forecast_tasks = forecast_tasks[forecast_tasks['sector'].isin(args.setor)]
+        if args.equipe:
+            forecast_tasks = forecast_tasks[forecast_tasks['team'].isin(args.equipe)]
+        task_forecast = forecast_completion(forecast_tasks, state['calendar'], today)
+        result['forecast'] = {
+            "end_date": iso_date(task_forecast['forecast_date'].max()),
+            "will_slip": int((task_forecast['forecast_status'] == "Vai Atrasar").sum()),
+            "overdue": int((task_forecast['forecast_status'] == "Atrasada").sum()),
+        }
+        scheduler = state['scheduler']
+        result['critical_path'] = {
+            "end_date": iso_date(scheduler.project_end_date()),
+            "critical_tasks": len(scheduler.critical_ids()),
+        }
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
+
+
+def command_report(args):
+    """Relatório HTML com os mesmos filtros da aba de relatórios."""
+    period = (args.inicio, args.fim) if args.inicio else None
+    filtered_df, filters = filter_report_tasks(state['tasks_df'], args.equipe, args.setor, args.status, period,
+                                               state['interval_index'])
+    if filtered_df.empty:
+        print("Nenhuma tarefa encontrada com os filtros selecionados.", file=sys.stderr)
+        return 1
+    personnel_df = pd.DataFrame(state['people'].get('employees', []))
+    chunks = iter_report_html(filtered_df, personnel_df, state['config'].get('project_goals', ''), filters, state['wbs'],
+                              state['calendar'], state['interval_index'])
+    describe_output(args.saida, write_output(args.saida, chunks))
+    return 0
+
+
+def diagram_output(args, title, syntax):
+    """HTML pronto para impressão quando a saída termina em .html; senão, a sintaxe Mermaid pura."""
+    if args.saida.lower().endswith(('.html', '.htm')):
+        syntax = create_printable_diagram_html(title, syntax, ORIENTATIONS[args.orientacao])
+    describe_output(args.saida, write_output(args.saida, [syntax]))
+    return 0
+
+
+def command_org_chart(args):
+    employees = state['people'].get('employees', [])
+    if not employees:
+        print("Nenhum funcionário cadastrado para gerar o organograma.", file=sys.stderr)
+        return 1
+    collapse = args.resumido
+    if collapse is None:
+        team_sizes = {}
+        for employee in employees:
+            team_sizes[employee.get('team')] = team_sizes.get(employee.get('team'), 0) + 1
+        collapse = max(team_sizes.values()) > ORG_COLLAPSE_TEAM_SIZE
+    syntax = generate_org_chart_mermaid_syntax(employees, state['tasks'], collapse, state['calendar'])
+    return diagram_output(args, "Organograma - Estrutura Hierárquica da Obra", syntax)
+
+
+def command_flowchart(args):
+    tasks = state['tasks']
+    if not tasks:
+        print("Nenhuma tarefa cadastrada para gerar o fluxograma.", file=sys.stderr)
+        return 1
+    layout = args.layout or (FLOWCHART_LAYOUTS[2] if len(tasks) > FLOWCHART_COLLAPSE_TASKS else FLOWCHART_LAYOUTS[0])
+    sector_order = [sector['name'] for sector in state['config'].get('sectors', [])]
+    syntax = generate_flowchart_mermaid_syntax(tasks, state['scheduler'], layout, sector_order, state['calendar'])
+    return diagram_output(args, "Fluxograma - Sequência de Atividades da Obra", syntax)
+
+
+def command_backup(args):
+    describe_output(args.saida, write_output(args.saida, [create_backup_zip()], binary=True))
+    return 0
+
+
+def command_api(args):
+    """Sobe a API local em primeiro plano; a chave de acesso vem de GESTOR_OBRAS_ACCESS_KEY."""
+    from .api import create_api_server  # Só quem serve a API carrega o servidor HTTP
+    access_key = os.environ.get("GESTOR_OBRAS_ACCESS_KEY", "")
+    server = create_api_server(args.host, args.porta, access_key)
+    mode = "leitura e alteração" if access_key else "somente leitura (defina GESTOR_OBRAS_ACCESS_KEY para alterar)"
+    print(f"API em http://{args.host}:{args.porta}/api/tarefas — {mode}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def command_state(args):
+    """Arquivos de tarefas, funcionários e configuração como estavam na data pedida, reconstruídos pelo diário."""
+    records, seq = get_event_log().state_as_of(args.em)
+    if not seq:
+        print(f"O diário de eventos não tem registros até {args.em.isoformat(sep=' ')}.", file=sys.stderr)
+        return 1
+    for file_path, collection in TRACKED_FILES.items():
+        data = records_file_data(collection, records[collection])
+        path = os.path.join(args.saida, file_path)
+        describe_output(path, write_output(path, [json.dumps(data, indent=2, ensure_ascii=False)]))
+    print(f"Estado até o evento {seq}.", file=sys.stderr)
+    return 0
+
+
+def command_audit(args):
+    """Eventos de um registro em JSON, do mais antigo ao mais recente."""
+    if args.tarefa:
+        events = get_event_log().history('tasks', args.tarefa)
+    elif args.funcionario:
+        events = get_event_log().history('people', args.funcionario)
+    else:
+        events = get_event_log().history('config', CONFIG_RECORD_ID)
+    if not events:
+        print("Nenhum evento encontrado para este registro.", file=sys.stderr)
+        return 1
+    json.dump(events, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return 0
+
+
+# --- ARGUMENTOS ---
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m gestor_obras", description="Gestor de Obras sem interface: indicadores, relatório, diagramas e backup.")
+    parser.add_argument("--dados", default=".", help="Pasta com os arquivos JSON da obra (padrão: pasta atual)")
+    commands = parser.add_subparsers(dest="comando", required=True)
+
+    def add_period(command, help_text):
+        command.add_argument("--inicio", type=date.fromisoformat, help=f"{help_text} (AAAA-MM-DD, junto com --fim)")
+        command.add_argument("--fim", type=date.fromisoformat, help="Fim do período (AAAA-MM-DD)")
+
+    def add_output(command, help_text):
+        # Resolvido já na leitura dos argumentos, antes da troca para a pasta de dados
+        command.add_argument("--saida", required=True, type=os.path.abspath, help=help_text)
+
+    kpis = commands.add_parser("kpis", help="Indicadores do dashboard em JSON")
+    kpis.add_argument("--setor", action="append", help="Considera só este setor (pode repetir)")
+    kpis.add_argument("--equipe", action="append", help="Considera só esta equipe (pode repetir)")
+    add_period(kpis, "Tarefas ativas a partir de")
+    kpis.add_argument("--hoje", type=date.fromisoformat, help="Data de referência dos prazos (padrão: hoje)")
+    kpis.set_defaults(handler=command_kpis)
+
+    report = commands.add_parser("relatorio", help="Relatório HTML com filtros de equipe, setor, status e período")
+    report.add_argument("--equipe", default="Todas")
+    report.add_argument("--setor", default="Todos")
+    report.add_argument("--status", default="Todos", choices=["Todos", "Planejada", "Em Andamento", "Concluída"])
+    add_period(report, "Tarefas em execução a partir de")
+    add_output(report, "Arquivo .html de destino")
+    report.set_defaults(handler=command_report)
+
+    for name, handler, help_text in (("organograma", command_org_chart, "Organograma das equipes"),
+                                     ("fluxograma", command_flowchart, "Fluxograma das tarefas")):
+        diagram = commands.add_parser(name, help=f"{help_text} (.html para impressão ou Mermaid puro)")
+        diagram.add_argument("--orientacao", choices=ORIENTATIONS, default="paisagem", help="Orientação da página no HTML")
+        add_output(diagram, "Arquivo de destino: .html gera a página para impressão; outra extensão grava a sintaxe Mermaid")
+        diagram.set_defaults(handler=handler)
+    commands.choices["organograma"].add_argument(
+        "--resumido", action=argparse.BooleanOptionalAction, default=None,
+        help=f"Agrupa equipes grandes em um nó (padrão: automático, equipes com mais de {ORG_COLLAPSE_TEAM_SIZE} pessoas)")
+    commands.choices["fluxograma"].add_argument("--layout", choices=FLOWCHART_LAYOUTS, help="Padrão: o mesmo da interface para o tamanho da obra")
+
+    backup = commands.add_parser("backup", help="Backup .zip dos arquivos de dados e do histórico de progresso")
+    add_output(backup, "Arquivo .zip de destino")
+    backup.set_defaults(handler=command_backup)
+
+    api = commands.add_parser("api", help="API JSON local (tarefas, funcionários e feed) para os tablets de campo")
+    api.add_argument("--host", default=API_HOST, help=f"Endereço de escuta (padrão: {API_HOST}; 0.0.0.0 libera a rede local)")
+    api.add_argument("--porta", type=int, default=API_PORT or 8600)
+    api.set_defaults(handler=command_api)
+
+    site_state = commands.add_parser("estado", help="Arquivos de dados como estavam em uma data, pelo diário de eventos")
+    site_state.add_argument("--em", required=True, type=moment, help="Data (AAAA-MM-DD, até o fim do dia) ou data e hora (AAAA-MM-DDTHH:MM)")
+    add_output(site_state, "Pasta de destino dos arquivos JSON")
+    site_state.set_defaults(handler=command_state)
+
+    audit = commands.add_parser("auditoria", help="Histórico de alterações de uma tarefa, funcionário ou da configuração")
+    target = audit.add_mutually_exclusive_group(required=True)
+    target.add_argument("--tarefa", metavar="ID")
+    target.add_argument("--funcionario", metavar="ID")
+    target.add_argument("--configuracao", action="store_true", help="Setores, equipes, metas e calendário da obra")
+    audit.set_defaults(handler=command_audit)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (getattr(args, 'inicio', None) is None) != (getattr(args, 'fim', None) is None):
+        parser.error("--inicio e --fim devem ser informados juntos")
+    if not os.path.isdir(args.dados):
+        parser.error(f"pasta de dados não encontrada: {args.dados}")
+    os.chdir(args.dados)  # Os arquivos de dados usam caminhos relativos
+    if args.handler not in (command_backup, command_api, command_state, command_audit):
+        state.clear()
+        state.update(load_site_state())
+    return args.handler(args)
@@ -0,0 +1,61 @@
+"""Caminhos dos arquivos de dados e parâmetros da aplicação (prazos, Gantt, métricas, diagramas)."""
+import os
+
+# --- CAMINHOS E CONSTANTES ---
+TASKS_FILE = "datatasks.json"
+ACTIVITIES_FILE = "data_activities.json"
+CONFIG_FILE = "dataconfig.json"
+PEOPLE_FILE = "data_people.json"
+BACKUP_DIR = "backup_tasks"
+PROGRESS_HISTORY_DIR = "historico_progresso"
+EVENTS_DIR = "eventos"  # Diário de eventos (sincronização, auditoria e recuperação) e seus snapshots
+EVENTS_SNAPSHOT_EVERY = 5000  # Eventos entre dois snapshots do estado completo
+FILE_LOCK_TIMEOUT_S = 30.0  # Espera máxima por uma trava entre processos antes de desistir com TimeoutError
+READ_SNAPSHOT_DELAY_S = 0.5  # Espera depois de uma gravação antes de remontar o instantâneo de leitura (junta rajadas)
+# Pasta "static" ao lado da interface: com server.enableStaticServing, o Streamlit a serve em app/static/
+# lendo o arquivo em partes, então um relatório grande vai ao navegador sem passar inteiro pela memória
+APP_STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+REPORTS_DIR = os.path.join(APP_STATIC_DIR, "relatorios")
+REPORTS_URL = "app/static/relatorios"
+REPORT_CHUNK_ROWS = 200  # Linhas de tabela agrupadas em cada pedaço do relatório
+REPORT_MAX_AGE_HOURS = 24  # Relatórios temporários mais antigos que isso são removidos
+
+# Níveis de detalhe do cronograma: colunas usadas na agregação (None = uma linha por tarefa)
+GANTT_LEVELS = {"Setor": ["sector"], "Equipe": ["team"], "Setor / Equipe": ["sector", "team"], "Tarefa": None}
+GANTT_AUTO_ORDER = ["Tarefa", "Setor / Equipe", "Equipe", "Setor"]  # Do mais detalhado ao mais agregado
+GANTT_COLOR_TITLES = {"Setor": "Setor", "Setor / Equipe": "Setor"}
+GANTT_MAX_ROWS = 80  # Número máximo de linhas desenhadas, qualquer que seja o tamanho da obra
+GANTT_ROW_HEIGHT = 24
+GANTT_BAR_WIDTH = 14
+GANTT_LABEL_MAX_CHARS = 45
+
+# Calendário da obra: por padrão trabalha-se de segunda a sexta (máscara de seg. a dom.)
+DEFAULT_WEEKMASK = "1111100"
+CALENDAR_EPOCH = '2000-01-03'  # Referência fixa (uma segunda-feira) para o índice de dias úteis
+DUE_SOON_WORKDAYS = 7  # Tarefas que vencem dentro deste número de dias úteis são destacadas
+DUE_SOON_LABEL = f"Vence em {DUE_SOON_WORKDAYS} dias úteis"
+DUE_CATEGORY_ORDER = ["Atrasada", DUE_SOON_LABEL, "Em Dia", "Sem Prazo"]
+PROFILE_HISTORY_RERUNS = 200  # Execuções do script guardadas para os percentis do painel de perfil
+
+# Exportação de métricas (Prometheus). Sem porta e sem arquivo configurados, as métricas ficam só em memória.
+METRICS_PORT = int(os.environ.get("GESTOR_OBRAS_METRICS_PORT", "0") or 0)
+METRICS_HOST = os.environ.get("GESTOR_OBRAS_METRICS_HOST", "127.0.0.1")
+METRICS_FILE = os.environ.get("GESTOR_OBRAS_METRICS_FILE", "")
+METRICS_FILE_INTERVAL_S = 15  # Intervalo entre regravações do arquivo de métricas
+METRICS_FILE_ROTATE_S = 3600  # A cada hora, o arquivo de métricas é guardado como arquivo.1 (o anterior vira .2...)
+METRICS_FILE_KEEP = 24  # Cópias guardadas pela rotação (arquivo.1 a arquivo.24)
+ACTIVE_SESSION_WINDOW_S = 300  # Sessões sem execução há mais tempo que isso deixam de contar como ativas
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# API local (tablets de campo). Sem porta configurada, a API não é aberta junto com a interface.
+API_PORT = int(os.environ.get("GESTOR_OBRAS_API_PORT", "0") or 0)
+API_HOST = os.environ.get("GESTOR_OBRAS_API_HOST", "127.0.0.1")
+API_GZIP_MIN_BYTES = 1024  # Respostas menores que isso não compensam a compressão
+API_MAX_BODY_BYTES = 64 * 1024  # Tamanho máximo do corpo de uma alteração
+API_FEED_LIMIT = 50  # Atividades devolvidas pelo feed quando o cliente não informa ?limite=
+API_CHANGES_LIMIT = 1000  # Eventos do diário percorridos por página de sincronização
+
+# Diagramas: acima destes tamanhos o modo resumido é sugerido por padrão
+ORG_COLLAPSE_TEAM_SIZE = 12  # Equipes maiores que isso viram um único nó no organograma resumido
+FLOWCHART_COLLAPSE_TASKS = 150  # Fluxogramas com mais tarefas que isso são agrupados por setor
+FLOWCHART_LAYOUTS = ["Faixas por Setor", "Dependências", "Resumido por Setor"]
@@ -0,0 +1,608 @@
+"""Modelo da obra: calendário de dias úteis, classificação de prazos, índice de intervalos, caminho crítico e EAP."""
+import copy
+import hashlib
+import heapq
+import json
+import uuid
+from datetime import date
+from .constants import (
+    ACTIVITIES_FILE, CALENDAR_EPOCH, CONFIG_FILE, DEFAULT_WEEKMASK, DUE_SOON_LABEL, DUE_SOON_WORKDAYS, PEOPLE_FILE,
+    TASKS_FILE,
+)
+from .lazy import lazy_import
+from .storage import DataManager, file_signature, get_event_log
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# --- CALENDÁRIO DA OBRA (DIAS ÚTEIS) ---
+
+class SiteCalendar:
+    """Calendário de trabalho da obra: dias da semana trabalhados, feriados e dias bloqueados (chuva etc.)."""
+
+    def __init__(self, weekmask=DEFAULT_WEEKMASK, holidays=(), blocked_days=()):
+        self.weekmask = weekmask
+        self.holidays = list(holidays)
+        self.blocked_days = list(blocked_days)
+        off_days = [entry['date'] for entry in self.holidays + self.blocked_days if entry.get('date')]
+        self.busdaycal = np.busdaycalendar(weekmask=weekmask, holidays=np.array(off_days, dtype='datetime64[D]'))
+
+    @classmethod
+    def from_config(cls, config):
+        """Monta o calendário a partir da seção 'calendar' do dataconfig.json."""
+        calendar_config = config.get('calendar', {})
+        return cls(calendar_config.get('weekmask', DEFAULT_WEEKMASK),
+                   calendar_config.get('holidays', []), calendar_config.get('blocked_days', []))
+
+    @staticmethod
+    def to_days(dates):
+        """Converte datas (escalares, listas, Series ou strings ISO) para datetime64[D]; valores vazios viram NaT."""
+        if isinstance(dates, np.ndarray) and np.issubdtype(dates.dtype, np.datetime64):
+            return dates.astype('datetime64[D]')
+        if isinstance(dates, (pd.Series, pd.Index, list, tuple, np.ndarray)):
+            return pd.to_datetime(pd.Series(dates), errors='coerce').to_numpy(dtype='datetime64[D]')
+        if dates is None or dates == '' or (not isinstance(dates, str) and pd.isna(dates)):
+            return np.datetime64('NaT', 'D')
+        return np.datetime64(pd.Timestamp(dates).date(), 'D')
+
+    def workdays_between(self, start, end):
+        """Dias úteis em [início, fim) — negativo se fim < início. Retorna float com NaN para datas ausentes."""
+        start, end = np.broadcast_arrays(self.to_days(start), self.to_days(end))
+        result = np.full(start.shape, np.nan)
+        valid = ~(np.isnat(start) | np.isnat(end))
+        result[valid] = np.busday_count(start[valid], end[valid], busdaycal=self.busdaycal)
+        return result if result.ndim else float(result)
+
+    def workdays_until(self, due_dates, today=None):
+        """Dias úteis de hoje até o vencimento (negativo quando já venceu)."""
+        return self.workdays_between(np.datetime64(today or date.today(), 'D'), due_dates)
+
+    def is_workday(self, dates):
+        return np.is_busday(self.to_days(dates), busdaycal=self.busdaycal)
+
+    def add_workdays(self, dates, offsets):
+        """Desloca as datas em N dias úteis (partindo do próximo dia útil, se cair em folga)."""
+        return np.busday_offset(self.to_days(dates), offsets, roll='forward', busdaycal=self.busdaycal)
+
+    def workday_index(self, dates):
+        """Número de dias úteis desde uma época fixa — permite fazer aritmética de prazos com inteiros."""
+        return np.busday_count(np.datetime64(CALENDAR_EPOCH, 'D'), self.to_days(dates), busdaycal=self.busdaycal)
+
+    def date_from_index(self, index):
+        return self.add_workdays(np.datetime64(CALENDAR_EPOCH, 'D'), index).astype(object)
+
+def categorize_due_dates(due_dates, status=None, calendar=None, today=None):
+    """Classifica os prazos de uma coluna de vencimentos em dias úteis. Retorna (categorias, dias úteis até o vencimento).
+    Com `status`, as concluídas ficam como "Concluída"; sem `calendar`, conta de segunda a sexta."""
+    calendar = calendar or SiteCalendar()
+    today = np.datetime64(today or date.today(), 'D')
+    due_days = calendar.to_days(due_dates)
+    workdays = calendar.workdays_until(due_days, today)
+    completed = np.asarray(status) == 'Concluída' if status is not None else np.zeros(due_days.shape, dtype=bool)
+    categories = np.select([completed, np.isnat(due_days), due_days < today, workdays <= DUE_SOON_WORKDAYS],
+                           ["Concluída", "Sem Prazo", "Atrasada", DUE_SOON_LABEL], default="Em Dia")
+    return categories, workdays
+
+
+# --- OBJETOS DERIVADOS COMPARTILHADOS ---
+
+class Freezable:
+    """Objeto derivado que pode ir para um instantâneo de leitura: depois de freeze(), alterá-lo levanta TypeError."""
+    frozen = False
+
+    def freeze(self):
+        self.frozen = True
+        return self
+
+    def _check_not_frozen(self):
+        if self.frozen:
+            raise TypeError(f"{type(self).__name__} de um instantâneo de leitura é compartilhado entre sessões e não pode ser alterado.")
+
+
+# --- ÍNDICE DE INTERVALOS DAS TAREFAS (JANELAS DE DATAS) ---
+
+class _IntervalNode:
+    __slots__ = ('center', 'by_start', 'by_end', 'left', 'right')
+
+class TaskIntervalIndex(Freezable):
+    """Índice das janelas [início, vencimento] das tarefas para consultas por período."""
+
+    def __init__(self, tasks):
+        self._build({task['id']: self._interval(task) for task in tasks})
+
+    @staticmethod
+    def _interval(task):
+        start, end = SiteCalendar.to_days(task.get('created_at')), SiteCalendar.to_days(task.get('due_date'))
+        if np.isnat(start) or np.isnat(end):
+            return None
+        return int(start.astype(np.int64)), int(end.astype(np.int64))
+
+    @staticmethod
+    def _ordinal(day):
+        return int(SiteCalendar.to_days(day).astype(np.int64))
+
+    def _build(self, intervals):
+        self.intervals = {task_id: interval for task_id, interval in intervals.items() if interval is not None}
+        self.buffer = {}
+        self.shadowed = set()
+        items = [(start, end, task_id) for task_id, (start, end) in self.intervals.items()]
+        self.root = self._build_node(items)
+        ends = sorted((end, task_id) for start, end, task_id in items)
+        self.sorted_ends = np.array([end for end, _ in ends], dtype=np.int64)
+        self.ids_by_end = [task_id for _, task_id in ends]
+
+    def _build_node(self, items):
+        if not items:
+            return None
+        endpoints = sorted([start for start, _, _ in items] + [end for _, end, _ in items])
+        node = _IntervalNode()
+        node.center = endpoints[len(endpoints) // 2]
+        here = [item for item in items if item[0] <= node.center <= item[1]]
+        node.by_start = sorted(here)
+        node.by_end = sorted(here, key=lambda item: item[1], reverse=True)
+        node.left = self._build_node([item for item in items if item[1] < node.center])
+        node.right = self._build_node([item for item in items if item[0] > node.center])
+        return node
+
+    def freeze(self):
+        self.sorted_ends.flags.writeable = False
+        return super().freeze()
+
+    def upsert(self, task):
+        """Registra uma tarefa nova ou editada (datas inválidas removem a tarefa do índice)."""
+        self._check_not_frozen()
+        interval = self._interval(task)
+        self.shadowed.add(task['id'])
+        self.buffer.pop(task['id'], None)
+        if interval is not None:
+            self.buffer[task['id']] = interval
+            self.intervals[task['id']] = interval
+        else:
+            self.intervals.pop(task['id'], None)
+        self._maybe_rebuild()
+
+    def remove(self, task_id):
+        self._check_not_frozen()
+        self.shadowed.add(task_id)
+        self.buffer.pop(task_id, None)
+        self.intervals.pop(task_id, None)
+        self._maybe_rebuild()
+
+    def _maybe_rebuild(self):
+        if len(self.shadowed) > max(32, int(len(self.intervals) ** 0.5)):
+            self._build(dict(self.intervals))
+
+    def overlapping(self, start, end):
+        """Ids das tarefas cujo intervalo [início, vencimento] intercepta [start, end] (datas inclusivas)."""
+        first, last = self._ordinal(start), self._ordinal(end)
+        found, stack = [], [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if last < node.center:
+                for item in node.by_start:
+                    if item[0] > last:
+                        break
+                    found.append(item[2])
+                stack.append(node.left)
+            elif first > node.center:
+                for item in node.by_end:
+                    if item[1] < first:
+                        break
+                    found.append(item[2])
+                stack.append(node.right)
+            else:
+                found.extend(item[2] for item in node.by_start)
+                stack.extend((node.left, node.right))
+        found = [task_id for task_id in found if task_id not in self.shadowed]
+        found.extend(task_id for task_id, (s, e) in self.buffer.items() if s <= last and e >= first)
+        return found
+
+    def active_on(self, day):
+        """Ids das tarefas em execução no dia informado."""
+        return self.overlapping(day, day)
+
+    def ending_between(self, start, end):
+        """Ids das tarefas com vencimento em [start, end] — base das listas de prazos e atrasos."""
+        first, last = self._ordinal(start), self._ordinal(end)
+        lo, hi = np.searchsorted(self.sorted_ends, [first, last + 1])
+        found = [task_id for task_id in self.ids_by_end[lo:hi] if task_id not in self.shadowed]
+        found.extend(task_id for task_id, (_, e) in self.buffer.items() if first <= e <= last)
+        return found
+
+    def __len__(self):
+        return len(self.intervals)
+
+
+# --- DEPENDÊNCIAS E CAMINHO CRÍTICO (CPM) ---
+
+class CriticalPathScheduler(Freezable):
+    """Calcula início/término mais cedo e mais tarde, folga e caminho crítico das tarefas, em dias úteis."""
+
+    def __init__(self, tasks, today=None, calendar=None):
+        self.calendar = calendar or SiteCalendar()
+        self.today = int(self.calendar.workday_index(today or date.today()))
+        starts = self.calendar.workday_index(self.calendar.to_days([t.get('created_at') or str(date.today()) for t in tasks]))
+        dues = self.calendar.workday_index(self.calendar.to_days([t.get('due_date') or t.get('created_at') or str(date.today()) for t in tasks]))
+        self.tasks = {}
+        for task, start, due in zip(tasks, starts.tolist(), dues.tolist()):
+            self.tasks[task['id']] = {'start': start, 'duration': max(due - start, 0), 'progress': task.get('progress', 0), 'delay': 0}
+        self.preds = {}
+        self.succs = {task_id: [] for task_id in self.tasks}
+        for task in tasks:
+            preds = [p for p in dict.fromkeys(task.get('predecessors') or []) if p in self.tasks and p != task['id']]
+            self.preds[task['id']] = preds
+            for p in preds:
+                self.succs[p].append(task['id'])
+        self.order = self._topological_order()
+        self.position = {task_id: i for i, task_id in enumerate(self.order)}
+        self.es, self.ef, self.ls, self.lf = {}, {}, {}, {}
+        self.project_end = None
+        self._forward_pass(self.order)
+        self._full_backward_pass()
+
+    def _task_params(self, task):
+        """Extrai do dicionário da tarefa os parâmetros usados no agendamento."""
+        start = int(self.calendar.workday_index(task.get('created_at') or date.today()))
+        due = int(self.calendar.workday_index(task['due_date'])) if task.get('due_date') else start
+        return {'start': start, 'duration': max(due - start, 0), 'progress': task.get('progress', 0), 'delay': 0}
+
+    def _topological_order(self):
+        """Ordenação topológica de Kahn. Lança ValueError se houver ciclo de dependências."""
+        in_degree = {task_id: len(preds) for task_id, preds in self.preds.items()}
+        queue = [task_id for task_id, degree in in_degree.items() if degree == 0]
+        order = []
+        while queue:
+            task_id = queue.pop()
+            order.append(task_id)
+            for s in self.succs[task_id]:
+                in_degree[s] -= 1
+                if in_degree[s] == 0:
+                    queue.append(s)
+        if len(order) != len(self.tasks):
+            raise ValueError("As dependências entre tarefas formam um ciclo.")
+        return order
+
+    def _early_dates(self, task_id):
+        """Calcula (início mais cedo, término mais cedo) a partir dos predecessores já calculados."""
+        params = self.tasks[task_id]
+        es = max([params['start']] + [self.ef[p] for p in self.preds[task_id]])
+        duration = params['duration'] + params['delay']
+        progress = params['progress']
+        if progress >= 100:
+            return es, es + duration
+        if progress == 0:
+            # Tarefa ainda não iniciada não pode começar antes de hoje
+            es = max(es, self.today)
+            return es, es + duration
+        remaining = -(-duration * (100 - progress) // 100)
+        return es, max(es + duration, self.today + remaining)
+
+    def _forward_pass(self, nodes):
+        for task_id in nodes:
+            self.es[task_id], self.ef[task_id] = self._early_dates(task_id)
+
+    def _late_dates(self, task_id):
+        lf = min((self.ls[s] for s in self.succs[task_id]), default=self.project_end)
+        return lf - (self.ef[task_id] - self.es[task_id]), lf
+
+    def _full_backward_pass(self):
+        self.project_end = max(self.ef.values(), default=self.today)
+        for task_id in reversed(self.order):
+            self.ls[task_id], self.lf[task_id] = self._late_dates(task_id)
+
+    def _propagate_forward(self, seeds):
+        """Recalcula as datas mais cedo a partir das tarefas alteradas, em ordem topológica."""
+        heap = [self.position[task_id] for task_id in seeds]
+        heapq.heapify(heap)
+        queued = set(heap)
+        changed = set()
+        while heap:
+            task_id = self.order[heapq.heappop(heap)]
+            new_dates = self._early_dates(task_id)
+            if new_dates == (self.es.get(task_id), self.ef.get(task_id)):
+                continue
+            self.es[task_id], self.ef[task_id] = new_dates
+            changed.add(task_id)
+            for s in self.succs[task_id]:
+                if self.position[s] not in queued:
+                    queued.add(self.position[s])
+                    heapq.heappush(heap, self.position[s])
+        return changed
+
+    def _propagate_backward(self, seeds):
+        """Recalcula as datas mais tarde subindo pelos predecessores das tarefas alteradas."""
+        heap = [-self.position[task_id] for task_id in seeds]
+        heapq.heapify(heap)
+        queued = set(heap)
+        while heap:
+            task_id = self.order[-heapq.heappop(heap)]
+            new_dates = self._late_dates(task_id)
+            if new_dates == (self.ls.get(task_id), self.lf.get(task_id)):
+                continue
+            self.ls[task_id], self.lf[task_id] = new_dates
+            for p in self.preds[task_id]:
+                if -self.position[p] not in queued:
+                    queued.add(-self.position[p])
+                    heapq.heappush(heap, -self.position[p])
+
+    def _reschedule(self, task_id):
+        changed = self._propagate_forward([task_id])
+        project_end = max(self.ef.values(), default=self.today)
+        if project_end != self.project_end:
+            self._full_backward_pass()
+        else:
+            self._propagate_backward(changed or [task_id])
+        return changed
+
+    def update_task(self, task):
+        """Atualiza datas/progresso de uma tarefa e recalcula só o subgrafo afetado (dependências novas exigem outro agendador).
+        Retorna o conjunto de tarefas cujas datas mais cedo mudaram."""
+        self._check_not_frozen()
+        delay = self.tasks[task['id']]['delay']
+        self.tasks[task['id']] = self._task_params(task)
+        self.tasks[task['id']]['delay'] = delay
+        return self._reschedule(task['id'])
+
+    def simulate_delay(self, task_id, days):
+        """Simula um atraso de N dias úteis em uma tarefa, sem alterar o agendador.
+        Retorna ({tarefa: dias de atraso no término}, novo término da obra)."""
+        simulation = copy.copy(self)
+        simulation.es, simulation.ef = dict(self.es), dict(self.ef)
+        simulation.tasks = {**self.tasks, task_id: {**self.tasks[task_id], 'delay': self.tasks[task_id]['delay'] + days}}
+        changed = simulation._propagate_forward([task_id])
+        slips = {t: simulation.ef[t] - self.ef[t] for t in changed if simulation.ef[t] != self.ef[t]}
+        new_end = max(simulation.ef.values(), default=self.today)
+        return slips, self.calendar.date_from_index(new_end)
+
+    def project_end_date(self):
+        return self.calendar.date_from_index(self.project_end)
+
+    def total_float(self, task_id):
+        return self.ls[task_id] - self.es[task_id]
+
+    def critical_ids(self):
+        """Tarefas sem folga: qualquer atraso nelas atrasa a conclusão da obra."""
+        return {task_id for task_id in self.order if self.ls[task_id] <= self.es[task_id]}
+
+    def critical_edges(self):
+        """Dependências entre tarefas críticas em que o término de uma determina o início da outra."""
+        critical = self.critical_ids()
+        return {(p, s) for s in critical for p in self.preds[s] if p in critical and self.ef[p] == self.es[s]}
+
+    def schedule_rows(self):
+        """Retorna o agendamento como lista de dicionários (datas já convertidas), em ordem topológica."""
+        to_dates = self.calendar.date_from_index
+        columns = {name: to_dates(np.array([values[task_id] for task_id in self.order], dtype=np.int64))
+                   for name, values in (('early_start', self.es), ('early_finish', self.ef), ('late_start', self.ls), ('late_finish', self.lf))}
+        return [{
+            'id': task_id,
+            'early_start': columns['early_start'][i], 'early_finish': columns['early_finish'][i],
+            'late_start': columns['late_start'][i], 'late_finish': columns['late_finish'][i],
+            'float': self.total_float(task_id), 'critical': self.ls[task_id] <= self.es[task_id],
+        } for i, task_id in enumerate(self.order)]
+
+# --- ESTRUTURA ANALÍTICA DO PROJETO (EAP) E PROGRESSO PONDERADO ---
+
+class WbsRollup(Freezable):
+    """Árvore da EAP (campo 'parent_id') com progresso consolidado e ponderado (por 'weight' ou pela duração)."""
+
+    def __init__(self, tasks, calendar=None):
+        self.calendar = calendar or SiteCalendar()
+        self.names = {task['id']: task.get('name', '') for task in tasks}
+        self.own_progress = {task['id']: float(task.get('progress', 0) or 0) for task in tasks}
+        self.explicit_weight = {task['id']: float(task.get('weight') or 0) for task in tasks}
+        durations = self.calendar.workdays_between([task.get('created_at') for task in tasks], [task.get('due_date') for task in tasks])
+        self.duration = {task['id']: max(float(np.nan_to_num(d)), 1.0) for task, d in zip(tasks, np.atleast_1d(durations))}
+
+        self.parent = {}
+        for task in tasks:
+            parent_id = task.get('parent_id')
+            self.parent[task['id']] = parent_id if parent_id in self.names and parent_id != task['id'] else None
+        self.children = {task_id: [] for task_id in self.names}
+        self.children[None] = []
+        for task_id, parent_id in self.parent.items():
+            self.children[parent_id].append(task_id)
+
+        # Percurso em largura a partir das raízes; o que não for alcançado está em ciclo e vira raiz
+        order = self._walk(self.children[None])
+        reached = set(order)
+        for task_id in self.names:
+            if task_id not in reached:
+                self.children[self.parent[task_id]].remove(task_id)
+                self.parent[task_id] = None
+                self.children[None].append(task_id)
+                new_nodes = self._walk([task_id])
+                reached.update(new_nodes)
+                order.extend(new_nodes)
+
+        self.child_weight = dict.fromkeys(self.children, 0.0)
+        self.child_value = dict.fromkeys(self.children, 0.0)
+        self.weight, self.rolled = {}, {}
+        for task_id in reversed(order):
+            self.weight[task_id], self.rolled[task_id] = self._node_totals(task_id)
+            parent_id = self.parent[task_id]
+            self.child_weight[parent_id] += self.weight[task_id]
+            self.child_value[parent_id] += self.weight[task_id] * self.rolled[task_id]
+
+    def _walk(self, roots):
+        order, queue = [], list(roots)
+        while queue:
+            task_id = queue.pop()
+            order.append(task_id)
+            queue.extend(self.children[task_id])
+        return order
+
+    def _node_totals(self, task_id):
+        """(peso, progresso consolidado) de um nó a partir dos acumulados dos filhos."""
+        if self.children[task_id] and self.child_weight[task_id] > 0:
+            rolled = self.child_value[task_id] / self.child_weight[task_id]
+            return self.explicit_weight[task_id] or self.child_weight[task_id], rolled
+        weight = self.explicit_weight[task_id] or self.duration[task_id]
+        return weight, self.own_progress[task_id]
+
+    def update_task(self, task):
+        """Aplica a edição de uma tarefa e propaga só pelos ancestrais. Retorna {id: progresso consolidado} das tarefas-resumo que mudaram."""
+        self._check_not_frozen()
+        task_id = task['id']
+        self.own_progress[task_id] = float(task.get('progress', 0) or 0)
+        self.explicit_weight[task_id] = float(task.get('weight') or 0)
+        self.duration[task_id] = max(float(np.nan_to_num(self.calendar.workdays_between(task.get('created_at'), task.get('due_date')))), 1.0)
+        self.names[task_id] = task.get('name', '')
+
+        changed = {}
+        node = task_id
+        while node is not None:
+            old_weight, old_rolled = self.weight[node], self.rolled[node]
+            self.weight[node], self.rolled[node] = self._node_totals(node)
+            delta_weight = self.weight[node] - old_weight
+            delta_value = self.weight[node] * self.rolled[node] - old_weight * old_rolled
+            if node != task_id and self.rolled[node] != old_rolled:
+                changed[node] = self.rolled[node]
+            if abs(delta_weight) < 1e-9 and abs(delta_value) < 1e-9:
+                break
+            parent_id = self.parent[node]
+            self.child_weight[parent_id] += delta_weight
+            self.child_value[parent_id] += delta_value
+            node = parent_id
+        return changed
+
+    def is_summary(self, task_id):
+        return bool(self.children.get(task_id))
+
+    def descendants(self, task_id):
+        """Todas as subtarefas (diretas e indiretas) — não podem ser escolhidas como pai da tarefa."""
+        return set(self._walk(self.children.get(task_id, []))) if task_id in self.children else set()
+
+    def path(self, task_id):
+        """Caminho da raiz até a tarefa, usado para exibir a posição dela na EAP."""
+        path = []
+        while task_id is not None:
+            path.append(self.names[task_id])
+            task_id = self.parent[task_id]
+        return list(reversed(path))
+
+    def overall_progress(self):
+        """Progresso geral da obra: média ponderada das tarefas de primeiro nível da EAP."""
+        return self.child_value[None] / self.child_weight[None] if self.child_weight[None] > 0 else 0.0
+
+    def leaf_shares(self):
+        """Participação de cada tarefa-folha no progresso geral (soma 1), respeitando os pesos dos resumos."""
+        shares = {}
+        total = self.child_weight[None]
+        queue = [(task_id, self.weight[task_id] / total) for task_id in self.children[None]] if total > 0 else []
+        while queue:
+            task_id, share = queue.pop()
+            if self.is_summary(task_id) and self.child_weight[task_id] > 0:
+                queue.extend((child, share * self.weight[child] / self.child_weight[task_id]) for child in self.children[task_id])
+            else:
+                shares[task_id] = share
+        return shares
+
+    def weighted_progress(self, tasks_df):
+        """Progresso ponderado de um subconjunto de tarefas (ex.: filtros do relatório), contando só as folhas."""
+        if tasks_df.empty:
+            return 0.0
+        shares = tasks_df['id'].map(self.leaf_shares()).to_numpy(dtype=float)
+        leaves = ~np.isnan(shares)
+        if not leaves.any() or shares[leaves].sum() <= 0:
+            return float(tasks_df['progress'].mean())
+        return float(np.dot(shares[leaves], tasks_df['progress'].to_numpy(dtype=float)[leaves]) / shares[leaves].sum())
+
+# --- TAREFAS: STATUS, PRAZOS E CARGA DOS DADOS ---
+
+def get_due_category(due_date, today=None, calendar=None):
+    """Classifica uma tarefa pendente com base na sua data de vencimento (em dias úteis)."""
+    categories, _ = categorize_due_dates([due_date], calendar=calendar, today=today)
+    return str(categories[0])
+
+def get_task_status(task):
+    """Retorna o status de uma tarefa com base no seu progresso."""
+    progress = task.get('progress', 0)
+    if progress == 100:
+        return 'Concluída'
+    elif progress > 0:
+        return 'Em Andamento'
+    else:
+        return 'Planejada'
+
+def build_tasks_df(tasks):
+    """Monta o DataFrame de tarefas usado pelos gráficos, com as datas já convertidas."""
+    df_tasks = pd.DataFrame(tasks)
+    if not df_tasks.empty:
+        df_tasks['created_at'] = pd.to_datetime(df_tasks['created_at'], errors='coerce')
+        df_tasks['due_date'] = pd.to_datetime(df_tasks['due_date'], errors='coerce')
+    return df_tasks
+
+def compute_data_version(tasks):
+    """Identificador do conteúdo atual das tarefas, usado como chave dos caches de análise."""
+    return hashlib.sha1(json.dumps(tasks, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def build_scheduler(tasks, calendar=None):
+    """Monta o agendador de caminho crítico. Em caso de ciclo nos dados salvos, ignora as dependências."""
+    try:
+        return CriticalPathScheduler(tasks, calendar=calendar)
+    except ValueError:
+        return CriticalPathScheduler([{**task, 'predecessors': []} for task in tasks], calendar=calendar)
+
+def load_site(track_versions=False, event_log=None):
+    """Lê os arquivos da obra e normaliza nomes, ids e status; as tarefas acertadas só em memória ficam em 'unsaved_task_ids'.
+    Com `track_versions`, inclui 'versions' e 'synced_seq', lidos de `event_log` (o do processo, se omitido)."""
+    if track_versions:
+        activities_signature = file_signature(ACTIVITIES_FILE)  # Antes da leitura: na dúvida, a próxima sincronização relê
+        versions, synced_seq = (event_log or get_event_log()).versions()
+    defaults = {CONFIG_FILE: {"sectors": [], "teams": [], "project_goals": ""}, PEOPLE_FILE: {"employees": []},
+                TASKS_FILE: []}
+    loaded = {file_path: DataManager.load(file_path, default) for file_path, default in defaults.items()}
+    unreadable = [file_path for file_path, default in defaults.items() if loaded[file_path] is default]
+    if unreadable:
+        loaded.update(get_event_log().recover(unreadable))
+    config, people, tasks = loaded[CONFIG_FILE], loaded[PEOPLE_FILE], loaded[TASKS_FILE]
+    activities = DataManager.load(ACTIVITIES_FILE, [])
+
+    for team in config.get("teams", []):
+        team['name'] = team['name'].strip()
+    for sector in config.get("sectors", []):
+        sector['name'] = sector['name'].strip()
+
+    unsaved_task_ids = set()
+    for task in tasks:
+        if 'id' not in task:
+            task['id'] = str(uuid.uuid4())
+            unsaved_task_ids.add(task['id'])
+        status = get_task_status(task)
+        if task.get('status') != status:
+            task['status'] = status
+            unsaved_task_ids.add(task['id'])
+    for employee in people.get("employees", []):
+        if not employee.get('id'):
+            employee['id'] = str(uuid.uuid4())
+    site = {"config": config, "people": people, "tasks": tasks, "activities": activities,
+            "unsaved_task_ids": unsaved_task_ids}
+    if track_versions:
+        site.update(versions=versions, synced_seq=synced_seq, activities_signature=activities_signature)
+    return site
+
+def load_site_state(track_versions=False):
+    """load_site() mais os objetos derivados que a interface monta ao abrir uma sessão (veja build_site_state)."""
+    return build_site_state(load_site(track_versions))
+
+def build_site_state(site):
+    """Acrescenta a `site` 'calendar', 'wbs', 'scheduler', 'interval_index' e 'tasks_df', e o devolve.
+    O progresso das tarefas-resumo é consolidado só em memória; as acertadas entram em site['unsaved_task_ids']."""
+    tasks = site['tasks']
+    calendar = SiteCalendar.from_config(site['config'])
+    wbs = WbsRollup(tasks, calendar)
+    unsaved_task_ids = site.setdefault('unsaved_task_ids', set())
+    for task in tasks:
+        if wbs.is_summary(task['id']):
+            progress = int(round(wbs.rolled[task['id']]))
+            if progress != task.get('progress', 0):
+                task['progress'] = progress
+                task['status'] = get_task_status(task)
+                unsaved_task_ids.add(task['id'])
+    site.update(calendar=calendar, wbs=wbs, scheduler=build_scheduler(tasks, calendar),
+                interval_index=TaskIntervalIndex(tasks), tasks_df=build_tasks_df(tasks))
+    return site
@@ -0,0 +1,278 @@
+"""Instrumentação: perfil por execução (spans) e métricas de operação no formato do Prometheus.
+
+Não depende do Streamlit: os spans são guardados por thread e o registro de métricas é único no processo.
+"""
+import bisect
+import contextlib
+import os
+import sys
+import tempfile
+import threading
+import time
+from .constants import (
+    ACTIVE_SESSION_WINDOW_S, LATENCY_BUCKETS_S, METRICS_FILE, METRICS_FILE_INTERVAL_S, METRICS_FILE_KEEP,
+    METRICS_FILE_ROTATE_S, METRICS_HOST, METRICS_PORT,
+)
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# --- PERFIL DE DESEMPENHO (SPANS POR EXECUÇÃO) ---
+
+_profiler_local = threading.local()  # Cada sessão do Streamlit roda o script na sua própria thread
+
+class _ProfileSpan:
+    """Trecho cronometrado. Guarda (início, profundidade, nome, duração) na lista da execução atual."""
+    __slots__ = ('name', 'start', 'last_lap', 'depth')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = _profiler_local.stack
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = self.last_lap = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _profiler_local.stack.pop()
+        _profiler_local.records.append((self.start, self.depth, self.name, time.perf_counter() - self.start))
+        return False
+
+_NULL_SPAN = contextlib.nullcontext()
+
+def profiling_active():
+    return getattr(_profiler_local, 'enabled', False)
+
+def profile_span(name):
+    """Contexto que mede um trecho. Com o perfil desligado devolve um contexto vazio compartilhado (custo ~zero)."""
+    return _ProfileSpan(name) if getattr(_profiler_local, 'enabled', False) else _NULL_SPAN
+
+def profile_lap(name):
+    """Marca o fim de uma seção dentro do trecho aberto: mede o tempo desde a marca (ou início) anterior.
+
+    Permite dividir blocos longos da interface em seções sem reindentá-los em um `with`.
+    """
+    if not getattr(_profiler_local, 'enabled', False) or not _profiler_local.stack:
+        return
+    parent = _profiler_local.stack[-1]
+    now = time.perf_counter()
+    _profiler_local.records.append((parent.last_lap, parent.depth + 1, name, now - parent.last_lap))
+    parent.last_lap = now
+
+def begin_profiled_rerun(enabled):
+    """Inicia a coleta da execução atual do script (só quando o perfil foi ligado pelo administrador)."""
+    _profiler_local.enabled = enabled
+    _profiler_local.stack = []
+    _profiler_local.records = []
+    _profiler_local.rerun_start = time.perf_counter()
+
+def end_profiled_rerun():
+    """Fecha a coleta e devolve {'total': segundos, 'spans': [(profundidade, nome, segundos), ...]} em ordem de início."""
+    if not getattr(_profiler_local, 'enabled', False):
+        return None
+    _profiler_local.enabled = False
+    records = sorted(_profiler_local.records, key=lambda record: (record[0], record[1]))
+    return {'total': time.perf_counter() - _profiler_local.rerun_start,
+            'spans': [(depth, name, duration) for _, depth, name, duration in records]}
+
+def profile_percentiles(history):
+    """Percentis (p50/p90/p99) do tempo de cada trecho nas últimas execuções registradas."""
+    samples = {"Execução completa": [run['total'] for run in history]}
+    for run in history:
+        totals = {}
+        for _, name, duration in run['spans']:
+            totals[name] = totals.get(name, 0.0) + duration
+        for name, duration in totals.items():
+            samples.setdefault(name, []).append(duration)
+    rows = []
+    for name, values in samples.items():
+        p50, p90, p99 = np.percentile(np.array(values) * 1000, [50, 90, 99])
+        rows.append({'Trecho': name, 'Execuções': len(values), 'p50 (ms)': p50, 'p90 (ms)': p90, 'p99 (ms)': p99})
+    return pd.DataFrame(rows).sort_values('p90 (ms)', ascending=False)
+
+# --- MÉTRICAS DE OPERAÇÃO (FORMATO PROMETHEUS) ---
+
+METRIC_DEFINITIONS = [
+    ("gestor_obras_rerun_duration_seconds", "histogram", "Duração de cada execução do script (rerun)."),
+    ("gestor_obras_save_duration_seconds", "histogram", "Tempo de gravação de um arquivo JSON pelo DataManager."),
+    ("gestor_obras_save_bytes_total", "counter", "Bytes gravados pelo DataManager, por arquivo."),
+    ("gestor_obras_backup_bytes", "gauge", "Tamanho do último backup gerado, por tipo."),
+    ("gestor_obras_report_duration_seconds", "histogram", "Tempo de geração do relatório HTML."),
+    ("gestor_obras_report_bytes", "gauge", "Tamanho do último relatório HTML gerado."),
+    ("gestor_obras_active_sessions", "gauge", f"Sessões com alguma execução nos últimos {ACTIVE_SESSION_WINDOW_S} s."),
+    ("gestor_obras_cache_requests_total", "counter", "Consultas aos caches de cálculo, por cache e resultado (hit/miss)."),
+    ("gestor_obras_event_log_seq", "gauge", "Último número de sequência do diário de eventos."),
+    ("gestor_obras_read_snapshot_seq", "gauge", "Último evento do diário refletido no instantâneo das sessões de visualização."),
+    ("gestor_obras_api_requests_total", "counter", "Requisições à API local, por rota, método e status (304 = cliente já tinha a versão atual)."),
+    ("gestor_obras_api_response_bytes_total", "counter", "Bytes enviados pela API local, por codificação (gzip/identity)."),
+]
+
+class MetricsRegistry:
+    """Contadores, medidores e histogramas do processo, compartilhados por todas as sessões.
+
+    As séries são identificadas por (nome, rótulos). Os histogramas guardam contagens por faixa e
+    são acumulados só na hora de exportar, no formato texto do Prometheus.
+    """
+    def __init__(self, definitions=METRIC_DEFINITIONS, buckets=LATENCY_BUCKETS_S):
+        self._lock = threading.Lock()
+        self.buckets = tuple(buckets)
+        self.definitions = {name: (kind, help_text) for name, kind, help_text in definitions}
+        self.series = {name: {} for name in self.definitions}
+        self.sessions = {}
+
+    @staticmethod
+    def _key(labels):
+        return tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self.series[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.series[name][self._key(labels)] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self.series[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            histogram['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            histogram['sum'] += value
+
+    def touch_session(self, session_id, now=None):
+        """Registra uma execução da sessão; alimenta o medidor de sessões ativas."""
+        with self._lock:
+            self.sessions[session_id] = now if now is not None else time.time()
+
+    def _refresh_active_sessions(self, now):
+        cutoff = now - ACTIVE_SESSION_WINDOW_S
+        for session_id in [sid for sid, seen in self.sessions.items() if seen < cutoff]:
+            del self.sessions[session_id]
+        self.series["gestor_obras_active_sessions"][()] = len(self.sessions)
+
+    @staticmethod
+    def _format_labels(key, extra=()):
+        pairs = list(key) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return "{" + ",".join(f'{label}="{value}"' for (label, _), value in zip(pairs, escaped)) + "}"
+
+    def render(self, now=None):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        lines = []
+        with self._lock:
+            self._refresh_active_sessions(now if now is not None else time.time())
+            for name, (kind, help_text) in self.definitions.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self.series[name].items()):
+                    if kind != "histogram":
+                        lines.append(f"{name}{self._format_labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float('inf'),), value['counts']):
+                        cumulative += count
+                        bound_text = "+Inf" if bound == float('inf') else repr(bound)
+                        lines.append(f"{name}_bucket{self._format_labels(key, [('le', bound_text)])} {cumulative}")
+                    lines.append(f"{name}_sum{self._format_labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{self._format_labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+_METRICS = MetricsRegistry()
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+def get_metrics():
+    """Registro único do processo: sobrevive às reexecuções do script e é compartilhado entre sessões."""
+    return _METRICS
+
+def _rotate_metrics_file(file_path, keep=METRICS_FILE_KEEP):
+    """Guarda o arquivo atual como arquivo.1, deslocando as cópias anteriores (.1 → .2 ...) e apagando a que passar de `keep`."""
+    for index in range(keep, 0, -1):
+        older = f"{file_path}.{index}"
+        if os.path.exists(older):
+            if index == keep:
+                os.remove(older)
+            else:
+                os.replace(older, f"{file_path}.{index + 1}")
+    os.replace(file_path, f"{file_path}.1")
+
+def _write_metrics_file(registry, file_path, rotate_s=METRICS_FILE_ROTATE_S, keep=METRICS_FILE_KEEP):
+    """Regrava o arquivo de métricas de forma atômica (o coletor nunca lê um arquivo pela metade).
+
+    O conteúdo vai primeiro para um arquivo temporário próprio deste processo, na mesma pasta, então
+    vários processos com o mesmo caminho nunca trocam um arquivo escrito pela metade. Quando a última
+    cópia guardada tem mais de `rotate_s` segundos, o arquivo atual é guardado antes (_rotate_metrics_file).
+    """
+    from .storage import get_file_lock  # storage importa este módulo
+
+    directory, name = os.path.split(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(registry.render())
+        os.chmod(temp_path, 0o644)  # mkstemp cria só para o dono; o coletor costuma rodar com outro usuário
+        with get_file_lock(os.path.join(directory, f".{name}.trava")):
+            try:
+                last_rotation = os.path.getmtime(f"{file_path}.1")
+            except FileNotFoundError:
+                last_rotation = 0
+            if keep and os.path.exists(file_path) and time.time() - last_rotation >= rotate_s:
+                _rotate_metrics_file(file_path, keep)
+            os.replace(temp_path, file_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+def start_metrics_exporter(port=METRICS_PORT, host=METRICS_HOST, file_path=METRICS_FILE):
+    """Sobe, uma vez por processo, o endpoint HTTP /metrics e/ou a regravação periódica do arquivo de métricas."""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return False
+        _exporter_started = True
+    registry = get_metrics()
+    if port:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Sem uma linha de log a cada coleta do Prometheus
+
+        try:
+            server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as error:
+            print(f"Métricas: não foi possível abrir {host}:{port} ({error}).", file=sys.stderr)
+        else:
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if file_path:
+        def write_periodically():
+            while True:
+                try:
+                    _write_metrics_file(registry, file_path)
+                except OSError as error:
+                    print(f"Métricas: falha ao gravar {file_path} ({error}).", file=sys.stderr)
+                time.sleep(METRICS_FILE_INTERVAL_S)
+        threading.Thread(target=write_periodically, name="metrics-file", daemon=True).start()
+    return True
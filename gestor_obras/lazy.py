@@ -0,0 +1,41 @@
+"""Importação adiada das bibliotecas pesadas (numpy, pandas, plotly).
+
+`lazy_import` devolve um representante do módulo; a importação real só acontece no primeiro acesso
+a um atributo (`pd.DataFrame`, `px.bar`...). Assim a tela de login abre sem carregar a pilha de
+análise e gráficos, e cada tela paga apenas pelo que de fato usa.
+
+O representante não entra em `sys.modules`: ferramentas que percorrem os módulos carregados (o
+observador de arquivos do Streamlit, `inspect.getmodule`) não disparam a importação por engano.
+"""
+import importlib
+import sys
+
+
+class LazyModule:
+    """Representante de um módulo ainda não importado."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        # Só é chamado para atributos que ainda não estão no representante
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        value = getattr(self._module, attribute)
+        setattr(self, attribute, value)  # Próximos acessos não passam mais por aqui
+        return value
+
+    def __repr__(self):
+        state = "carregado" if self._module is not None else "adiado"
+        return f"<módulo {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """Módulo `name`, importado no primeiro uso. Se já estiver carregado, devolve o próprio módulo."""
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def is_loaded(name):
+    """Indica se o módulo já foi importado de fato."""
+    return name in sys.modules
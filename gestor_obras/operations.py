@@ -0,0 +1,390 @@
+"""Alterações na obra carregada (tarefas, feed, gravação concorrente e instantâneo de leitura), comuns à interface e à API."""
+import functools
+import sys
+import threading
+import time
+from datetime import datetime
+from .constants import ACTIVITIES_FILE, CONFIG_FILE, PEOPLE_FILE, READ_SNAPSHOT_DELAY_S, TASKS_FILE
+from .domain import (
+    CriticalPathScheduler, WbsRollup, build_site_state, build_tasks_df, compute_data_version, get_task_status,
+    load_site,
+)
+from .instrumentation import get_metrics
+from .lazy import lazy_import
+from .storage import (
+    TRACKED_FILES, DataManager, EventLog, ProgressHistoryStore, file_records, file_signature, get_event_log,
+    get_file_lock, records_file_data,
+)
+
+pd = lazy_import("pandas")
+
+ACTIVITY_ICONS = {"new": "➕", "update": "🔄", "delete": "🗑️", "user": "👤", "config": "⚙️", "complete": "✅"}
+
+# Campos de uma tarefa que podem ser alterados depois de criada
+EDITABLE_TASK_FIELDS = ('name', 'team', 'sector', 'created_at', 'due_date', 'progress', 'predecessors', 'crew_size',
+                        'parent_id', 'weight')
+
+# Chave do estado com o conteúdo de cada arquivo gravado com controle de concorrência
+STATE_KEYS = {TASKS_FILE: 'tasks', PEOPLE_FILE: 'people', CONFIG_FILE: 'config'}
+COLLECTION_FILES = {collection: file_path for file_path, collection in TRACKED_FILES.items()}
+ACTIVITIES_LOCK = ".atividades.trava"
+
+
+class ConflictError(ValueError):
+    """O registro foi alterado por outra sessão depois de carregado; a versão gravada foi mantida."""
+
+
+# --- FEED DE ATIVIDADES ---
+
+def add_activity(state, icon_type, title, desc):
+    """Adiciona uma nova atividade ao log, relendo antes, sob a trava do feed, o que outras sessões gravaram."""
+    new_activity = {
+        "type": ACTIVITY_ICONS.get(icon_type, "ℹ️"), "title": title, "desc": desc, "time": datetime.now().strftime("%d/%m %H:%M")
+    }
+    with get_file_lock(ACTIVITIES_LOCK):
+        if file_signature(ACTIVITIES_FILE) != state.get('activities_signature'):
+            state['activities'] = DataManager.load(ACTIVITIES_FILE, [])
+        state['activities'].insert(0, new_activity)
+        DataManager.save(ACTIVITIES_FILE, state['activities'])
+        state['activities_signature'] = file_signature(ACTIVITIES_FILE)
+    publish_read_snapshot()
+
+
+# --- GRAVAÇÃO CONCORRENTE ---
+
+def refresh_site_state(state):
+    """Remonta calendário, caminho crítico, índice, EAP e DataFrame depois que tarefas ou configuração vieram de fora."""
+    site = build_site_state({'tasks': state['tasks'], 'config': state['config']})
+    for key in ('calendar', 'wbs', 'scheduler', 'interval_index', 'tasks_df'):
+        state[key] = site[key]
+    state.setdefault('unsaved_task_ids', set()).update(site['unsaved_task_ids'])
+    state['data_version'] = compute_data_version(state['tasks'])
+
+def save_site_file(state, file_path):
+    """Grava as tarefas, os funcionários ou a configuração do estado sem apagar o que outras sessões gravaram.
+    Retorna os conflitos desta gravação (que substituem os anteriores dos mesmos registros em state['conflicts'])."""
+    key = STATE_KEYS[file_path]
+    versions = state.get('versions')
+    if versions is None:
+        DataManager.save(file_path, state[key])
+        return []
+    collection = TRACKED_FILES[file_path]
+    data, versions[collection], conflicts, refreshed = get_event_log().save_records(
+        file_path, state[key], versions[collection])
+    if key == 'tasks':
+        state['tasks'][:] = data  # A mesma lista: quem guardou a referência continua em dia
+    else:
+        state[key] = data
+    if refreshed and key != 'people':
+        refresh_site_state(state)
+    new_keys = {(conflict['collection'], conflict['id']) for conflict in conflicts}
+    state['conflicts'] = [conflict for conflict in state.get('conflicts', [])
+                          if (conflict['collection'], conflict['id']) not in new_keys] + conflicts
+    publish_read_snapshot()
+    return conflicts
+
+def sync_site_state(state, event_log=None):
+    """Traz para o estado o que outras sessões e processos gravaram desde a última sincronização. Retorna se algo mudou.
+    `event_log` é o diário lido (o do processo, se omitido)."""
+    versions = state.get('versions')
+    if versions is None:
+        return False
+    changed, state['synced_seq'] = (event_log or get_event_log()).pull(state.get('synced_seq', 0), versions)
+    for collection, changed_records in changed.items():
+        file_path = COLLECTION_FILES[collection]
+        records = file_records(collection, state[STATE_KEYS[file_path]])
+        for record_id, record in changed_records.items():
+            if record is None:
+                records.pop(record_id, None)
+            else:
+                records[record_id] = record
+        data = records_file_data(collection, records)
+        if file_path == TASKS_FILE:
+            state['tasks'][:] = data
+        else:
+            state[STATE_KEYS[file_path]] = data
+    if 'tasks' in changed or 'config' in changed:
+        refresh_site_state(state)
+    if file_signature(ACTIVITIES_FILE) != state.get('activities_signature'):
+        state['activities'] = DataManager.load(ACTIVITIES_FILE, [])
+        state['activities_signature'] = file_signature(ACTIVITIES_FILE)
+    return bool(changed)
+
+def resolve_conflict(state, conflict, keep_mine):
+    """Encerra um conflito mantendo a versão gravada ou gravando a desta sessão. Retorna os conflitos da nova gravação."""
+    key = (conflict['collection'], conflict['id'])
+    state['conflicts'] = [c for c in state.get('conflicts', []) if (c['collection'], c['id']) != key]
+    if not keep_mine:
+        return []
+    file_path = COLLECTION_FILES[conflict['collection']]
+    records = file_records(conflict['collection'], state[STATE_KEYS[file_path]])
+    records.pop(conflict['id'], None)
+    if conflict['mine'] is not None:
+        records[conflict['id']] = conflict['mine']
+    data = records_file_data(conflict['collection'], records)
+    if file_path == TASKS_FILE:
+        state['tasks'][:] = data
+        refresh_site_state(state)
+        save_tasks(state)
+        return [c for c in state['conflicts'] if (c['collection'], c['id']) == key]
+    state[STATE_KEYS[file_path]] = data
+    conflicts = save_site_file(state, file_path)
+    if file_path == CONFIG_FILE:
+        refresh_site_state(state)
+    return conflicts
+
+
+# --- INSTANTÂNEOS DE LEITURA ---
+
+# Chaves do estado que o instantâneo entrega às sessões de visualização
+SNAPSHOT_KEYS = ('config', 'people', 'tasks', 'activities', 'calendar', 'wbs', 'scheduler', 'interval_index',
+                 'tasks_df', 'data_version')
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("Os dados do instantâneo de leitura são compartilhados entre sessões e não podem ser alterados.")
+
+class FrozenDict(dict):
+    """dict somente leitura. Continua sendo um dict para json, pandas e quem só consulta os dados."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+class FrozenList(list):
+    """list somente leitura (veja FrozenDict)."""
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = append = extend = insert = pop = remove = clear = sort = \
+        reverse = _read_only
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+def freeze(value):
+    """Cópia profunda de dicionários e listas JSON em FrozenDict e FrozenList."""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+class _ReadOnlyIndexer:
+    """loc/iloc/at/iat de um FrozenFrame: consultas passam, atribuições levantam TypeError."""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    __setitem__ = _read_only
+
+    def __call__(self, *args, **kwargs):
+        return _ReadOnlyIndexer(self._indexer(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._indexer, name)
+
+@functools.cache
+def _frozen_frame_class():
+    """FrozenFrame, montada no primeiro uso para que importar este módulo não importe o pandas."""
+
+    class FrozenFrame(pd.DataFrame):
+        """DataFrame somente leitura. Filtros, cópias e cálculos sobre ele voltam a ser DataFrames comuns."""
+
+        @property
+        def _constructor(self):
+            return pd.DataFrame
+
+        __setitem__ = __delitem__ = insert = _update_inplace = _read_only
+        loc = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.loc.fget(self)))
+        iloc = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.iloc.fget(self)))
+        at = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.at.fget(self)))
+        iat = property(lambda self: _ReadOnlyIndexer(pd.DataFrame.iat.fget(self)))
+
+        def __setattr__(self, name, value):
+            if not name.startswith('_'):  # Colunas (df.progress = ...), index, columns, attrs
+                _read_only(self)
+            super().__setattr__(name, value)
+
+        def __reduce__(self):
+            return freeze_frame, (pd.DataFrame(self),)
+
+    return FrozenFrame
+
+def freeze_frame(df):
+    """FrozenFrame com os dados de `df`, sem cópia (o pandas já entrega .values e .to_numpy() somente leitura)."""
+    return _frozen_frame_class()(df)
+
+class ReadSnapshotPublisher:
+    """Publica a obra do processo em instantâneos imutáveis, remontados numa thread própria e trocados de uma vez."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._event_log = None
+        self._site = None
+        self._activities = None  # Lista do estado privado congelada no instantâneo atual
+        self._stale = threading.Event()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.current = None
+
+    def _signature(self):
+        return file_signature(self._event_log.path), file_signature(ACTIVITIES_FILE)
+
+    def get(self):
+        """O instantâneo mais recente (montado na primeira chamada do processo)."""
+        snapshot = self.current
+        if snapshot is None or snapshot['signature'] != self._signature():
+            snapshot = self.publish(wait=snapshot is None) or snapshot
+        return snapshot
+
+    def publish(self, wait=True):
+        """Atualiza o estado privado pelo diário e troca o instantâneo, se algo mudou.
+        Com `wait=False`, não espera outra publicação em andamento e retorna None."""
+        if not self._lock.acquire(blocking=wait):
+            return None
+        try:
+            if self._event_log is None:
+                self._event_log = EventLog(read_only=True)
+            signature = self._signature()  # Antes da leitura: o que chegar depois muda a assinatura de novo
+            previous = self.current
+            if self._site is None:
+                self._site = build_site_state(load_site(track_versions=True, event_log=self._event_log))
+                self._site['data_version'] = compute_data_version(self._site['tasks'])
+                changed = True
+            else:
+                changed = sync_site_state(self._site, self._event_log)
+            site = self._site
+            if previous is not None and not changed and site['activities'] is self._activities:
+                if signature != previous['signature']:
+                    self.current = FrozenDict({**previous, 'signature': signature})
+                return self.current
+            snapshot = {key: site[key] for key in SNAPSHOT_KEYS}
+            for key in ('config', 'people', 'tasks'):
+                snapshot[key] = freeze(site[key]) if changed else previous[key]
+            if changed:  # Objetos derivados novos (refresh_site_state), só deste instantâneo
+                for key in ('wbs', 'scheduler', 'interval_index'):
+                    snapshot[key] = site[key].freeze()
+                snapshot['tasks_df'] = freeze_frame(site['tasks_df'])
+            else:
+                for key in ('wbs', 'scheduler', 'interval_index', 'tasks_df'):
+                    snapshot[key] = previous[key]
+            snapshot['activities'] = freeze(site['activities'])
+            snapshot.update(signature=signature, seq=site['synced_seq'])
+            self.current, self._activities = FrozenDict(snapshot), site['activities']
+            get_metrics().set("gestor_obras_read_snapshot_seq", site['synced_seq'])
+            return self.current
+        finally:
+            self._lock.release()
+
+    def publish_later(self):
+        """Marca o instantâneo como desatualizado; a thread de publicação o remonta em seguida."""
+        self._stale.set()
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._publish_forever, name="instantaneo-leitura", daemon=True)
+                self._worker.start()
+
+    def _publish_forever(self):
+        while True:
+            self._stale.wait()
+            time.sleep(READ_SNAPSHOT_DELAY_S)  # Deixa a gravação (e as seguintes, numa rajada) terminar antes
+            self._stale.clear()  # Antes de publicar: uma gravação durante a publicação pede outra
+            try:
+                self.publish()
+            except Exception as error:  # A próxima gravação ou leitura tenta de novo
+                print(f"Instantâneo de leitura: falha ao republicar ({error}).", file=sys.stderr)
+
+_read_snapshots = ReadSnapshotPublisher()
+
+def get_read_snapshot():
+    """Instantâneo imutável e em dia da obra (FrozenDict com SNAPSHOT_KEYS e 'seq'), compartilhado pelas sessões de visualização."""
+    return _read_snapshots.get()
+
+def publish_read_snapshot():
+    """Depois de uma gravação deste processo: pede a republicação do instantâneo, se alguma sessão já o usa."""
+    if _read_snapshots.current is not None:
+        _read_snapshots.publish_later()
+
+
+# --- TAREFAS ---
+
+def refresh_tasks_df(state):
+    """Reconstrói o DataFrame de tarefas e a versão dos dados após qualquer alteração nas tarefas."""
+    state['tasks_df'] = build_tasks_df(state['tasks'])
+    state['data_version'] = compute_data_version(state['tasks'])
+
+def save_tasks(state):
+    """Salva as tarefas (save_site_file), atualiza o DataFrame de análise e cria um backup. Retorna o caminho do backup (ou None)."""
+    save_site_file(state, TASKS_FILE)
+    refresh_tasks_df(state)
+    return DataManager.backup_tasks(state['tasks'])
+
+def save_rollup(state):
+    """Grava, numa gravação própria, as tarefas que a carga acertou só em memória (id, status e progresso
+    consolidado das tarefas-resumo), para que não entrem nos eventos da próxima alteração do usuário."""
+    if state.get('unsaved_task_ids') and state.get('versions') is not None:
+        state['unsaved_task_ids'] = set()
+        save_site_file(state, TASKS_FILE)
+        refresh_tasks_df(state)
+
+def apply_rollup_progress(state, changed):
+    """Grava nas tarefas-resumo o progresso consolidado pela EAP e registra no histórico."""
+    if not changed:
+        return
+    for task in state['tasks']:
+        if task['id'] in changed:
+            task['progress'] = int(round(changed[task['id']]))
+            task['status'] = get_task_status(task)
+    ProgressHistoryStore().record_many({task_id: int(round(progress)) for task_id, progress in changed.items()})
+
+def rebuild_wbs(state):
+    """Remonta a EAP inteira — usado quando a estrutura muda (inclusão, exclusão, troca de pai ou de calendário)."""
+    wbs = WbsRollup(state['tasks'], state.get('calendar'))
+    state['wbs'] = wbs
+    stale = {task['id']: wbs.rolled[task['id']] for task in state['tasks']
+             if wbs.is_summary(task['id']) and int(round(wbs.rolled[task['id']])) != task.get('progress', 0)}
+    apply_rollup_progress(state, stale)
+
+def update_task(state, task_id, changes):
+    """Aplica `changes` (campos de EDITABLE_TASK_FIELDS) a uma tarefa e grava tudo o que depende dela. Retorna (tarefa, caminho do backup).
+    Levanta KeyError (tarefa inexistente), ValueError (alteração inválida, nada é alterado) ou ConflictError (outra sessão mudou os mesmos campos)."""
+    save_rollup(state)
+    task = next((t for t in state['tasks'] if t['id'] == task_id), None)
+    if task is None:
+        raise KeyError(task_id)
+    original_task = dict(task)
+    updated = {**task, **changes}
+    if updated.get('created_at') and updated.get('due_date') and updated['created_at'] > updated['due_date']:
+        raise ValueError("A data de início não pode ser posterior à data de vencimento.")
+    wbs = state['wbs']
+    if wbs.is_summary(task_id) and changes.get('progress', task.get('progress', 0)) != task.get('progress', 0):
+        raise ValueError("Tarefa-resumo: o progresso é consolidado a partir das subtarefas.")
+    predecessors_changed = set(updated.get('predecessors') or []) != set(task.get('predecessors') or [])
+    if predecessors_changed:
+        candidate_tasks = [updated if t['id'] == task_id else t for t in state['tasks']]
+        try:
+            new_scheduler = CriticalPathScheduler(candidate_tasks, calendar=state.get('calendar'))
+        except ValueError:
+            raise ValueError("Essas dependências criariam um ciclo entre tarefas.") from None
+
+    task.update(changes, status=get_task_status(updated))
+    if predecessors_changed:
+        state['scheduler'] = new_scheduler
+    else:
+        state['scheduler'].update_task(task)
+    state['interval_index'].upsert(task)
+    if task.get('parent_id') != original_task.get('parent_id'):
+        rebuild_wbs(state)
+    else:
+        apply_rollup_progress(state, wbs.update_task(task))
+    state['conflicts'] = [c for c in state.get('conflicts', []) if (c['collection'], c['id']) != ('tasks', task_id)]
+    backup_path = save_tasks(state)
+    if any((c['collection'], c['id']) == ('tasks', task_id) for c in state['conflicts']):
+        raise ConflictError(f"A tarefa '{original_task.get('name', '')}' foi alterada em outra sessão enquanto você "
+                            "editava; a versão gravada foi mantida.")
+    if task.get('progress', 0) != original_task.get('progress', 0):
+        ProgressHistoryStore().record(task_id, task['progress'])
+    add_activity(state, "update", "Tarefa Atualizada", f"A tarefa '{original_task.get('name', '')}' foi atualizada.")
+    return task, backup_path
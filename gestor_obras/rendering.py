@@ -0,0 +1,832 @@
+"""Saídas visuais: diagramas Mermaid, figura do Gantt e relatório HTML."""
+import os
+import re
+import tempfile
+from datetime import date, datetime
+from .constants import (
+    DUE_CATEGORY_ORDER, DUE_SOON_LABEL, GANTT_BAR_WIDTH, GANTT_COLOR_TITLES, GANTT_LABEL_MAX_CHARS,
+    GANTT_ROW_HEIGHT, ORG_COLLAPSE_TEAM_SIZE, REPORTS_DIR, REPORT_CHUNK_ROWS, REPORT_MAX_AGE_HOURS,
+)
+from .domain import SiteCalendar, build_scheduler, categorize_due_dates
+from .analytics import compute_report_metrics, prepare_gantt_rows
+from .lazy import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
+
+# --- FUNÇÕES DE GERAÇÃO DE DIAGRAMAS (MERMAID) ---
+
+_SAFE_ID_RE = re.compile(r'[^a-zA-Z0-9]')
+
+class MermaidBuilder:
+    """Monta o texto de um diagrama Mermaid em listas de linhas, unidas uma única vez no final.
+
+    Nós e arestas ficam em `lines` e os estilos em `styles` (o Mermaid exige os estilos depois dos
+    nós). O índice de cada aresta é contado à parte para permitir `linkStyle` nas arestas destacadas.
+    """
+
+    def __init__(self, header):
+        self.lines = [header]
+        self.styles = []
+        self.edge_count = 0
+
+    @staticmethod
+    def safe_id(text, prefix=''):
+        return prefix + _SAFE_ID_RE.sub('', str(text))
+
+    @staticmethod
+    def label(text):
+        return str(text).replace('"', '')
+
+    @staticmethod
+    def shaped(node_id, label, shape='()'):
+        """Definição de um nó: '()' arredondado, '[]' retângulo, '([])' cápsula."""
+        half = len(shape) // 2
+        return f'{node_id}{shape[:half]}"{label}"{shape[half:]}'
+
+    def node(self, node_id, label, shape='()', style=None):
+        self.lines.append(f"    {self.shaped(node_id, label, shape)}")
+        if style:
+            self.styles.append(f"    style {node_id} {style}")
+
+    def edge(self, origin, target, style=None, arrow="-->"):
+        """Aresta entre dois nós; `target` pode ser a definição completa do nó (ver `shaped`)."""
+        self.lines.append(f"    {origin} {arrow} {target}")
+        if style:
+            self.styles.append(f"    linkStyle {self.edge_count} {style}")
+        self.edge_count += 1
+
+    def subgraph(self, subgraph_id, label, direction=None):
+        self.lines.append(f'    subgraph {subgraph_id}["{label}"]')
+        if direction:
+            self.lines.append(f"    direction {direction}")
+
+    def end(self):
+        self.lines.append("    end")
+
+    def style(self, node_id, style):
+        self.styles.append(f"    style {node_id} {style}")
+
+    def build(self):
+        return "\n".join(self.lines + [""] + self.styles) + "\n"
+
+def team_performance_color(task_count, avg_progress, overdue_count):
+    """Cor do nó da equipe com base na performance."""
+    if task_count == 0:
+        return "#b3b3b3"  # Cinza (padrão, sem tarefas)
+    if overdue_count > 0:
+        return "#ffcdd2"  # Vermelho claro para atraso
+    if avg_progress > 70:
+        return "#c8e6c9"  # Verde claro
+    if avg_progress > 30:
+        return "#fff9c4"  # Amarelo claro
+    return "#ffecb3"  # Laranja claro
+
+def generate_org_chart_mermaid_syntax(employees, tasks, collapse=False, calendar=None):
+    """Gera a sintaxe Mermaid para o organograma, enriquecida com dados de performance.
+
+    No modo resumido, equipes com mais de ORG_COLLAPSE_TEAM_SIZE colaboradores viram um único nó
+    com a contagem por função, o que mantém o diagrama legível em obras com centenas de pessoas.
+    """
+    if not employees:
+        return "graph LR\n    A[Nenhum funcionário cadastrado]"
+
+    # Agrupa funcionários e calcula performance por equipe
+    teams = {}
+    for emp in employees:
+        team_name = emp.get('team', 'Sem Equipe')
+        if team_name not in teams:
+            teams[team_name] = {'members': [], 'total_progress': 0, 'task_count': 0, 'overdue_count': 0}
+        teams[team_name]['members'].append(emp)
+
+    due_categories, _ = categorize_due_dates([task.get('due_date') for task in tasks], [task.get('status') for task in tasks],
+                                             calendar=calendar)
+    for task, due_category in zip(tasks, due_categories):
+        team_name = task.get('team')
+        if team_name in teams:
+            teams[team_name]['task_count'] += 1
+            teams[team_name]['total_progress'] += task.get('progress', 0)
+            if due_category == "Atrasada":
+                teams[team_name]['overdue_count'] += 1
+
+    builder = MermaidBuilder("graph TD")
+    builder.node("ENG_CIVIL", "Engenheiro Civil", '[]', "fill:#d1e7dd,stroke:#0f5132,stroke-width:2px")
+    builder.node("ENC_CIVIL", "Encarregado Civil", '[]', "fill:#e9ecef,stroke:#343a40,stroke-width:2px")
+    builder.node("TEC_SEG", "Técnico de Seg. do Trabalho", '[]', "fill:#e9ecef,stroke:#343a40,stroke-width:2px")
+    builder.edge("ENG_CIVIL", "ENC_CIVIL")
+    builder.edge("ENC_CIVIL", "TEC_SEG")
+
+    for team_name, data in teams.items():
+        team_id = builder.safe_id(team_name, 'T')
+        avg_progress = (data['total_progress'] / data['task_count']) if data['task_count'] > 0 else 0
+        color = team_performance_color(data['task_count'], avg_progress, data['overdue_count'])
+        team_label = f'{builder.label(team_name)}<br><b>{avg_progress:.1f}% Concluído</b><br><i>{data["task_count"]} tarefas</i>'
+        builder.edge("ENC_CIVIL", builder.shaped(team_id, team_label))
+        builder.style(team_id, f"fill:{color},stroke:#333,stroke-width:2px")
+
+        members = data['members']
+        if collapse and len(members) > ORG_COLLAPSE_TEAM_SIZE:
+            roles = {}
+            for member in members:
+                role = member.get('role', 'Sem Função')
+                roles[role] = roles.get(role, 0) + 1
+            role_summary = "<br>".join(f"{count} × {builder.label(role)}" for role, count in sorted(roles.items(), key=lambda item: -item[1]))
+            builder.edge(team_id, builder.shaped(f"{team_id}_MEMBROS", f"<b>{len(members)} colaboradores</b><br><i>{role_summary}</i>", '[]'))
+            continue
+        for member in members:
+            member_id = builder.safe_id(member['id'], 'P')
+            member_name = builder.label(member.get('name', 'Sem Nome'))
+            member_role = builder.label(member.get('role', 'Sem Função'))
+            builder.edge(team_id, builder.shaped(member_id, f"{member_name}<br><i>({member_role})</i>", '[]'))
+
+    return builder.build()
+
+def generate_flowchart_mermaid_syntax(tasks, scheduler=None, layout="Dependências", sector_order=None, calendar=None):
+    """Gera a sintaxe Mermaid para o fluxograma de tarefas, com status e prazos.
+
+    Layouts (ver FLOWCHART_LAYOUTS):
+    - "Dependências": as setas seguem as predecessoras e o caminho crítico é destacado em
+      vermelho; sem dependências, as tarefas são encadeadas pela data de criação.
+    - "Faixas por Setor": uma faixa (subgrafo) por frente de serviço, na ordem de `sector_order`,
+      com as tarefas em ordem de data dentro de cada faixa.
+    - "Resumido por Setor": cada setor vira um subgrafo com um nó por status e as setas ligam
+      setores em vez de tarefas.
+    """
+    if not tasks:
+        return "flowchart TD\n    A[Nenhuma tarefa cadastrada]"
+
+    sorted_tasks = sorted(tasks, key=lambda x: x.get('created_at', ''))
+    task_ids = {task['id'] for task in tasks}
+    has_dependencies = any(p in task_ids for task in tasks for p in task.get('predecessors', []))
+    if scheduler is None and has_dependencies:
+        scheduler = build_scheduler(tasks, calendar)
+    critical = scheduler.critical_ids() if scheduler and has_dependencies else set()
+    critical_edges = scheduler.critical_edges() if critical else set()
+
+    builder = MermaidBuilder("flowchart LR" if layout == "Faixas por Setor" else "flowchart TD")
+    builder.node("Start", "Início da Obra", '([])', "fill:#d4edda,stroke:#155724,stroke-width:2px")
+    if layout == "Resumido por Setor":
+        _add_sector_summary_nodes(builder, sorted_tasks, task_ids, has_dependencies, critical, critical_edges, calendar)
+    elif layout == "Faixas por Setor":
+        _add_sector_lanes(builder, tasks, task_ids, sector_order or [], critical, critical_edges, calendar)
+    else:
+        _add_task_nodes(builder, sorted_tasks, task_ids, has_dependencies, critical, critical_edges, calendar)
+    return builder.build()
+
+def _add_task_node_defs(builder, tasks, critical, calendar):
+    """Acrescenta ao builder o nó de cada tarefa, com cor e prazo. Retorna {id da tarefa: id Mermaid}."""
+    node_ids = {}
+    categories, workdays = categorize_due_dates([task.get('due_date') for task in tasks], calendar=calendar)
+    due_dates = SiteCalendar.to_days([task.get('due_date') for task in tasks]).astype(object)
+
+    for task, due_category, due_workdays, due_date in zip(tasks, categories, workdays, due_dates):
+        task_id = builder.safe_id(task['id'], 'TASK')
+        status = task.get('status', 'Planejada')
+
+        # Informações de prazo
+        prazo_info = ""
+        color = "#e9ecef"  # Cinza (Planejada)
+        if status == 'Concluída':
+            color = "#c8e6c9"  # Verde
+            prazo_info = "Concluída"
+        elif status == 'Em Andamento':
+            color = "#fff9c4"  # Amarelo
+            if due_date is not None:
+                if due_category == "Atrasada":
+                    color = "#ffcdd2"  # Vermelho (Atrasada)
+                    prazo_info = f"Atrasada! (Venceu em {due_date:%d/%m})"
+                else:
+                    prazo_info = f"Vence em {due_date:%d/%m} ({due_workdays:.0f} dias úteis)"
+
+        label = (f"{builder.label(task.get('name', 'Tarefa sem nome'))}<br><b>{task.get('progress', 0)}%</b> - "
+                 f"<i>{builder.label(task.get('team', 'Sem equipe'))}</i><br><small>{prazo_info}</small>")
+        stroke = "stroke:#dc3545,stroke-width:4px" if task['id'] in critical else "stroke:#333,stroke-width:2px"
+        builder.node(task_id, label, '()', f"fill:{color},{stroke}")
+        node_ids[task['id']] = task_id
+    return node_ids
+
+def _add_task_nodes(builder, sorted_tasks, task_ids, has_dependencies, critical, critical_edges, calendar):
+    """Fluxograma detalhado: um nó por tarefa."""
+    _add_task_node_defs(builder, sorted_tasks, critical, calendar)
+    builder.node("End", "Conclusão da Obra", '([])', "fill:#d4edda,stroke:#155724,stroke-width:2px")
+    critical_style = "stroke:#dc3545,stroke-width:3px"
+    if has_dependencies:
+        successors = {p for task in sorted_tasks for p in task.get('predecessors', []) if p in task_ids}
+        for task in sorted_tasks:
+            task_id = builder.safe_id(task['id'], 'TASK')
+            preds = [p for p in task.get('predecessors', []) if p in task_ids]
+            if not preds:
+                builder.edge("Start", task_id, critical_style if task['id'] in critical else None)
+            for p in preds:
+                builder.edge(builder.safe_id(p, 'TASK'), task_id, critical_style if (p, task['id']) in critical_edges else None)
+            if task['id'] not in successors:
+                builder.edge(task_id, "End", critical_style if task['id'] in critical else None)
+    else:
+        last_node_id = "Start"
+        for task in sorted_tasks:
+            task_id = builder.safe_id(task['id'], 'TASK')
+            builder.edge(last_node_id, task_id)
+            last_node_id = task_id
+        builder.edge(last_node_id, "End")
+
+def _add_sector_lanes(builder, tasks, task_ids, sector_order, critical, critical_edges, calendar):
+    """Fluxograma em faixas: um subgrafo por setor, com as tarefas encadeadas por data de início.
+
+    A ordenação usa baldes por dia (ordinal da data menos o menor ordinal), o que mantém a geração
+    linear no número de tarefas (mais o número de dias da obra). Entre faixas só há setas de
+    dependência entre setores diferentes e setas tracejadas quando a mesma equipe passa de uma
+    frente para outra.
+    """
+    ordinals = SiteCalendar.to_days([task.get('created_at') for task in tasks])
+    valid = ~np.isnat(ordinals)
+    day_offsets = np.zeros(len(tasks), dtype=np.int64)
+    if valid.any():
+        day_offsets[valid] = (ordinals[valid] - ordinals[valid].min()).astype(np.int64)
+        day_offsets[~valid] = day_offsets[valid].max() + 1  # Tarefas sem data vão para o fim da faixa
+    buckets = [[] for _ in range(int(day_offsets.max()) + 1)]
+    for task, offset in zip(tasks, day_offsets):
+        buckets[offset].append(task)
+    date_ordered = [task for bucket in buckets for task in bucket]
+
+    lanes = {sector: [] for sector in sector_order}
+    for task in date_ordered:
+        lanes.setdefault(task.get('sector', 'Sem Setor'), []).append(task)
+
+    critical_style = "stroke:#dc3545,stroke-width:3px"
+    node_ids = {}
+    for lane_index, (sector, lane_tasks) in enumerate(lanes.items()):
+        if not lane_tasks:
+            continue
+        builder.subgraph(f"LANE{lane_index}", builder.label(sector), direction="LR")
+        node_ids.update(_add_task_node_defs(builder, lane_tasks, critical, calendar))
+        for previous, task in zip(lane_tasks, lane_tasks[1:]):
+            builder.edge(node_ids[previous['id']], node_ids[task['id']],
+                         critical_style if (previous['id'], task['id']) in critical_edges else None)
+        builder.end()
+        builder.edge("Start", node_ids[lane_tasks[0]['id']], critical_style if lane_tasks[0]['id'] in critical else None)
+        builder.edge(node_ids[lane_tasks[-1]['id']], "End", critical_style if lane_tasks[-1]['id'] in critical else None)
+
+    builder.node("End", "Conclusão da Obra", '([])', "fill:#d4edda,stroke:#155724,stroke-width:2px")
+
+    # Setas entre faixas: dependências entre setores diferentes...
+    sector_of = {task['id']: task.get('sector', 'Sem Setor') for task in tasks}
+    for task in date_ordered:
+        for p in task.get('predecessors', []):
+            if p in task_ids and sector_of[p] != sector_of[task['id']]:
+                builder.edge(node_ids[p], node_ids[task['id']], critical_style if (p, task['id']) in critical_edges else None)
+
+    # ... e a mesma equipe mudando de frente (tarefa anterior da equipe em outro setor)
+    last_task_of_team = {}
+    for task in date_ordered:
+        team = task.get('team')
+        previous = last_task_of_team.get(team)
+        if previous is not None and sector_of[previous['id']] != sector_of[task['id']]:
+            builder.edge(node_ids[previous['id']], node_ids[task['id']], "stroke:#6c757d,stroke-dasharray:4",
+                         arrow=f"-.->|{builder.label(team)}|")
+        last_task_of_team[team] = task
+
+def _add_sector_summary_nodes(builder, sorted_tasks, task_ids, has_dependencies, critical, critical_edges, calendar):
+    """Fluxograma resumido: um subgrafo por setor, com contagem e progresso médio por status.
+
+    O tamanho do texto depende do número de setores (e dos pares de setores ligados por
+    dependências), e não do número de tarefas.
+    """
+    categories, _ = categorize_due_dates([task.get('due_date') for task in sorted_tasks], [task.get('status') for task in sorted_tasks],
+                                         calendar=calendar)
+    sectors = {}
+    sector_of = {}
+    for task, due_category in zip(sorted_tasks, categories):
+        sector = task.get('sector', 'Sem Setor')
+        sector_of[task['id']] = sector
+        summary = sectors.setdefault(sector, {})
+        status_summary = summary.setdefault(task.get('status', 'Planejada'), {'count': 0, 'progress': 0, 'overdue': 0, 'critical': 0})
+        status_summary['count'] += 1
+        status_summary['progress'] += task.get('progress', 0)
+        status_summary['overdue'] += due_category == "Atrasada"
+        status_summary['critical'] += task['id'] in critical
+
+    status_colors = {'Concluída': "#c8e6c9", 'Em Andamento': "#fff9c4", 'Planejada': "#e9ecef"}
+    for sector, summary in sectors.items():
+        sector_id = builder.safe_id(sector, 'SETOR')
+        builder.subgraph(sector_id, builder.label(sector))
+        for status, data in summary.items():
+            node_id = builder.safe_id(status, f'{sector_id}_')
+            details = [f"{data['progress'] / data['count']:.0f}% médio"]
+            if data['overdue']:
+                details.append(f"{data['overdue']} atrasada(s)")
+            if data['critical']:
+                details.append(f"{data['critical']} no caminho crítico")
+            color = "#ffcdd2" if data['overdue'] else status_colors.get(status, "#e9ecef")
+            stroke = "stroke:#dc3545,stroke-width:4px" if data['critical'] else "stroke:#333,stroke-width:2px"
+            builder.node(node_id, f"<b>{builder.label(status)}: {data['count']}</b><br><small>{' | '.join(details)}</small>", '()', f"fill:{color},{stroke}")
+        builder.end()
+
+    builder.node("End", "Conclusão da Obra", '([])', "fill:#d4edda,stroke:#155724,stroke-width:2px")
+    critical_style = "stroke:#dc3545,stroke-width:3px"
+    sector_ids = {sector: builder.safe_id(sector, 'SETOR') for sector in sectors}
+    if has_dependencies:
+        sector_edges = {}
+        for task in sorted_tasks:
+            for p in task.get('predecessors', []):
+                if p in task_ids and sector_of[p] != sector_of[task['id']]:
+                    key = (sector_of[p], sector_of[task['id']])
+                    sector_edges[key] = sector_edges.get(key, False) or (p, task['id']) in critical_edges
+        has_incoming = {target for _, target in sector_edges}
+        has_outgoing = {origin for origin, _ in sector_edges}
+        for sector in sectors:
+            if sector not in has_incoming:
+                builder.edge("Start", sector_ids[sector])
+        for (origin, target), is_critical in sector_edges.items():
+            builder.edge(sector_ids[origin], sector_ids[target], critical_style if is_critical else None)
+        for sector in sectors:
+            if sector not in has_outgoing:
+                builder.edge(sector_ids[sector], "End")
+    else:
+        last_node_id = "Start"
+        for sector in sectors:  # Setores na ordem da primeira tarefa de cada um
+            builder.edge(last_node_id, sector_ids[sector])
+            last_node_id = sector_ids[sector]
+        builder.edge(last_node_id, "End")
+
+def create_printable_diagram_html(title, mermaid_syntax, orientation='landscape'):
+    """Cria um arquivo HTML completo com um diagrama Mermaid, otimizado para impressão."""
+    html_content = f"""
+    <!DOCTYPE html>
+    <html lang="pt-BR">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>{title}</title>
+        <script src="https://cdn.jsdelivr.net/npm/mermaid@10/dist/mermaid.min.js"></script>
+        <script>
+            mermaid.initialize({{
+                startOnLoad: true,
+                theme: 'default',
+                flowchart: {{ useMaxWidth: false, htmlLabels: true }},
+                graph: {{ useMaxWidth: false, htmlLabels: true }}
+            }});
+        </script>
+        <style>
+            body {{
+                font-family: Arial, sans-serif;
+                display: flex;
+                flex-direction: column;
+                align-items: center;
+                justify-content: center;
+                min-height: 100vh;
+                margin: 0;
+            }}
+            h1 {{
+                text-align: center;
+                margin-top: 20px;
+                margin-bottom: 10px;
+            }}
+            .mermaid {{
+                display: block;
+                width: 100%;
+                text-align: center;
+            }}
+            /* Estilos para Impressão */
+            @media print {{
+                @page {{
+                    size: A4 {orientation};
+                    margin: 1cm;
+                }}
+                body {{
+                    -webkit-print-color-adjust: exact;
+                    print-color-adjust: exact;
+                    justify-content: flex-start;
+                }}
+                h1 {{
+                    font-size: 16pt;
+                }}
+            }}
+        </style>
+    </head>
+    <body>
+        <h1>{title}</h1>
+        <div class="mermaid">
+{mermaid_syntax}
+        </div>
+    </body>
+    </html>
+    """
+    return html_content
+
+# --- FIGURA DO CRONOGRAMA (GANTT) ---
+
+def build_gantt_figure(rows, title, level="Tarefa", highlight_ids=None):
+    """Desenha o cronograma com traços WebGL (Scattergl): um traço por grupo de cor, não um por tarefa.
+
+    Cada linha vira um segmento horizontal (início → vencimento) e um segmento sobreposto com a
+    parcela já executada. O volume de dados enviado ao navegador cresce com o número de linhas
+    agregadas, que é limitado por GANTT_MAX_ROWS.
+    """
+    num_rows = len(rows)
+    positions = np.arange(num_rows)
+    starts = rows['start'].to_numpy()
+    finishes = rows['finish'].to_numpy()
+    progress_ends = starts + (finishes - starts) * (rows['progress'].to_numpy() / 100.0)
+
+    def segments(values_from, values_to, mask):
+        points = np.empty(int(mask.sum()) * 3, dtype=object)
+        points[0::3] = values_from[mask]
+        points[1::3] = values_to[mask]
+        points[2::3] = None
+        return points
+
+    labels = rows['label'].tolist()
+    hover = [
+        f"<b>{label}</b><br>{start:%d/%m/%Y} → {finish:%d/%m/%Y}<br>Progresso: {progress:.0f}%"
+        + (f"<br>Tarefas: {count}" if level != "Tarefa" else "")
+        for label, start, finish, progress, count in zip(labels, rows['start'], rows['finish'], rows['progress'], rows['count'])
+    ]
+    hover = np.array(hover, dtype=object)
+
+    fig = go.Figure()
+    color_palette = px.colors.qualitative.Plotly
+    color_keys = rows['color_key'].to_numpy()
+    for i, key in enumerate(pd.unique(color_keys)):
+        mask = color_keys == key
+        color = color_palette[i % len(color_palette)]
+        y_points = segments(positions, positions, mask)
+        fig.add_trace(go.Scattergl(
+            x=segments(starts, finishes, mask), y=y_points, mode='lines', name=str(key), legendgroup=str(key),
+            line=dict(color=color, width=GANTT_BAR_WIDTH), opacity=0.4,
+            hovertext=segments(hover, hover, mask), hoverinfo='text',
+        ))
+        fig.add_trace(go.Scattergl(
+            x=segments(starts, progress_ends, mask), y=y_points, mode='lines', name=str(key), legendgroup=str(key),
+            line=dict(color=color, width=GANTT_BAR_WIDTH), showlegend=False, hoverinfo='skip',
+        ))
+
+    if highlight_ids:
+        mask = rows['id'].isin(highlight_ids).to_numpy()
+        if mask.any():
+            fig.add_trace(go.Scattergl(
+                x=segments(starts, finishes, mask), y=segments(positions, positions, mask), mode='lines',
+                name="Caminho Crítico", line=dict(color='#dc3545', width=3), hoverinfo='skip',
+            ))
+
+    label_width = min(GANTT_LABEL_MAX_CHARS, max((len(label) for label in labels), default=10))
+    short_labels = [label if len(label) <= GANTT_LABEL_MAX_CHARS else label[:GANTT_LABEL_MAX_CHARS - 1] + '…' for label in labels]
+    fig.update_yaxes(tickmode='array', tickvals=positions, ticktext=short_labels, autorange="reversed", title=None)
+    fig.update_xaxes(type='date', title="Linha do Tempo")
+    fig.update_layout(
+        title=title, height=max(400, num_rows * GANTT_ROW_HEIGHT + 150),
+        margin=dict(l=min(350, label_width * 7 + 20)), legend_title_text=GANTT_COLOR_TITLES.get(level, "Equipe"),
+    )
+
+    fig.add_shape(type='line', x0=datetime.now(), y0=0, x1=datetime.now(), y1=1, yref='paper', line=dict(color='#dc3545', width=2, dash='dash'))
+    fig.add_annotation(x=datetime.now(), y=1.05, yref='paper', showarrow=False, text="Hoje", font=dict(color="#dc3545"))
+    return fig
+
+# --- RELATÓRIO HTML ---
+
+def iter_report_html(filtered_df, personnel_df, project_goals, filters, wbs=None, calendar=None, index=None):
+    """Gera o relatório HTML em partes (chunks), sem montar o documento inteiro em memória.
+
+    Cada gráfico e cada lote de linhas das tabelas é entregue separadamente, de modo que
+    o consumo de memória fica limitado pelo tamanho do maior pedaço, e não pelo número de tarefas.
+    Os prazos são contados em dias úteis do `calendar` da obra; as vencidas saem do `index`, se informado.
+    """
+
+    # --- Pré-processamento e Cálculos Adicionais ---
+    today = date.today()
+
+    due_categories, workdays = categorize_due_dates(filtered_df['due_date'], filtered_df['status'], calendar, today)
+    late_days = np.maximum(-np.nan_to_num(workdays), 1).astype(int)
+    soon_days = np.nan_to_num(workdays).astype(int)
+    filtered_df['due_days_color'] = np.select(
+        [due_categories == "Concluída", due_categories == "Sem Prazo", due_categories == "Atrasada", due_categories == DUE_SOON_LABEL],
+        ['success', 'secondary', 'danger', 'warning'], default='primary')
+    filtered_df['due_days_text'] = np.where(
+        due_categories == "Atrasada", [f"{n} dias úteis de atraso" for n in late_days],
+        np.where(np.isin(due_categories, [DUE_SOON_LABEL, "Em Dia"]), [f"Vence em {n} dias úteis" for n in soon_days], None))
+
+    # --- Métricas Principais ---
+    metrics = compute_report_metrics(filtered_df, today, wbs, index)
+    total_tasks = metrics['total_tasks']
+    progress = metrics['progress']
+    overdue_tasks = metrics['overdue_tasks']
+    completion_rate = metrics['completion_rate']
+
+    # Processar as metas para formato de lista HTML
+    goals_html = ""
+    if project_goals and project_goals.strip():
+        goals_list = [goal.strip() for goal in project_goals.strip().split('\n') if goal.strip()]
+        goals_html = '<ul style="margin-top: 10px; padding-left: 20px;">' + "".join(f"<li>{goal}</li>" for goal in goals_list) + "</ul>"
+    else:
+        goals_html = "<p style='margin-top:10px;'>Nenhuma meta definida.</p>"
+
+    # --- Cabeçalho, Estilos e Sumário ---
+    yield f"""
+    <!DOCTYPE html>
+    <html lang="pt-br">
+    <head>
+        <meta charset="UTF-8">
+        <title>Relatório de Andamento da Obra</title>
+        <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;700&display=swap" rel="stylesheet">
+        <style>
+            body {{ font-family: 'Roboto', sans-serif; line-height: 1.6; color: #333; background-color: #f4f7f9; margin: 0; padding: 0; }}
+            .container {{ max-width: 1200px; margin: 20px auto; padding: 25px; background-color: #fff; border-radius: 8px; box-shadow: 0 4px 15px rgba(0,0,0,0.08); }}
+            header {{ display: flex; justify-content: space-between; align-items: center; border-bottom: 3px solid #007bff; padding-bottom: 20px; margin-bottom: 25px; }}
+            header h1 {{ margin: 0; color: #004a99; font-size: 2.2em; font-weight: 700;}}
+            .report-info p {{ margin: 2px 0; text-align: right; color: #555; font-size: 0.9em; }}
+            .section {{ margin-bottom: 45px; }}
+            .section h2 {{ font-size: 1.6em; color: #004a99; border-bottom: 1px solid #ddd; padding-bottom: 10px; margin-bottom: 20px; font-weight: 700; }}
+            .metrics-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 20px; }}
+            .metric {{ background-color: #fff; padding: 20px; border-radius: 8px; text-align: center; border: 1px solid #e0e0e0; transition: all 0.3s ease; }}
+            .metric:hover {{ transform: translateY(-5px); box-shadow: 0 8px 20px rgba(0,0,0,0.1); }}
+            .metric .value {{ font-size: 2.8em; font-weight: 700; color: #007bff; }}
+            .metric .value.danger {{ color: #dc3545; }}
+            .metric .label {{ font-size: 1.1em; color: #666; margin-top: 5px; }}
+            .summary-box {{ background-color: #e7f5ff; border-left: 5px solid #007bff; padding: 20px; margin-bottom: 25px; border-radius: 5px; }}
+            .summary-box strong {{ color: #004a99; }}
+            .charts-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(400px, 1fr)); gap: 25px; align-items: start; }}
+            .chart {{ border: 1px solid #ddd; padding: 15px; border-radius: 8px; background: #fff; }}
+            .chart-desc {{ font-size: 0.9em; color: #777; text-align: center; margin-top: 5px; }}
+            .dataframe {{ width: 100%; border-collapse: collapse; }}
+            .dataframe th, .dataframe td {{ padding: 12px 15px; text-align: left; border-bottom: 1px solid #e0e0e0; }}
+            .dataframe th {{ background-color: #f2f7fc; font-weight: bold; color: #004a99; }}
+            .dataframe tbody tr:hover {{ background-color: #f8f9fa; }}
+            .dataframe .table-danger, .dataframe .table-danger:hover {{ background-color: #f8d7da !important; }}
+            .badge {{ display: inline-block; padding: .35em .65em; font-size: 85%; font-weight: 700; line-height: 1; text-align: center; white-space: nowrap; vertical-align: baseline; border-radius: .25rem; color: #fff; }}
+            .badge-primary {{ background-color: #007bff; }}
+            .badge-success {{ background-color: #28a745; }}
+            .badge-warning {{ background-color: #ffc107; color: #212529;}}
+            .badge-danger {{ background-color: #dc3545; }}
+            .badge-secondary {{ background-color: #6c757d; }}
+            .badge-prazo {{ font-size: 0.8em; margin-left: 8px; padding: 0.2em 0.5em; border-radius: 10px; }}
+            .badge-prazo-danger {{ background-color: #dc3545; color: white;}}
+            .badge-prazo-warning {{ background-color: #ffc107; color: #212529;}}
+            .badge-prazo-primary {{ background-color: #e7f5ff; color: #007bff;}}
+            .badge-prazo-success {{ background-color: #d4edda; color: #155724;}}
+            .badge-prazo-secondary {{ background-color: #e9ecef; color: #343a40;}}
+            .progress-bar-container {{ width: 100%; background-color: #e9ecef; border-radius: .25rem; }}
+            .progress-bar {{ height: 20px; line-height: 20px; text-align: center; color: white; font-size: 0.85em; border-radius: .25rem; }}
+            .personnel-list-container {{ max-height: 400px; overflow-y: auto; }}
+            footer {{ text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #eee; font-size: 0.9em; color: #888; }}
+            
+            @media print {{ 
+                body {{ background-color: #fff; }} 
+                .container {{ box-shadow: none; border: none; margin: 0; max-width: 100%; }} 
+                .personnel-list-container {{ 
+                    max-height: none !important; 
+                    overflow-y: visible !important; 
+                }}
+                .no-print {{ display: none; }}
+                body {{
+                    -webkit-print-color-adjust: exact !important;
+                    print-color-adjust: exact !important;
+                }}
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <header>
+                <h1>Relatório de Andamento da Obra</h1>
+                <div class="report-info">
+                    <p><strong>Data de Emissão:</strong> {datetime.now().strftime('%d/%m/%Y %H:%M')}</p>
+                    <p><strong>Filtros Aplicados:</strong></p>
+                    <p>Equipe: {filters['team']} | Setor: {filters['sector']} | Status: {filters['status']} | Período: {filters.get('period', 'Todo o projeto')}</p>
+                </div>
+            </header>
+
+            <div class="section">
+                <h2>1. Sumário Executivo e Metas</h2>
+                <div class="summary-box"><strong>Metas do Projeto:</strong>
+                {goals_html}
+                </div>
+                <div class="metrics-grid">
+                    <div class="metric"><div class="value">{total_tasks}</div><div class="label">Total de Tarefas</div></div>
+                    <div class="metric"><div class="value">{progress:.1f}%</div><div class="label">Progresso Geral (Ponderado)</div></div>
+                    <div class="metric"><div class="value">{completion_rate:.1f}%</div><div class="label">Taxa de Conclusão</div></div>
+                    <div class="metric"><div class="value {'danger' if overdue_tasks > 0 else ''}">{overdue_tasks}</div><div class="label">Tarefas Atrasadas</div></div>
+                </div>
+            </div>
+    """
+
+    # --- Geração de Gráficos (convertidos para HTML, um por vez) ---
+    # Gráfico de Gantt (Cronograma)
+    gantt_chart_html = "<p>Nenhuma tarefa com datas válidas para gerar o cronograma.</p>"
+    gantt_rows, gantt_level, gantt_total = prepare_gantt_rows(filtered_df)
+    if not gantt_rows.empty:
+        fig_gantt = build_gantt_figure(gantt_rows, "Cronograma da Obra", gantt_level)
+        gantt_chart_html = fig_gantt.to_html(full_html=False, include_plotlyjs='cdn')
+        if gantt_level != "Tarefa" or gantt_total > len(gantt_rows):
+            gantt_chart_html += f'<p class="chart-desc">Cronograma agregado por {gantt_level.lower()} ({len(gantt_rows)} de {gantt_total} linhas).</p>'
+        del fig_gantt
+    del gantt_rows
+
+    yield f"""
+            <div class="section">
+                <h2>2. Cronograma das Tarefas</h2>
+                <div class="chart">{gantt_chart_html}</div>
+                <p class="chart-desc">O Gráfico de Gantt ilustra a linha do tempo das atividades, permitindo visualizar a duração e a sobreposição das tarefas.</p>
+            </div>
+
+            <div class="section">
+                <h2>3. Análise de Desempenho</h2>
+                <div class="charts-grid">
+    """
+    del gantt_chart_html
+
+    # Gráfico de Status (Pizza)
+    status_counts = filtered_df['status'].value_counts().reset_index()
+    status_counts.columns = ['status', 'count']
+    fig_status = px.pie(status_counts, names='status', values='count', hole=.4,
+                        title="Distribuição por Status",
+                        color='status', color_discrete_map={'Concluída':'#28a745', 'Em Andamento':'#ffc107', 'Planejada':'#007bff'})
+    fig_status.update_layout(legend_title_text='Status', margin=dict(t=40, b=20, l=20, r=20), font_family="Arial")
+    yield f"""
+                    <div class="chart">
+                        {fig_status.to_html(full_html=False, include_plotlyjs='cdn')}
+                        <p class="chart-desc">Este gráfico mostra a proporção de tarefas concluídas, em andamento e planejadas.</p>
+                    </div>
+    """
+
+    # Gráfico de Prazos (Barras)
+    df_pending = filtered_df[filtered_df['status'] != 'Concluída'].copy()
+    due_chart_html = ""
+    if not df_pending.empty:
+        df_pending['due_category'] = categorize_due_dates(df_pending['due_date'], calendar=calendar, today=today)[0]
+        due_counts = df_pending['due_category'].value_counts().reset_index()
+        due_counts.columns = ['category', 'count']
+        category_order = DUE_CATEGORY_ORDER
+        fig_due = px.bar(due_counts, x='category', y='count', color='category', text_auto=True,
+                         title="Análise de Prazos (Tarefas Pendentes)",
+                         labels={'category': 'Status do Prazo', 'count': 'Nº de Tarefas'},
+                         color_discrete_map={'Atrasada': '#dc3545', DUE_SOON_LABEL: '#ffc107', 'Em Dia': '#28a745', 'Sem Prazo': '#6c757d'},
+                         category_orders={"category": category_order})
+        fig_due.update_layout(xaxis_title=None, yaxis_title="Nº de Tarefas", showlegend=False, font_family="Arial")
+        due_chart_html = fig_due.to_html(full_html=False, include_plotlyjs='cdn')
+    del df_pending
+    yield f"""
+                    <div class="chart">
+                        {due_chart_html if due_chart_html else "<p>Nenhuma tarefa pendente para análise de prazo.</p>"}
+                        <p class="chart-desc">Análise focada nas tarefas pendentes, classificando-as por urgência de prazo.</p>
+                    </div>
+    """
+
+    # Gráfico de Progresso por Setor
+    progress_by_sector = filtered_df.groupby('sector')['progress'].mean().sort_values(ascending=False).reset_index()
+    fig_sector_progress = px.bar(progress_by_sector, x='sector', y='progress', text='progress',
+                                title="Progresso Médio por Setor",
+                                color='progress', color_continuous_scale=px.colors.sequential.Greens)
+    fig_sector_progress.update_traces(texttemplate='%{text:.2s}%', textposition='outside')
+    fig_sector_progress.update_layout(xaxis_title="Setor", yaxis_title="Progresso Médio (%)", coloraxis_showscale=False, font_family="Arial")
+    yield f"""
+                    <div class="chart">
+                        {fig_sector_progress.to_html(full_html=False, include_plotlyjs='cdn')}
+                        <p class="chart-desc">Média de progresso das tarefas agrupadas por cada setor da obra.</p>
+                    </div>
+    """
+
+    # Gráfico de Carga de Trabalho por Equipe
+    tasks_by_team_status = filtered_df.groupby(['team', 'status']).size().reset_index(name='count')
+    fig_teams_workload = px.bar(tasks_by_team_status, x='team', y='count', color='status',
+                               title="Carga de Trabalho por Equipe e Status",
+                               labels={'team': 'Equipe', 'count': 'Nº de Tarefas', 'status': 'Status'},
+                               color_discrete_map={'Concluída':'#28a745', 'Em Andamento':'#ffc107', 'Planejada':'#007bff'},
+                               text_auto=True)
+    fig_teams_workload.update_layout(xaxis={'categoryorder':'total descending'}, yaxis_title="Nº de Tarefas", xaxis_title=None, font_family="Arial")
+    yield f"""
+                    <div class="chart">
+                        {fig_teams_workload.to_html(full_html=False, include_plotlyjs='cdn')}
+                        <p class="chart-desc">Distribuição do número de tarefas por status para cada equipe.</p>
+                    </div>
+                </div>
+            </div>
+    """
+
+    # --- Geração de Tabelas (em lotes de linhas) ---
+    yield """
+            <div class="section">
+                <h2>4. Detalhamento das Atividades</h2>
+                <p>A tabela a seguir lista todas as atividades consideradas neste relatório, com detalhes sobre status, progresso e prazos.</p>
+                <table class="dataframe"><thead><tr><th>Tarefa</th><th>Equipe</th><th>Setor</th><th>Status</th><th>Progresso</th><th>Prazo</th></tr></thead><tbody>
+    """
+
+    status_map = {'Concluída': 'success', 'Em Andamento': 'warning', 'Planejada': 'primary'}
+    due_labels = filtered_df['due_date'].dt.strftime('%d/%m/%Y').fillna('')
+    rows = zip(filtered_df['name'], filtered_df['team'], filtered_df['sector'], filtered_df['status'],
+               filtered_df['progress'], due_labels, filtered_df['due_days_text'], filtered_df['due_days_color'])
+    batch = []
+    for name, team, sector, status, task_progress, due_label, due_text, due_color in rows:
+        batch.append(f"""
+            <tr class="{'table-danger' if due_color == 'danger' else ''}">
+                <td>{name}</td>
+                <td>{team}</td>
+                <td>{sector}</td>
+                <td><span class="badge badge-{status_map.get(status, 'secondary')}">{status}</span></td>
+                <td>
+                    <div class="progress-bar-container">
+                        <div class="progress-bar" style="width: {task_progress}%; background-color: {'#28a745' if task_progress == 100 else '#007bff'};">{task_progress}%</div>
+                    </div>
+                </td>
+                <td>
+                    {due_label}
+                    <small class="badge-prazo badge-prazo-{due_color}">{due_text if due_text else ''}</small>
+                </td>
+            </tr>
+        """)
+        if len(batch) >= REPORT_CHUNK_ROWS:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+    yield "</tbody></table></div>"
+
+    # Tabela de Pessoal
+    total_employees = len(personnel_df)
+    team_summary_html = "<p>Nenhuma equipe para exibir.</p>"
+    if not personnel_df.empty:
+        team_counts = personnel_df['team'].value_counts().reset_index()
+        team_counts.columns = ['Equipe', 'Nº de Colaboradores']
+        team_summary_html = team_counts.to_html(index=False, border=0, classes='dataframe')
+
+    yield f"""
+            <div class="section">
+                <h2>5. Gestão de Pessoal</h2>
+                <div class="charts-grid">
+                     <div class="chart">
+                        <h3 style="text-align: center; margin-top: 5px;">Colaboradores por Equipe</h3>
+                        {team_summary_html}
+                    </div>
+                    <div class="metric" style="display: flex; flex-direction: column; justify-content: center; align-items: center; height: 100%;">
+                        <div class="value">{total_employees}</div>
+                        <div class="label">Total de Colaboradores</div>
+                    </div>
+                </div>
+                <br>
+                <h3>Lista Geral de Funcionários Por Atividade</h3>
+                <div class="personnel-list-container">
+    """
+
+    if personnel_df.empty:
+        yield "<p>Nenhum funcionário para exibir.</p>"
+    else:
+        # A lista de tarefas de cada equipe é montada uma única vez e reaproveitada em cada linha
+        tasks_by_team = {team: '<br>'.join(names) for team, names in filtered_df.groupby('team')['name']}
+        df_people_display = personnel_df[['name', 'team', 'role']].sort_values(by=['team', 'name'])
+        yield '<table border="0" class="dataframe"><thead><tr style="text-align: right;"><th>Nome</th><th>Equipe</th><th>Função</th><th>Tarefa(s) da Equipe</th></tr></thead><tbody>'
+        batch = []
+        for name, team, role in zip(df_people_display['name'], df_people_display['team'], df_people_display['role']):
+            team_tasks = tasks_by_team.get(team, 'Nenhuma tarefa atribuída à equipe')
+            batch.append(f"<tr><td>{name}</td><td>{team}</td><td>{role}</td><td>{team_tasks}</td></tr>")
+            if len(batch) >= REPORT_CHUNK_ROWS:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+        yield "</tbody></table>"
+
+    yield f"""
+                </div>
+            </div>
+            
+            <footer>
+                <p>Relatório gerado pelo sistema Gestor de Obras Pro+ | © {datetime.now().year}</p>
+                <p>Desenvolvido por Francelino neto santos.</p>
+            </footer>
+        </div>
+    </body>
+    </html>
+    """
+
+def write_report_file(chunks, directory=REPORTS_DIR):
+    """Grava os pedaços do relatório em um arquivo temporário e retorna (caminho, tamanho em bytes)."""
+    os.makedirs(directory, exist_ok=True)
+    prune_old_reports(directory)
+    size = 0
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix='.html', prefix='relatorio_obra_',
+                                     dir=directory, delete=False) as f:
+        for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk.encode('utf-8'))
+    return f.name, size
+
+def prune_old_reports(directory=REPORTS_DIR, max_age_hours=REPORT_MAX_AGE_HOURS):
+    """Remove relatórios temporários antigos, deixados por sessões que já foram encerradas."""
+    if not os.path.isdir(directory):
+        return
+    limit = datetime.now().timestamp() - max_age_hours * 3600
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.startswith('relatorio_obra_') and entry.stat().st_mtime < limit:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+_startup_pruned = False
+
+def prune_old_reports_at_startup(directory=REPORTS_DIR):
+    """prune_old_reports uma vez por processo, ao subir a interface, sem esperar o próximo relatório gerado."""
+    global _startup_pruned
+    if not _startup_pruned:
+        _startup_pruned = True
+        prune_old_reports(directory)
@@ -0,0 +1,849 @@
+"""Persistência: arquivos JSON da obra, histórico de progresso colunar e backup compactado."""
+import contextlib
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from datetime import date, datetime
+from .constants import (
+    ACTIVITIES_FILE, BACKUP_DIR, CONFIG_FILE, EVENTS_DIR, EVENTS_SNAPSHOT_EVERY, FILE_LOCK_TIMEOUT_S, PEOPLE_FILE,
+    PROGRESS_HISTORY_DIR, TASKS_FILE,
+)
+from .instrumentation import get_metrics, profile_span
+from .lazy import lazy_import
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# --- TRAVAS ENTRE PROCESSOS ---
+
+class InterProcessLock:
+    """Trava exclusiva e reentrante entre processos (fcntl/msvcrt) e entre threads, sobre um arquivo de trava.
+    Desiste com TimeoutError depois de `timeout` segundos; `local` é só a parte entre threads, para quem apenas lê."""
+
+    def __init__(self, path, timeout=FILE_LOCK_TIMEOUT_S):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.RLock()
+        self._depth = 0
+        self._file = None
+        self._pid = None
+
+    def __enter__(self):
+        self.local.acquire()
+        if self._depth == 0:
+            try:
+                if self._pid != os.getpid():  # Primeiro uso, ou processo filho: o arquivo herdado dividiria a trava com o pai
+                    os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                    self._file, self._pid = open(self.path, 'a+b'), os.getpid()
+                _lock_file(self._file, self.timeout, self.path)
+            except BaseException:
+                self.local.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            _unlock_file(self._file)
+        self.local.release()
+
+def _lock_file(f, timeout, path):
+    """Trava o arquivo sem bloquear, tentando de novo com espera crescente (1 a 50 ms) até `timeout`."""
+    deadline = time.monotonic() + timeout
+    delay = 0.001
+    while not _try_lock_file(f):
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Trava {path} ocupada por outro processo há mais de {timeout:.0f} s.")
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+if fcntl is not None:
+    def _try_lock_file(f):
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+else:
+    def _try_lock_file(f):
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+_file_locks = {}
+_file_locks_lock = threading.Lock()
+
+def file_signature(path):
+    """(inode, mtime, tamanho) do arquivo, ou None se não existir: muda a cada gravação (os.replace)."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def get_file_lock(path):
+    """Trava entre processos do arquivo de trava `path`, uma instância por processo e caminho."""
+    path = os.path.abspath(path)
+    with _file_locks_lock:
+        if path not in _file_locks:
+            _file_locks[path] = InterProcessLock(path)
+        return _file_locks[path]
+
+# --- CLASSES PARA GERENCIAMENTO DE DADOS ---
+class DataManager:
+    """Classe centralizada para carregar e salvar dados em arquivos JSON."""
+    @staticmethod
+    def load(file_path, default=None):
+        """Carrega dados de um arquivo JSON. Retorna um valor padrão se o arquivo não existir ou estiver corrompido."""
+        default_value = default if default is not None else {}
+        try:
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return default_value
+        return default_value
+
+    @staticmethod
+    def save(file_path, data):
+        """Salva dados em um arquivo JSON por meio de um temporário renomeado, para quem lê ao mesmo tempo nunca ver o arquivo pela metade."""
+        label = BACKUP_DIR if os.path.dirname(file_path) == BACKUP_DIR else os.path.basename(file_path)
+        event_log = get_event_log() if file_path in TRACKED_FILES else None
+        # Arquivo acompanhado pelo diário: gravação e eventos sob a trava do diário, na mesma ordem em todos os processos
+        with event_log.transaction() if event_log is not None else contextlib.nullcontext():
+            if event_log is not None:
+                event_log.refresh()  # O diário conhece a versão anterior antes de o arquivo mudar no disco
+            started = time.perf_counter()
+            temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with profile_span(f"Salvar {label}"):
+                try:
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, indent=2, ensure_ascii=False)
+                        size = f.tell()
+                    os.replace(temp_path, file_path)
+                except BaseException:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+            elapsed = time.perf_counter() - started
+            if event_log is not None:
+                event_log.record_file(file_path, data)
+        metrics = get_metrics()
+        metrics.observe("gestor_obras_save_duration_seconds", elapsed, file=label)
+        metrics.inc("gestor_obras_save_bytes_total", size, file=label)
+
+    @staticmethod
+    def backup_tasks(tasks):
+        """Cria um backup do arquivo de tarefas com timestamp. Retorna o caminho do backup (None se não houver tarefas)."""
+        if not tasks:
+            return None
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+        backup_file_path = os.path.join(BACKUP_DIR, f"backup_tasks_{timestamp}.json")
+        DataManager.save(backup_file_path, tasks)
+        get_metrics().set("gestor_obras_backup_bytes", os.path.getsize(backup_file_path), kind="tarefas")
+        return backup_file_path
+
+# --- DIÁRIO DE EVENTOS (SINCRONIZAÇÃO, AUDITORIA E RECUPERAÇÃO) ---
+
+TRACKED_FILES = {TASKS_FILE: 'tasks', PEOPLE_FILE: 'people', CONFIG_FILE: 'config'}
+CONFIG_RECORD_ID = 'obra'  # A configuração é um registro único; cada chave de primeiro nível é um campo
+_MISSING = object()
+EVENTS_FILE_NAME = "eventos.jsonl"
+SNAPSHOT_INDEX_NAME = "snapshots.jsonl"
+
+def file_records(collection, data):
+    """Registros de um arquivo de dados por id: tarefas e funcionários pelo 'id', a configuração como registro único."""
+    if collection == 'config':
+        return {CONFIG_RECORD_ID: data}
+    items = data if collection == 'tasks' else data.get('employees', [])
+    return {item.get('id') or item.get('name'): item for item in items}
+
+def records_file_data(collection, records):
+    """Inverso de file_records: o conteúdo do arquivo de dados a partir dos registros."""
+    if collection == 'config':
+        return records.get(CONFIG_RECORD_ID, {})
+    items = list(records.values())
+    return items if collection == 'tasks' else {"employees": items}
+
+def diff_record(before, after):
+    """Diferença campo a campo entre duas versões de um registro: ({campo: [antes, depois]}, [campos removidos])."""
+    changes = {field: [before.get(field), value] for field, value in after.items()
+               if field not in before or before[field] != value}
+    removed = [field for field in before if field not in after]
+    return changes, removed
+
+def apply_event(records, entry):
+    """Aplica um evento do diário aos registros {coleção: {id: dados}}."""
+    collection_records = records[entry['collection']]
+    if entry['op'] == 'delete':
+        collection_records.pop(entry['id'], None)
+    elif entry['op'] == 'create':
+        collection_records[entry['id']] = entry['data']
+    else:
+        record = collection_records.setdefault(entry['id'], {})
+        for field, (_, value) in entry['changes'].items():
+            record[field] = value
+        for field in entry.get('removed', ()):
+            record.pop(field, None)
+
+def fold_events(entries):
+    """Junta os eventos de cada registro em um só (inclusão + alterações viram a inclusão final; a remoção prevalece)."""
+    folded = {}
+    for entry in entries:
+        key = (entry['collection'], entry['id'])
+        previous = folded.pop(key, None)  # Reinserido no fim: a ordem segue a última mudança
+        if previous is not None and entry['op'] == 'update' and previous['op'] != 'delete':
+            if previous['op'] == 'create':
+                apply_event({entry['collection']: {entry['id']: previous['data']}}, entry)
+            else:
+                changes = previous['changes']
+                for field, (before, after) in entry['changes'].items():
+                    changes[field] = [changes[field][0] if field in changes else before, after]
+                removed = [field for field in previous.get('removed', ()) if field not in entry['changes']]
+                for field in entry.get('removed', ()):
+                    changes.pop(field, None)
+                    removed.append(field)
+                previous.pop('removed', None)
+                if removed:
+                    previous['removed'] = removed
+            previous.update(seq=entry['seq'], at=entry['at'])
+            entry = previous
+        folded[key] = entry
+    return list(folded.values())
+
+def _complete_lines(f):
+    """Linhas completas de um arquivo aberto em modo binário; uma linha ainda sendo escrita fica de fora."""
+    for line in f:
+        if not line.endswith(b'\n'):
+            break
+        yield line.decode('utf-8')
+
+class _ReaderLock:
+    """Trava de um diário somente leitura: só entre as threads do próprio leitor."""
+
+    def __init__(self):
+        self.local = threading.RLock()
+
+class EventLog:
+    """Diário, só acrescentado, das alterações em tarefas, funcionários e configuração, com snapshots periódicos.
+    Com `read_only`, é uma leitura à parte, com trava própria, que só aceita consultas."""
+
+    def __init__(self, directory=EVENTS_DIR, read_only=False):
+        self.directory = directory
+        self.path = os.path.join(directory, EVENTS_FILE_NAME)
+        self.index_path = os.path.join(directory, SNAPSHOT_INDEX_NAME)
+        self.read_only = read_only
+        if read_only:
+            self._lock = _ReaderLock()
+        else:
+            self._lock = get_file_lock(os.path.join(directory, ".trava"))  # Reentrante: save_records volta ao diário pelo DataManager.save
+        self._reset()
+
+    def _reset(self):
+        self._offset = None  # None: diário ainda não aberto
+        self.base_seq = 0  # Seq do último evento anterior às linhas em memória
+        self.lines = []  # Texto dos eventos desde base_seq; a linha i tem seq base_seq + i + 1
+        self.records = {collection: {} for collection in TRACKED_FILES.values()}
+        self.seqs = {collection: {} for collection in TRACKED_FILES.values()}  # id -> seq do último evento
+        self.positions = {collection: {} for collection in TRACKED_FILES.values()}  # id -> posição de cada evento
+        self.snapshots = []  # Índice: {"seq", "at", "offset", "file"}
+
+    @property
+    def last_seq(self):
+        return self.base_seq + len(self.lines)
+
+    def _log_size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, 'rb') as f:
+                return [json.loads(line) for line in _complete_lines(f)]
+        except FileNotFoundError:
+            return []
+
+    def _load_snapshot(self, snapshot):
+        with gzip.open(os.path.join(self.directory, snapshot['file']), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _open(self):
+        """Carrega o último snapshot legível e reaplica os eventos posteriores (ou começa o diário)."""
+        self._offset = 0
+        size = self._log_size()
+        self.snapshots = [s for s in self._read_index() if s['offset'] <= size]
+        for snapshot in reversed(self.snapshots):
+            try:
+                content = self._load_snapshot(snapshot)
+            except (OSError, EOFError, ValueError):  # Snapshot ausente ou danificado: tenta o anterior
+                continue
+            self.records, self.seqs = content['records'], content['seqs']
+            self.base_seq, self._offset = snapshot['seq'], snapshot['offset']
+            if 'positions' in content:
+                self.positions = content['positions']
+            else:  # Snapshot anterior ao índice de posições: monta o índice uma vez, lendo o trecho anterior
+                self._index_positions(0, self._offset)
+            break
+        if not size and not self.read_only:
+            self._seed()
+
+    def _index_positions(self, start, end):
+        """Anota a posição dos eventos entre os bytes `start` e `end` do diário no índice por registro."""
+        with open(self.path, 'rb') as f:
+            f.seek(start)
+            for line in f.read(end - start).splitlines(keepends=True):
+                entry = json.loads(line)
+                self.positions[entry['collection']].setdefault(entry['id'], []).append(start)
+                start += len(line)
+
+    def _catch_up(self):
+        """Lê os eventos acrescentados desde a última leitura (por este ou por outro processo)."""
+        if self._offset is None:
+            self._open()
+        size = self._log_size()
+        if size < self._offset:  # Diário substituído: reabre
+            self._reset()
+            self._open()
+            size = self._log_size()
+        if size == self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        complete = chunk[:chunk.rfind(b'\n') + 1]  # Uma linha ainda sendo escrita fica para a próxima leitura
+        position = self._offset
+        for raw in complete.splitlines(keepends=True):
+            line = raw.decode('utf-8').rstrip('\n')
+            entry = json.loads(line)
+            apply_event(self.records, entry)
+            self.seqs[entry['collection']][entry['id']] = entry['seq']
+            self.positions[entry['collection']].setdefault(entry['id'], []).append(position)
+            self.lines.append(line)
+            position += len(raw)
+        self._offset = position
+
+    def _seed(self):
+        """Primeiros eventos do diário: todos os registros atuais dos arquivos, como inclusões."""
+        with self._lock:
+            if self._log_size():  # Outro processo começou o diário antes
+                return
+            events = []
+            for file_path, collection in TRACKED_FILES.items():
+                data = DataManager.load(file_path, [] if collection == 'tasks' else {})
+                events.extend({"collection": collection, "id": record_id, "op": "create", "data": record}
+                              for record_id, record in file_records(collection, data).items())
+            self._append(events)
+
+    def _append(self, events):
+        if not events:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        now = datetime.now().isoformat(timespec='seconds')
+        lines = [json.dumps({"seq": seq, "at": now, **event}, ensure_ascii=False)
+                 for seq, event in enumerate(events, start=self.last_seq + 1)]
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        self._catch_up()
+        get_metrics().set("gestor_obras_event_log_seq", self.last_seq)
+        if self.last_seq - (self.snapshots[-1]['seq'] if self.snapshots else 0) >= EVENTS_SNAPSHOT_EVERY:
+            self.snapshots = self._read_index()  # Outro processo pode já ter salvo o snapshot
+            if self.last_seq - (self.snapshots[-1]['seq'] if self.snapshots else 0) >= EVENTS_SNAPSHOT_EVERY:
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        """Salva o estado atual em um snapshot e descarta da memória os eventos anteriores ao snapshot anterior."""
+        file_name = f"snapshot_{self.last_seq:012d}.json.gz"
+        path = os.path.join(self.directory, file_name)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with profile_span("Snapshot do diário de eventos"):
+            with gzip.open(temp_path, 'wt', encoding='utf-8') as f:
+                json.dump({"seq": self.last_seq, "records": self.records, "seqs": self.seqs, "positions": self.positions},
+                          f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        snapshot = {"seq": self.last_seq, "at": datetime.now().isoformat(timespec='seconds'),
+                    "offset": self._offset, "file": file_name}
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot) + "\n")
+        self.snapshots.append(snapshot)
+        if len(self.snapshots) >= 2:
+            keep_from = self.snapshots[-2]['seq']
+            if keep_from > self.base_seq:
+                del self.lines[:keep_from - self.base_seq]
+                self.base_seq = keep_from
+
+    def _read_lines(self, start, end):
+        """Linhas dos eventos start+1..end lidas do arquivo, a partir do snapshot mais próximo."""
+        snapshot = max((s for s in self.snapshots if s['seq'] <= start), key=lambda s: s['seq'], default=None)
+        seq, offset = (snapshot['seq'], snapshot['offset']) if snapshot else (0, 0)
+        lines = []
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            for line in _complete_lines(f):
+                seq += 1
+                if seq > end:
+                    break
+                if seq > start:
+                    lines.append(line)
+        return lines
+
+    def transaction(self):
+        """Trava de gravação do diário: o que for gravado dentro dela fica na mesma ordem no arquivo e no diário."""
+        return self._lock
+
+    def refresh(self):
+        """Abre o diário (ou lê o que outro processo acrescentou); feito antes de um arquivo acompanhado mudar no disco."""
+        with self._lock.local:
+            self._catch_up()
+
+    def record_file(self, file_path, data):
+        """Registra como eventos as diferenças entre `data` (conteúdo recém-gravado) e o estado conhecido do arquivo."""
+        collection = TRACKED_FILES[file_path]
+        with self._lock:
+            self._catch_up()
+            known = self.records[collection]
+            current = file_records(collection, data)
+            events = []
+            for record_id, record in current.items():
+                before = known.get(record_id)
+                if before is None:
+                    events.append({"collection": collection, "id": record_id, "op": "create", "data": record})
+                elif before != record:
+                    changes, removed = diff_record(before, record)
+                    event = {"collection": collection, "id": record_id, "op": "update", "changes": changes}
+                    if removed:
+                        event["removed"] = removed
+                    events.append(event)
+            events.extend({"collection": collection, "id": record_id, "op": "delete", "data": before}
+                          for record_id, before in known.items() if record_id not in current)
+            self._append(events)
+
+    def record_seq(self, collection, record_id):
+        """Seq do último evento do registro (0 se nunca mudou)."""
+        with self._lock.local:
+            self._catch_up()
+            return self.seqs[collection].get(record_id, 0)
+
+    def versions(self):
+        """Seq do último evento de cada registro, por coleção, e o último seq. Pedir antes de ler os arquivos, que assim nunca ficam atrás da versão."""
+        with self._lock.local:
+            self._catch_up()
+            return {collection: dict(seqs) for collection, seqs in self.seqs.items()}, self.last_seq
+
+    def pull(self, since, versions):
+        """Registros gravados depois do evento `since` que a cópia do chamador ainda não tem. Atualiza `versions`.
+        Retorna ({coleção: {id: dados (cópia) ou None se removido}}, último seq)."""
+        with self._lock.local:
+            self._catch_up()
+            last_seq = self.last_seq
+            if since >= last_seq:
+                return {}, last_seq
+            lines = self._read_lines(since, self.base_seq) if since < self.base_seq else []
+            lines += self.lines[max(since - self.base_seq, 0):]
+            changed = {}
+            for line in lines:
+                entry = json.loads(line)
+                collection, record_id = entry['collection'], entry['id']
+                seq = self.seqs[collection].get(record_id, 0)
+                if versions.setdefault(collection, {}).get(record_id) != seq:
+                    versions[collection][record_id] = seq
+                    record = self.records[collection].get(record_id)
+                    changed.setdefault(collection, {})[record_id] = json.loads(json.dumps(record)) if record is not None else None
+        return changed, last_seq
+
+    def _read_at(self, positions):
+        """Eventos lidos do diário nas posições `positions`."""
+        entries = []
+        with open(self.path, 'rb') as f:
+            for position in positions:
+                f.seek(position)
+                entries.append(json.loads(f.readline()))
+        return entries
+
+    def _record_at(self, collection, record_id, seq):
+        """Um registro como estava logo depois do evento `seq` (None se não existia), reaplicando só os eventos dele."""
+        records = {collection: {}}
+        for entry in self.history(collection, record_id):
+            if entry['seq'] > seq:
+                break
+            apply_event(records, entry)
+        return records[collection].get(record_id)
+
+    def save_records(self, file_path, data, versions):
+        """Grava `data` com compare-and-swap por registro sobre `versions` ({id: seq}), combinando o que outras sessões alteraram.
+        Retorna (dados gravados, novas versões, conflitos, ids de registros que vieram de outras sessões)."""
+        collection = TRACKED_FILES[file_path]
+        with self._lock:
+            self._catch_up()
+            known, seqs = self.records[collection], self.seqs[collection]
+            mine_records = file_records(collection, data)
+            merged, conflicts, refreshed = {}, [], []
+            for record_id in [*mine_records, *(i for i in known if i not in mine_records)]:
+                mine, theirs = mine_records.get(record_id), known.get(record_id)
+                base, current = versions.get(record_id, 0), seqs.get(record_id, 0)
+                result = mine
+                if mine != theirs and current != base:  # Outra sessão gravou o registro depois da versão do chamador
+                    original = self._record_at(collection, record_id, base) if base else None
+                    if mine == original:
+                        result = theirs
+                    elif mine is None or theirs is None:
+                        result = theirs
+                        conflicts.append({"collection": collection, "id": record_id, "mine": mine,
+                                          "theirs": json.loads(json.dumps(theirs)), "seq": current})
+                    else:
+                        mine_changes, mine_removed = diff_record(original or {}, mine)
+                        theirs_changes, theirs_removed = diff_record(original or {}, theirs)
+                        overlap = (set(mine_changes) | set(mine_removed)) & (set(theirs_changes) | set(theirs_removed))
+                        if any(mine.get(field, _MISSING) != theirs.get(field, _MISSING) for field in overlap):
+                            result = theirs
+                            conflicts.append({"collection": collection, "id": record_id, "mine": mine,
+                                              "theirs": json.loads(json.dumps(theirs)), "seq": current})
+                        else:
+                            result = {**theirs, **{field: mine[field] for field in mine_changes}}
+                            for field in mine_removed:
+                                result.pop(field, None)
+                    if result is not mine:
+                        refreshed.append(record_id)
+                        result = json.loads(json.dumps(result))  # Cópia: o estado do diário não é compartilhado
+                if result is not None:
+                    merged[record_id] = result
+            merged_data = records_file_data(collection, merged)
+            DataManager.save(file_path, merged_data)
+            seqs = self.seqs[collection]
+            return merged_data, {record_id: seqs.get(record_id, 0) for record_id in merged}, conflicts, refreshed
+
+    def changes_since(self, seq, limit=None):
+        """Eventos depois de `seq`, no máximo `limit`, juntados por registro: (eventos, seq alcançado, último seq)."""
+        with self._lock.local:
+            self._catch_up()
+            last_seq = self.last_seq
+            start = min(max(seq, 0), last_seq)
+            end = last_seq if limit is None else min(start + limit, last_seq)
+            lines = self._read_lines(start, min(end, self.base_seq)) if start < self.base_seq else []
+            lines += self.lines[max(start - self.base_seq, 0):end - self.base_seq]
+        events = fold_events(json.loads(line) for line in lines)
+        for event in events:
+            if event['op'] == 'delete':
+                event.pop('data', None)
+        return events, end, last_seq
+
+    def state_as_of(self, when):
+        """Registros {coleção: {id: dados}} como estavam em `when` (datetime) e o seq do último evento aplicado."""
+        moment = when.isoformat(timespec='seconds')
+        with self._lock.local:
+            self._catch_up()
+            snapshots = [s for s in self.snapshots if s['at'] <= moment]
+        records, seq, offset = {collection: {} for collection in TRACKED_FILES.values()}, 0, 0
+        for snapshot in reversed(snapshots):
+            try:
+                records = self._load_snapshot(snapshot)['records']
+            except (OSError, EOFError, ValueError):
+                continue
+            seq, offset = snapshot['seq'], snapshot['offset']
+            break
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                for line in _complete_lines(f):
+                    entry = json.loads(line)
+                    if entry['at'] > moment:
+                        break
+                    apply_event(records, entry)
+                    seq = entry['seq']
+        return records, seq
+
+    def history(self, collection, record_id):
+        """Todos os eventos de um registro, do mais antigo ao mais recente (auditoria)."""
+        with self._lock.local:
+            self._catch_up()
+            positions = list(self.positions[collection].get(record_id, ()))
+        return self._read_at(positions) if positions else []
+
+    def recover(self, file_paths):
+        """Regrava, com o estado do diário, arquivos acompanhados ausentes ou corrompidos. Retorna {arquivo: dados}."""
+        recovered = {}
+        for file_path in file_paths:
+            collection = TRACKED_FILES[file_path]
+            with self._lock.local:
+                self._catch_up()
+                records = self.records[collection]
+                data = json.loads(json.dumps(records_file_data(collection, records))) if records else None
+            if data is not None:
+                DataManager.save(file_path, data)
+                recovered[file_path] = data
+        return recovered
+
+_event_log = None
+_event_log_lock = threading.Lock()
+
+def get_event_log():
+    """Diário de eventos do processo, na pasta de dados atual."""
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog()
+        return _event_log
+
+# --- HISTÓRICO DE PROGRESSO (CURVA S) ---
+
+class ProgressHistoryStore:
+    """Histórico de progresso das tarefas em colunas: um arquivo pendente do mês corrente e uma partição .npz por mês encerrado."""
+
+    def __init__(self, directory=PROGRESS_HISTORY_DIR):
+        self.directory = directory
+        self.ids_path = os.path.join(directory, "tarefas.txt")
+        self.tail_path = os.path.join(directory, "pendentes.csv")
+        self._task_ids = None
+
+    # --- Dicionário de tarefas ---
+    def task_ids(self):
+        if self._task_ids is None:
+            self._task_ids = []
+            if os.path.exists(self.ids_path):
+                with open(self.ids_path, 'r', encoding='utf-8') as f:
+                    self._task_ids = f.read().split()
+        return self._task_ids
+
+    def task_codes(self):
+        return {task_id: code for code, task_id in enumerate(self.task_ids())}
+
+    def _task_code(self, task_id):
+        codes = self.task_codes()
+        if task_id in codes:
+            return codes[task_id]
+        with open(self.ids_path, 'a', encoding='utf-8') as f:
+            f.write(task_id + "\n")
+        self._task_ids.append(task_id)
+        return len(self._task_ids) - 1
+
+    # --- Escrita ---
+    def is_empty(self):
+        return not os.path.exists(self.ids_path)
+
+    def record(self, task_id, progress, day=None):
+        """Acrescenta um registro (tarefa, dia, progresso). Meses já encerrados são selados antes."""
+        self.record_many({task_id: progress}, day)
+
+    def record_many(self, progress_by_task, day=None):
+        """Acrescenta um registro por tarefa, sob a trava da pasta; um `day` de um mês encerrado vai direto à partição do mês.
+        Datas futuras levantam ValueError."""
+        today = date.today()
+        day = day or today
+        if day > today:
+            raise ValueError("O histórico de progresso não aceita registros com data futura.")
+        os.makedirs(self.directory, exist_ok=True)
+        with get_file_lock(os.path.join(self.directory, ".trava")):
+            self._task_ids = None  # Outro processo pode ter acrescentado tarefas ao dicionário
+            self._seal_closed_months(today)
+            codes = [self._task_code(task_id) for task_id in progress_by_task]
+            if day.strftime("%Y-%m") < today.strftime("%Y-%m"):
+                self._merge_into_partitions(np.full(len(codes), np.datetime64(day, 'D')), np.array(codes, dtype=np.int64),
+                                            np.array([int(p) for p in progress_by_task.values()], dtype=np.int64))
+                return
+            lines = [f"{day.isoformat()},{code},{int(progress)}\n" for code, progress in zip(codes, progress_by_task.values())]
+            with open(self.tail_path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+
+    # --- Leitura do arquivo pendente ---
+    def _read_tail(self):
+        if not os.path.exists(self.tail_path) or os.path.getsize(self.tail_path) == 0:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        tail = pd.read_csv(self.tail_path, header=None, names=['day', 'code', 'progress'], dtype={'day': str})
+        return tail['day'].to_numpy(dtype='datetime64[D]'), tail['code'].to_numpy(np.int64), tail['progress'].to_numpy(np.int64)
+
+    @staticmethod
+    def _dedupe(days, codes, progress):
+        """Mantém o último registro de cada (dia, tarefa), ordenando por dia."""
+        if len(days) == 0:
+            return days, codes, progress
+        keys = days.astype(np.int64) * (int(codes.max()) + 1) + codes
+        _, last = np.unique(keys[::-1], return_index=True)
+        keep = np.sort(len(keys) - 1 - last)
+        order = keep[np.argsort(days[keep], kind='stable')]
+        return days[order], codes[order], progress[order]
+
+    # --- Partições mensais ---
+    def _partition_path(self, month):
+        return os.path.join(self.directory, f"progresso_{month}.npz")
+
+    def sealed_months(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[len("progresso_"):-len(".npz")] for name in os.listdir(self.directory)
+                      if name.startswith("progresso_") and name.endswith(".npz"))
+
+    def _read_partition(self, month):
+        with np.load(self._partition_path(month)) as data:
+            days = np.datetime64(f"{month}-01", 'D') + np.cumsum(data['day_delta'])
+            return (data['base_code'], data['base_progress'].astype(np.int64),
+                    days.astype('datetime64[D]'), data['code'].astype(np.int64), data['progress'].astype(np.int64))
+
+    def _write_partition(self, month, base_code, base_progress, days, codes, progress):
+        first_day = np.datetime64(f"{month}-01", 'D')
+        day_numbers = (days - first_day).astype(np.int64)
+        day_delta = np.diff(day_numbers, prepend=0).astype(np.int8)
+        path = self._partition_path(month)
+        with open(path + ".tmp", 'wb') as f:  # Quem consulta sem a trava nunca vê a partição pela metade
+            np.savez_compressed(f, base_code=base_code.astype(np.uint32), base_progress=base_progress.astype(np.uint8),
+                                day_delta=day_delta, code=codes.astype(np.uint32), progress=progress.astype(np.uint8))
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _apply(state, codes, progress):
+        state = dict(state)
+        state.update(zip(codes.tolist(), progress.tolist()))
+        return state
+
+    def _state_at_month_end(self, month):
+        base_code, base_progress, _, codes, progress = self._read_partition(month)
+        return self._apply(dict(zip(base_code.tolist(), base_progress.tolist())), codes, progress)
+
+    def _seal_closed_months(self, today):
+        """Move os registros pendentes de meses anteriores ao atual para as partições mensais."""
+        if not os.path.exists(self.tail_path):
+            return
+        with open(self.tail_path, 'r', encoding='utf-8') as f:
+            first_line = f.readline()
+        current_month = today.strftime("%Y-%m")
+        if not first_line or first_line[:7] >= current_month:
+            return
+        days, codes, progress = self._read_tail()
+        closed = days.astype('datetime64[M]').astype(str) < current_month
+        self._merge_into_partitions(days[closed], codes[closed], progress[closed])
+        remaining = ~closed
+        tmp_path = self.tail_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{d},{c},{p}\n" for d, c, p in zip(days[remaining].astype(str), codes[remaining], progress[remaining]))
+        os.replace(tmp_path, self.tail_path)
+
+    def _merge_into_partitions(self, days, codes, progress):
+        """Junta registros de meses encerrados às partições desses meses e recalcula, em ordem, o estado
+        inicial de cada partição a partir do primeiro mês alterado."""
+        if len(days) == 0:
+            return
+        months = days.astype('datetime64[M]').astype(str)
+        first_month = min(months.tolist())
+        sealed = self.sealed_months()
+        state = {}
+        before = [m for m in sealed if m < first_month]
+        if before:
+            state = self._state_at_month_end(before[-1])
+        for month in sorted(set(sealed) | set(months.tolist())):
+            if month < first_month:
+                continue
+            in_month = months == month
+            month_days, month_codes, month_progress = days[in_month], codes[in_month], progress[in_month]
+            if month in sealed:
+                _, _, old_days, old_codes, old_progress = self._read_partition(month)
+                month_days = np.concatenate([old_days, month_days])  # Os novos depois: prevalecem no mesmo dia
+                month_codes = np.concatenate([old_codes, month_codes])
+                month_progress = np.concatenate([old_progress, month_progress])
+            month_days, month_codes, month_progress = self._dedupe(month_days, month_codes, month_progress)
+            self._write_partition(month, np.array(list(state), dtype=np.int64), np.array(list(state.values()), dtype=np.int64),
+                                  month_days, month_codes, month_progress)
+            state = self._apply(state, month_codes, month_progress)
+
+    # --- Consulta ---
+    def read_range(self, start, end):
+        """Lê apenas as partições do intervalo. Retorna (estado no início: {código: progresso}, dias, códigos, progresso)."""
+        start, end = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+        start_month, end_month = str(start.astype('datetime64[M]')), str(end.astype('datetime64[M]'))
+        sealed = self.sealed_months()
+        before = [m for m in sealed if m < start_month]
+        state = self._state_at_month_end(before[-1]) if before else {}
+
+        parts = []
+        for month in (m for m in sealed if start_month <= m <= end_month):
+            base_code, base_progress, days, codes, progress = self._read_partition(month)
+            if month == start_month:
+                state = dict(zip(base_code.tolist(), base_progress.tolist()))
+            parts.append((days, codes, progress))
+        parts.append(self._read_tail())
+        days = np.concatenate([p[0] for p in parts])
+        codes = np.concatenate([p[1] for p in parts])
+        progress = np.concatenate([p[2] for p in parts])
+        days, codes, progress = self._dedupe(days, codes, progress)
+
+        earlier = days < start
+        state = self._apply(state, codes[earlier], progress[earlier])
+        in_range = (days >= start) & (days <= end)
+        return state, days[in_range], codes[in_range], progress[in_range]
+
+    def progress_curve(self, task_ids, start, end, weights=None):
+        """Progresso médio (ponderado) realizado, dia a dia, das tarefas informadas."""
+        days_index = pd.date_range(start, end, freq='D')
+        codes_by_id = self.task_codes()
+        weight = np.zeros(len(codes_by_id) + 1)
+        task_weights = np.ones(len(task_ids)) if weights is None else np.asarray(weights, dtype=float)
+        for task_id, w in zip(task_ids, task_weights):
+            if task_id in codes_by_id:
+                weight[codes_by_id[task_id]] = w
+        total_weight = task_weights.sum()
+        if total_weight == 0 or len(days_index) == 0:
+            return pd.Series(0.0, index=days_index)
+
+        state, days, codes, progress = self.read_range(start, end)
+        state_codes = np.fromiter(state.keys(), dtype=np.int64, count=len(state))
+        state_progress = np.fromiter(state.values(), dtype=float, count=len(state))
+        current = np.zeros(len(weight))
+        current[state_codes] = state_progress
+        base_sum = (current * weight).sum()
+
+        order = np.lexsort((days, codes))
+        days, codes, progress = days[order], codes[order], progress[order].astype(float)
+        previous = np.empty_like(progress)
+        if len(progress):
+            previous[1:] = progress[:-1]
+            first_of_task = np.r_[True, codes[1:] != codes[:-1]]
+            previous[first_of_task] = current[codes[first_of_task]]
+        contribution = (progress - previous) * weight[codes]
+        day_numbers = (days - np.datetime64(start, 'D')).astype(np.int64)
+        daily_change = np.bincount(day_numbers, weights=contribution, minlength=len(days_index))
+        return pd.Series((base_sum + np.cumsum(daily_change)) / total_weight, index=days_index)
+
+# --- BACKUP COMPLETO (.ZIP) ---
+
+def create_backup_zip(pending=None):
+    """Cria um arquivo ZIP em memória com todos os arquivos de dados; `pending` ({arquivo: dados}) é gravado antes."""
+    data_files = [TASKS_FILE, ACTIVITIES_FILE, CONFIG_FILE, PEOPLE_FILE]
+
+    for file_path, data in (pending or {}).items():
+        DataManager.save(file_path, data)
+
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_f:
+        for file_path in data_files:
+            if os.path.exists(file_path):
+                zip_f.write(file_path, arcname=os.path.basename(file_path))
+        for directory in (PROGRESS_HISTORY_DIR, EVENTS_DIR):
+            if os.path.isdir(directory):
+                for file_name in sorted(os.listdir(directory)):
+                    if not file_name.endswith('.tmp') and not file_name.startswith('.'):
+                        zip_f.write(os.path.join(directory, file_name), arcname=f"{directory}/{file_name}")
+    
+    zip_bytes = zip_buffer.getvalue()
+    get_metrics().set("gestor_obras_backup_bytes", len(zip_bytes), kind="zip")
+    return zip_bytes
@@ -0,0 +1,19 @@
+"""Fixtures dos testes: cada teste roda numa pasta de dados vazia, com diário de eventos próprio."""
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from gestor_obras import operations, storage  # noqa: E402
+
+
+@pytest.fixture
+def site_dir(tmp_path, monkeypatch):
+    """Pasta de dados vazia como diretório atual; o diário e o instantâneo de leitura do processo são reabertos nela."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "_event_log", None)
+    monkeypatch.setattr(operations, "_read_snapshots", operations.ReadSnapshotPublisher())
+    return tmp_path
@@ -0,0 +1,157 @@
+"""Contrato HTTP da API local (gestor_obras.api) sobre uma pasta de dados temporária."""
+import gzip
+import http.client
+import json
+import threading
+
+import pytest
+
+from gestor_obras.api import create_api_server
+from gestor_obras.constants import API_GZIP_MIN_BYTES, API_MAX_BODY_BYTES, CONFIG_FILE, TASKS_FILE
+from gestor_obras.storage import DataManager, get_event_log
+
+ACCESS_KEY = "chave-de-teste"
+
+
+@pytest.fixture
+def api(site_dir):
+    DataManager.save(CONFIG_FILE, {"sectors": [{"name": "Bloco A"}], "teams": [{"name": "Civil"}], "project_goals": ""})
+    DataManager.save(TASKS_FILE, [
+        {"id": f"t{i}", "name": f"Tarefa {i} " + "x" * 40, "team": "Civil", "sector": "Bloco A", "progress": 0,
+         "status": "Planejada", "created_at": "2025-01-06", "due_date": "2025-02-28"}
+        for i in range(40)
+    ])
+    server = create_api_server(port=0, access_key=ACCESS_KEY)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def request(port, method, path, body=None, headers=None):
+    """(status, cabeçalhos, corpo bruto) de uma requisição à API."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        payload = body if isinstance(body, bytes) or body is None else json.dumps(body).encode()
+        connection.request(method, path, body=payload, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, response.headers, response.read()
+    finally:
+        connection.close()
+
+
+def patch(port, task_id, changes, key=ACCESS_KEY, query=""):
+    headers = {"Content-Type": "application/json"}
+    if key is not None:
+        headers["Authorization"] = f"Bearer {key}"
+    return request(port, "PATCH", f"/api/tarefas/{task_id}{query}", changes, headers)
+
+
+def test_etag_and_if_none_match_give_304(api):
+    status, headers, body = request(api, "GET", "/api/tarefas/t1")
+    assert status == 200 and json.loads(body)["id"] == "t1"
+    etag = headers["ETag"]
+    status, headers, body = request(api, "GET", "/api/tarefas/t1", headers={"If-None-Match": etag})
+    assert status == 304 and body == b"" and headers["ETag"] == etag
+    assert patch(api, "t1", {"progress": 50})[0] == 200
+    status, headers, _ = request(api, "GET", "/api/tarefas/t1", headers={"If-None-Match": etag})
+    assert status == 200 and headers["ETag"] != etag
+
+
+def test_large_responses_are_gzipped_only_when_accepted(api):
+    status, headers, body = request(api, "GET", "/api/tarefas", headers={"Accept-Encoding": "gzip"})
+    assert status == 200 and headers["Content-Encoding"] == "gzip"
+    tasks = json.loads(gzip.decompress(body))
+    assert len(tasks) == 40 and len(gzip.decompress(body)) >= API_GZIP_MIN_BYTES
+    status, headers, body = request(api, "GET", "/api/tarefas")
+    assert headers.get("Content-Encoding") is None and json.loads(body) == tasks
+    status, headers, body = request(api, "GET", "/api/tarefas/t1", headers={"Accept-Encoding": "gzip"})
+    assert len(body) < API_GZIP_MIN_BYTES and headers.get("Content-Encoding") is None
+
+
+def test_patch_goes_through_the_save_path_and_returns_its_seq(api):
+    status, headers, body = patch(api, "t3", {"progress": 40, "crew_size": 4})
+    assert status == 200 and json.loads(body)["progress"] == 40
+    assert DataManager.load(TASKS_FILE)[3]["progress"] == 40
+    assert int(headers["X-Sequencia"]) == get_event_log().record_seq('tasks', "t3")
+
+
+@pytest.mark.parametrize("key, body, status", [
+    (None, {"progress": 10}, 401),
+    ("errada", {"progress": 10}, 401),
+    (ACCESS_KEY, b"{nao e json", 400),
+    (ACCESS_KEY, {"status": "Concluída"}, 400),
+    (ACCESS_KEY, {"progress": 150}, 400),
+    (ACCESS_KEY, {"team": "Inexistente"}, 400),
+    (ACCESS_KEY, {"created_at": "2025-03-10"}, 422),  # Início depois do vencimento
+])
+def test_patch_rejections(api, key, body, status):
+    response_status, headers, response_body = patch(api, "t1", body, key=key)
+    assert response_status == status and "erro" in json.loads(response_body)
+    if status == 401:
+        assert headers["WWW-Authenticate"] == "Bearer"
+    assert DataManager.load(TASKS_FILE)[1]["progress"] == 0
+
+
+def test_patch_without_configured_key_is_forbidden(site_dir):
+    DataManager.save(TASKS_FILE, [{"id": "t1", "name": "Tarefa", "progress": 0}])
+    server = create_api_server(port=0, access_key=None)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    try:
+        assert patch(server.server_address[1], "t1", {"progress": 10})[0] == 403
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_patch_body_too_large(api):
+    status, _, _ = patch(api, "t1", {"name": "x" * (API_MAX_BODY_BYTES + 1)})
+    assert status == 413
+
+
+def test_unknown_task_and_route(api):
+    assert patch(api, "nao-existe", {"progress": 10})[0] == 404
+    assert request(api, "GET", "/api/tarefas/nao-existe")[0] == 404
+    assert request(api, "GET", "/api/outra")[0] == 404
+
+
+def test_stale_base_is_rejected_with_409(api):
+    _, headers, _ = patch(api, "t2", {"progress": 10})
+    base = int(headers["X-Sequencia"])
+    assert patch(api, "t2", {"crew_size": 3}, query=f"?base={base}")[0] == 200  # Outro dispositivo
+    status, _, body = patch(api, "t2", {"progress": 90}, query=f"?base={base}")
+    assert status == 409 and "erro" in json.loads(body)
+    assert DataManager.load(TASKS_FILE)[2]["progress"] == 10
+    current = get_event_log().record_seq('tasks', "t2")
+    status, headers, _ = patch(api, "t2", {"progress": 90}, query=f"?base={current}")
+    assert status == 200 and int(headers["X-Sequencia"]) > current
+
+
+def get_changes(port, since, limit):
+    status, _, body = request(port, "GET", f"/api/mudancas?desde={since}&limite={limit}")
+    assert status == 200
+    return json.loads(body)
+
+
+def test_changes_are_paged_by_seq(api):
+    latest = get_event_log().last_seq
+    pages, since, ids = 0, 0, []
+    while True:
+        page = get_changes(api, since, 15)
+        pages += 1
+        assert page["latest"] == latest and page["seq"] == min(since + 15, latest)
+        assert page["more"] == (page["seq"] < latest)
+        ids.extend(change["id"] for change in page["changes"])
+        since = page["seq"]
+        if not page["more"]:
+            break
+    assert pages == -(-latest // 15)
+    assert {f"t{i}" for i in range(40)} <= set(ids)
+
+    patch(api, "t5", {"progress": 25})
+    patch(api, "t5", {"progress": 35})
+    page = get_changes(api, since, 15)
+    assert page["more"] is False and [(c["id"], c["op"]) for c in page["changes"]] == [("t5", "update")]
+    assert page["changes"][0]["changes"]["progress"] == [0, 35]  # As duas alterações juntadas
+    assert get_changes(api, page["seq"], 15)["changes"] == []
+    assert request(api, "GET", "/api/mudancas?desde=-1")[0] == 400
@@ -0,0 +1,70 @@
+"""Caminho crítico incremental (CriticalPathScheduler.update_task) contra o cálculo completo."""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from gestor_obras.domain import CriticalPathScheduler, SiteCalendar
+
+TODAY = date(2025, 3, 3)
+CALENDAR = SiteCalendar(holidays=[{"date": "2025-03-04", "name": "Carnaval"}],
+                        blocked_days=[{"date": "2025-04-10", "reason": "Chuva"}])
+
+
+def random_dates(rng):
+    start = date(2025, 1, 6) + timedelta(days=rng.randint(0, 120))
+    return start.isoformat(), (start + timedelta(days=rng.randint(0, 40))).isoformat()
+
+
+def random_tasks(rng, count):
+    tasks = []
+    for i in range(count):
+        created_at, due_date = random_dates(rng)
+        predecessors = rng.sample([t['id'] for t in tasks], k=min(len(tasks), rng.randint(0, 3)))
+        tasks.append({"id": f"t{i}", "created_at": created_at, "due_date": due_date,
+                      "progress": rng.choice([0, 0, 25, 60, 100]), "predecessors": predecessors})
+    return tasks
+
+
+def assert_same_schedule(incremental, full):
+    for dates in ('es', 'ef', 'ls', 'lf'):
+        assert getattr(incremental, dates) == getattr(full, dates), dates
+    assert incremental.critical_ids() == full.critical_ids()
+    assert incremental.critical_edges() == full.critical_edges()
+    assert incremental.project_end_date() == full.project_end_date()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_updates_match_a_full_rebuild(seed):
+    rng = random.Random(seed)
+    tasks = random_tasks(rng, 60)
+    scheduler = CriticalPathScheduler(tasks, today=TODAY, calendar=CALENDAR)
+    for _ in range(200):
+        task = rng.choice(tasks)
+        edit = rng.choice(("dates", "progress", "both"))
+        if edit in ("dates", "both"):
+            task['created_at'], task['due_date'] = random_dates(rng)
+        if edit in ("progress", "both"):
+            task['progress'] = rng.choice([0, 10, 50, 90, 100])
+        scheduler.update_task(task)
+        assert_same_schedule(scheduler, CriticalPathScheduler(tasks, today=TODAY, calendar=CALENDAR))
+
+
+def test_simulated_delay_matches_a_rebuild_with_a_longer_task():
+    rng = random.Random(7)
+    tasks = random_tasks(rng, 40)
+    scheduler = CriticalPathScheduler(tasks, today=TODAY, calendar=CALENDAR)
+    task = next(t for t in reversed(tasks) if t['progress'] < 100 and t['predecessors'])
+    slips, new_end = scheduler.simulate_delay(task['id'], 5)
+    delayed = dict(task, due_date=CALENDAR.add_workdays(task['due_date'], 5).astype(object).isoformat())
+    rebuilt = CriticalPathScheduler([delayed if t is task else t for t in tasks], today=TODAY, calendar=CALENDAR)
+    assert slips == {t: rebuilt.ef[t] - scheduler.ef[t] for t in rebuilt.ef if rebuilt.ef[t] != scheduler.ef[t]}
+    assert new_end == rebuilt.project_end_date()
+    assert scheduler.ef == CriticalPathScheduler(tasks, today=TODAY, calendar=CALENDAR).ef  # Simulação não altera o agendador
+
+
+def test_cycle_is_rejected():
+    tasks = [{"id": "a", "created_at": "2025-01-06", "due_date": "2025-01-10", "predecessors": ["b"]},
+             {"id": "b", "created_at": "2025-01-06", "due_date": "2025-01-10", "predecessors": ["a"]}]
+    with pytest.raises(ValueError):
+        CriticalPathScheduler(tasks, today=TODAY, calendar=CALENDAR)
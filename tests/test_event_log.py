@@ -0,0 +1,162 @@
+"""Diário de eventos (storage.EventLog): snapshots, recuperação, estado numa data passada e página de mudanças."""
+import datetime as dt
+import json
+import os
+
+import pytest
+
+from gestor_obras import storage
+from gestor_obras.constants import CONFIG_FILE, TASKS_FILE
+from gestor_obras.domain import load_site
+from gestor_obras.storage import DataManager, EventLog, apply_event, get_event_log
+
+
+class Clock(dt.datetime):
+    """datetime.now() controlado pelo teste, para datar eventos e snapshots."""
+    current = dt.datetime(2025, 3, 1, 8, 0, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(storage, "datetime", Clock)
+    monkeypatch.setattr(Clock, "current", Clock.current)
+    return Clock
+
+
+@pytest.fixture
+def snapshot_every(monkeypatch):
+    monkeypatch.setattr(storage, "EVENTS_SNAPSHOT_EVERY", 4)
+
+
+def full_replay(log, until=None):
+    """Registros reconstruídos lendo o diário inteiro desde o primeiro evento (até o evento `until`)."""
+    records = {collection: {} for collection in storage.TRACKED_FILES.values()}
+    with open(log.path, encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if until is not None and entry['seq'] > until:
+                break
+            apply_event(records, entry)
+    return records
+
+
+def save_progress(tasks, task_id, progress):
+    next(t for t in tasks if t['id'] == task_id)['progress'] = progress
+    DataManager.save(TASKS_FILE, tasks)
+
+
+@pytest.fixture
+def tasks(site_dir):
+    tasks = [{"id": f"t{i}", "name": f"Tarefa {i}", "progress": 0} for i in range(3)]
+    DataManager.save(CONFIG_FILE, {"sectors": [], "teams": [], "project_goals": ""})
+    DataManager.save(TASKS_FILE, tasks)
+    return tasks
+
+
+def test_snapshot_plus_tail_equals_full_replay(tasks, snapshot_every):
+    for step in range(1, 12):
+        save_progress(tasks, f"t{step % 3}", step * 5)
+    tasks.append({"id": "t9", "name": "Nova", "progress": 0})
+    DataManager.save(TASKS_FILE, tasks)
+    log = get_event_log()
+    assert len(log.snapshots) >= 2 and log.base_seq > 0  # Eventos antigos já fora da memória
+
+    reopened = EventLog()  # Outro processo: parte do último snapshot e lê só a cauda
+    reopened.refresh()
+    assert reopened.base_seq == log.snapshots[-1]['seq'] < reopened.last_seq == log.last_seq
+    assert reopened.records == full_replay(log) == log.records
+    assert reopened.seqs == log.seqs
+    assert reopened.history('tasks', 't1') == log.history('tasks', 't1')
+    assert [e['seq'] for e in reopened.history('tasks', 't1')] == [
+        e['seq'] for e in map(json.loads, open(log.path, encoding='utf-8')) if e['id'] == 't1']
+
+
+def test_damaged_latest_snapshot_falls_back_to_the_previous_one(tasks, snapshot_every):
+    for step in range(1, 10):
+        save_progress(tasks, "t0", step)
+    log = get_event_log()
+    with open(os.path.join(log.directory, log.snapshots[-1]['file']), 'wb') as f:
+        f.write(b"corrompido")
+    reopened = EventLog()
+    reopened.refresh()
+    assert reopened.base_seq == log.snapshots[-2]['seq']
+    assert reopened.records == full_replay(log)
+
+
+@pytest.mark.parametrize("damage", ["delete", "corrupt"])
+def test_recover_rebuilds_a_missing_or_corrupt_data_file(tasks, damage):
+    save_progress(tasks, "t1", 40)
+    if damage == "delete":
+        os.remove(TASKS_FILE)
+    else:
+        with open(TASKS_FILE, 'w', encoding='utf-8') as f:
+            f.write('[{"id": "t0", "na')
+    site = load_site()
+    assert [(t['id'], t['progress']) for t in site['tasks']] == [("t0", 0), ("t1", 40), ("t2", 0)]
+    assert DataManager.load(TASKS_FILE, None) == tasks  # Arquivo regravado com o estado do diário
+
+
+def test_state_as_of_between_two_snapshots(tasks, clock, snapshot_every):
+    moments = []
+    for step in range(1, 13):
+        clock.current += dt.timedelta(minutes=10)
+        save_progress(tasks, f"t{step % 3}", step * 5)
+        moments.append(clock.current)
+    log = get_event_log()
+    first, second = log.snapshots[0], log.snapshots[1]
+    moment = dt.datetime.fromisoformat(first['at']) + dt.timedelta(minutes=5)
+    assert first['at'] < moment.isoformat() < second['at']
+
+    records, seq = log.state_as_of(moment)
+    expected_seq = max(e['seq'] for e in map(json.loads, open(log.path, encoding='utf-8'))
+                       if e['at'] <= moment.isoformat())
+    assert seq == expected_seq
+    assert records == full_replay(log, until=expected_seq)
+    assert records['tasks']['t1']['progress'] == 5 * max(s for s, m in enumerate(moments, 1) if m <= moment and s % 3 == 1)
+
+
+def test_changes_since_pages_through_the_log(tasks):
+    for step in range(1, 8):
+        save_progress(tasks, f"t{step % 3}", step * 10)
+    log = get_event_log()
+    seen, since, pages = [], 0, 0
+    while True:
+        events, reached, latest = log.changes_since(since, limit=4)
+        pages += 1
+        assert reached == min(since + 4, latest) and latest == log.last_seq
+        seen.extend(events)
+        since = reached
+        if reached >= latest:  # "more" da API: reached < latest
+            break
+    assert pages == -(-log.last_seq // 4)
+    replayed = {collection: {} for collection in storage.TRACKED_FILES.values()}
+    for event in seen:
+        apply_event(replayed, event)
+    assert replayed['tasks'] == log.records['tasks']
+    assert log.changes_since(log.last_seq) == ([], log.last_seq, log.last_seq)
+
+
+def test_changes_since_folds_each_record_in_the_window(tasks):
+    start = get_event_log().last_seq
+    save_progress(tasks, "t0", 10)
+    save_progress(tasks, "t0", 30)
+    tasks[1]['name'] = "Renomeada"
+    DataManager.save(TASKS_FILE, tasks)
+    tasks.append({"id": "t3", "name": "Criada", "progress": 0})
+    DataManager.save(TASKS_FILE, tasks)
+    save_progress(tasks, "t3", 20)
+    del tasks[2]
+    DataManager.save(TASKS_FILE, tasks)
+
+    events, reached, _ = get_event_log().changes_since(start)
+    by_id = {event['id']: event for event in events}
+    assert [event['id'] for event in events] == ["t0", "t1", "t3", "t2"]  # Ordem da última mudança
+    assert by_id["t0"]['op'] == "update" and by_id["t0"]['changes'] == {"progress": [0, 30]}
+    assert by_id["t1"]['changes'] == {"name": ["Tarefa 1", "Renomeada"]}
+    assert by_id["t3"]['op'] == "create" and by_id["t3"]['data']['progress'] == 20
+    assert by_id["t2"]['op'] == "delete" and 'data' not in by_id["t2"]
+    assert by_id["t3"]['seq'] < by_id["t2"]['seq'] == reached
@@ -0,0 +1,71 @@
+"""Trava entre processos (storage.InterProcessLock): exclusão mútua real entre processos e desistência por tempo."""
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from gestor_obras.storage import InterProcessLock, get_file_lock
+
+WORKERS = 4
+INCREMENTS = 50
+
+
+def increment_counter(directory, increments):
+    """Lê, espera um pouco e regrava o contador, sob a trava: sem ela, os processos perdem incrementos."""
+    lock = get_file_lock(os.path.join(directory, ".trava"))
+    counter = os.path.join(directory, "contador.txt")
+    for _ in range(increments):
+        with lock:
+            with open(counter, encoding='utf-8') as f:
+                value = int(f.read())
+            time.sleep(0.0005)  # Alarga a janela entre a leitura e a gravação
+            with open(counter, 'w', encoding='utf-8') as f:
+                f.write(str(value + 1))
+
+
+def hold_lock(path, acquired, release):
+    with InterProcessLock(path):
+        acquired.set()
+        release.wait(30)
+
+
+def test_processes_do_not_lose_increments(tmp_path):
+    (tmp_path / "contador.txt").write_text("0", encoding='utf-8')
+    context = multiprocessing.get_context("spawn")  # Como no Windows: nada herdado do processo pai
+    processes = [context.Process(target=increment_counter, args=(str(tmp_path), INCREMENTS)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(120)
+        assert process.exitcode == 0
+    assert int((tmp_path / "contador.txt").read_text(encoding='utf-8')) == WORKERS * INCREMENTS
+
+
+def test_waiting_for_another_process_times_out(tmp_path):
+    path = str(tmp_path / ".trava")
+    context = multiprocessing.get_context("spawn")
+    acquired, release = context.Event(), context.Event()
+    holder = context.Process(target=hold_lock, args=(path, acquired, release))
+    holder.start()
+    try:
+        assert acquired.wait(60)
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            with InterProcessLock(path, timeout=0.2):
+                pass
+        assert time.monotonic() - started < 5
+    finally:
+        release.set()
+        holder.join(60)
+    with InterProcessLock(path, timeout=5):  # Liberada quando o outro processo sai
+        pass
+
+
+def test_lock_is_reentrant_in_the_same_thread(tmp_path):
+    lock = InterProcessLock(str(tmp_path / ".trava"))
+    with lock:
+        with lock:
+            pass
+    with InterProcessLock(str(tmp_path / ".trava"), timeout=1):  # Tudo liberado no fim
+        pass
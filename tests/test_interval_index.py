@@ -0,0 +1,81 @@
+"""Índice de intervalos (TaskIntervalIndex) mantido por upsert/remove contra a varredura de todas as tarefas."""
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from gestor_obras.analytics import build_capacity_plan, compute_report_metrics, filter_tasks_by_window
+from gestor_obras.domain import TaskIntervalIndex, build_tasks_df
+
+EPOCH = date(2025, 1, 1)
+
+
+def random_window(rng):
+    if rng.random() < 0.05:
+        return {"created_at": None, "due_date": "2025-02-01"}  # Sem data: fora do índice
+    start = EPOCH + timedelta(days=rng.randint(0, 200))
+    return {"created_at": start.isoformat(), "due_date": (start + timedelta(days=rng.randint(0, 45))).isoformat()}
+
+
+def brute_force(tasks, start, end):
+    return {task_id for task_id, task in tasks.items()
+            if task['created_at'] and task['due_date'] and task['created_at'] <= end and task['due_date'] >= start}
+
+
+def random_query(rng):
+    start = EPOCH + timedelta(days=rng.randint(-10, 240))
+    return start.isoformat(), (start + timedelta(days=rng.randint(0, 30))).isoformat()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_maintained_index_matches_a_scan(seed):
+    rng = random.Random(seed)
+    tasks = {f"t{i}": {"id": f"t{i}", **random_window(rng)} for i in range(150)}
+    index = TaskIntervalIndex(tasks.values())
+    next_id = len(tasks)
+    for _ in range(200):
+        action = rng.random()
+        if action < 0.6:
+            task_id = rng.choice(list(tasks))
+            tasks[task_id].update(random_window(rng))
+            index.upsert(tasks[task_id])
+        elif action < 0.8:
+            task = {"id": f"t{next_id}", **random_window(rng)}
+            next_id += 1
+            tasks[task['id']] = task
+            index.upsert(task)
+        elif tasks:
+            task_id = rng.choice(list(tasks))
+            del tasks[task_id]
+            index.remove(task_id)
+        start, end = random_query(rng)
+        found = index.overlapping(start, end)
+        assert len(found) == len(set(found)) and set(found) == brute_force(tasks, start, end)
+        assert set(index.active_on(start)) == brute_force(tasks, start, start)
+        ending = {task_id for task_id, task in tasks.items()
+                  if task['created_at'] and task['due_date'] and start <= task['due_date'] <= end}
+        assert set(index.ending_between(start, end)) == ending
+        assert len(index) == len(brute_force(tasks, "0000-01-01", "9999-12-31"))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_report_and_plan_queries_match_the_dataframe_scan(seed):
+    rng = random.Random(seed)
+    tasks = [{"id": f"t{i}", "name": f"Tarefa {i}", "team": rng.choice("AB"), "sector": rng.choice("XY"),
+              "progress": rng.choice([0, 50, 100]), **random_window(rng)} for i in range(120)]
+    for task in tasks:
+        task['status'] = "Concluída" if task['progress'] == 100 else "Em Andamento"
+    tasks_df = build_tasks_df(tasks)
+    index = TaskIntervalIndex(tasks)
+    employees = [{"team": "A"}, {"team": "A"}, {"team": "B"}]
+    for _ in range(10):
+        start, end = random_query(rng)
+        assert set(filter_tasks_by_window(tasks_df, start, start, index)['id']) == set(filter_tasks_by_window(tasks_df, start, start)['id'])
+        today = date.fromisoformat(end)
+        assert compute_report_metrics(tasks_df, today, index=index) == compute_report_metrics(tasks_df, today)
+        with_index, scan = build_capacity_plan(tasks_df, employees, start, end, index=index), build_capacity_plan(tasks_df, employees, start, end)
+        assert (with_index is None) == (scan is None)
+        if scan is not None:
+            assert np.array_equal(with_index['pair_tasks'].sum(axis=0), scan['pair_tasks'].sum(axis=0))
+            assert np.allclose(with_index['team_demand'].sum(axis=0), scan['team_demand'].sum(axis=0))
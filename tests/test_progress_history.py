@@ -0,0 +1,122 @@
+"""Histórico de progresso (storage.ProgressHistoryStore): selagem dos meses, um registro por tarefa por dia e consultas por intervalo."""
+import datetime as dt
+import os
+import random
+
+import numpy as np
+import pytest
+
+from gestor_obras import storage
+from gestor_obras.storage import ProgressHistoryStore
+
+
+class Today(dt.date):
+    """date.today() controlado pelo teste, para atravessar viradas de mês."""
+    current = dt.date(2025, 1, 28)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+@pytest.fixture
+def today(monkeypatch):
+    monkeypatch.setattr(storage, "date", Today)
+    monkeypatch.setattr(Today, "current", Today.current)
+    return Today
+
+
+@pytest.fixture
+def history(site_dir):
+    return ProgressHistoryStore(str(site_dir / "historico"))
+
+
+def state_on(history, day):
+    """Progresso de cada tarefa no fim do dia, pelo que o histórico devolve."""
+    state, days, codes, progress = history.read_range(day, day)
+    return history._apply(state, codes, progress)
+
+
+def test_closed_month_is_sealed_into_a_partition(history, today):
+    history.record_many({"a": 10, "b": 20}, dt.date(2025, 1, 5))
+    history.record("a", 30, dt.date(2025, 1, 20))
+    today.current = dt.date(2025, 2, 3)
+    history.record("b", 40)
+
+    assert history.sealed_months() == ["2025-01"]
+    assert os.path.exists(os.path.join(history.directory, "progresso_2025-01.npz"))
+    with open(history.tail_path, encoding='utf-8') as f:
+        assert f.read() == "2025-02-03,1,40\n"
+    codes = history.task_codes()
+    assert state_on(history, dt.date(2025, 1, 31)) == {codes["a"]: 30, codes["b"]: 20}
+    assert state_on(history, dt.date(2025, 2, 3)) == {codes["a"]: 30, codes["b"]: 40}
+
+
+def test_one_record_per_task_per_day_last_wins(history, today):
+    for progress in (10, 20, 35):
+        history.record("a", progress, dt.date(2025, 1, 8))
+    history.record("b", 5, dt.date(2025, 1, 8))
+    today.current = dt.date(2025, 2, 1)
+    history.record("b", 6)
+
+    _, _, days, codes, progress = history._read_partition("2025-01")
+    assert len(days) == 2
+    assert dict(zip(codes.tolist(), progress.tolist())) == {history.task_codes()["a"]: 35, history.task_codes()["b"]: 5}
+    _, days, codes, progress = history.read_range(dt.date(2025, 1, 8), dt.date(2025, 1, 8))
+    assert sorted(progress.tolist()) == [5, 35]
+
+
+def test_read_range_returns_start_state_and_only_the_range(history, today):
+    for month in range(1, 5):
+        today.current = dt.date(2025, month, 20)
+        history.record("a", month * 10, dt.date(2025, month, 1))
+        history.record("b", month * 10 + 1, dt.date(2025, month, 15))
+    assert history.sealed_months() == ["2025-01", "2025-02", "2025-03"]
+
+    state, days, codes, progress = history.read_range(dt.date(2025, 2, 10), dt.date(2025, 3, 31))
+    codes_by_id = history.task_codes()
+    assert state == {codes_by_id["a"]: 20, codes_by_id["b"]: 11}
+    assert days.tolist() == [dt.date(2025, 2, 15), dt.date(2025, 3, 1), dt.date(2025, 3, 15)]
+    assert progress.tolist() == [21, 30, 31]
+
+    curve = history.progress_curve(["a", "b"], "2025-02-10", "2025-03-31")
+    assert curve.iloc[0] == pytest.approx((20 + 11) / 2)
+    assert curve.iloc[-1] == pytest.approx((30 + 31) / 2)
+
+
+def test_back_dated_record_rederives_later_partitions(history, today):
+    rng = random.Random(7)
+    task_ids = [f"t{i}" for i in range(6)]
+    written = {}  # (dia, tarefa) -> progresso: o último registro de cada dia vale
+    day = dt.date(2025, 1, 1)
+    while day < dt.date(2025, 6, 20):
+        today.current = day
+        if rng.random() < 0.3 and day.month > 1:
+            past = day - dt.timedelta(days=rng.randint(20, 120))
+            past = max(past, dt.date(2025, 1, 1))
+        else:
+            past = day
+        task_id = rng.choice(task_ids)
+        progress = rng.randint(0, 100)
+        history.record(task_id, progress, past)
+        written[(past, task_id)] = progress
+        day += dt.timedelta(days=rng.randint(1, 4))
+
+    assert history.sealed_months() == ["2025-01", "2025-02", "2025-03", "2025-04", "2025-05"]
+    codes_by_id = history.task_codes()
+    for check in (dt.date(2025, 1, 31), dt.date(2025, 3, 14), dt.date(2025, 4, 30), dt.date(2025, 6, 19)):
+        expected = {}
+        for (past, task_id), progress in sorted(written.items()):
+            if past <= check:
+                expected[codes_by_id[task_id]] = progress
+        assert state_on(history, check) == expected
+    for month in history.sealed_months()[1:]:
+        previous = f"{month[:5]}{int(month[5:]) - 1:02d}"
+        base_code, base_progress, _, _, _ = history._read_partition(month)
+        assert dict(zip(base_code.tolist(), base_progress.tolist())) == history._state_at_month_end(previous)
+
+
+def test_future_day_is_rejected(history, today):
+    with pytest.raises(ValueError):
+        history.record("a", 10, today.current + dt.timedelta(days=1))
+    assert history.is_empty() or np.size(history._read_tail()[0]) == 0
@@ -0,0 +1,99 @@
+"""Instantâneos de leitura das sessões de visualização (operations.ReadSnapshotPublisher)."""
+import pickle
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from gestor_obras import operations
+from gestor_obras.constants import CONFIG_FILE, TASKS_FILE
+from gestor_obras.domain import load_site_state
+from gestor_obras.storage import DataManager, get_event_log
+
+
+@pytest.fixture
+def site(site_dir):
+    DataManager.save(CONFIG_FILE, {"sectors": [], "teams": [], "project_goals": ""})
+    DataManager.save(TASKS_FILE, [
+        {"id": "t1", "name": "Fundação", "progress": 10, "created_at": "2025-01-06", "due_date": "2025-01-17"},
+        {"id": "t2", "name": "Alvenaria", "progress": 0, "created_at": "2025-01-20", "due_date": "2025-02-07",
+         "predecessors": ["t1"]},
+    ])
+    state = load_site_state(track_versions=True)
+    state['conflicts'] = []
+    return state
+
+
+def snapshot_task(snapshot, task_id):
+    return next(t for t in snapshot['tasks'] if t['id'] == task_id)
+
+
+def test_write_republishes_in_the_background(site, monkeypatch):
+    monkeypatch.setattr(operations, "READ_SNAPSHOT_DELAY_S", 0)
+    operations.get_read_snapshot()
+    operations.update_task(site, "t1", {"progress": 60})
+    publisher = operations._read_snapshots
+    deadline = time.monotonic() + 5
+    while snapshot_task(publisher.current, "t1")["progress"] != 60:  # Sem chamar get(): só a thread de publicação
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_publishing_does_not_wait_for_the_writer_lock(site):
+    operations.get_read_snapshot()
+    operations.update_task(site, "t1", {"progress": 30})
+    holding, release = threading.Event(), threading.Event()
+
+    def writer():
+        with get_event_log().transaction():  # Uma gravação deste processo em andamento
+            holding.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        holding.wait(5)
+        started = time.monotonic()
+        snapshot = operations.get_read_snapshot()
+        assert time.monotonic() - started < 2
+        assert snapshot_task(snapshot, "t1")["progress"] == 30
+    finally:
+        release.set()
+        thread.join()
+
+
+@pytest.mark.parametrize("mutate", [
+    lambda s: s['tasks_df'].loc.__setitem__((0, 'progress'), 5),
+    lambda s: s['tasks_df'].iloc.__setitem__((0, 0), 5),
+    lambda s: s['tasks_df'].at.__setitem__((0, 'progress'), 5),
+    lambda s: s['tasks_df'].__setitem__('progress', 0),
+    lambda s: setattr(s['tasks_df'], 'progress', 0),
+    lambda s: s['tasks_df'].drop(columns='name', inplace=True),
+    lambda s: s['tasks_df'].sort_values('progress', inplace=True),
+    lambda s: s['scheduler'].update_task({"id": "t1", "created_at": "2025-01-06", "due_date": "2025-03-01"}),
+    lambda s: s['wbs'].update_task({"id": "t1", "progress": 90}),
+    lambda s: s['interval_index'].upsert({"id": "t3", "created_at": "2025-01-06", "due_date": "2025-01-10"}),
+    lambda s: s['interval_index'].remove("t1"),
+    lambda s: s['tasks'][0].__setitem__('progress', 5),
+    lambda s: s['tasks'].append({}),
+    lambda s: s['config'].update(teams=[]),
+])
+def test_snapshot_cannot_be_mutated(site, mutate):
+    snapshot = operations.get_read_snapshot()
+    with pytest.raises(TypeError):
+        mutate(snapshot)
+    assert snapshot['tasks_df'].loc[0, 'progress'] == 10
+    assert snapshot['scheduler'].critical_ids() == {"t1", "t2"}
+
+
+def test_snapshot_frame_reads_and_derived_frames_are_plain(site):
+    frame = operations.get_read_snapshot()['tasks_df']
+    assert frame['progress'].to_numpy().flags.writeable is False
+    filtered = frame[frame['progress'] > 0]
+    filtered.loc[:, 'progress'] = 99  # Um DataFrame comum, só da sessão
+    copy = frame.copy()
+    copy['name'] = "x"
+    assert type(filtered) is type(copy) is pd.DataFrame
+    assert frame.loc[0, 'progress'] == 10 and frame.loc[0, 'name'] == "Fundação"
+    assert pickle.loads(pickle.dumps(frame)).equals(frame)
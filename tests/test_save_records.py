@@ -0,0 +1,173 @@
+"""Controle de concorrência otimista por registro (EventLog.save_records): duas sessões sobre o mesmo diário."""
+import copy
+import json
+
+import pytest
+
+from gestor_obras.constants import CONFIG_FILE, TASKS_FILE
+from gestor_obras.storage import DataManager, get_event_log
+
+
+@pytest.fixture
+def log(site_dir):
+    DataManager.save(TASKS_FILE, [
+        {"id": "t1", "name": "Fundação", "progress": 10, "team": "Civil"},
+        {"id": "t2", "name": "Alvenaria", "progress": 0, "team": "Civil"},
+    ])
+    DataManager.save(CONFIG_FILE, {"sectors": [], "teams": [], "project_goals": "Entregar em junho"})
+    return get_event_log()
+
+
+def open_session(log):
+    """Cópia dos dados e das versões, como uma sessão que acabou de carregar a obra."""
+    versions, _ = log.versions()
+    return copy.deepcopy(DataManager.load(TASKS_FILE, [])), versions['tasks']
+
+
+def task(tasks, task_id):
+    return next((t for t in tasks if t['id'] == task_id), None)
+
+
+def save(log, tasks, versions):
+    return log.save_records(TASKS_FILE, tasks, versions)
+
+
+def test_only_mine_changed_is_written_with_a_new_version(log):
+    mine, versions = open_session(log)
+    task(mine, "t1")["progress"] = 40
+    data, new_versions, conflicts, refreshed = save(log, mine, versions)
+    assert task(data, "t1")["progress"] == 40
+    assert conflicts == [] and refreshed == []
+    assert new_versions["t1"] == log.last_seq > versions["t1"]
+    assert new_versions["t2"] == versions["t2"]
+    assert task(DataManager.load(TASKS_FILE), "t1")["progress"] == 40
+
+
+def test_only_theirs_changed_is_kept_and_returned(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    task(theirs, "t1")["progress"] = 70
+    save(log, theirs, their_versions)
+    task(mine, "t2")["progress"] = 5  # Esta sessão só mexeu em outra tarefa
+    data, new_versions, conflicts, refreshed = save(log, mine, mine_versions)
+    assert task(data, "t1")["progress"] == 70
+    assert task(data, "t2")["progress"] == 5
+    assert conflicts == [] and refreshed == ["t1"]
+    assert new_versions == log.versions()[0]['tasks']
+
+
+def test_different_fields_of_the_same_record_are_merged(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    task(theirs, "t1")["progress"] = 70
+    save(log, theirs, their_versions)
+    task(mine, "t1")["name"] = "Fundação e baldrame"
+    data, new_versions, conflicts, refreshed = save(log, mine, mine_versions)
+    assert task(data, "t1") == {"id": "t1", "name": "Fundação e baldrame", "progress": 70, "team": "Civil"}
+    assert conflicts == [] and refreshed == ["t1"]
+    assert new_versions["t1"] == log.last_seq
+
+
+def test_removed_field_is_merged_with_a_change_in_another_field(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    task(theirs, "t1")["progress"] = 70
+    save(log, theirs, their_versions)
+    del task(mine, "t1")["team"]
+    data, _, conflicts, _ = save(log, mine, mine_versions)
+    assert task(data, "t1") == {"id": "t1", "name": "Fundação", "progress": 70}
+    assert conflicts == []
+
+
+def test_same_field_with_different_values_is_a_conflict(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    task(theirs, "t1")["progress"] = 70
+    save(log, theirs, their_versions)
+    seq_before = log.last_seq
+    task(mine, "t1")["progress"] = 50
+    data, new_versions, conflicts, refreshed = save(log, mine, mine_versions)
+    assert task(data, "t1")["progress"] == 70  # Fica a versão gravada primeiro
+    assert log.last_seq == seq_before  # Nada novo no diário
+    assert conflicts == [{"collection": "tasks", "id": "t1", "mine": task(mine, "t1"),
+                          "theirs": task(data, "t1"), "seq": seq_before}]
+    assert new_versions["t1"] == seq_before  # A sessão passa a conhecer a versão gravada
+    assert refreshed == ["t1"]
+
+
+def test_same_field_with_the_same_value_is_not_a_conflict(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    task(theirs, "t1")["progress"] = 70
+    save(log, theirs, their_versions)
+    task(mine, "t1")["progress"] = 70
+    data, _, conflicts, _ = save(log, mine, mine_versions)
+    assert task(data, "t1")["progress"] == 70
+    assert conflicts == []
+
+
+def test_edit_of_a_record_deleted_by_another_session_is_a_conflict(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    save(log, [t for t in theirs if t["id"] != "t1"], their_versions)
+    task(mine, "t1")["progress"] = 50
+    data, new_versions, conflicts, _ = save(log, mine, mine_versions)
+    assert task(data, "t1") is None and "t1" not in new_versions
+    assert [(c["id"], c["mine"]["progress"], c["theirs"]) for c in conflicts] == [("t1", 50, None)]
+
+
+def test_delete_of_a_record_edited_by_another_session_is_a_conflict(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    task(theirs, "t1")["progress"] = 70
+    save(log, theirs, their_versions)
+    data, _, conflicts, _ = save(log, [t for t in mine if t["id"] != "t1"], mine_versions)
+    assert task(data, "t1")["progress"] == 70
+    assert [(c["id"], c["mine"], c["theirs"]["progress"]) for c in conflicts] == [("t1", None, 70)]
+
+
+def test_delete_of_an_unchanged_record_is_written(log):
+    mine, versions = open_session(log)
+    data, new_versions, conflicts, _ = save(log, [t for t in mine if t["id"] != "t2"], versions)
+    assert task(data, "t2") is None and "t2" not in new_versions
+    assert conflicts == []
+    assert log.history("tasks", "t2")[-1]["op"] == "delete"
+
+
+def test_records_created_by_both_sessions_are_kept(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    save(log, theirs + [{"id": "t3", "name": "Cobertura", "progress": 0}], their_versions)
+    data, new_versions, conflicts, refreshed = save(log, mine + [{"id": "t4", "name": "Pintura", "progress": 0}],
+                                                    mine_versions)
+    assert [t["id"] for t in data] == ["t1", "t2", "t4", "t3"]
+    assert conflicts == [] and refreshed == ["t3"]
+    assert set(new_versions) == {"t1", "t2", "t3", "t4"}
+
+
+def test_seqs_stay_contiguous_across_sessions(log):
+    mine, mine_versions = open_session(log)
+    theirs, their_versions = open_session(log)
+    task(theirs, "t1")["progress"] = 20
+    _, their_versions, _, _ = save(log, theirs, their_versions)
+    task(mine, "t2")["progress"] = 30
+    save(log, mine, mine_versions)
+    task(theirs, "t1")["progress"] = 25
+    save(log, theirs, their_versions)
+    with open(log.path, encoding='utf-8') as f:
+        seqs = [json.loads(line)["seq"] for line in f]
+    assert seqs == list(range(1, log.last_seq + 1))
+    assert [entry["changes"]["progress"] for entry in log.history("tasks", "t1")[1:]] == [[10, 20], [20, 25]]
+    assert task(DataManager.load(TASKS_FILE), "t1")["progress"] == 25
+    assert task(DataManager.load(TASKS_FILE), "t2")["progress"] == 30
+
+
+def test_config_fields_are_merged_as_a_single_record(log):
+    versions, _ = log.versions()
+    mine, theirs = DataManager.load(CONFIG_FILE), DataManager.load(CONFIG_FILE)
+    theirs["teams"] = [{"name": "Elétrica"}]
+    log.save_records(CONFIG_FILE, theirs, dict(versions["config"]))
+    mine["project_goals"] = "Entregar em julho"
+    data, _, conflicts, _ = log.save_records(CONFIG_FILE, mine, dict(versions["config"]))
+    assert data == {"sectors": [], "teams": [{"name": "Elétrica"}], "project_goals": "Entregar em julho"}
+    assert conflicts == []
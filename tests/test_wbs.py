@@ -0,0 +1,93 @@
+"""EAP incremental (WbsRollup.update_task) contra a consolidação completa."""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from gestor_obras import operations
+from gestor_obras.constants import CONFIG_FILE, TASKS_FILE
+from gestor_obras.domain import SiteCalendar, WbsRollup, load_site_state
+from gestor_obras.storage import DataManager, get_event_log
+
+CALENDAR = SiteCalendar()
+
+
+def random_dates(rng):
+    start = date(2025, 1, 6) + timedelta(days=rng.randint(0, 90))
+    return start.isoformat(), (start + timedelta(days=rng.randint(0, 60))).isoformat()
+
+
+def random_tree(rng, count):
+    tasks = []
+    for i in range(count):
+        created_at, due_date = random_dates(rng)
+        parent_id = rng.choice([None, None] + [t['id'] for t in tasks[-15:]]) if tasks else None
+        tasks.append({"id": f"t{i}", "name": f"Tarefa {i}", "parent_id": parent_id, "created_at": created_at,
+                      "due_date": due_date, "progress": rng.randint(0, 100), "weight": rng.choice([None, None, 2, 10])})
+    return tasks
+
+
+def assert_same_rollup(incremental, full):
+    assert incremental.rolled == pytest.approx(full.rolled)
+    assert incremental.weight == pytest.approx(full.weight)
+    assert incremental.overall_progress() == pytest.approx(full.overall_progress())
+    assert incremental.leaf_shares() == pytest.approx(full.leaf_shares())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_updates_match_a_full_rollup(seed):
+    rng = random.Random(seed)
+    tasks = random_tree(rng, 80)
+    wbs, full = WbsRollup(tasks, CALENDAR), WbsRollup(tasks, CALENDAR)
+    for _ in range(200):
+        task = rng.choice(tasks)
+        before = full.rolled
+        edit = rng.choice(("progress", "weight", "dates"))
+        if edit == "progress":
+            task['progress'] = rng.randint(0, 100)
+        elif edit == "weight":
+            task['weight'] = rng.choice([None, 1, 5, 20])
+        else:
+            task['created_at'], task['due_date'] = random_dates(rng)
+        changed = wbs.update_task(task)
+        full = WbsRollup(tasks, CALENDAR)
+        assert_same_rollup(wbs, full)
+        moved = {task_id for task_id in full.rolled if task_id != task['id'] and full.is_summary(task_id)
+                 and abs(full.rolled[task_id] - before[task_id]) > 1e-6}
+        assert moved <= set(changed)
+        assert all(wbs.is_summary(task_id) for task_id in changed)
+
+
+def test_update_walks_only_the_ancestors():
+    tasks = [{"id": "root", "name": "Obra"}, {"id": "a", "parent_id": "root"}, {"id": "b", "parent_id": "root"},
+             {"id": "a1", "parent_id": "a", "progress": 0}, {"id": "b1", "parent_id": "b", "progress": 50}]
+    wbs = WbsRollup(tasks, CALENDAR)
+    changed = wbs.update_task({"id": "a1", "parent_id": "a", "progress": 100})
+    assert set(changed) == {"a", "root"}
+    assert wbs.rolled["a"] == 100 and wbs.rolled["root"] == pytest.approx(75)
+
+
+def test_parent_cycle_becomes_a_root():
+    tasks = [{"id": "a", "parent_id": "b", "progress": 20}, {"id": "b", "parent_id": "a", "progress": 40}]
+    wbs = WbsRollup(tasks, CALENDAR)
+    assert wbs.overall_progress() == pytest.approx(WbsRollup(tasks, CALENDAR).overall_progress())
+    assert None in (wbs.parent["a"], wbs.parent["b"])
+
+
+def test_rollup_from_the_load_is_saved_apart_from_the_edit(site_dir):
+    dates = {"created_at": "2025-01-06", "due_date": "2025-02-28"}
+    DataManager.save(CONFIG_FILE, {"sectors": [], "teams": [], "project_goals": ""})
+    DataManager.save(TASKS_FILE, [{"id": "root", "name": "Obra", "progress": 0, **dates}]
+                     + [{"id": f"s{i}", "name": f"Etapa {i}", "parent_id": "root", "progress": 0, **dates} for i in range(5)]
+                     + [{"id": f"s{i}-{j}", "name": "Serviço", "parent_id": f"s{i}", "progress": 40, **dates}
+                        for i in range(5) for j in range(2)])
+    saved_seq = get_event_log().last_seq
+    state = load_site_state(track_versions=True)
+    assert get_event_log().last_seq == saved_seq  # A carga não grava: status e progresso consolidado ficam só em memória
+    assert len(state['unsaved_task_ids']) == 16
+
+    operations.update_task(state, "s0-0", {"progress": 100})
+    assert get_event_log().last_seq == saved_seq + 16 + 3  # A gravação dos acertos da carga e, separada, a da edição
+    events, _, _ = get_event_log().changes_since(saved_seq + 16)
+    assert sorted(event['id'] for event in events) == ["root", "s0", "s0-0"]
+    assert not state['unsaved_task_ids']